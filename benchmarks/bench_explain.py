@@ -0,0 +1,90 @@
+"""
+EXPLAIN plans and latency of the frequent queries of the loader and of the analytics, before and after schema migrations.
+
+Usage (from the repository root, database read from the RUGBY_DB_* environment variables) :
+    python -m benchmarks.bench_explain [--migration 3] [--runs 5]
+
+Without --migration, prints the plans of the current schema. With --migration N, prints the plans,
+applies the pending migrations up to version N (see database/migrate.py), and prints the plans again.
+"""
+import argparse
+import statistics
+import time
+
+from config.db_config import env_db_config, set_db_config
+from database.migrate import apply_migrations
+from database.sql_functions import create_connection, select_records
+
+##########################################	GLOBAL SCOPE	#######################################
+
+# Access paths of the secondary indexes (database/migrations/0003_secondary_indexes.sql) :
+# name, query and the sample row giving the values of its placeholders
+QUERIES = {
+    "matches of a league-season by date": (
+        "SELECT espnId, `status`, lastFetched FROM MATCHES WHERE leagueUid = %s ORDER BY `date`",
+        "SELECT leagueUid FROM MATCHES ORDER BY `date` DESC LIMIT 1",
+    ),
+    "player statistics of a match": (
+        "SELECT `uid`, playerTeamUid FROM PLAYER_MATCH_STATS WHERE matchEspnId = %s",
+        "SELECT matchEspnId FROM PLAYER_MATCH_STATS LIMIT 1",
+    ),
+    "teams of a player in a season": (
+        "SELECT teamEspnId FROM PLAYER_TEAM WHERE playerEspnId = %s AND season = %s",
+        "SELECT playerEspnId, season FROM PLAYER_TEAM LIMIT 1",
+    ),
+    "standings of a league-season": (
+        "SELECT teamEspnId, `rank`, points FROM STANDINGS WHERE leagueUid = %s",
+        "SELECT leagueUid FROM STANDINGS LIMIT 1",
+    ),
+    "analytics refresh of a league-season": (
+        "SELECT COUNT(*) FROM view_team_match_stats v JOIN MATCHES m ON v.matchEspnId = m.espnId WHERE m.leagueUid = %s",
+        "SELECT leagueUid FROM MATCHES ORDER BY `date` DESC LIMIT 1",
+    ),
+}
+
+##########################################	FUNCTIONS	###########################################
+
+def get_sample_values(conn) -> dict[str, tuple | None]:
+    # Values of an existing row : plans depend on the data. None when the table is empty
+    samples = {}
+    for name, (_, sample_sql) in QUERIES.items():
+        rows = select_records(conn, sample_sql)
+        samples[name] = tuple(rows[0].values()) if rows else None
+    return samples
+
+def explain(conn, samples: dict[str, tuple | None], runs: int):
+    print(f"{'query':>38} | {'table':>16} | {'type':>7} | {'key':>32} | {'rows':>8} | {'median (ms)':>11}")
+    for name, (sql, _) in QUERIES.items():
+        values = samples[name]
+        if values is None:
+            print(f"{name:>38} | no sample row")
+            continue
+        plan = select_records(conn, f"EXPLAIN {sql}", values)
+        durations = []
+        for _ in range(runs):
+            start_time = time.perf_counter()
+            select_records(conn, sql, values)
+            durations.append(time.perf_counter() - start_time)
+        median_ms = statistics.median(durations) * 1000
+        for index, step in enumerate(plan):
+            print(f"{name if index == 0 else '':>38} | {str(step['table']):>16} | {str(step['type']):>7} | "
+                  f"{str(step['key']):>32} | {str(step['rows']):>8} | {f'{median_ms:.2f}' if index == 0 else '':>11}")
+
+def main():
+    argument_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    argument_parser.add_argument("--migration", type=int, default=None, help="Apply the pending migrations up to this version between the two runs.")
+    argument_parser.add_argument("--runs", type=int, default=5, help="Runs of each query for its median latency.")
+    arguments = argument_parser.parse_args()
+
+    with create_connection(set_db_config(env_db_config())) as conn:
+        samples = get_sample_values(conn)
+        print("Before :" if arguments.migration is not None else "Current schema :")
+        explain(conn, samples, arguments.runs)
+        if arguments.migration is None:
+            return
+        applied = apply_migrations(conn, arguments.migration)
+        print(f"\nAfter migrations {[migration['version'] for migration in applied]} :")
+        explain(conn, samples, arguments.runs)
+
+if __name__ == "__main__":
+    main()
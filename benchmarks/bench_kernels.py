@@ -0,0 +1,78 @@
+"""
+Microbenchmarks of the hot-path kernels (processing.kernels) against the former implementations.
+tests/test_kernels.py checks that the kernels return exactly the results of the former implementations.
+
+Usage (from the repository root) :
+    python -m benchmarks.bench_kernels [--number 20000]
+"""
+import argparse
+import hashlib
+import random
+import re
+import timeit
+
+from dateutil import parser
+
+from processing.kernels import convert_iso_date_to_MySQL, generate_uid, generate_uids, parse_ref_ids
+
+##########################################	FUNCTIONS	###########################################
+
+# Former implementations of processing.utils, without their logging
+
+def baseline_get_number_field(url, index_field):
+    numbers = re.findall(r'/(\d+)', url)
+    return int(numbers[index_field])
+
+def baseline_convert_date_time_to_MySQL(date):
+    return parser.parse(date).strftime('%Y-%m-%d %H:%M:%S')
+
+def baseline_generate_deterministic_uid(unique_keys):
+    str_keys = [str(key) for key in unique_keys]
+    sorted_keys = sorted(str_keys)
+    combined_key = "_".join(sorted_keys)
+    return hashlib.sha256(combined_key.encode('utf-8')).hexdigest()[:16]
+
+#--------------------------------------------------------------------------------------------------
+
+def make_inputs(count: int, seed: int = 0):
+    generator = random.Random(seed)
+    roster_refs = [
+        f"http://sports.core.api.espn.com/v2/sports/rugby/leagues/270557/events/{event}/competitions/{event}/competitors/{team}/roster?lang=en&region=us"
+        for event, team in ((generator.randint(590000, 600000), generator.randint(25000, 26000)) for _ in range(200))
+    ]
+    position_refs = [f"http://sports.core.api.espn.com/v2/sports/rugby/positions/{position}?lang=en&region=us" for position in range(54)]
+    refs = [generator.choice(roster_refs + position_refs) for _ in range(count)]
+    dates = [f"20{generator.randint(10, 24)}-{generator.randint(1, 12):02d}-{generator.randint(1, 28):02d}T{generator.choice(['13:00', '15:05', '19:45'])}Z"
+             for _ in range(500)]
+    dates = [generator.choice(dates) for _ in range(count)]
+    # Player-team keys : a season squad of ~40 players per team, each playing many matches
+    squads = [(team, player, 2024) for team in range(25900, 25912) for player in generator.sample(range(1, 300000), 40)]
+    uid_keys = [generator.choice(squads) for _ in range(count)]
+    return refs, dates, uid_keys
+
+#--------------------------------------------------------------------------------------------------
+
+def bench(label: str, baseline, kernel, number: int):
+    baseline_time = timeit.timeit(baseline, number=1)
+    kernel_time = timeit.timeit(kernel, number=1)
+    print(f"{label:>22} | {baseline_time * 1e6 / number:8.2f} us | {kernel_time * 1e6 / number:8.2f} us | x{baseline_time / kernel_time:6.1f}")
+
+def main():
+    argument_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    argument_parser.add_argument("--number", type=int, default=20000, help="Calls per benchmark.")
+    arguments = argument_parser.parse_args()
+    refs, dates, uid_keys = make_inputs(arguments.number)
+
+    print(f"{arguments.number} calls per benchmark")
+    print(f"{'kernel':>22} | {'baseline':>11} | {'kernel':>11} | speedup")
+    bench("ref ids", lambda: [baseline_get_number_field(ref, -1) for ref in refs],
+          lambda: [parse_ref_ids(ref)[-1] for ref in refs], arguments.number)
+    bench("ISO date to MySQL", lambda: [baseline_convert_date_time_to_MySQL(date) for date in dates],
+          lambda: [convert_iso_date_to_MySQL(date) for date in dates], arguments.number)
+    bench("UID (one by one)", lambda: [baseline_generate_deterministic_uid(keys) for keys in uid_keys],
+          lambda: [generate_uid(keys) for keys in uid_keys], arguments.number)
+    bench("UID (batched)", lambda: [baseline_generate_deterministic_uid(keys) for keys in uid_keys],
+          lambda: generate_uids(uid_keys), arguments.number)
+
+if __name__ == "__main__":
+    main()
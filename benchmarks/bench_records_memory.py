@@ -0,0 +1,56 @@
+"""
+Peak memory of the processed `player_match_stats` records : dict records vs compact records.
+
+Usage (from the repository root) :
+    python -m benchmarks.bench_records_memory [--rows 30000]
+"""
+import argparse
+import gc
+import random
+import tracemalloc
+
+from processing.stats_columns import StatsBatch, get_stat_table_columns
+
+##########################################	FUNCTIONS	###########################################
+
+def make_stats_pages(count: int, seed: int = 0) -> list[dict]:
+    # Synthetic statistics pages : ~80% of the statistics of the table, like ESPN pages
+    _, stat_columns = get_stat_table_columns("player_match_stats")
+    generator = random.Random(seed)
+    return [
+        {"splits": {"categories": [{"stats": [
+            {"name": name, "value": float(generator.randint(0, 40))}
+            for name in stat_columns if generator.random() < 0.8
+        ]}]}}
+        for _ in range(count)
+    ]
+
+def measure(rows: int, compact: bool) -> tuple[int, int]:
+    pages = make_stats_pages(64)
+    gc.collect()
+    tracemalloc.start()
+    batch = StatsBatch("player_match_stats", capacity=rows)
+    for row in range(rows):
+        key_values = {"uid": f"{row:016x}", "playerTeamUid": f"{row // 30:016x}", "matchEspnId": 590000 + row // 46,
+                      "jersey": row % 23 + 1, "positionName": "prop", "isFirstChoice": row % 23 < 15}
+        batch.add_row(key_values, pages[row % len(pages)])
+    records = batch.to_records(compact=compact)
+    del batch
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del records
+    return current, peak
+
+def main():
+    argument_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    argument_parser.add_argument("--rows", type=int, default=30000, help="Number of player_match_stats rows.")
+    arguments = argument_parser.parse_args()
+
+    print(f"{arguments.rows} player_match_stats rows")
+    print(f"{'records':>10} | {'retained (MB)':>14} | {'peak (MB)':>10}")
+    for label, compact in (("dict", False), ("compact", True)):
+        current, peak = measure(arguments.rows, compact)
+        print(f"{label:>10} | {current / 2**20:14.1f} | {peak / 2**20:10.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Startup cost of the command line : `import main` measured with `python -X importtime`, and `main.py --help`.
+
+Fails (exit code 1) when a heavy module is imported by `import main`, or when the import time
+exceeds the budget, so a new top-level import of the CLI can not silently slow every start.
+
+Usage (from the repository root) :
+    python -m benchmarks.bench_startup [--runs 5] [--budget-ms 150]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+##########################################	GLOBAL SCOPE	#######################################
+
+ROOT_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Packages that only the commands using them may import
+DEFERRED_PACKAGES = ("pymysql", "requests", "numpy", "dateutil", "coloredlogs", "zstandard", "yaml",
+                     "scraping", "processing", "parsing", "orchestration", "database")
+
+##########################################	FUNCTIONS	###########################################
+
+def run_python(*arguments: str) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, *arguments], cwd=ROOT_PATH, capture_output=True, text=True,
+                          env={**os.environ, "PYTHONPATH": ROOT_PATH}, check=True)
+
+def parse_importtime(stderr: str) -> dict[str, tuple[int, int]]:
+    # "import time: self [us] | cumulative | imported package" lines
+    import_times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_time, cumulative_time, module = line[len("import time:"):].split("|")
+        import_times[module.strip()] = (int(self_time), int(cumulative_time))
+    return import_times
+
+def get_deferred_imports() -> list[str]:
+    modules = run_python("-c", "import sys, main; print('\\n'.join(sys.modules))").stdout.split()
+    return sorted(module for module in modules if module.split(".")[0] in DEFERRED_PACKAGES)
+
+#--------------------------------------------------------------------------------------------------
+
+def main():
+    argument_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    argument_parser.add_argument("--runs", type=int, default=5, help="Measures per benchmark (median reported).")
+    argument_parser.add_argument("--budget-ms", type=float, default=150, help="Maximum cumulative import time of `main`.")
+    arguments = argument_parser.parse_args()
+
+    import_times = [parse_importtime(run_python("-X", "importtime", "-c", "import main").stderr) for _ in range(arguments.runs)]
+    main_ms = statistics.median(times["main"][1] for times in import_times) / 1000
+    help_times = []
+    for _ in range(arguments.runs):
+        start = time.perf_counter()
+        run_python("main.py", "--help")
+        help_times.append(time.perf_counter() - start)
+
+    print(f"import main   : {main_ms:8.1f} ms (median of {arguments.runs}, budget {arguments.budget_ms:.0f} ms)")
+    print(f"main.py --help: {statistics.median(help_times) * 1000:8.1f} ms (wall time, interpreter start included)")
+    print("Heaviest imports (cumulative) :")
+    heaviest = sorted(import_times[-1].items(), key=lambda item: item[1][1], reverse=True)[:10]
+    for module, (_, cumulative_time) in heaviest:
+        print(f"    {cumulative_time / 1000:8.1f} ms  {module}")
+
+    failures = []
+    deferred_imports = get_deferred_imports()
+    if deferred_imports:
+        failures.append(f"modules to import lazily, imported by `import main` : {deferred_imports}")
+    if main_ms > arguments.budget_ms:
+        failures.append(f"`import main` takes {main_ms:.1f} ms, over the {arguments.budget_ms:.0f} ms budget")
+    for failure in failures:
+        print(f"FAILED : {failure}")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
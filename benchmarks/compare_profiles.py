@@ -0,0 +1,67 @@
+"""
+Compares the stage profiles of two runs (see `config.profiling.StageProfiler`) : wall time, CPU time
+and peak traced memory of every stage, and the functions whose own time grew the most.
+
+Profile the same units twice from the same response archive (`reprocess`), before and after a change,
+then compare the two run directories. Stages slower than the threshold make the comparison fail
+(exit code 1), so a regression can be bisected offline with `git bisect run`.
+
+Usage (from the repository root) :
+    python -m benchmarks.compare_profiles profiles/<before> profiles/<after> [--threshold 1.2] [--top 5]
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+
+##########################################	FUNCTIONS	###########################################
+
+def load_summary(run_dir: str) -> dict[str, dict]:
+    # Stages of the run and of its worker processes, by "<unit> <stage>"
+    stages = {}
+    for summary_path in glob.glob(os.path.join(run_dir, "summary.json")) + glob.glob(os.path.join(run_dir, "worker-*", "summary.json")):
+        with open(summary_path, encoding="utf-8") as summary_file:
+            for scope, scope_stages in json.load(summary_file).items():
+                for stage_name, stage in scope_stages.items():
+                    stages[f"{scope} {stage_name}"] = stage
+    return stages
+
+def compare(before: dict[str, dict], after: dict[str, dict], threshold: float, top: int) -> list[str]:
+    """Prints the stage deltas and returns the stages slower than the threshold."""
+    regressions = []
+    print(f"{'stage':<50} {'wall before':>12} {'wall after':>12} {'ratio':>7} {'cpu after':>10} {'peak MB':>8}")
+    for name in sorted(before.keys() & after.keys()):
+        old, new = before[name], after[name]
+        ratio = new["wallTime"] / old["wallTime"] if old["wallTime"] else float("inf")
+        print(f"{name:<50} {old['wallTime']:>11.3f}s {new['wallTime']:>11.3f}s {ratio:>7.2f} "
+              f"{new['cpuTime']:>9.3f}s {new['peakMemory'] / 2**20:>8.1f}")
+        if ratio > threshold and new["wallTime"] - old["wallTime"] > 0.01:
+            regressions.append(name)
+            old_functions = {function["function"]: function["ownTime"] for function in old["topFunctions"]}
+            grown = sorted(new["topFunctions"], key=lambda function: function["ownTime"] - old_functions.get(function["function"], 0),
+                           reverse=True)[:top]
+            for function in grown:
+                if function["ownTime"] <= old_functions.get(function["function"], 0):
+                    break
+                print(f"    {function['function']:<70} {old_functions.get(function['function'], 0):>9.4f}s -> {function['ownTime']:.4f}s")
+    for name in sorted(before.keys() ^ after.keys()):
+        print(f"{name:<50} only in the {'before' if name in before else 'after'} run")
+    return regressions
+
+def main():
+    argument_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    argument_parser.add_argument("before", help="Run directory of the reference profiles.")
+    argument_parser.add_argument("after", help="Run directory of the profiles to check.")
+    argument_parser.add_argument("--threshold", type=float, default=1.2, help="Maximum wall time ratio of a stage.")
+    argument_parser.add_argument("--top", type=int, default=5, help="Functions shown for each slower stage.")
+    arguments = argument_parser.parse_args()
+
+    regressions = compare(load_summary(arguments.before), load_summary(arguments.after), arguments.threshold, arguments.top)
+    if regressions:
+        print(f"FAILED : {len(regressions)} stages over {arguments.threshold}x : {regressions}")
+        sys.exit(1)
+    print("OK")
+
+if __name__ == "__main__":
+    main()
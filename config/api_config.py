@@ -1,4 +1,5 @@
 import os
+import re
 import json
 
 import logging
@@ -56,4 +57,27 @@ def get_urls_core_api():
     # Create api url to get league information
     api_base = configs["API"]["core_api_base"]
     endpoints = configs["API"]["core_endpoints"]
-    return (api_base, endpoints)
\ No newline at end of file
+    return (api_base, endpoints)
+
+#--------------------------------------------------------------------------------------------------
+
+def get_endpoint_family(url: str) -> str:
+    """
+    Get the endpoint family of an API url : its last non numeric path segment.
+
+    For example :
+        - ".../leagues/270557/events?dates=20240101" -> "events"
+        - ".../events/595187/competitions/595187/competitors/25912/statistics/0" -> "statistics"
+        - ".../competitors/25912/roster" -> "roster"
+
+    Args:
+        url (str): url of the API request.
+
+    Returns:
+        family (str) : endpoint family, "root" if the url has no non numeric segment.
+    """
+    path = url.split("?", 1)[0].rstrip("/")
+    for segment in reversed(path.split("/")):
+        if segment and not segment.isdigit():
+            return re.sub(r"[^A-Za-z0-9_-]", "_", segment)
+    return "root"
\ No newline at end of file
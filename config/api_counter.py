@@ -1,44 +1,172 @@
+import json
 import logging
+import multiprocessing
+import threading
+import time
 import requests
-from typing import List
+from collections import OrderedDict
+from typing import List, Optional
+
+from config.api_config import get_endpoint_family
+from config.metrics import get_metrics
+from config.tracing import trace_span
 
 ###### GLOBAL SCOPE ######
 
 # logs
 logger = logging.getLogger(__name__)
 
+# Maximum size of the response bodies held by the response cache of a process
+DEFAULT_CACHE_MAX_BYTES = 128 * 1024 * 1024
+
 ##########################################	CLASS	###########################################
 
-class APICounter:
+class CachedResponse:
+    """
+        A response served by the response cache, with the attributes of `requests.Response` used by the scraper.
+        Only the body is kept : its JSON is decoded again on each read, so callers never share a payload.
+    """
+
+    status_code = 200
+
+    def __init__(self, url: str, content: bytes) -> None:
+        self.url = url
+        self.content = content
+
+    def json(self):
+        return json.loads(self.content)
+
+    def raise_for_status(self):
+        pass
+
+
+class ResponseCache:
     """
-        A singleton class for counting API calls in an application.
+        A singleton, thread-safe and bounded (LRU) cache of API responses.
+
+        The cache is disabled by default, so the interactive scraper keeps fetching
+        every url. The batch runner enables it to share pages requested by several
+        league-seasons (teams, athletes, leagues ...) between all its targets.
 
-        This class provides a method for incrementing a counter and a method
-        to obtain the counter's current value. It is designed to be used
-        as a singleton, ensuring that only one instance of the counter exists
-        in the entire application.
+        Only the body of each response is kept (not the `requests.Response` object, its headers
+        and connection), and the cache is bounded by the size of the bodies as well as by their number.
 
         Attributes:
-            count (int): The total number of API calls counted.
+            max_entries (int): Maximum number of responses kept, 0 when the cache is disabled.
+            max_bytes (int): Maximum size of the response bodies kept.
+            hits (int): Number of requests served from the cache.
+            misses (int): Number of requests sent to the API while the cache was enabled.
 
         Methods:
-            increment(): Increment the counter by 1.
-            get_count(): Returns the current counter value.
-
+            enable(max_entries, max_bytes): Enable the cache with a maximum number of entries and bytes.
+            get(key): Returns the cached response (see `CachedResponse`) or None.
+            put(key, response): Stores the body of a response.
+            get_size(): Returns the number of cached responses.
+            get_bytes(): Returns the size of the cached response bodies.
     """
     _instance = None
-    count = 0
 
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
+            cls._instance._lock = threading.Lock()
+            cls._instance._entries = OrderedDict()
+            cls._instance.max_entries = 0
+            cls._instance.max_bytes = DEFAULT_CACHE_MAX_BYTES
+            cls._instance._bytes = 0
+            cls._instance.hits = 0
+            cls._instance.misses = 0
         return cls._instance
-    
-    def increment(self):
-        self.count += 1
 
-    def get_count(self):
-        return self.count
+    def enable(self, max_entries: int = 20000, max_bytes: int = DEFAULT_CACHE_MAX_BYTES):
+        with self._lock:
+            self.max_entries = max_entries
+            self.max_bytes = max_bytes
+
+    def is_enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            content = self._entries.get(key)
+            if content is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return CachedResponse(key, content)
+
+    def put(self, key: str, response: requests.Response):
+        content = response.content
+        if len(content) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous)
+            self._entries[key] = content
+            self._bytes += len(content)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    def get_size(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def get_bytes(self) -> int:
+        with self._lock:
+            return self._bytes
+
+
+class RateLimiter:
+    """
+        A token bucket limiting the API request rate, shared between processes.
+
+        The bucket state lives in shared memory, so one instance created by the
+        backfill coordinator and handed to every worker process enforces a global
+        request rate (and an optional global request budget) for the whole pool.
+
+        Attributes:
+            rate (float): Maximum number of requests per second.
+            burst (float): Maximum number of requests that can be sent at once.
+            budget (int): Maximum number of requests for the whole run, 0 for no limit.
+
+        Methods:
+            acquire(): Blocks until a request can be sent.
+            get_used(): Returns the number of requests already allowed.
+            get_tokens(): Returns the number of tokens available now.
+    """
+
+    def __init__(self, rate: float, burst: float | None = None, budget: int = 0, context=multiprocessing) -> None:
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate)
+        self.budget = budget
+        # Shared state : [available tokens, last refill timestamp, used requests]
+        self._state = context.Array("d", [self.burst, time.time(), 0.0])
+
+    def acquire(self):
+        while True:
+            with self._state.get_lock():
+                tokens, last_refill, used = self._state[:]
+                if self.budget and used >= self.budget:
+                    raise APIBudgetExceededError(f"The API request budget ({self.budget}) is exhausted.")
+                now = time.time()
+                tokens = min(self.burst, tokens + (now - last_refill) * self.rate)
+                if tokens >= 1:
+                    self._state[:] = [tokens - 1, now, used + 1]
+                    return
+                self._state[0], self._state[1] = tokens, now
+                wait = (1 - tokens) / self.rate
+            time.sleep(wait)
+
+    def get_used(self) -> int:
+        return int(self._state[2])
+
+    def get_tokens(self) -> float:
+        with self._state.get_lock():
+            tokens, last_refill, _ = self._state[:]
+        return min(self.burst, tokens + (time.time() - last_refill) * self.rate)
 
 
 class SessionManager:
@@ -60,22 +188,81 @@ class SessionManager:
         # Rotate User-Agent
         return self.session
 
+    @classmethod
+    def reset(cls):
+        # A forked worker process must not reuse the sockets of its parent session
+        cls._instance = None
+
 
 
 ##########################################	FUNCTIONS	###########################################
 
-# Utility function to obtain counter instance
-def get_counter():
-    return APICounter()
+# Utility function to obtain response cache instance
+def get_cache():
+    return ResponseCache()
+
+def get_cache_key(url, params=None) -> str:
+    """
+    Builds the cache key of a request from its url and query parameters.
+
+    Args:
+        url (str): The URL of the request.
+        params (dict, optional): The request params. Default None.
+
+    Returns:
+        str: The url followed by the sorted query parameters.
+    """
+    if not params:
+        return url
+    query = "&".join(f"{key}={value}" for key, value in sorted(params.items()))
+    return f"{url}?{query}"
+
+# Utility functions to install / obtain the rate limiter of the process (None if the rate is not limited)
+_rate_limiter = None
+
+def set_rate_limiter(rate_limiter: RateLimiter | None):
+    global _rate_limiter
+    _rate_limiter = rate_limiter
+
+def get_rate_limiter() -> RateLimiter | None:
+    return _rate_limiter
+
+# Utility functions to install / obtain the raw response archive of the process (None if responses are not archived)
+_archive_writer = None
+
+def set_archive_writer(archive_writer):
+    global _archive_writer
+    _archive_writer = archive_writer
+
+def get_archive_writer():
+    return _archive_writer
+
+# Utility functions to install / obtain the archive serving every request offline (None to use the API)
+_archive_reader = None
+
+def set_archive_reader(archive_reader):
+    global _archive_reader
+    _archive_reader = archive_reader
+
+def get_archive_reader():
+    return _archive_reader
 
 # Custom exception for API request errors.
 class APIRequestError(Exception):
     pass
 
-# API Request with counter
+# Custom exception raised when the global API request budget is exhausted.
+class APIBudgetExceededError(APIRequestError):
+    pass
+
+# Custom exception raised when a response is missing in the archive serving every request.
+class ArchiveMissError(APIRequestError):
+    pass
+
+# API Request with metrics
 def API_request(url, params=None):
     """
-    Makes a GET request to the specified URL and increments the API counter.
+    Makes a GET request to the specified URL and records it in the metrics registry.
 
     Args:
         url (str): The URL of the request.
@@ -88,26 +275,69 @@ def API_request(url, params=None):
         APIRequestError: If an error occurs during the request.
 
     Note:
-        The API counter is incremented only in the event of a successful request.
+        - Requests, latency, bytes received, retries, cache lookups and errors are recorded by
+          endpoint family in the metrics registry (see `config.metrics.MetricsRegistry`), with
+          the number of requests in flight.
+        - When the response cache is enabled, cached responses are returned without any request.
+        - When a rate limiter is installed, the request waits for a token of the shared bucket.
+        - When an archive writer is installed, the raw content of every fetched response is archived.
+        - When an archive reader is installed, every response is read from the archive, without any request.
+        - When a tracer is installed, the request is timed in a span named after its endpoint family.
     """
-    session = SessionManager().get_session()
-    try:
-        # request headers
-        headers = {'User-Agent': 
-            'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36 OPR/109.0.0.0'} 
-
-        response = session.get(url, headers=headers, timeout=10, params=params)
-        response.raise_for_status()
-        if not response.json():
-            raise APIRequestError(f"Request error : The response JSON is empty. Check url : {url}")
-        get_counter().increment()
-        return(response)
-
-    except requests.exceptions.RequestException as e:
-        error_message = f"Request error: {e}. Response : {response.content}"
-        logger.error(error_message)
-        raise APIRequestError
-    except Exception as e :
-        error_message = f"An unexpected error has occurred: {e}"
-        logger.error(error_message)
-        raise APIRequestError
+    metrics = get_metrics()
+    family = get_endpoint_family(url)
+    request_key = get_cache_key(url, params)
+    with trace_span(f"GET {family}", "api", url=request_key):
+        archive_reader = get_archive_reader()
+        if archive_reader is not None:
+            archived_response = archive_reader.get(url, params)
+            metrics.record_cache(family, archived_response is not None)
+            if archived_response is None:
+                logger.error(f"Request error : {get_cache_key(url, params)} is not in the response archive.")
+                raise ArchiveMissError(f"{get_cache_key(url, params)} is not in the response archive.")
+            return archived_response
+        session = SessionManager().get_session()
+        cache = get_cache()
+        if cache.is_enabled():
+            cache_key = request_key
+            cached_response = cache.get(cache_key)
+            metrics.record_cache(family, cached_response is not None)
+            if cached_response is not None:
+                return cached_response
+        rate_limiter = get_rate_limiter()
+        if rate_limiter is not None:
+            rate_limiter.acquire()
+        metrics.record_attempt(family, request_key)
+        start_time = time.perf_counter()
+        try:
+            # request headers
+            headers = {'User-Agent': 
+                'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36 OPR/109.0.0.0'} 
+
+            response = session.get(url, headers=headers, timeout=10, params=params)
+            response.raise_for_status()
+            if not response.json():
+                metrics.record_error(family, "empty", request_key)
+                raise APIRequestError(f"Request error : The response JSON is empty. Check url : {url}")
+            metrics.record_request(family, time.perf_counter() - start_time, len(response.content), request_key)
+            archive_writer = get_archive_writer()
+            if archive_writer is not None:
+                archive_writer.record(url, params, response.content)
+            if cache.is_enabled():
+                cache.put(cache_key, response)
+            return(response)
+
+        except requests.exceptions.RequestException as e:
+            # HTTP status of the error, or its type when no response was received (timeout, connection error ...)
+            metrics.record_error(family, str(e.response.status_code) if e.response is not None else type(e).__name__, request_key)
+            error_message = f"Request error: {e}. Response : {e.response.content if e.response is not None else None}"
+            logger.error(error_message)
+            raise APIRequestError
+        except Exception as e :
+            if not isinstance(e, APIRequestError): # Empty responses are already recorded
+                metrics.record_error(family, type(e).__name__, request_key)
+            error_message = f"An unexpected error has occurred: {e}"
+            logger.error(error_message)
+            raise APIRequestError
+        finally:
+            metrics.record_done()
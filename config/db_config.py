@@ -1,4 +1,5 @@
 import getpass
+import os
 from pymysql.cursors import DictCursor
 from os import system, name
 from typing import Dict
@@ -37,13 +38,44 @@ def ui_db_config():
     clear()
     return user_config
 
+def env_db_config():
+    """
+    Reads the database connection information from environment variables,
+    for non-interactive runs (batch jobs, cron ...).
+
+    Environment variables:
+        RUGBY_DB_NAME (required), RUGBY_DB_USER (required), RUGBY_DB_PASSWORD (required),
+        RUGBY_DB_HOST (default 'localhost'), RUGBY_DB_PORT (default 3306).
+
+    Returns: dict: A dictionary containing the connection information.
+
+    Raises:
+        KeyError: If a required environment variable is missing.
+    """
+    missing_variables = [
+        variable for variable in ("RUGBY_DB_NAME", "RUGBY_DB_USER", "RUGBY_DB_PASSWORD")
+        if variable not in os.environ
+    ]
+    if missing_variables :
+        logger.error(f"Missing database environment variables : {missing_variables}")
+        raise KeyError(missing_variables)
+
+    user_config = {
+        "database": os.environ["RUGBY_DB_NAME"],
+        "user": os.environ["RUGBY_DB_USER"],
+        "password": os.environ["RUGBY_DB_PASSWORD"],
+        "host": os.environ.get("RUGBY_DB_HOST", "localhost"),
+        "port": int(os.environ.get("RUGBY_DB_PORT", 3306)),
+    }
+    return user_config
+
 def set_db_config(user_config: Dict) :
     db_config = {
-        'host': 'localhost',
+        'host': user_config.get("host", 'localhost'),
         'user': user_config["user"],
         'password': user_config["password"],
         'database': user_config["database"],
-        'port': 3306,  # Port par défaut de MySQL, ajustez si nécessaire
+        'port': user_config.get("port", 3306),  # Port par défaut de MySQL, ajustez si nécessaire
         'charset': 'utf8mb4',
         'cursorclass': DictCursor
     }
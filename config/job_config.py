@@ -0,0 +1,111 @@
+import os
+import json
+import logging
+from typing import Dict, Any, Tuple
+
+##########################################	GLOBAL SCOPE	#######################################
+# logs
+logger = logging.getLogger(__name__)
+
+LATEST_SEASON = "latest"
+
+DEFAULT_JOB_SPEC = {
+    "parallelism": 1,   # Number of league-seasons processed at the same time
+    "cache_size": 20000, # Maximum number of API responses shared between targets
+    "targets": [],
+}
+
+##########################################	CLASS	###########################################
+
+class JobSpecError(Exception):
+    pass
+
+##########################################	FUNCTIONS	###########################################
+
+def parse_target(league: Any, season: Any) -> Tuple[int, int | None]:
+    """
+    Converts a league and a season from a job spec into a scraping target.
+
+    Args:
+        league (Any): ESPN ID of the league.
+        season (Any): Year of the season, or "latest" (or None) for the latest gameday of the current season.
+
+    Returns:
+        Tuple[int, int | None]: The ESPN league ID and the season year (None for the latest gameday).
+
+    Raises:
+        JobSpecError: If the league or the season is not valid.
+    """
+    try :
+        espn_league_id = int(league)
+        if season is None or str(season).strip().lower() == LATEST_SEASON :
+            season_year = None
+        else :
+            season_year = int(season)
+        return espn_league_id, season_year
+    except (TypeError, ValueError) as err :
+        raise JobSpecError(f"Invalid target (league: {league}, season: {season}) : {err}") from err
+
+#--------------------------------------------------------------------------------------------------
+
+def parse_target_arg(target_arg: str) -> Tuple[int, int | None]:
+    """
+    Parses a command line target : "<league>:<season>" or "<league>:latest" (or "<league>").
+
+    Args:
+        target_arg (str): The command line target, for example "270557:2024".
+
+    Returns:
+        Tuple[int, int | None]: The ESPN league ID and the season year (None for the latest gameday).
+    """
+    league, _, season = target_arg.partition(":")
+    return parse_target(league, season or LATEST_SEASON)
+
+#--------------------------------------------------------------------------------------------------
+
+def load_job_spec(spec_path: str) -> Dict[str, Any]:
+    """
+    Loads a job spec file (JSON or YAML).
+
+    Expected format (JSON example, the YAML keys are the same) :
+        {
+            "parallelism": 4,
+            "cache_size": 20000,
+            "targets": [
+                {"league": 270557, "season": 2024},
+                {"league": 270559, "season": "latest"}
+            ]
+        }
+
+    Args:
+        spec_path (str): Path of the job spec file (.json, .yaml or .yml).
+
+    Returns:
+        Dict[str, Any]: The job spec, with default values for missing keys and parsed targets.
+
+    Raises:
+        JobSpecError: If the file can not be read or has an invalid content.
+
+    Note:
+        YAML specs require the `PyYAML` package (`pip install pyyaml`).
+    """
+    try :
+        with open(spec_path, "r") as f:
+            if os.path.splitext(spec_path)[1].lower() in (".yaml", ".yml") :
+                try :
+                    import yaml
+                except ImportError as import_err :
+                    raise JobSpecError("YAML job specs require PyYAML : pip install pyyaml") from import_err
+                raw_spec = yaml.safe_load(f) or {}
+            else :
+                raw_spec = json.load(f)
+    except (OSError, ValueError) as err :
+        logger.error(f"Unable to read job spec '{spec_path}' : {err}")
+        raise JobSpecError(err) from err
+
+    job_spec = {**DEFAULT_JOB_SPEC, **raw_spec}
+    try :
+        job_spec["targets"] = [parse_target(target["league"], target.get("season")) for target in job_spec["targets"]]
+    except (KeyError, TypeError, AttributeError) as err :
+        raise JobSpecError(f"Each target needs at least a 'league' key : {err}") from err
+    return job_spec
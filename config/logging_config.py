@@ -1,40 +1,131 @@
 import logging
-import coloredlogs
 import os
+import queue
+from logging.handlers import QueueHandler, QueueListener
 from config.api_config import get_root_dir
+from config.metrics import get_metrics
+
+##########################################	GLOBAL SCOPE	#######################################
 
 ROOT_PATH = get_root_dir()
+LOG_FILE_PATH = os.path.join(ROOT_PATH, "logs/app.log")
+
+# Level of the logs when `setup_logging()` is not given one (inherited by the worker processes)
+LOG_LEVEL_ENV = "RUGBY_LOG_LEVEL"
+
+# Occurrences of a sampled warning logged in full, the next ones are only counted (see `warn_sampled()`)
+WARNING_SAMPLE = 3
+
+# Logging is configured once per process, by `setup_logging()`
+_is_configured = False
+
+##########################################	CLASS	###########################################
+
+class LogQueueHandler(QueueHandler):
+    """
+        Hands the records to the logging thread without formatting them.
+
+        The standard `QueueHandler` formats the message in the logging thread (to send it to
+        another process). The queue of `setup_logging()` stays in the process : the message,
+        its arguments and the traceback are formatted by the listener thread, off the hot path.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+##########################################	FUNCTIONS	###########################################
+
+def setup_logging(level: int | str | None = None, log_file: str | None = LOG_FILE_PATH):
+    """
+    Configures the logs of the process : a log file and a colored console output.
+
+    Nothing is configured at import time : the commands (and the worker processes) call
+    this function when they start, so importing a module has no side effect on the logs.
+    Later calls do nothing.
+
+    Logging is asynchronous : loggers only put their records in a queue, and a listener
+    thread formats and writes them to the file and the console. The queue is flushed when
+    the process exits.
+
+    Args:
+        level (int | str | None, optional): Level of global log. Defaults to the RUGBY_LOG_LEVEL
+                                            environment variable, or logging.INFO.
+        log_file (str | None, optional): Path of the log file, None for the console only. Defaults to logs/app.log.
+    """
+    global _is_configured
+    if _is_configured:
+        return
+    _is_configured = True
+    import coloredlogs
+    from multiprocessing.util import Finalize
+
+    if level is None:
+        level = os.environ.get(LOG_LEVEL_ENV, "INFO").upper()
+
+    # Setting up coloredlogs to add colors
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(coloredlogs.ColoredFormatter(
+        fmt='%(asctime)s - %(name)s.%(funcName)s - %(levelname)s - %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S',
+        level_styles={
+            'debug': {'color': 'green'},
+            'info': {'color': 'blue'},
+            'warning': {'color': 'yellow'},
+            'error': {'color': 'red'},
+            'critical': {'color': 'red', 'bold': True},
+        },
+        field_styles={
+            'asctime': {'color': 'cyan'},
+            'name': {'color': 'magenta'},
+            'funcName' : {'color': 'magenta'},
+            'levelname': {'color': 'white', 'bold': True},
+            'message': {'color': 'white'},
+        },
+    ))
+    handlers = [console_handler]
+    if log_file:
+        os.makedirs(os.path.dirname(log_file), exist_ok=True)
+        file_handler = logging.FileHandler(log_file) #Handler to write logs in a file
+        file_handler.setFormatter(logging.Formatter(
+            '%(asctime)s - %(name)s - %(levelname)s - %(funcName)s - %(message)s', datefmt='%Y-%m-%d %H:%M:%S'))
+        handlers.insert(0, file_handler)
+
+    # Loggers only enqueue their records : the listener thread formats and writes them
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    # Run at exit by the main process and by the pool workers (where atexit handlers do not run),
+    # after the finalizers of higher priority that still log (response archive, tracer ...)
+    Finalize(listener, listener.stop, exitpriority=0)
+
+    root_logger = logging.getLogger()
+    for handler in list(root_logger.handlers):
+        root_logger.removeHandler(handler)
+    root_logger.addHandler(LogQueueHandler(log_queue))
+    root_logger.setLevel(level)
+
+#--------------------------------------------------------------------------------------------------
 
-# Basic logging configuration with custom format
-logging.basicConfig(
-    level=logging.INFO, #Level of global log
-    format='%(asctime)s - %(name)s - %(levelname)s - %(funcName)s - %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S',
-    handlers=[
-        logging.FileHandler(os.path.join(ROOT_PATH,"logs/app.log")), #Handler to write logs in a file
-        logging.StreamHandler()
-    ]
-)
-
-# Setting up coloredlogs to add colors
-coloredlogs.install(
-    level='DEBUG',
-    fmt='%(asctime)s - %(name)s.%(funcName)s - %(levelname)s - %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S',
-    level_styles={
-        'debug': {'color': 'green'},
-        'info': {'color': 'blue'},
-        'warning': {'color': 'yellow'},
-        'error': {'color': 'red'},
-        'critical': {'color': 'red', 'bold': True},
-    },
-    field_styles={
-        'asctime': {'color': 'cyan'},
-        'name': {'color': 'magenta'},
-		'funcName' : {'color': 'magenta'},
-        'levelname': {'color': 'white', 'bold': True},
-        'message': {'color': 'white'},
-    }
-)
+def warn_sampled(logger: logging.Logger, kind: str, message: str, *args):
+    """
+    Logs a repeated warning (missing statistics of a player, missing roster of a match ...) for its
+    first `WARNING_SAMPLE` occurrences only. Every occurrence is counted by kind in the metrics
+    registry : `log_warning_summary()` logs the totals, e.g. "Player statistics missing : 312 occurrences".
 
+    Args:
+        logger (logging.Logger): Logger of the calling module.
+        kind (str): Kind of the warning, e.g. "Player statistics missing".
+        message (str): Message of the warning, formatted with `args` by the logging thread.
+        *args: Arguments of the message.
+    """
+    count = get_metrics().record_warning(kind)
+    if count < WARNING_SAMPLE:
+        logger.warning(message, *args, stacklevel=2)
+    elif count == WARNING_SAMPLE:
+        logger.warning(f"{message} (next '{kind}' warnings are counted only)", *args, stacklevel=2)
 
+def log_warning_summary(logger: logging.Logger):
+    """Logs the number of occurrences of each sampled warning with more occurrences than logged."""
+    for kind, count in get_metrics().get_warning_counts().items():
+        if count > WARNING_SAMPLE:
+            logger.warning("%s : %d occurrences (%d logged).", kind, count, WARNING_SAMPLE)
@@ -0,0 +1,405 @@
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, Any, Callable
+
+from config.api_config import get_root_dir
+
+##########################################	GLOBAL SCOPE	#######################################
+# logs
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the request latency buckets, in milliseconds (the last bucket has no bound)
+LATENCY_BUCKETS_MS = (25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+# Failed requests remembered to count their retries : the oldest are forgotten first (permanent 404s of a long-running daemon)
+MAX_FAILED_KEYS = 10000
+
+##########################################	CLASS	###########################################
+
+class Histogram:
+    """
+        A fixed-bucket histogram.
+
+        Attributes:
+            bounds (tuple[float]): Upper bound of each bucket, a last bucket holds the greater values.
+            counts (list[int]): Number of values of each bucket.
+            count (int): Number of values.
+            total (float): Sum of the values.
+            max (float): Greatest value.
+    """
+
+    def __init__(self, bounds: tuple[float, ...]) -> None:
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def get_quantile(self, quantile: float) -> float | None:
+        # Upper bound of the bucket holding the quantile (the maximum for the last bucket)
+        if not self.count:
+            return None
+        rank = quantile * self.count
+        cumulative = 0
+        for bound, count in zip(self.bounds, self.counts):
+            cumulative += count
+            if cumulative >= rank:
+                return bound
+        return self.max
+
+    def merge(self, histogram: Dict[str, Any]):
+        self.counts = [count + other for count, other in zip(self.counts, histogram["counts"])]
+        self.count += histogram["count"]
+        self.total += histogram["sum"]
+        self.max = max(self.max, histogram["max"])
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "bounds": list(self.bounds), "counts": list(self.counts), "count": self.count,
+            "sum": round(self.total, 3), "max": round(self.max, 3),
+            "p50": self.get_quantile(0.5), "p95": self.get_quantile(0.95),
+        }
+
+
+class EndpointMetrics:
+    """
+        Request metrics of one endpoint family (see `config.api_config.get_endpoint_family()`).
+
+        Attributes:
+            requests (int): Successful API requests.
+            bytes_received (int): Body bytes of the successful requests.
+            latency (Histogram): Latency of the successful requests, in milliseconds.
+            retries (int): Requests sent again for a url whose former request failed.
+            cache_hits (int): Requests served by the response cache or the response archive.
+            cache_misses (int): Requests not found in the response cache.
+            errors (Dict[str, int]): Failed requests, by HTTP status (or error type without response).
+    """
+
+    def __init__(self) -> None:
+        self.requests = 0
+        self.bytes_received = 0
+        self.latency = Histogram(LATENCY_BUCKETS_MS)
+        self.retries = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.errors: Dict[str, int] = {}
+
+    def merge(self, endpoint: Dict[str, Any]):
+        self.requests += endpoint["requests"]
+        self.bytes_received += endpoint["bytesReceived"]
+        self.latency.merge(endpoint["latencyMs"])
+        self.retries += endpoint["retries"]
+        self.cache_hits += endpoint["cacheHits"]
+        self.cache_misses += endpoint["cacheMisses"]
+        for status, count in endpoint["errors"].items():
+            self.errors[status] = self.errors.get(status, 0) + count
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests, "bytesReceived": self.bytes_received, "latencyMs": self.latency.to_dict(),
+            "retries": self.retries, "cacheHits": self.cache_hits, "cacheMisses": self.cache_misses, "errors": dict(self.errors),
+        }
+
+
+class MetricsRegistry:
+    """
+        A singleton and thread-safe registry of the metrics of the process.
+
+        It records the API requests by endpoint family (count, latency histogram, bytes
+        received, retries, cache hits and misses, errors by status), the requests in
+        flight, the wall time and rows produced by each pipeline stage (processing
+        functions and table writes), the flushes of each database table (latency
+        histogram, rows written), the occurrences of the sampled warnings
+        (see `config.logging_config.warn_sampled()`), the quarantined items by kind and
+        reason (see `storage.quarantine.quarantine()`) and the values without column in the
+        database, by table and column (see `database.schema_drift`).
+
+        Commands can also register gauges read on demand by the metrics endpoint (queue
+        depths ...), see `register_gauge()` and `config.metrics_server`.
+
+        Worker processes have their own registry : their snapshots are merged in the
+        registry of the parent process (see `merge()`).
+
+        Methods:
+            record_attempt(family, request_key): Records a request sent to the API (a retry if it failed before).
+            record_done(): Records the end of a request sent to the API, successful or not.
+            record_request(family, latency, bytes_received, request_key): Records a successful request.
+            record_cache(family, hit): Records a response cache lookup.
+            record_error(family, status, request_key): Records a failed request.
+            record_stage(name, function_name, elapsed, rows): Records a run of a pipeline stage.
+            record_db_flush(table_name, elapsed, rows): Records a batch of records written to a table.
+            record_warning(kind): Counts a warning and returns its number of occurrences.
+            get_warning_counts(): Returns the occurrences of each kind of warning.
+            record_quarantine(kind, reason): Counts a quarantined item.
+            get_quarantine_counts(): Returns the quarantined items by kind and reason.
+            record_schema_drift(table_name, column, rows): Counts records holding a column missing in a table.
+            get_schema_drift(): Returns the records holding each missing column, by table.
+            register_gauge(name, help_text, callback, label): Registers a gauge read by the metrics endpoint.
+            get_gauges(): Returns the current value of every registered gauge.
+            get_request_count(): Returns the number of successful requests.
+            to_dict(): Returns a snapshot of every metric.
+            merge(snapshot): Adds a snapshot of another registry.
+            reset(): Clears every metric.
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._lock = threading.Lock()
+            cls._instance._gauges = {} # Kept by `reset()` : they belong to the running command
+            cls._instance.reset()
+        return cls._instance
+
+    def reset(self):
+        with self._lock:
+            self.started_at = time.time()
+            self.endpoints: Dict[str, EndpointMetrics] = {}
+            self.stages: Dict[str, Dict[str, Any]] = {}
+            self.tables: Dict[str, Dict[str, Any]] = {}
+            self.warnings: Dict[str, int] = {}
+            self.quarantined: Dict[str, Dict[str, int]] = {}
+            self.schema_drift: Dict[str, Dict[str, int]] = {}
+            self.in_flight = 0
+            self._failed_keys: OrderedDict[str, None] = OrderedDict() # Requests failed and not succeeded since, oldest first
+
+    def _get_endpoint(self, family: str) -> EndpointMetrics:
+        # Called with the lock held
+        endpoint = self.endpoints.get(family)
+        if endpoint is None:
+            endpoint = self.endpoints[family] = EndpointMetrics()
+        return endpoint
+
+    def _get_table(self, table_name: str) -> Dict[str, Any]:
+        # Called with the lock held
+        table = self.tables.get(table_name)
+        if table is None:
+            table = self.tables[table_name] = {"rows": 0, "flushLatencyMs": Histogram(LATENCY_BUCKETS_MS)}
+        return table
+
+    def record_attempt(self, family: str, request_key: str):
+        with self._lock:
+            self.in_flight += 1
+            if request_key in self._failed_keys:
+                self._get_endpoint(family).retries += 1
+
+    def record_done(self):
+        with self._lock:
+            self.in_flight = max(0, self.in_flight - 1) # A reset may happen during a request
+
+    def record_request(self, family: str, latency: float, bytes_received: int, request_key: str):
+        with self._lock:
+            endpoint = self._get_endpoint(family)
+            endpoint.requests += 1
+            endpoint.bytes_received += bytes_received
+            endpoint.latency.observe(latency * 1000)
+            self._failed_keys.pop(request_key, None)
+
+    def record_cache(self, family: str, hit: bool):
+        with self._lock:
+            endpoint = self._get_endpoint(family)
+            if hit:
+                endpoint.cache_hits += 1
+            else:
+                endpoint.cache_misses += 1
+
+    def record_error(self, family: str, status: str, request_key: str):
+        with self._lock:
+            errors = self._get_endpoint(family).errors
+            errors[status] = errors.get(status, 0) + 1
+            self._failed_keys[request_key] = None
+            self._failed_keys.move_to_end(request_key)
+            if len(self._failed_keys) > MAX_FAILED_KEYS:
+                self._failed_keys.popitem(last=False)
+
+    def record_stage(self, name: str, function_name: str, elapsed: float, rows: int):
+        with self._lock:
+            stage = self.stages.get(name)
+            if stage is None:
+                stage = self.stages[name] = {"function": function_name, "calls": 0, "wallTime": 0.0, "rows": 0}
+            stage["calls"] += 1
+            stage["wallTime"] += elapsed
+            stage["rows"] += rows
+
+    def record_db_flush(self, table_name: str, elapsed: float, rows: int):
+        with self._lock:
+            table = self._get_table(table_name)
+            table["rows"] += rows
+            table["flushLatencyMs"].observe(elapsed * 1000)
+
+    def record_warning(self, kind: str) -> int:
+        with self._lock:
+            count = self.warnings[kind] = self.warnings.get(kind, 0) + 1
+            return count
+
+    def get_warning_counts(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.warnings)
+
+    def record_quarantine(self, kind: str, reason: str):
+        with self._lock:
+            reasons = self.quarantined.setdefault(kind, {})
+            reasons[reason] = reasons.get(reason, 0) + 1
+
+    def get_quarantine_counts(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {kind: dict(reasons) for kind, reasons in self.quarantined.items()}
+
+    def record_schema_drift(self, table_name: str, column: str, rows: int):
+        with self._lock:
+            columns = self.schema_drift.setdefault(table_name, {})
+            columns[column] = columns.get(column, 0) + rows
+
+    def get_schema_drift(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {table_name: dict(columns) for table_name, columns in self.schema_drift.items()}
+
+    def register_gauge(self, name: str, help_text: str, callback: Callable[[], float | Dict[str, float]],
+                       label: str | None = None):
+        """
+        Registers a gauge computed when the metrics endpoint is read.
+
+        Args:
+            name (str): Name of the metric, e.g. "scraper_work_queue_tasks".
+            help_text (str): Description of the metric.
+            callback (Callable): Returns the value, or the values by label value when `label` is set.
+            label (str | None, optional): Name of the label of the values. Defaults to None.
+        """
+        with self._lock:
+            self._gauges[name] = (help_text, callback, label)
+
+    def unregister_gauge(self, name: str):
+        with self._lock:
+            self._gauges.pop(name, None)
+
+    def get_gauges(self) -> Dict[str, Dict[str, Any]]:
+        # Callbacks run without the lock : they may query a database or another lock
+        with self._lock:
+            gauges = dict(self._gauges)
+        values = {}
+        for name, (help_text, callback, label) in gauges.items():
+            try:
+                values[name] = {"help": help_text, "label": label, "value": callback()}
+            except Exception as e:
+                logger.warning(f"Gauge {name} unavailable : {e!r}")
+        return values
+
+    def get_request_count(self) -> int:
+        with self._lock:
+            return sum(endpoint.requests for endpoint in self.endpoints.values())
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "endpoints": {family: endpoint.to_dict() for family, endpoint in sorted(self.endpoints.items())},
+                "stages": {name: dict(stage, wallTime=round(stage["wallTime"], 3))
+                           for name, stage in sorted(self.stages.items(), key=lambda item: item[1]["wallTime"], reverse=True)},
+                "tables": {table_name: {"rows": table["rows"], "flushLatencyMs": table["flushLatencyMs"].to_dict()}
+                           for table_name, table in sorted(self.tables.items())},
+                "warnings": dict(sorted(self.warnings.items())),
+                "quarantined": {kind: dict(sorted(reasons.items())) for kind, reasons in sorted(self.quarantined.items())},
+                "schemaDrift": {table_name: dict(sorted(columns.items())) for table_name, columns in sorted(self.schema_drift.items())},
+            }
+
+    def merge(self, snapshot: Dict[str, Any]):
+        with self._lock:
+            for family, endpoint in snapshot["endpoints"].items():
+                self._get_endpoint(family).merge(endpoint)
+            for name, stage in snapshot["stages"].items():
+                own_stage = self.stages.setdefault(name, {"function": stage["function"], "calls": 0, "wallTime": 0.0, "rows": 0})
+                own_stage["calls"] += stage["calls"]
+                own_stage["wallTime"] += stage["wallTime"]
+                own_stage["rows"] += stage["rows"]
+            for table_name, table in snapshot.get("tables", {}).items():
+                own_table = self._get_table(table_name)
+                own_table["rows"] += table["rows"]
+                own_table["flushLatencyMs"].merge(table["flushLatencyMs"])
+            for kind, count in snapshot.get("warnings", {}).items():
+                self.warnings[kind] = self.warnings.get(kind, 0) + count
+            for kind, reasons in snapshot.get("quarantined", {}).items():
+                own_reasons = self.quarantined.setdefault(kind, {})
+                for reason, count in reasons.items():
+                    own_reasons[reason] = own_reasons.get(reason, 0) + count
+            for table_name, columns in snapshot.get("schemaDrift", {}).items():
+                own_columns = self.schema_drift.setdefault(table_name, {})
+                for column, rows in columns.items():
+                    own_columns[column] = own_columns.get(column, 0) + rows
+
+##########################################	FUNCTIONS	###########################################
+
+# Utility function to obtain the metrics registry instance
+def get_metrics():
+    return MetricsRegistry()
+
+#--------------------------------------------------------------------------------------------------
+
+def count_rows(output: Any) -> int:
+    """
+    Counts the rows produced by a stage : the length of a list of records, the number of
+    records written by a write stage, the sum for several outputs.
+    """
+    if isinstance(output, bool) or output is None:
+        return 0
+    if isinstance(output, int):
+        return output
+    if isinstance(output, (list, tuple)) and output and isinstance(output[0], (list, tuple)):
+        return sum(count_rows(item) for item in output)
+    if isinstance(output, (list, tuple)):
+        return len(output)
+    return 0
+
+#--------------------------------------------------------------------------------------------------
+
+def get_default_report_path() -> str:
+    return os.path.join(get_root_dir(), "logs", f"run_report_{datetime.now():%Y%m%d_%H%M%S}.json")
+
+#--------------------------------------------------------------------------------------------------
+
+def write_run_report(path: str, extra: Dict[str, Any] | None = None) -> Dict[str, Any]:
+    """
+    Writes the structured JSON report of the run : the metrics of the process registry,
+    with the totals of every endpoint family.
+
+    Args:
+        path (str): Path of the JSON file.
+        extra (Dict[str, Any] | None, optional): Other values of the report (command, status, rows written ...). Defaults to None.
+
+    Returns:
+        Dict[str, Any]: The report.
+    """
+    metrics = get_metrics()
+    snapshot = metrics.to_dict()
+    endpoints = snapshot["endpoints"].values()
+    report = {
+        "startedAt": datetime.fromtimestamp(metrics.started_at, timezone.utc).isoformat(),
+        "endedAt": datetime.now(timezone.utc).isoformat(),
+        "wallTime": round(time.time() - metrics.started_at, 3),
+        "totals": {
+            "requests": sum(endpoint["requests"] for endpoint in endpoints),
+            "bytesReceived": sum(endpoint["bytesReceived"] for endpoint in endpoints),
+            "requestTime": round(sum(endpoint["latencyMs"]["sum"] for endpoint in endpoints) / 1000, 3),
+            "cacheHits": sum(endpoint["cacheHits"] for endpoint in endpoints),
+            "errors": sum(sum(endpoint["errors"].values()) for endpoint in endpoints),
+        },
+        **(extra or {}),
+        **snapshot,
+    }
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as report_file:
+        json.dump(report, report_file, indent=4)
+    logger.info(f"Run report written to '{path}'.")
+    return report
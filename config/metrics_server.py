@@ -0,0 +1,268 @@
+import logging
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any
+
+from config.metrics import get_metrics
+
+##########################################	GLOBAL SCOPE	#######################################
+# logs
+logger = logging.getLogger(__name__)
+
+OPENMETRICS_CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+##########################################	CLASS	###########################################
+
+class MetricsExposition:
+    """
+        Builds a text exposition of metrics, in the OpenMetrics format or in the Prometheus
+        text format (0.0.4) when the scraper does not ask for OpenMetrics.
+
+        Methods:
+            add(name, metric_type, help_text, samples): Adds a metric family and its samples.
+            add_histogram(name, help_text, histograms, label, scale): Adds histograms of `config.metrics.Histogram.to_dict()`.
+            render(): Returns the text of the exposition.
+    """
+
+    def __init__(self, openmetrics: bool = True) -> None:
+        self.openmetrics = openmetrics
+        self._lines: list[str] = []
+
+    def add(self, name: str, metric_type: str, help_text: str, samples: list[tuple[Dict[str, str], float]]):
+        if not samples:
+            return
+        # Prometheus 0.0.4 declares counters with their sample name ('_total')
+        family_name = name if self.openmetrics or metric_type != "counter" else f"{name}_total"
+        self._lines.append(f"# HELP {family_name} {help_text}")
+        self._lines.append(f"# TYPE {family_name} {metric_type}")
+        sample_suffix = "_total" if metric_type == "counter" else ""
+        for labels, value in samples:
+            self._lines.append(f"{name}{sample_suffix}{format_labels(labels)} {format_value(value)}")
+
+    def add_histogram(self, name: str, help_text: str, histograms: Dict[str, Dict[str, Any]], label: str,
+                      scale: float = 0.001):
+        if not histograms:
+            return
+        self._lines.append(f"# HELP {name} {help_text}")
+        self._lines.append(f"# TYPE {name} histogram")
+        for label_value, histogram in histograms.items():
+            cumulative = 0
+            for bound, count in zip(histogram["bounds"], histogram["counts"]):
+                cumulative += count
+                labels = format_labels({label: label_value, "le": format_value(bound * scale)})
+                self._lines.append(f"{name}_bucket{labels} {cumulative}")
+            self._lines.append(f"{name}_bucket{format_labels({label: label_value, 'le': '+Inf'})} {histogram['count']}")
+            self._lines.append(f"{name}_count{format_labels({label: label_value})} {histogram['count']}")
+            self._lines.append(f"{name}_sum{format_labels({label: label_value})} {format_value(histogram['sum'] * scale)}")
+
+    def render(self) -> str:
+        lines = self._lines + ["# EOF"] if self.openmetrics else self._lines
+        return "\n".join(lines) + "\n"
+
+
+class MetricsRequestHandler(BaseHTTPRequestHandler):
+    """Serves the metrics of the process on GET /metrics."""
+
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        openmetrics = "application/openmetrics-text" in self.headers.get("Accept", "")
+        try:
+            body = render_metrics(openmetrics).encode("utf-8")
+        except Exception as e:
+            logger.error(f"Metrics rendering failed : {e!r}")
+            self.send_error(500)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", OPENMETRICS_CONTENT_TYPE if openmetrics else PROMETHEUS_CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Scrapes are frequent : keep them out of the application logs
+        logger.debug(f"Metrics endpoint : {format % args}")
+
+
+class MetricsServer:
+    """
+        A small HTTP server exposing the metrics of the process for Prometheus, in a daemon thread.
+
+        Each scrape renders the metrics registry of the process (see `config.metrics.MetricsRegistry`),
+        the state of the rate limiter, response cache and response archive installed in the process,
+        the registered gauges (queue depths ...) and the resident memory of the process.
+
+        Attributes:
+            host (str): Listening address.
+            port (int): Listening port (the port chosen by the system when 0 was asked).
+
+        Methods:
+            start(): Starts serving in a daemon thread.
+            close(): Stops the server.
+    """
+
+    def __init__(self, port: int, host: str = "127.0.0.1") -> None:
+        self._server = ThreadingHTTPServer((host, port), MetricsRequestHandler)
+        self._server.daemon_threads = True
+        self.host, self.port = self._server.server_address[:2]
+        self._thread = threading.Thread(target=self._server.serve_forever, name="metrics-server", daemon=True)
+
+    def start(self) -> "MetricsServer":
+        self._thread.start()
+        logger.info(f"Metrics endpoint listening on http://{self.host}:{self.port}/metrics")
+        return self
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+##########################################	FUNCTIONS	###########################################
+
+def format_labels(labels: Dict[str, Any]) -> str:
+    if not labels:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n") for value in labels.values())
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(labels, escaped)) + "}"
+
+def format_value(value: float) -> str:
+    if isinstance(value, bool):
+        return str(int(value))
+    if isinstance(value, int):
+        return str(value)
+    return repr(float(value))
+
+#--------------------------------------------------------------------------------------------------
+
+def get_rss_bytes() -> int | None:
+    """Returns the resident memory of the process, None when the platform does not provide it."""
+    try:
+        with open("/proc/self/statm") as statm_file:
+            return int(statm_file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+        # Peak resident memory : kilobytes on Linux, bytes on macOS
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return max_rss if os.uname().sysname == "Darwin" else max_rss * 1024
+    except (ImportError, AttributeError):
+        return None
+
+#--------------------------------------------------------------------------------------------------
+
+def render_metrics(openmetrics: bool = True) -> str:
+    """
+    Renders the metrics of the process.
+
+    Args:
+        openmetrics (bool, optional): OpenMetrics format, else Prometheus text format 0.0.4. Defaults to True.
+
+    Returns:
+        str: The text exposition of the metrics.
+    """
+    from config.api_counter import get_archive_writer, get_cache, get_rate_limiter
+
+    metrics = get_metrics()
+    snapshot = metrics.to_dict()
+    endpoints = snapshot["endpoints"]
+    exposition = MetricsExposition(openmetrics)
+
+    # --- API requests
+    exposition.add("scraper_api_in_flight_requests", "gauge", "API requests waiting for their response.",
+                   [({}, metrics.in_flight)])
+    exposition.add("scraper_api_requests", "counter", "Successful API requests.",
+                   [({"family": family}, endpoint["requests"]) for family, endpoint in endpoints.items()])
+    exposition.add("scraper_api_received_bytes", "counter", "Body bytes of the successful API requests.",
+                   [({"family": family}, endpoint["bytesReceived"]) for family, endpoint in endpoints.items()])
+    exposition.add("scraper_api_retries", "counter", "API requests sent again after a failure.",
+                   [({"family": family}, endpoint["retries"]) for family, endpoint in endpoints.items()])
+    exposition.add("scraper_api_errors", "counter", "Failed API requests, by HTTP status or error type.",
+                   [({"family": family, "status": status}, count)
+                    for family, endpoint in endpoints.items() for status, count in endpoint["errors"].items()])
+    exposition.add_histogram("scraper_api_request_duration_seconds", "Latency of the successful API requests.",
+                             {family: endpoint["latencyMs"] for family, endpoint in endpoints.items()}, "family")
+
+    # --- Response cache (and archive replay)
+    exposition.add("scraper_cache_lookups", "counter", "Response cache and archive lookups, by result.",
+                   [({"family": family, "result": result}, endpoint[key]) for family, endpoint in endpoints.items()
+                    for result, key in (("hit", "cacheHits"), ("miss", "cacheMisses"))])
+    cache_hits = sum(endpoint["cacheHits"] for endpoint in endpoints.values())
+    cache_lookups = cache_hits + sum(endpoint["cacheMisses"] for endpoint in endpoints.values())
+    exposition.add("scraper_cache_hit_ratio", "gauge", "Share of the lookups served by the response cache or archive.",
+                   [({}, cache_hits / cache_lookups if cache_lookups else 0.0)])
+    cache = get_cache()
+    if cache.is_enabled():
+        exposition.add("scraper_cache_entries", "gauge", "Responses held by the response cache.",
+                       [({}, cache.get_size())])
+        exposition.add("scraper_cache_bytes", "gauge", "Size of the response bodies held by the response cache.",
+                       [({}, cache.get_bytes())])
+
+    # --- Rate limiter
+    rate_limiter = get_rate_limiter()
+    if rate_limiter is not None:
+        exposition.add("scraper_rate_limiter_tokens", "gauge", "Tokens available in the rate limiter bucket.",
+                       [({}, rate_limiter.get_tokens())])
+        exposition.add("scraper_rate_limiter_rate", "gauge", "Maximum API requests per second.",
+                       [({}, rate_limiter.rate)])
+        exposition.add("scraper_rate_limiter_used", "gauge", "API requests allowed by the rate limiter.",
+                       [({}, rate_limiter.get_used())])
+        if rate_limiter.budget:
+            exposition.add("scraper_rate_limiter_budget", "gauge", "API request budget of the run.",
+                           [({}, rate_limiter.budget)])
+
+    # --- Queues
+    archive_writer = get_archive_writer()
+    if archive_writer is not None:
+        exposition.add("scraper_archive_queue_depth", "gauge", "Responses waiting for the archive writer.",
+                       [({}, archive_writer.get_queue_depth())])
+    for name, gauge in sorted(metrics.get_gauges().items()):
+        value = gauge["value"]
+        samples = [({gauge["label"]: label_value}, count) for label_value, count in value.items()] \
+            if gauge["label"] else [({}, value)]
+        exposition.add(name, "gauge", gauge["help"], samples)
+
+    # --- Database and stages
+    tables = snapshot["tables"]
+    exposition.add("scraper_db_rows_written", "counter", "Records written to the database, by table.",
+                   [({"table": table_name}, table["rows"]) for table_name, table in tables.items()])
+    exposition.add_histogram("scraper_db_flush_duration_seconds", "Latency of the database flushes, by table.",
+                             {table_name: table["flushLatencyMs"] for table_name, table in tables.items()}, "table")
+    stages = snapshot["stages"]
+    exposition.add("scraper_stage_seconds", "counter", "Wall time of the pipeline stages.",
+                   [({"stage": name}, stage["wallTime"]) for name, stage in stages.items()])
+    exposition.add("scraper_stage_rows", "counter", "Rows produced by the pipeline stages.",
+                   [({"stage": name}, stage["rows"]) for name, stage in stages.items()])
+
+    exposition.add("scraper_warnings", "counter", "Occurrences of the sampled warnings, by kind.",
+                   [({"kind": kind}, count) for kind, count in snapshot["warnings"].items()])
+    exposition.add("scraper_quarantined_items", "counter", "Items set aside by the pipeline, by kind and reason.",
+                   [({"kind": kind, "reason": reason}, count)
+                    for kind, reasons in snapshot["quarantined"].items() for reason, count in reasons.items()])
+    exposition.add("scraper_schema_drift_records", "counter", "Records holding a value without column in the database.",
+                   [({"table": table_name, "column": column}, rows)
+                    for table_name, columns in snapshot["schemaDrift"].items() for column, rows in columns.items()])
+
+    # --- Process
+    rss_bytes = get_rss_bytes()
+    if rss_bytes is not None:
+        exposition.add("scraper_process_resident_memory_bytes", "gauge", "Resident memory of the process.",
+                       [({}, rss_bytes)])
+    return exposition.render()
+
+#--------------------------------------------------------------------------------------------------
+
+def start_metrics_server(port: int, host: str = "127.0.0.1") -> MetricsServer:
+    """
+    Starts the metrics endpoint of the process, see `MetricsServer`.
+
+    Args:
+        port (int): Listening port, 0 for a port chosen by the system.
+        host (str, optional): Listening address. Defaults to "127.0.0.1".
+
+    Returns:
+        MetricsServer: The running server.
+    """
+    return MetricsServer(port, host).start()
@@ -0,0 +1,183 @@
+import contextvars
+import cProfile
+import json
+import logging
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from typing import Dict, Any
+
+##########################################	GLOBAL SCOPE	#######################################
+# logs
+logger = logging.getLogger(__name__)
+
+# Profiler of the process (None when profiling is disabled : a stage costs one global lookup)
+_stage_profiler = None
+
+# Unit profiled by the current pipeline, e.g. "270557_2024" (stages copy the context of the pipeline)
+_profile_scope = contextvars.ContextVar("profile_scope", default="pipeline")
+
+# Returned by `profile_stage()` and `profile_scope()` when profiling is disabled
+_NO_PROFILE = nullcontext()
+
+##########################################	CLASS	###########################################
+
+class StageProfiler:
+    """
+        Profiles the pipeline stages with cProfile and tracemalloc, and writes the results to a run directory.
+
+        Each stage of each unit gets its own deterministic profile, accumulated over the runs of
+        the stage (e.g. the polls of the live daemon), and the top allocating lines between the
+        tracemalloc snapshots taken before and after its last run. Stages are profiled one at a
+        time : with a profiler installed, concurrent stages (and concurrent pipelines of a batch)
+        wait for each other, so each profile and allocation diff only holds its own stage.
+
+        Files written by `close()`, in `run_dir` :
+        - `<unit>/<stage>.prof` : the cProfile stats (`python -m pstats`, snakeviz ...).
+        - `<unit>/<stage>.alloc.txt` : the top allocators of the last run of the stage.
+        - `summary.json` : calls, wall and CPU time, peak traced memory (over the memory held when the
+          stage started) and top functions of each stage.
+
+        Attributes:
+            run_dir (str): Directory of the profiles of the run.
+            top (int): Number of functions and allocating lines kept by stage.
+
+        Methods:
+            profile(stage_name): Context manager profiling one run of a stage.
+            close(): Writes the profiles and the summary.
+    """
+
+    def __init__(self, run_dir: str, top: int = 25) -> None:
+        self.run_dir = run_dir
+        self.top = top
+        self._lock = threading.Lock()
+        self._stages: Dict[tuple, Dict[str, Any]] = {}
+        self._started_tracemalloc = not tracemalloc.is_tracing()
+        if self._started_tracemalloc:
+            tracemalloc.start()
+        self._closed = False
+        os.makedirs(run_dir, exist_ok=True)
+
+    @contextmanager
+    def profile(self, stage_name: str):
+        key = (_profile_scope.get(), stage_name)
+        with self._lock:
+            stage = self._stages.get(key)
+            if stage is None:
+                stage = self._stages[key] = {"profile": cProfile.Profile(), "calls": 0, "wallTime": 0.0,
+                                             "cpuTime": 0.0, "peakMemory": 0, "allocations": []}
+            before = take_snapshot()
+            tracemalloc.reset_peak()
+            start_memory = tracemalloc.get_traced_memory()[0]
+            start_time, start_cpu = time.perf_counter(), time.thread_time()
+            stage["profile"].enable()
+            try:
+                yield
+            finally:
+                stage["profile"].disable()
+                stage["calls"] += 1
+                stage["wallTime"] += time.perf_counter() - start_time
+                stage["cpuTime"] += time.thread_time() - start_cpu
+                stage["peakMemory"] = max(stage["peakMemory"], tracemalloc.get_traced_memory()[1] - start_memory)
+                stage["allocations"] = take_snapshot().compare_to(before, "lineno")[:self.top]
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+
+        summary = {}
+        for (scope, stage_name), stage in sorted(self._stages.items()):
+            unit_dir = os.path.join(self.run_dir, scope)
+            os.makedirs(unit_dir, exist_ok=True)
+            stage["profile"].dump_stats(os.path.join(unit_dir, f"{stage_name}.prof"))
+            with open(os.path.join(unit_dir, f"{stage_name}.alloc.txt"), "w", encoding="utf-8") as alloc_file:
+                alloc_file.write("\n".join(str(statistic) for statistic in stage["allocations"]) + "\n")
+            summary.setdefault(scope, {})[stage_name] = {
+                "calls": stage["calls"],
+                "wallTime": round(stage["wallTime"], 4),
+                "cpuTime": round(stage["cpuTime"], 4),
+                "peakMemory": stage["peakMemory"],
+                "allocatedBytes": sum(statistic.size_diff for statistic in stage["allocations"] if statistic.size_diff > 0),
+                "topFunctions": get_top_functions(stage["profile"], self.top),
+            }
+        with open(os.path.join(self.run_dir, "summary.json"), "w", encoding="utf-8") as summary_file:
+            json.dump(summary, summary_file, indent=4)
+
+        lines = [f"Stage profiles written to '{self.run_dir}' (wall time, CPU time, peak traced memory) :"]
+        for scope, stages in summary.items():
+            for stage_name, stage in sorted(stages.items(), key=lambda item: item[1]["wallTime"], reverse=True):
+                lines.append(f"  {scope + ' ' + stage_name:<50} {stage['wallTime']:>9.3f}s {stage['cpuTime']:>9.3f}s "
+                             f"{stage['peakMemory'] / 2**20:>9.1f} MB")
+        logger.info("\n".join(lines))
+
+##########################################	FUNCTIONS	###########################################
+
+def take_snapshot() -> tracemalloc.Snapshot:
+    # Allocations of the profiler itself are not part of the stages
+    return tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    ))
+
+def get_top_functions(profile: cProfile.Profile, top: int) -> list[Dict[str, Any]]:
+    """Returns the functions of a profile with the most own time."""
+    stats = pstats.Stats(profile).stats
+    functions = sorted(stats.items(), key=lambda item: item[1][2], reverse=True)[:top]
+    return [{"function": f"{os.path.basename(file_name)}:{line}({function_name})", "calls": calls,
+             "ownTime": round(own_time, 4), "cumulativeTime": round(cumulative_time, 4)}
+            for (file_name, line, function_name), (_, calls, own_time, cumulative_time, _) in functions]
+
+#--------------------------------------------------------------------------------------------------
+
+def profile_stage(stage_name: str):
+    """Profiles a stage with the profiler of the process, does nothing when profiling is disabled."""
+    stage_profiler = _stage_profiler
+    if stage_profiler is None:
+        return _NO_PROFILE
+    return stage_profiler.profile(stage_name)
+
+@contextmanager
+def _scope(label: str):
+    token = _profile_scope.set(label)
+    try:
+        yield
+    finally:
+        _profile_scope.reset(token)
+
+def profile_scope(*parts: Any):
+    """Names the unit of the stages profiled in this context, e.g. `profile_scope(league, season)`."""
+    if _stage_profiler is None:
+        return _NO_PROFILE
+    return _scope("_".join(str(part) for part in parts if part is not None) or "pipeline")
+
+#--------------------------------------------------------------------------------------------------
+
+def get_default_run_dir(profile_dir: str) -> str:
+    return os.path.join(profile_dir, f"{datetime.now():%Y%m%d_%H%M%S}")
+
+def get_process_run_dir(run_dir: str) -> str:
+    # Run directory of a worker process
+    return os.path.join(run_dir, f"worker-{os.getpid()}")
+
+#--------------------------------------------------------------------------------------------------
+
+# Utility functions to install / obtain the stage profiler of the process (None when profiling is disabled)
+def set_stage_profiler(stage_profiler: StageProfiler | None):
+    global _stage_profiler
+    _stage_profiler = stage_profiler
+
+def get_stage_profiler() -> StageProfiler | None:
+    return _stage_profiler
+
+def get_profile_run_dir() -> str | None:
+    # Run directory of the profiles, handed to the worker processes
+    return _stage_profiler.run_dir if _stage_profiler is not None else None
@@ -3,8 +3,7 @@ from click import pause
 
 import logging
 from config.db_config import clear
-from parsing.leagues_data import parse_leagues_id, parse_seasons_year
-from scraping.league_pages import scrape_league_pages, scrape_league_season_urls_page
+from storage.league_catalog import list_leagues, list_seasons
 
 ##########################################	GLOBAL SCOPE	#######################################
 # logs
@@ -15,8 +14,7 @@ logger = logging.getLogger(__name__)
 
 
 def select_league():
-    league_pages = scrape_league_pages(200)
-    leagues_id = parse_leagues_id(league_pages)
+    leagues_id = list_leagues() # Local lookup with the league catalog (see `storage.league_catalog`)
 
     while True:
         for n, league in enumerate(leagues_id):
@@ -57,8 +55,7 @@ def select_season_type():
 
 
 def select_season(espn_league_id):
-    season_pages = scrape_league_season_urls_page(espn_league_id, 200)
-    seasons_year = parse_seasons_year(season_pages)
+    seasons_year = list_seasons(espn_league_id)
 
     while True:
         for n, year in enumerate(seasons_year):
@@ -104,6 +101,7 @@ def ui_scraper_config() -> Tuple[int, int, bool]:
         season_year = select_season(espn_league_id)
     else :
         is_full_season_scrape = False
+        season_year = None # Resolved from the league page (current season)
     pause("Press Enter to scrape data ...")
     clear()
     return espn_league_id, season_year, is_full_season_scrape
@@ -0,0 +1,226 @@
+import contextvars
+import functools
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Dict, Any, Callable
+
+##########################################	GLOBAL SCOPE	#######################################
+# logs
+logger = logging.getLogger(__name__)
+
+# Tracer of the process (None when tracing is disabled : spans cost one global lookup)
+_tracer = None
+
+# Span running in the current thread or stage (stages copy the context of the pipeline, see `orchestration.stage_dag`)
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+# Returned by `trace_span()` when tracing is disabled
+_NO_SPAN = nullcontext()
+
+##########################################	CLASS	###########################################
+
+class Span:
+    """
+        A timed operation of the trace.
+
+        Attributes:
+            span_id (int): Identifier of the span in the trace.
+            name (str): Name of the operation, e.g. "GET roster" or "stage:rosters".
+            category (str): Kind of operation : "api", "processing", "stage", "match", "db" ...
+            args (Dict[str, Any]): Values shown with the span (url, match id, table, rows ...).
+            parent (Span | None): Span running when this one started, in the same thread or stage.
+            path (tuple[str]): Names of the span and its ancestors, root first.
+            start (int): Start time, in nanoseconds.
+            child_time (int): Time spent in the child spans, in nanoseconds.
+    """
+    __slots__ = ("span_id", "name", "category", "args", "parent", "path", "start", "child_time")
+
+    def __init__(self, span_id: int, name: str, category: str, args: Dict[str, Any], parent: "Span | None") -> None:
+        self.span_id = span_id
+        self.name = name
+        self.category = category
+        self.args = args
+        self.parent = parent
+        self.path = (parent.path if parent is not None else ()) + (name,)
+        self.start = time.perf_counter_ns()
+        self.child_time = 0
+
+
+class Tracer:
+    """
+        Records spans in the Chrome trace event format, and summarizes them at the end of the run.
+
+        Each span becomes a complete event ("ph": "X") of its process and thread, with its span
+        and parent ids in its args : the trace opens in chrome://tracing, Perfetto or speedscope.
+        Spans are nested by the context they run in, so the API requests of a match are the
+        children of the span of that match, inside the span of their pipeline stage.
+
+        When closed, the tracer writes the trace file, a folded stacks file (`<trace>.folded`,
+        one "root;child;leaf <self microseconds>" line per stack, for flame graph tools), and
+        logs a flame-style summary : the time of the slowest stacks and the self time of each
+        span name.
+
+        Attributes:
+            path (str): Path of the trace file.
+            max_events (int): Maximum number of events kept, later spans are only summarized.
+            dropped (int): Number of events not kept.
+
+        Methods:
+            span(name, category, **args): Context manager timing a span.
+            close(): Writes the trace and its summary.
+    """
+
+    def __init__(self, path: str, max_events: int = 1_000_000) -> None:
+        self.path = path
+        self.max_events = max_events
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter_ns()
+        self._pid = os.getpid()
+        self._events: list[Dict[str, Any]] = []
+        self._thread_names: Dict[int, str] = {}
+        self._span_ids = itertools.count(1)
+        self._totals: Dict[tuple, list] = {} # path : [count, total ns, self ns]
+        self._closed = False
+
+    @contextmanager
+    def span(self, name: str, category: str = "", **args):
+        parent = _current_span.get()
+        span = Span(next(self._span_ids), name, category, args, parent)
+        token = _current_span.set(span)
+        try:
+            yield span
+        finally:
+            _current_span.reset(token)
+            self._end(span)
+
+    def _end(self, span: Span):
+        duration = time.perf_counter_ns() - span.start
+        thread = threading.current_thread()
+        with self._lock:
+            if span.parent is not None:
+                span.parent.child_time += duration
+            totals = self._totals.get(span.path)
+            if totals is None:
+                totals = self._totals[span.path] = [0, 0, 0]
+            totals[0] += 1
+            totals[1] += duration
+            totals[2] += max(0, duration - span.child_time) # Children of other threads may overlap
+            if len(self._events) >= self.max_events:
+                self.dropped += 1
+                return
+            self._thread_names.setdefault(thread.ident, thread.name)
+            self._events.append({
+                "name": span.name, "cat": span.category, "ph": "X", "pid": self._pid, "tid": thread.ident,
+                "ts": (span.start - self._origin) / 1000, "dur": duration / 1000,
+                "args": dict(span.args, spanId=span.span_id, parentId=span.parent.span_id if span.parent is not None else None),
+            })
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            metadata = [{"name": "thread_name", "ph": "M", "pid": self._pid, "tid": tid, "args": {"name": name}}
+                        for tid, name in self._thread_names.items()]
+            events = metadata + self._events
+            totals = dict(self._totals)
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, "w", encoding="utf-8") as trace_file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, trace_file)
+        with open(f"{self.path}.folded", "w", encoding="utf-8") as folded_file:
+            for path, (_, _, self_time) in sorted(totals.items()):
+                if self_time // 1000:
+                    folded_file.write(f"{';'.join(name.replace(';', ',') for name in path)} {self_time // 1000}\n")
+        if self.dropped:
+            logger.warning(f"Trace : {self.dropped} spans over the limit of {self.max_events} events are only summarized.")
+        logger.info(f"Trace written to '{self.path}' ({len(events)} events).")
+        log_flame_summary(totals)
+
+##########################################	FUNCTIONS	###########################################
+
+def trace_span(name: str, category: str = "", **args):
+    """
+    Times a span with the tracer of the process, does nothing when tracing is disabled.
+
+    Args:
+        name (str): Name of the span.
+        category (str, optional): Kind of operation ("api", "processing", "stage", "match", "db" ...). Defaults to "".
+        **args: Values shown with the span.
+
+    Returns:
+        A context manager.
+    """
+    tracer = _tracer
+    if tracer is None:
+        return _NO_SPAN
+    return tracer.span(name, category, **args)
+
+def traced(category: str) -> Callable:
+    """Decorator timing every call of a function in a span named after the function."""
+    def decorator(function: Callable) -> Callable:
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            tracer = _tracer
+            if tracer is None:
+                return function(*args, **kwargs)
+            with tracer.span(function.__name__, category):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+#--------------------------------------------------------------------------------------------------
+
+def log_flame_summary(totals: Dict[tuple, list], top: int = 15):
+    """
+    Logs the slowest stacks (total time) and the span names with the most self time.
+
+    Args:
+        totals (Dict[tuple, list]): [count, total ns, self ns] of each stack of span names.
+        top (int, optional): Number of lines of each table. Defaults to 15.
+    """
+    if not totals:
+        return
+    root_time = sum(total for path, (_, total, _) in totals.items() if len(path) == 1) or 1
+    lines = ["Trace summary, slowest stacks (calls, total, share of the root spans) :"]
+    for path, (count, total, _) in sorted(totals.items(), key=lambda item: item[1][1], reverse=True)[:top]:
+        lines.append(f"  {' > '.join(path):<90} {count:>7} {total / 1e9:>9.3f}s {100 * total / root_time:>6.1f}%")
+
+    self_times: Dict[str, list] = {}
+    for path, (count, _, self_time) in totals.items():
+        name_totals = self_times.setdefault(path[-1], [0, 0])
+        name_totals[0] += count
+        name_totals[1] += self_time
+    lines.append("Self time by span (calls, self time) :")
+    for name, (count, self_time) in sorted(self_times.items(), key=lambda item: item[1][1], reverse=True)[:top]:
+        lines.append(f"  {name:<90} {count:>7} {self_time / 1e9:>9.3f}s")
+    logger.info("\n".join(lines))
+
+#--------------------------------------------------------------------------------------------------
+
+def get_process_trace_path(trace_path: str) -> str:
+    # Trace file of a worker process : the pid before the extension
+    root, extension = os.path.splitext(trace_path)
+    return f"{root}.{os.getpid()}{extension or '.json'}"
+
+#--------------------------------------------------------------------------------------------------
+
+# Utility functions to install / obtain the tracer of the process (None when tracing is disabled)
+def set_tracer(tracer: Tracer | None):
+    global _tracer
+    _tracer = tracer
+
+def get_tracer() -> Tracer | None:
+    return _tracer
+
+def get_trace_path() -> str | None:
+    # Trace file of the run, handed to the worker processes
+    return _tracer.path if _tracer is not None else None
@@ -0,0 +1,221 @@
+import logging
+from typing import Dict, Any, Tuple
+
+from config.logging_config import warn_sampled
+from database.db_writer import DBWriter
+
+##########################################	GLOBAL SCOPE	#######################################
+# logs
+logger = logging.getLogger(__name__)
+
+# Materialized table and source view of each statistics level (see database/create_tables.sql) :
+# the table holds the rows of the view, with the league-season of their match
+MATERIALIZED_VIEWS = {
+    "team": ("MV_TEAM_MATCH_STATS", "view_team_match_stats"),
+    "player": ("MV_PLAYER_MATCH_STATS", "view_player_match_stats"),
+}
+
+# Matches per DELETE / INSERT ... SELECT statement of a refresh
+REFRESH_BATCH_SIZE = 500
+
+# Columns of the materialized tables in the database, read once per process (empty when the tables are missing)
+_materialized_columns: Dict[str, Tuple[str, ...]] | None = None
+
+# Columns of the category views of each level in the database, read once per process
+_category_columns: Dict[str, Dict[str, Tuple[str, ...]]] = {}
+
+##########################################	FUNCTIONS	###########################################
+
+def get_materialized_columns(writer: DBWriter) -> Dict[str, Tuple[str, ...]]:
+    """
+    Reads the columns of the materialized tables in the database, once per process.
+
+    Args:
+        writer (DBWriter): The database writer.
+
+    Returns:
+        Dict[str, Tuple[str, ...]]: The columns of each materialized table, in table order.
+        Tables missing in the database (created with an older schema) are left out.
+    """
+    global _materialized_columns
+    if _materialized_columns is None:
+        table_names = [table_name for table_name, _ in MATERIALIZED_VIEWS.values()]
+        placeholders = ", ".join(["%s"] * len(table_names))
+        rows = writer.select(f"""
+            SELECT UPPER(TABLE_NAME) AS tableName, COLUMN_NAME AS columnName FROM information_schema.COLUMNS
+            WHERE TABLE_SCHEMA = DATABASE() AND UPPER(TABLE_NAME) IN ({placeholders})
+            ORDER BY TABLE_NAME, ORDINAL_POSITION
+        """, tuple(table_names))
+        columns: Dict[str, list[str]] = {}
+        for row in rows:
+            columns.setdefault(row["tableName"], []).append(row["columnName"])
+        _materialized_columns = {table_name: tuple(table_columns) for table_name, table_columns in columns.items()}
+    return _materialized_columns
+
+#--------------------------------------------------------------------------------------------------
+
+def refresh_analytics(writer: DBWriter, league_uids: list[str], match_espn_ids: list[int] | None = None) -> Dict[str, int]:
+    """
+    Refreshes the rows of league-seasons in the materialized tables of the analytics views.
+
+    The rows are deleted and selected again from their view (the stacked joins of matches, teams
+    and players run for these league-seasons only), in one transaction : readers see either the
+    former rows or the new ones.
+
+    Args:
+        writer (DBWriter): The database writer.
+        league_uids (list[str]): The unique identifiers of the league-seasons.
+        match_espn_ids (list[int] | None, optional): Only the rows of these matches of the league-seasons,
+                                                      None for every match. Defaults to None.
+
+    Returns:
+        Dict[str, int]: Number of rows inserted, by materialized table. Empty when the tables are
+        missing in the database (created before them, see `database.migrate`).
+    """
+    if not league_uids or match_espn_ids == []:
+        return {}
+    columns_by_table = get_materialized_columns(writer)
+    if not columns_by_table:
+        warn_sampled(logger, "Analytics tables missing", "Analytics tables missing in the database, not refreshed : "
+                     "run 'python main.py migrate' to create them.")
+        return {}
+
+    league_placeholders = ", ".join(["%s"] * len(league_uids))
+    match_batches = [match_espn_ids[i:i + REFRESH_BATCH_SIZE] for i in range(0, len(match_espn_ids), REFRESH_BATCH_SIZE)] \
+        if match_espn_ids is not None else [None]
+    statements = []
+    statement_tables = []
+    for table_name, view_name in MATERIALIZED_VIEWS.values():
+        columns = columns_by_table.get(table_name)
+        if not columns:
+            continue
+        column_list = ", ".join(f"`{column}`" for column in columns)
+        select_list = ", ".join("m.leagueUid" if column == "leagueUid" else f"v.`{column}`" for column in columns)
+        for match_batch in match_batches:
+            table_scope = f"leagueUid IN ({league_placeholders})"
+            view_scope = f"m.leagueUid IN ({league_placeholders})"
+            values = tuple(league_uids)
+            if match_batch is not None:
+                match_placeholders = ", ".join(["%s"] * len(match_batch))
+                table_scope += f" AND matchEspnId IN ({match_placeholders})"
+                view_scope += f" AND m.espnId IN ({match_placeholders})"
+                values += tuple(match_batch)
+            statements.append((f"DELETE FROM {table_name} WHERE {table_scope}", values))
+            statements.append((f"INSERT INTO {table_name} ({column_list}) SELECT {select_list} FROM {view_name} v "
+                               f"JOIN MATCHES m ON v.matchEspnId = m.espnId WHERE {view_scope}", values))
+            statement_tables.append(table_name)
+
+    row_counts = writer.execute(statements)
+    rows_refreshed: Dict[str, int] = {}
+    for table_name, inserted_count in zip(statement_tables, row_counts[1::2]):
+        rows_refreshed[table_name] = rows_refreshed.get(table_name, 0) + inserted_count
+    logger.info("Analytics tables refreshed for %s : %s", league_uids, rows_refreshed)
+    return rows_refreshed
+
+#--------------------------------------------------------------------------------------------------
+
+def resolve_league_uids(writer: DBWriter, targets: list[Tuple[int, int | None]] | None = None) -> list[str]:
+    """
+    Looks up the unique identifiers of league-seasons in the database.
+
+    Args:
+        writer (DBWriter): The database writer.
+        targets (list[Tuple[int, int | None]] | None, optional): (ESPN league ID, season year) pairs, season None for
+                                                                 the latest season of the league. None for every
+                                                                 league-season with matches. Defaults to None.
+
+    Returns:
+        list[str]: The unique identifiers of the league-seasons found in the database.
+    """
+    if targets is None:
+        return [row["leagueUid"] for row in writer.select("SELECT DISTINCT leagueUid FROM MATCHES ORDER BY leagueUid")]
+    league_uids = []
+    for espn_league_id, season_year in targets:
+        if season_year is None:
+            rows = writer.select("SELECT `uid` FROM LEAGUES WHERE espnId = %s ORDER BY season DESC LIMIT 1", (espn_league_id,))
+        else:
+            rows = writer.select("SELECT `uid` FROM LEAGUES WHERE espnId = %s AND season = %s", (espn_league_id, season_year))
+        if not rows:
+            logger.warning(f"League-season {espn_league_id}:{season_year or 'latest'} not in the database.")
+            continue
+        league_uids.append(rows[0]["uid"])
+    return league_uids
+
+#--------------------------------------------------------------------------------------------------
+
+def get_category_columns(writer: DBWriter, level: str) -> Dict[str, Tuple[str, ...]]:
+    """
+    Reads the columns of the statistics categories of a level in the database, from the
+    `VIEW_<LEVEL>_MATCH_<CATEGORY>_STATS` views, once per process.
+
+    Args:
+        writer (DBWriter): The database writer.
+        level (str): "team" or "player".
+
+    Returns:
+        Dict[str, Tuple[str, ...]]: The columns of each category, in view order, e.g. {"offensive": ("uid", "leagueName", ...)}.
+        Views missing in the database (created with an older schema) are left out.
+    """
+    if level not in _category_columns:
+        prefix = f"VIEW_{level.upper()}_MATCH_"
+        rows = writer.select("""
+            SELECT UPPER(TABLE_NAME) AS viewName, COLUMN_NAME AS columnName FROM information_schema.COLUMNS
+            WHERE TABLE_SCHEMA = DATABASE() AND UPPER(TABLE_NAME) LIKE %s
+            ORDER BY TABLE_NAME, ORDINAL_POSITION
+        """, (prefix.replace("_", "\\_") + "%\\_STATS",))
+        columns: Dict[str, list[str]] = {}
+        for row in rows:
+            category = row["viewName"][len(prefix):-len("_STATS")].lower()
+            columns.setdefault(category, []).append(row["columnName"])
+        _category_columns[level] = {category: tuple(view_columns) for category, view_columns in columns.items()}
+    return _category_columns[level]
+
+#--------------------------------------------------------------------------------------------------
+
+def query_match_stats(writer: DBWriter, level: str = "team", category: str | None = None,
+                      league_uids: list[str] | None = None, team_name: str | None = None,
+                      limit: int | None = None) -> list[Dict[str, Any]]:
+    """
+    Reads match statistics from the materialized tables, instead of the stacked analytics views.
+
+    Args:
+        writer (DBWriter): The database writer.
+        level (str, optional): "team" or "player" statistics. Defaults to "team".
+        category (str | None, optional): Statistics category ("offensive", "kicking" ...), with the columns of its
+                                         `VIEW_<LEVEL>_MATCH_<CATEGORY>_STATS` view. None for every column. Defaults to None.
+        league_uids (list[str] | None, optional): Only these league-seasons, see `resolve_league_uids()`. Defaults to None.
+        team_name (str | None, optional): Only the rows of this team. Defaults to None.
+        limit (int | None, optional): Maximum number of rows. Defaults to None.
+
+    Returns:
+        list[Dict[str, Any]]: The rows, ordered by match date.
+
+    Raises:
+        ValueError: If the level or the category is unknown.
+    """
+    if level not in MATERIALIZED_VIEWS:
+        raise ValueError(f"Unknown statistics level '{level}', expected one of {sorted(MATERIALIZED_VIEWS)}.")
+    table_name = MATERIALIZED_VIEWS[level][0]
+    if category is None:
+        select_list = "*"
+    else:
+        categories = get_category_columns(writer, level)
+        if category.lower() not in categories:
+            raise ValueError(f"Unknown {level} statistics category '{category}', expected one of {sorted(categories)}.")
+        select_list = ", ".join(f"`{column}`" for column in categories[category.lower()])
+
+    conditions = []
+    values: tuple = ()
+    if league_uids:
+        conditions.append(f"leagueUid IN ({', '.join(['%s'] * len(league_uids))})")
+        values += tuple(league_uids)
+    if team_name is not None:
+        conditions.append("teamName = %s")
+        values += (team_name,)
+    sql = f"SELECT {select_list} FROM {table_name}"
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    sql += " ORDER BY matchDate, `uid`"
+    if limit is not None:
+        sql += f" LIMIT {int(limit)}"
+    return writer.select(sql, values)
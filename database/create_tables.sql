@@ -64,6 +64,7 @@ CREATE TABLE IF NOT EXISTS STANDINGS (
    bonusPointsLosing DECIMAL(8, 3),
    streak DECIMAL(8, 3),
    UNIQUE (teamEspnId, leagueUid),
+   INDEX idx_standings_league (leagueUid),
    FOREIGN KEY (teamEspnId) REFERENCES TEAMS(espnId),
    FOREIGN KEY (leagueUid) REFERENCES LEAGUES(`uid`) -- Not the espn ID, the unique league Id By Season
 );
@@ -82,7 +83,12 @@ CREATE TABLE IF NOT EXISTS MATCHES (
    loserScore INT,
    totalPlayTime DECIMAL(8, 3),
    -- unit in seconds
+   `status` VARCHAR(20),
+   -- scheduled, in_progress, final or postponed
+   lastFetched DATETIME,
+   -- UTC time of the last scrape of the match
    UNIQUE(`date`, `name`),
+   INDEX idx_matches_league_date (leagueUid, `date`),
    FOREIGN KEY (leagueUid) REFERENCES LEAGUES(`uid`),
    -- Not the espn ID, the unique league Id By Season
    FOREIGN KEY (homeTeamEspnId) REFERENCES TEAMS(espnId),
@@ -92,9 +98,12 @@ CREATE TABLE IF NOT EXISTS MATCHES (
    FOREIGN KEY (stadiumEspnId) REFERENCES STADIUMS(espnId)
 );
 -- Junction table (many-to-many)
+-- TEAM_MATCH_STATS and PLAYER_MATCH_STATS can be partitioned by season (matchSeason),
+-- see database/migrations/0007_season_partitioning.optional.sql and database/partitions.py
 CREATE TABLE IF NOT EXISTS TEAM_MATCH_STATS (
    `uid` VARCHAR(16) PRIMARY KEY,
    matchEspnId INT NOT NULL,
+   matchSeason SMALLINT, -- Season of the match (LEAGUES.season), partitioning key
    teamEspnId INT NOT NULL,
    opponentEspnId INT,
    linescore1stHalf INT,
@@ -303,6 +312,7 @@ CREATE TABLE IF NOT EXISTS TEAM_MATCH_STATS (
    numberOfTeams DECIMAL(8, 3),
    startingMatches DECIMAL(8, 3),
    replacementMatches DECIMAL(8, 3),
+   extraStats JSON, -- Statistics of the API without column, see database/schema_drift.py
    UNIQUE(matchEspnId, teamEspnId),
    FOREIGN KEY (matchEspnId) REFERENCES MATCHES(espnId),
    FOREIGN KEY (teamEspnId) REFERENCES TEAMS(espnId),
@@ -329,6 +339,7 @@ CREATE TABLE IF NOT EXISTS PLAYER_TEAM (
    teamEspnId INT NOT NULL,
    season YEAR,
    UNIQUE (playerEspnId, teamEspnId, season),
+   INDEX idx_player_team_player_season (playerEspnId, season),
    FOREIGN KEY (playerEspnId) REFERENCES PLAYERS(espnId),
    FOREIGN KEY (teamEspnId) REFERENCES TEAMS(espnId)
 );
@@ -337,6 +348,7 @@ CREATE TABLE IF NOT EXISTS PLAYER_MATCH_STATS (
    `uid` VARCHAR(16) PRIMARY KEY,
    playerTeamUid VARCHAR(16) NOT NULL,
    matchEspnId INT NOT NULL,
+   matchSeason SMALLINT, -- Season of the match (LEAGUES.season), partitioning key
    jersey INT,
    positionName VARCHAR(50),
    isFirstChoice BOOLEAN,
@@ -524,7 +536,9 @@ CREATE TABLE IF NOT EXISTS PLAYER_MATCH_STATS (
    minutesPlayedSecondHalf DECIMAL(8, 3),
    minutesPlayedSecondHalfExtra DECIMAL(8, 3),
    minutesPlayedTotal DECIMAL(8, 3),
+   extraStats JSON, -- Statistics of the API without column, see database/schema_drift.py
    UNIQUE (playerTeamUid, matchEspnId),
+   INDEX idx_player_match_stats_match (matchEspnId),
    FOREIGN KEY (playerTeamUid) REFERENCES PLAYER_TEAM(`uid`),
    FOREIGN KEY (matchEspnId) REFERENCES MATCHES(espnId)
 );
@@ -644,6 +658,30 @@ FROM player_match_stats pms
    JOIN players p ON pt.playerEspnId = p.espnId
    JOIN view_team_match_stats tms_view ON pt.teamEspnId = tms_view.teamEspnId
    AND pms.matchEspnId = tms_view.matchEspnId;
+-- ########## MATERIALIZED VIEWS ##########
+-- Rows of view_team_match_stats and view_player_match_stats with the league-season of their match,
+-- refreshed by the loader for the matches it writes (see database/analytics.py).
+-- The statistics category views below read them instead of the stacked views.
+CREATE TABLE IF NOT EXISTS MV_TEAM_MATCH_STATS (
+   PRIMARY KEY (`uid`),
+   INDEX (leagueUid, matchEspnId),
+   INDEX (matchDate)
+) AS
+SELECT m.leagueUid,
+   tms_view.*
+FROM view_team_match_stats tms_view
+   JOIN matches m ON tms_view.matchEspnId = m.espnId
+WHERE FALSE;
+CREATE TABLE IF NOT EXISTS MV_PLAYER_MATCH_STATS (
+   PRIMARY KEY (`uid`),
+   INDEX (leagueUid, matchEspnId),
+   INDEX (matchDate)
+) AS
+SELECT m.leagueUid,
+   pms_view.*
+FROM view_player_match_stats pms_view
+   JOIN matches m ON pms_view.matchEspnId = m.espnId
+WHERE FALSE;
 -- TEAM_MATCH_STATS
 -- view_team_match_offensive_stats
 CREATE VIEW IF NOT EXISTS VIEW_TEAM_MATCH_OFFENSIVE_STATS AS
@@ -689,7 +727,7 @@ SELECT -- Informations
    attackingEventsZoneD,
    completeSets,
    incompleteSets
-FROM VIEW_TEAM_MATCH_STATS;
+FROM MV_TEAM_MATCH_STATS;
 -- VIEW_TEAM_MATCH_DEFENSIVE_STATS
 CREATE VIEW IF NOT EXISTS VIEW_TEAM_MATCH_DEFENSIVE_STATS AS
 SELECT -- Informations
@@ -714,9 +752,9 @@ SELECT -- Informations
    tackleSuccess,
    missedTackles,
    markerTackles
-FROM VIEW_TEAM_MATCH_STATS;
--- VIEW_TEAM_MATCH_DEFENSIVE_STATS
-CREATE VIEW IF NOT EXISTS VIEW_TEAM_MATCH_DEFENSIVE_STATS AS
+FROM MV_TEAM_MATCH_STATS;
+-- VIEW_TEAM_MATCH_SCORING_STATS
+CREATE VIEW IF NOT EXISTS VIEW_TEAM_MATCH_SCORING_STATS AS
 SELECT -- Informations
    `uid`,
    leagueName,
@@ -749,7 +787,7 @@ SELECT -- Informations
    missedGoals,
    penaltyGoals,
    missedPenaltyGoals
-FROM VIEW_TEAM_MATCH_STATS;
+FROM MV_TEAM_MATCH_STATS;
 -- VIEW_TEAM_MATCH_DISCIPLINE_STATS
 CREATE VIEW IF NOT EXISTS VIEW_TEAM_MATCH_DISCIPLINE_STATS AS
 SELECT -- Informations
@@ -799,7 +837,7 @@ SELECT -- Informations
    onReport,
    redCards,
    yellowCards
-FROM VIEW_TEAM_MATCH_STATS;
+FROM MV_TEAM_MATCH_STATS;
 -- VIEW_TEAM_MATCH_KICKING_STATS
 CREATE VIEW IF NOT EXISTS VIEW_TEAM_MATCH_KICKING_STATS AS
 SELECT -- Informations
@@ -843,7 +881,7 @@ SELECT -- Informations
    kickReturnMetres,
    fortyTwenty,
    penaltyKickForTouchMetres
-FROM VIEW_TEAM_MATCH_STATS;
+FROM MV_TEAM_MATCH_STATS;
 -- VIEW_TEAM_MATCH_POSSESSION_CONTROL_STATS
 CREATE VIEW IF NOT EXISTS VIEW_TEAM_MATCH_POSSESSION_CONTROL_STATS AS
 SELECT -- Informations
@@ -907,7 +945,7 @@ SELECT -- Informations
    ballWonZoneB,
    ballWonZoneC,
    ballWonZoneD
-FROM VIEW_TEAM_MATCH_STATS;
+FROM MV_TEAM_MATCH_STATS;
 -- VIEW_TEAM_MATCH_SET_PIECES_STATS
 CREATE VIEW IF NOT EXISTS VIEW_TEAM_MATCH_SET_PIECES_STATS AS
 SELECT -- Informations
@@ -963,7 +1001,7 @@ SELECT -- Informations
    lineoutWonSteal,
    totalLineouts,
    setPieceWon
-FROM VIEW_TEAM_MATCH_STATS;
+FROM MV_TEAM_MATCH_STATS;
 -- VIEW_TEAM_MATCH_RUCK_AND_MAUL_STATS
 CREATE VIEW IF NOT EXISTS VIEW_TEAM_MATCH_RUCK_AND_MAUL_STATS AS
 SELECT -- Informations
@@ -998,7 +1036,7 @@ SELECT -- Informations
    maulsWonPenaltyTry,
    maulsWonTry,
    maulingMetres
-FROM VIEW_TEAM_MATCH_STATS;
+FROM MV_TEAM_MATCH_STATS;
 -- VIEW_TEAM_MATCH_GENERAL_STATS
 CREATE VIEW IF NOT EXISTS VIEW_TEAM_MATCH_GENERAL_STATS AS
 SELECT -- Informations
@@ -1026,7 +1064,7 @@ SELECT -- Informations
    numberOfTeams,
    startingMatches,
    replacementMatches
-FROM VIEW_TEAM_MATCH_STATS;
+FROM MV_TEAM_MATCH_STATS;
 -- PLAYER_MATCH_STATS
 -- VIEW_PLAYER_MATCH_OFFENSIVE_STATS
 CREATE VIEW IF NOT EXISTS VIEW_PLAYER_MATCH_OFFENSIVE_STATS AS
@@ -1068,7 +1106,7 @@ SELECT -- Informations
    hitUpMetres,
    runFromDummyHalf,
    tackleBusts
-FROM VIEW_PLAYER_MATCH_STATS;
+FROM MV_PLAYER_MATCH_STATS;
 -- VIEW_PLAYER_MATCH_DEFENSIVE_STATS
 CREATE VIEW IF NOT EXISTS VIEW_PLAYER_MATCH_DEFENSIVE_STATS AS
 SELECT -- Informations
@@ -1094,7 +1132,7 @@ SELECT -- Informations
    tackleSuccess,
    missedTackles,
    markerTackles
-FROM VIEW_PLAYER_MATCH_STATS;
+FROM MV_PLAYER_MATCH_STATS;
 -- VIEW_PLAYER_MATCH_SCORING_STATS
 CREATE VIEW IF NOT EXISTS VIEW_PLAYER_MATCH_SCORING_STATS AS
 SELECT -- Informations
@@ -1130,7 +1168,7 @@ SELECT -- Informations
    penaltyGoals,
    missedPenaltyGoals,
    goalsFromMark
-FROM VIEW_PLAYER_MATCH_STATS;
+FROM MV_PLAYER_MATCH_STATS;
 -- VIEW_PLAYER_MATCH_DISCIPLINE_STATS
 CREATE VIEW IF NOT EXISTS VIEW_PLAYER_MATCH_DISCIPLINE_STATS AS
 SELECT -- Informations
@@ -1179,7 +1217,7 @@ SELECT -- Informations
    onReport,
    redCards,
    yellowCards
-FROM VIEW_PLAYER_MATCH_STATS;
+FROM MV_PLAYER_MATCH_STATS;
 -- VIEW_PLAYER_MATCH_KICKING_STATS
 CREATE VIEW IF NOT EXISTS VIEW_PLAYER_MATCH_KICKING_STATS AS
 SELECT -- Informations
@@ -1223,7 +1261,7 @@ SELECT -- Informations
    kickReturnMetres,
    fortyTwenty,
    penaltyKickForTouchMetres
-FROM VIEW_PLAYER_MATCH_STATS;
+FROM MV_PLAYER_MATCH_STATS;
 -- VIEW_PLAYER_MATCH_POSSESSION_CONTROL_STATS
 CREATE VIEW IF NOT EXISTS VIEW_PLAYER_MATCH_POSSESSION_CONTROL_STATS AS
 SELECT -- Informations
@@ -1279,7 +1317,7 @@ SELECT -- Informations
    turnoverCarriedOver,
    turnoverKickError,
    turnoverBadPass
-FROM VIEW_PLAYER_MATCH_STATS;
+FROM MV_PLAYER_MATCH_STATS;
 -- VIEW_PLAYER_MATCH_SET_PIECES_STATS
 CREATE VIEW IF NOT EXISTS VIEW_PLAYER_MATCH_SET_PIECES_STATS AS
 SELECT -- Informations
@@ -1329,7 +1367,7 @@ SELECT -- Informations
    lineoutWonOwnThrow,
    lineoutWonSteal,
    totalLineouts
-FROM VIEW_PLAYER_MATCH_STATS;
+FROM MV_PLAYER_MATCH_STATS;
 -- VIEW_PLAYER_MATCH_RUCK_AND_MAUL_STATS
 CREATE VIEW IF NOT EXISTS VIEW_PLAYER_MATCH_RUCK_AND_MAUL_STATS AS
 SELECT -- Informations
@@ -1361,7 +1399,7 @@ SELECT -- Informations
    maulsLostTurnover,
    maulsWonPenaltyTry,
    maulsWonTry
-FROM VIEW_PLAYER_MATCH_STATS;
+FROM MV_PLAYER_MATCH_STATS;
 -- VIEW_PLAYER_MATCH_GENERAL_STATS
 CREATE VIEW IF NOT EXISTS VIEW_PLAYER_MATCH_GENERAL_STATS AS
 SELECT -- Informations
@@ -1400,4 +1438,4 @@ SELECT -- Informations
    minutesPlayedSecondHalf,
    minutesPlayedSecondHalfExtra,
    minutesPlayedTotal
-FROM VIEW_PLAYER_MATCH_STATS;
\ No newline at end of file
+FROM MV_PLAYER_MATCH_STATS;
\ No newline at end of file
@@ -0,0 +1,146 @@
+import logging
+import threading
+import time
+from typing import Dict, Any
+from pymysql import connect
+from pymysql.err import MySQLError
+
+from config.metrics import get_metrics
+from database.row_hashes import RowHashIndex
+from database.schema_drift import conform_records
+from database.sql_functions import execute_statements, insert, insert_or_ignore, insert_with_update, select_records
+
+##########################################	GLOBAL SCOPE	#######################################
+# logs
+logger = logging.getLogger(__name__)
+
+# Row hash index file used by the writers of the process (None to write every upserted record)
+_row_hash_path = None
+
+##########################################	CLASS	###########################################
+
+class DBWriter:
+    """
+        A thread-safe writer sharing one database connection between several pipelines.
+
+        A pymysql connection must not be used by two threads at the same time. The writer
+        serializes every insertion behind a lock, so the batch runner can process several
+        league-seasons concurrently while keeping a single connection (and a single
+        transaction at a time) on the database.
+
+        With a row hash index, upserted records identical to the last written ones are
+        dropped before reaching the database (see `database.row_hashes.RowHashIndex`).
+
+        The latency and rows of every flush are recorded by table in the metrics registry.
+
+        Records are fitted to the columns of their table in the database before each flush, read
+        once per table : values without column are kept in the overflow column of the table or
+        dropped, instead of failing the batch (see `database.schema_drift.conform_records()`).
+
+        Records of a table can be sent to another table of the same columns (see `table_redirects`),
+        e.g. the staging tables of a season reload (see `database.partitions.reload_league_season()`).
+
+        Attributes:
+            conn (connect): MySQL connection object.
+            row_hashes (RowHashIndex | None): Content hashes of the upserted rows, None to write every record.
+            rows_written (Dict[str, int]): Number of records sent to the database, by table.
+            rows_unchanged (Dict[str, int]): Number of unchanged records dropped, by table.
+            table_redirects (Dict[str, str]): Table receiving the records of a table, by lower-case table name.
+                                              Redirected upserts bypass the row hash index.
+
+        Methods:
+            insert(table_name, records_data): See `database.sql_functions.insert()`.
+            insert_or_ignore(table_name, records_data): See `database.sql_functions.insert_or_ignore()`.
+            insert_with_update(table_name, records_data, primary_key): See `database.sql_functions.insert_with_update()`.
+            select(sql, values): See `database.sql_functions.select_records()`.
+            execute(statements): See `database.sql_functions.execute_statements()`.
+            get_table_columns(table_name): Returns the lower-case columns of a table in the database, None when unreadable.
+            get_total_rows(): Returns the total number of records sent to the database.
+    """
+
+    def __init__(self, conn: connect, row_hashes: RowHashIndex | None = None) -> None:
+        self.conn = conn
+        if row_hashes is None and _row_hash_path is not None:
+            row_hashes = RowHashIndex(_row_hash_path)
+        self.row_hashes = row_hashes
+        self.rows_written: Dict[str, int] = {}
+        self.rows_unchanged: Dict[str, int] = {}
+        self.table_redirects: Dict[str, str] = {}
+        self._table_columns: Dict[str, frozenset[str] | None] = {}
+        self._lock = threading.Lock()
+
+    def _get_table_columns(self, table_name: str) -> frozenset[str] | None:
+        # Called with the lock held. None when the columns can not be read : records are sent unchanged
+        if table_name not in self._table_columns:
+            try:
+                columns = select_records(self.conn, f"SHOW COLUMNS FROM `{table_name}`")
+                self._table_columns[table_name] = frozenset(column["Field"].lower() for column in columns)
+            except MySQLError:
+                self._table_columns[table_name] = None
+        return self._table_columns[table_name]
+
+    def _flush(self, insert_function, table_name: str, records_data: list[Dict[str, Any]]) -> int:
+        # Called with the lock held
+        columns = self._get_table_columns(table_name)
+        if columns:
+            records_data, _ = conform_records(table_name, records_data, columns)
+        start_time = time.perf_counter()
+        inserted_count = insert_function(self.conn, self.table_redirects.get(table_name.lower(), table_name), records_data)
+        get_metrics().record_db_flush(table_name, time.perf_counter() - start_time, inserted_count)
+        self.rows_written[table_name] = self.rows_written.get(table_name, 0) + inserted_count
+        return inserted_count
+
+    def _write(self, insert_function, table_name: str, records_data: list[Dict[str, Any]]) -> int:
+        with self._lock:
+            return self._flush(insert_function, table_name, records_data)
+
+    def insert(self, table_name: str, records_data: list[Dict[str, Any]]) -> int:
+        return self._write(insert, table_name, records_data)
+
+    def insert_or_ignore(self, table_name: str, records_data: list[Dict[str, Any]]) -> int:
+        return self._write(insert_or_ignore, table_name, records_data)
+
+    def insert_with_update(self, table_name: str, records_data: list[Dict[str, Any]], primary_key: str | None = None) -> int:
+        # A redirected table starts empty : every record is written
+        if self.row_hashes is None or primary_key is None or table_name.lower() in self.table_redirects:
+            return self._write(insert_with_update, table_name, records_data)
+
+        with self._lock:
+            changed_records, changed_keys = self.row_hashes.filter_changed(table_name, primary_key, records_data)
+            unchanged_count = len(records_data) - len(changed_records)
+            self.rows_unchanged[table_name] = self.rows_unchanged.get(table_name, 0) + unchanged_count
+            logger.info("%s : %d new, %d changed, %d unchanged records.",
+                        table_name, len(changed_records) - len(changed_keys), len(changed_keys), unchanged_count)
+            if changed_keys:
+                logger.debug("Changed %s records : %s", table_name, changed_keys)
+            if not changed_records:
+                return 0
+            inserted_count = self._flush(insert_with_update, table_name, changed_records)
+            self.row_hashes.update(table_name, primary_key, changed_records)
+        return inserted_count
+
+    def select(self, sql: str, values: tuple = ()) -> list[Dict[str, Any]]:
+        # Reads share the connection, and its lock, with the insertions
+        with self._lock:
+            return select_records(self.conn, sql, values)
+
+    def execute(self, statements: list[tuple[str, tuple]]) -> list[int]:
+        with self._lock:
+            return execute_statements(self.conn, statements)
+
+    def get_table_columns(self, table_name: str) -> frozenset[str] | None:
+        with self._lock:
+            return self._get_table_columns(table_name)
+
+    def get_total_rows(self) -> int:
+        return sum(self.rows_written.values())
+
+##########################################	FUNCTIONS	###########################################
+
+# Utility functions to install / obtain the row hash index file of the writers created by the process
+def set_row_hash_path(path: str | None):
+    global _row_hash_path
+    _row_hash_path = path
+
+def get_row_hash_path() -> str | None:
+    return _row_hash_path
@@ -0,0 +1,201 @@
+import hashlib
+import logging
+import os
+import re
+import time
+from typing import Dict, Any
+from pymysql import connect
+
+from database.sql_functions import execute_statements, select_records
+
+##########################################	GLOBAL SCOPE	#######################################
+# logs
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+
+# Migration files : "<version>_<name>.sql", applied in version order.
+# Optional migrations ("<version>_<name>.optional.sql") are applied only when asked by name
+MIGRATION_FILE_PATTERN = re.compile(r"^(\d+)_(\w+)(\.optional)?\.sql$")
+
+# Versions applied to the database
+MIGRATIONS_TABLE = "SCHEMA_MIGRATIONS"
+
+# Named lock held while migrating : two processes never apply the same migration at the same time
+MIGRATION_LOCK_NAME = "rugby_db_schema_migrations"
+MIGRATION_LOCK_TIMEOUT = 60
+
+##########################################	CLASS	###########################################
+
+class MigrationError(Exception):
+    pass
+
+##########################################	FUNCTIONS	###########################################
+
+def split_statements(sql: str) -> list[str]:
+    """Splits the SQL of a migration file into statements, without the comments."""
+    lines = [re.sub(r"--(\s.*)?$", "", line) for line in sql.splitlines()]
+    return [statement.strip() for statement in "\n".join(lines).split(";") if statement.strip()]
+
+#--------------------------------------------------------------------------------------------------
+
+def load_migrations(migrations_dir: str = MIGRATIONS_DIR) -> list[Dict[str, Any]]:
+    """
+    Reads the migration files of a directory.
+
+    Args:
+        migrations_dir (str, optional): Directory of the migration files. Defaults to `MIGRATIONS_DIR`.
+
+    Returns:
+        list[Dict[str, Any]]: The migrations, in version order :
+        {
+            "version": int,
+            "name": str,
+            "checksum": str,        # SHA-256 of the file
+            "statements": list[str],
+            "optional": bool        # Applied only when asked by name
+        }
+
+    Raises:
+        MigrationError: If two files have the same version.
+    """
+    migrations = {}
+    for file_name in sorted(os.listdir(migrations_dir)):
+        file_match = MIGRATION_FILE_PATTERN.match(file_name)
+        if file_match is None:
+            continue
+        version = int(file_match.group(1))
+        if version in migrations:
+            raise MigrationError(f"Migration version {version} defined twice : '{migrations[version]['name']}' and '{file_match.group(2)}'.")
+        with open(os.path.join(migrations_dir, file_name), encoding="utf-8") as migration_file:
+            sql = migration_file.read()
+        migrations[version] = {
+            "version": version,
+            "name": file_match.group(2),
+            "checksum": hashlib.sha256(sql.encode("utf-8")).hexdigest(),
+            "statements": split_statements(sql),
+            "optional": file_match.group(3) is not None,
+        }
+    return [migrations[version] for version in sorted(migrations)]
+
+#--------------------------------------------------------------------------------------------------
+
+def get_applied_migrations(conn: connect) -> Dict[int, Dict[str, Any]]:
+    """
+    Reads the migrations applied to the database, and creates their table when missing.
+
+    Args:
+        conn (connect): MySQL connection object.
+
+    Returns:
+        Dict[int, Dict[str, Any]]: The applied migrations by version ("version", "name", "checksum", "appliedAt").
+    """
+    execute_statements(conn, [(f"""
+        CREATE TABLE IF NOT EXISTS {MIGRATIONS_TABLE} (
+            version INT PRIMARY KEY,
+            `name` VARCHAR(255) NOT NULL,
+            checksum CHAR(64) NOT NULL,
+            appliedAt DATETIME NOT NULL
+        )
+    """, ())])
+    rows = select_records(conn, f"SELECT version, `name`, checksum, appliedAt FROM {MIGRATIONS_TABLE} ORDER BY version")
+    return {row["version"]: row for row in rows}
+
+#--------------------------------------------------------------------------------------------------
+
+def get_pending_migrations(conn: connect, target_version: int | None = None,
+                           migrations_dir: str = MIGRATIONS_DIR, optional: tuple[str, ...] = ()) -> list[Dict[str, Any]]:
+    """
+    Lists the migrations not applied to the database yet, see `load_migrations()`.
+
+    Applied migrations whose file changed since are logged : a migration is never applied twice,
+    changes to the schema go to a new migration.
+
+    Args:
+        conn (connect): MySQL connection object.
+        target_version (int | None, optional): Only the migrations up to this version. Defaults to None.
+        migrations_dir (str, optional): Directory of the migration files. Defaults to `MIGRATIONS_DIR`.
+        optional (tuple[str, ...], optional): Names of the optional migrations to apply. Defaults to ().
+
+    Returns:
+        list[Dict[str, Any]]: The pending migrations, in version order.
+
+    Raises:
+        MigrationError: If an optional migration asked is unknown.
+    """
+    applied = get_applied_migrations(conn)
+    migrations = load_migrations(migrations_dir)
+    unknown = set(optional) - {migration["name"] for migration in migrations if migration["optional"]}
+    if unknown:
+        raise MigrationError(f"Unknown optional migrations {sorted(unknown)}.")
+    pending = []
+    for migration in migrations:
+        applied_migration = applied.get(migration["version"])
+        if applied_migration is not None:
+            if applied_migration["checksum"] != migration["checksum"]:
+                logger.warning(f"Migration {migration['version']} ({migration['name']}) changed since it was applied : "
+                               f"not applied again, add a new migration instead.")
+            continue
+        if migration["optional"] and migration["name"] not in optional:
+            logger.debug(f"Optional migration {migration['version']} ({migration['name']}) not asked.")
+            continue
+        if target_version is None or migration["version"] <= target_version:
+            pending.append(migration)
+    return pending
+
+#--------------------------------------------------------------------------------------------------
+
+def apply_migrations(conn: connect, target_version: int | None = None, dry_run: bool = False,
+                     migrations_dir: str = MIGRATIONS_DIR, optional: tuple[str, ...] = ()) -> list[Dict[str, Any]]:
+    """
+    Applies the pending migrations to the database, in version order.
+
+    Each migration is recorded in the `SCHEMA_MIGRATIONS` table once all its statements ran.
+    MySQL commits schema changes immediately : the statements of a migration are written to be
+    idempotent (CREATE ... IF NOT EXISTS, ADD COLUMN IF NOT EXISTS ...), so a migration interrupted
+    halfway is simply applied again by the next run. A database created by database/create_tables.sql
+    already has the current schema : its migrations only get recorded. Optional migrations
+    (database/migrations/*.optional.sql) are applied only when named in `optional`.
+
+    Args:
+        conn (connect): MySQL connection object.
+        target_version (int | None, optional): Apply the migrations up to this version only. Defaults to None.
+        dry_run (bool, optional): True to only log the pending migrations and their statements. Defaults to False.
+        migrations_dir (str, optional): Directory of the migration files. Defaults to `MIGRATIONS_DIR`.
+        optional (tuple[str, ...], optional): Names of the optional migrations to apply, e.g. ("season_partitioning",). Defaults to ().
+
+    Returns:
+        list[Dict[str, Any]]: The migrations applied (pending with `dry_run`), see `load_migrations()`.
+
+    Raises:
+        MigrationError: If the migration lock is held by another process, an optional migration asked is unknown,
+                        or a statement fails.
+    """
+    lock_rows = select_records(conn, "SELECT GET_LOCK(%s, %s) AS acquired", (MIGRATION_LOCK_NAME, MIGRATION_LOCK_TIMEOUT))
+    if not lock_rows or lock_rows[0]["acquired"] != 1:
+        raise MigrationError(f"Migration lock held by another process for more than {MIGRATION_LOCK_TIMEOUT} seconds.")
+    try:
+        pending = get_pending_migrations(conn, target_version, migrations_dir, optional)
+        if not pending:
+            logger.info("Database schema up to date.")
+            return []
+        for migration in pending:
+            if dry_run:
+                logger.info(f"Pending migration {migration['version']} ({migration['name']}) :\n"
+                            + "\n".join(f"{statement};" for statement in migration["statements"]))
+                continue
+            start_time = time.perf_counter()
+            for statement in migration["statements"]:
+                try:
+                    execute_statements(conn, [(statement, None)]) # No placeholder : '%' kept as is
+                except Exception as e:
+                    raise MigrationError(f"Migration {migration['version']} ({migration['name']}) failed, "
+                                         f"run it again once fixed : {e!r}\n{statement}") from e
+            execute_statements(conn, [(
+                f"INSERT INTO {MIGRATIONS_TABLE} (version, `name`, checksum, appliedAt) VALUES (%s, %s, %s, UTC_TIMESTAMP())",
+                (migration["version"], migration["name"], migration["checksum"]),
+            )])
+            logger.info(f"Migration {migration['version']} ({migration['name']}) applied in {time.perf_counter() - start_time:.1f} s.")
+        return pending
+    finally:
+        select_records(conn, "SELECT RELEASE_LOCK(%s) AS released", (MIGRATION_LOCK_NAME,))
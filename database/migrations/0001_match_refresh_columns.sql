@@ -0,0 +1,4 @@
+-- Status and last scrape time of the matches, read by the refresh policy (orchestration/refresh_policy.py)
+ALTER TABLE MATCHES
+   ADD COLUMN IF NOT EXISTS `status` VARCHAR(20) AFTER totalPlayTime,
+   ADD COLUMN IF NOT EXISTS lastFetched DATETIME AFTER `status`;
@@ -0,0 +1,3 @@
+-- Statistics of the API without column, kept as JSON (database/schema_drift.py)
+ALTER TABLE TEAM_MATCH_STATS ADD COLUMN IF NOT EXISTS extraStats JSON;
+ALTER TABLE PLAYER_MATCH_STATS ADD COLUMN IF NOT EXISTS extraStats JSON;
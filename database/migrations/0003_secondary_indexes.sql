@@ -0,0 +1,11 @@
+-- Secondary indexes of the frequent access paths, see benchmarks/bench_explain.py.
+-- InnoDB already indexes the foreign key columns alone : the named indexes below replace
+-- these implicit indexes where they have the same columns, and add the composite ones.
+-- Matches of a league-season in date order : event lists, refresh plans, analytics refresh
+CREATE INDEX IF NOT EXISTS idx_matches_league_date ON MATCHES (leagueUid, `date`);
+-- Player statistics of a match : refresh of a match, analytics refresh
+CREATE INDEX IF NOT EXISTS idx_player_match_stats_match ON PLAYER_MATCH_STATS (matchEspnId);
+-- Teams of a player in a season
+CREATE INDEX IF NOT EXISTS idx_player_team_player_season ON PLAYER_TEAM (playerEspnId, season);
+-- Standings of a league-season
+CREATE INDEX IF NOT EXISTS idx_standings_league ON STANDINGS (leagueUid);
@@ -0,0 +1,22 @@
+-- Materialized rows of the team and player statistics views (database/analytics.py).
+-- Fill them once with : python main.py analytics --refresh
+CREATE TABLE IF NOT EXISTS MV_TEAM_MATCH_STATS (
+   PRIMARY KEY (`uid`),
+   INDEX (leagueUid, matchEspnId),
+   INDEX (matchDate)
+) AS
+SELECT m.leagueUid,
+   tms_view.*
+FROM view_team_match_stats tms_view
+   JOIN matches m ON tms_view.matchEspnId = m.espnId
+WHERE FALSE;
+CREATE TABLE IF NOT EXISTS MV_PLAYER_MATCH_STATS (
+   PRIMARY KEY (`uid`),
+   INDEX (leagueUid, matchEspnId),
+   INDEX (matchDate)
+) AS
+SELECT m.leagueUid,
+   pms_view.*
+FROM view_player_match_stats pms_view
+   JOIN matches m ON pms_view.matchEspnId = m.espnId
+WHERE FALSE;
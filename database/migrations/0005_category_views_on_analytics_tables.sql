@@ -0,0 +1,758 @@
+-- Statistics category views reading the materialized analytics tables instead of the stacked views
+-- TEAM_MATCH_STATS
+-- view_team_match_offensive_stats
+CREATE OR REPLACE VIEW VIEW_TEAM_MATCH_OFFENSIVE_STATS AS
+SELECT -- Informations
+   `uid`,
+   leagueName,
+   season,
+   matchName,
+   matchAbbreviationName,
+   matchDate,
+   teamName,
+   teamAbbreviationName,
+   teamColor,
+   teamLogoUrl,
+   opponentTeamName,
+   totalPlayTime,
+   isWinner,
+   isHome,
+   teamScore,
+   opponentTeamScore,
+   -- Stats
+   passes,
+   runs,
+   metres,
+   attackingKicks,
+   offload,
+   cleanBreaks,
+   defendersBeaten,
+   breakAssist,
+   carriesMetres,
+   carriesCrossedGainLine,
+   carriesNotMadeGainLine,
+   carriesSupport,
+   averageGain,
+   dummyHalfMetres,
+   hitUps,
+   hitUpMetres,
+   runFromDummyHalf,
+   tackleBusts,
+   attackingEventsZoneA,
+   attackingEventsZoneB,
+   attackingEventsZoneC,
+   attackingEventsZoneD,
+   completeSets,
+   incompleteSets
+FROM MV_TEAM_MATCH_STATS;
+-- VIEW_TEAM_MATCH_DEFENSIVE_STATS
+CREATE OR REPLACE VIEW VIEW_TEAM_MATCH_DEFENSIVE_STATS AS
+SELECT -- Informations
+   `uid`,
+   leagueName,
+   season,
+   matchName,
+   matchAbbreviationName,
+   matchDate,
+   teamName,
+   teamAbbreviationName,
+   teamColor,
+   teamLogoUrl,
+   opponentTeamName,
+   totalPlayTime,
+   isWinner,
+   isHome,
+   teamScore,
+   opponentTeamScore,
+   -- Stats
+   tackles,
+   tackleSuccess,
+   missedTackles,
+   markerTackles
+FROM MV_TEAM_MATCH_STATS;
+-- VIEW_TEAM_MATCH_SCORING_STATS
+CREATE OR REPLACE VIEW VIEW_TEAM_MATCH_SCORING_STATS AS
+SELECT -- Informations
+   `uid`,
+   leagueName,
+   season,
+   matchName,
+   matchAbbreviationName,
+   matchDate,
+   teamName,
+   teamAbbreviationName,
+   teamColor,
+   teamLogoUrl,
+   opponentTeamName,
+   totalPlayTime,
+   isWinner,
+   isHome,
+   teamScore,
+   opponentTeamScore,
+   -- Stats
+   points,
+   tries,
+   penaltyTries,
+   tryAssists,
+   tryBonusPoints,
+   losingBonusPoints,
+   conversionGoals,
+   dropGoalsConverted,
+   dropGoalMissed,
+   goals,
+   missedConversionGoals,
+   missedGoals,
+   penaltyGoals,
+   missedPenaltyGoals
+FROM MV_TEAM_MATCH_STATS;
+-- VIEW_TEAM_MATCH_DISCIPLINE_STATS
+CREATE OR REPLACE VIEW VIEW_TEAM_MATCH_DISCIPLINE_STATS AS
+SELECT -- Informations
+   `uid`,
+   leagueName,
+   season,
+   matchName,
+   matchAbbreviationName,
+   matchDate,
+   teamName,
+   teamAbbreviationName,
+   teamColor,
+   teamLogoUrl,
+   opponentTeamName,
+   totalPlayTime,
+   isWinner,
+   isHome,
+   teamScore,
+   opponentTeamScore,
+   -- Stats
+   freeKickConcededAtLineout,
+   freeKickConcededAtScrum,
+   freeKickConcededInGeneralPlay,
+   freeKickConcededInRuckOrMaul,
+   freeKickConceded,
+   penaltiesConceded,
+   penaltyConcededCollapsingMaul,
+   penaltyConcededCollapsingOffense,
+   penaltyConcededCollapsing,
+   penaltyConcededDelibKnockOn,
+   penaltyConcededDissent,
+   penaltyConcededEarlyTackle,
+   penaltyConcededFoulPlay,
+   penaltyConcededHandlingInRuck,
+   penaltyConcededHighTackle,
+   penaltyConcededKillingRuck,
+   penaltyConcededLineoutOffence,
+   penaltyConcededObstruction,
+   penaltyConcededOffside,
+   penaltyConcededOppHalf,
+   penaltyConcededOther,
+   penaltyConcededOwnHalf,
+   penaltyConcededScrumOffence,
+   penaltyConcededStamping,
+   penaltyConcededWrongSide,
+   totalFreeKicksConceded,
+   onReport,
+   redCards,
+   yellowCards
+FROM MV_TEAM_MATCH_STATS;
+-- VIEW_TEAM_MATCH_KICKING_STATS
+CREATE OR REPLACE VIEW VIEW_TEAM_MATCH_KICKING_STATS AS
+SELECT -- Informations
+   `uid`,
+   leagueName,
+   season,
+   matchName,
+   matchAbbreviationName,
+   matchDate,
+   teamName,
+   teamAbbreviationName,
+   teamColor,
+   teamLogoUrl,
+   opponentTeamName,
+   totalPlayTime,
+   isWinner,
+   isHome,
+   teamScore,
+   opponentTeamScore,
+   -- Stats
+   kicks,
+   kickFromHandMetres,
+   kicksFromHand,
+   kickChargedDown,
+   tryKicks,
+   kickTryScored,
+   kickOutOfPlay,
+   kickInTouch,
+   kickOppnCollection,
+   kickPossessionLost,
+   kickPossessionRetained,
+   kickTouchInGoal,
+   kickPenaltyBad,
+   kickPenaltyGood,
+   totalKicks,
+   totalKicksSucceeded,
+   kickPercentSuccess,
+   pcKickPercent,
+   kickSuccess,
+   kickReturns,
+   kickReturnMetres,
+   fortyTwenty,
+   penaltyKickForTouchMetres
+FROM MV_TEAM_MATCH_STATS;
+-- VIEW_TEAM_MATCH_POSSESSION_CONTROL_STATS
+CREATE OR REPLACE VIEW VIEW_TEAM_MATCH_POSSESSION_CONTROL_STATS AS
+SELECT -- Informations
+   `uid`,
+   leagueName,
+   season,
+   matchName,
+   matchAbbreviationName,
+   matchDate,
+   teamName,
+   teamAbbreviationName,
+   teamColor,
+   teamLogoUrl,
+   opponentTeamName,
+   totalPlayTime,
+   isWinner,
+   isHome,
+   teamScore,
+   opponentTeamScore,
+   -- Stats
+   ballPossessionLast10Mins,
+   pcPossessionFirst,
+   pcPossessionSecond,
+   pcTerritoryFirst,
+   pcTerritorySecond,
+   possession,
+   territory,
+   territoryLast10Mins,
+   collectionFailed,
+   collectionFromKick,
+   collectionInterception,
+   collectionLooseBall,
+   collectionSuccess,
+   retainedKicks,
+   trueRetainedKicks,
+   restart22m,
+   restartErrorNotTen,
+   restartErrorOutOfPlay,
+   restartHalfway,
+   restartOppError,
+   restartOppPlayer,
+   restartOwnPlayer,
+   restartsLost,
+   restartsSuccess,
+   restartsWon,
+   handlingError,
+   phaseNumber,
+   playTheBall,
+   turnoverWon,
+   turnoversConceded,
+   turnoverOppHalf,
+   turnoverOwnHalf,
+   turnoverLostInRuckOrMaul,
+   turnoverKnockOn,
+   turnoverForwardPass,
+   turnoverCarriedInTouch,
+   turnoverCarriedOver,
+   turnoverKickError,
+   turnoverBadPass,
+   ballWonZoneA,
+   ballWonZoneB,
+   ballWonZoneC,
+   ballWonZoneD
+FROM MV_TEAM_MATCH_STATS;
+-- VIEW_TEAM_MATCH_SET_PIECES_STATS
+CREATE OR REPLACE VIEW VIEW_TEAM_MATCH_SET_PIECES_STATS AS
+SELECT -- Informations
+   `uid`,
+   leagueName,
+   season,
+   matchName,
+   matchAbbreviationName,
+   matchDate,
+   teamName,
+   teamAbbreviationName,
+   teamColor,
+   teamLogoUrl,
+   opponentTeamName,
+   totalPlayTime,
+   isWinner,
+   isHome,
+   teamScore,
+   opponentTeamScore,
+   -- Stats
+   scrumsWonFreeKick,
+   scrumsWonOutright,
+   scrumsWonPenalty,
+   scrumsWonPenaltyTry,
+   scrumsWonPushoverTry,
+   scrumsLostFreeKick,
+   scrumsLostOutright,
+   scrumsLostPenalty,
+   scrumsLostReversed,
+   scrumsLost,
+   scrumsReset,
+   scrumsSuccess,
+   scrumsTotal,
+   scrumsWon,
+   lineoutsToOppPlayer,
+   lineoutsWon,
+   lineoutSuccess,
+   lineoutsLost,
+   lineoutsInfringeOpp,
+   lineoutsInfringeOwn,
+   lineoutThrowWonClean,
+   lineoutThrowWonFreeKick,
+   lineoutThrowWonPenalty,
+   lineoutThrowWonTap,
+   lineoutThrowLostFreeKick,
+   lineoutThrowLostHandlingError,
+   lineoutThrowLostNotStraight,
+   lineoutThrowLostOutright,
+   lineoutThrowLostPenalty,
+   lineoutsToOwnPlayer,
+   lineoutThrowNotStraight,
+   lineoutWonOwnThrow,
+   lineoutWonSteal,
+   totalLineouts,
+   setPieceWon
+FROM MV_TEAM_MATCH_STATS;
+-- VIEW_TEAM_MATCH_RUCK_AND_MAUL_STATS
+CREATE OR REPLACE VIEW VIEW_TEAM_MATCH_RUCK_AND_MAUL_STATS AS
+SELECT -- Informations
+   `uid`,
+   leagueName,
+   season,
+   matchName,
+   matchAbbreviationName,
+   matchDate,
+   teamName,
+   teamAbbreviationName,
+   teamColor,
+   teamLogoUrl,
+   opponentTeamName,
+   totalPlayTime,
+   isWinner,
+   isHome,
+   teamScore,
+   opponentTeamScore,
+   -- Stats
+   rucksLost,
+   rucksWon,
+   rucksTotal,
+   ruckSuccess,
+   maulsWon,
+   maulsLost,
+   maulsTotal,
+   maulsWonOutright,
+   maulsLostOutright,
+   maulsWonPenalty,
+   maulsLostTurnover,
+   maulsWonPenaltyTry,
+   maulsWonTry,
+   maulingMetres
+FROM MV_TEAM_MATCH_STATS;
+-- VIEW_TEAM_MATCH_GENERAL_STATS
+CREATE OR REPLACE VIEW VIEW_TEAM_MATCH_GENERAL_STATS AS
+SELECT -- Informations
+   `uid`,
+   leagueName,
+   season,
+   matchName,
+   matchAbbreviationName,
+   matchDate,
+   teamName,
+   teamAbbreviationName,
+   teamColor,
+   teamLogoUrl,
+   opponentTeamName,
+   totalPlayTime,
+   isWinner,
+   isHome,
+   teamScore,
+   opponentTeamScore,
+   -- Stats
+   matches,
+   won,
+   lost,
+   drawn,
+   numberOfTeams,
+   startingMatches,
+   replacementMatches
+FROM MV_TEAM_MATCH_STATS;
+-- PLAYER_MATCH_STATS
+-- VIEW_PLAYER_MATCH_OFFENSIVE_STATS
+CREATE OR REPLACE VIEW VIEW_PLAYER_MATCH_OFFENSIVE_STATS AS
+SELECT -- Informations
+   `uid`,
+   firstName,
+   lastName,
+   weight,
+   height,
+   teamName,
+   teamAbbreviationName,
+   teamColor,
+   teamLogoUrl,
+   matchName,
+   matchDate,
+   teamScore,
+   opponentTeamScore,
+   isHome,
+   leagueName,
+   season,
+   opponentTeamName,
+   -- Stats
+   passes,
+   runs,
+   metres,
+   attackingKicks,
+   offload,
+   cleanBreaks,
+   defendersBeaten,
+   breakAssist,
+   carriesMetres,
+   gainLine,
+   carriesCrossedGainLine,
+   carriesNotMadeGainLine,
+   carriesSupport,
+   averageGain,
+   dummyHalfMetres,
+   hitUps,
+   hitUpMetres,
+   runFromDummyHalf,
+   tackleBusts
+FROM MV_PLAYER_MATCH_STATS;
+-- VIEW_PLAYER_MATCH_DEFENSIVE_STATS
+CREATE OR REPLACE VIEW VIEW_PLAYER_MATCH_DEFENSIVE_STATS AS
+SELECT -- Informations
+   `uid`,
+   firstName,
+   lastName,
+   weight,
+   height,
+   teamName,
+   teamAbbreviationName,
+   teamColor,
+   teamLogoUrl,
+   matchName,
+   matchDate,
+   teamScore,
+   opponentTeamScore,
+   isHome,
+   leagueName,
+   season,
+   opponentTeamName,
+   -- Stats
+   tackles,
+   tackleSuccess,
+   missedTackles,
+   markerTackles
+FROM MV_PLAYER_MATCH_STATS;
+-- VIEW_PLAYER_MATCH_SCORING_STATS
+CREATE OR REPLACE VIEW VIEW_PLAYER_MATCH_SCORING_STATS AS
+SELECT -- Informations
+   `uid`,
+   firstName,
+   lastName,
+   weight,
+   height,
+   teamName,
+   teamAbbreviationName,
+   teamColor,
+   teamLogoUrl,
+   matchName,
+   matchDate,
+   teamScore,
+   opponentTeamScore,
+   isHome,
+   leagueName,
+   season,
+   opponentTeamName,
+   -- Stats
+   points,
+   tries,
+   tryAssists,
+   tryBonusPoints,
+   losingBonusPoints,
+   conversionGoals,
+   dropGoalsConverted,
+   dropGoalMissed,
+   goals,
+   missedConversionGoals,
+   missedGoals,
+   penaltyGoals,
+   missedPenaltyGoals,
+   goalsFromMark
+FROM MV_PLAYER_MATCH_STATS;
+-- VIEW_PLAYER_MATCH_DISCIPLINE_STATS
+CREATE OR REPLACE VIEW VIEW_PLAYER_MATCH_DISCIPLINE_STATS AS
+SELECT -- Informations
+   `uid`,
+   firstName,
+   lastName,
+   weight,
+   height,
+   teamName,
+   teamAbbreviationName,
+   teamColor,
+   teamLogoUrl,
+   matchName,
+   matchDate,
+   teamScore,
+   opponentTeamScore,
+   isHome,
+   leagueName,
+   season,
+   opponentTeamName,
+   -- Stats
+   freeKickConcededAtLineout,
+   freeKickConcededAtScrum,
+   freeKickConcededInGeneralPlay,
+   freeKickConcededInRuckOrMaul,
+   penaltiesConceded,
+   penaltyConcededCollapsingMaul,
+   penaltyConcededCollapsingOffense,
+   penaltyConcededDelibKnockOn,
+   penaltyConcededDissent,
+   penaltyConcededEarlyTackle,
+   penaltyConcededFoulPlay,
+   penaltyConcededHandlingInRuck,
+   penaltyConcededHighTackle,
+   penaltyConcededKillingRuck,
+   penaltyConcededLineoutOffence,
+   penaltyConcededObstruction,
+   penaltyConcededOffside,
+   penaltyConcededOppHalf,
+   penaltyConcededOther,
+   penaltyConcededOwnHalf,
+   penaltyConcededScrumOffence,
+   penaltyConcededStamping,
+   penaltyConcededWrongSide,
+   totalFreeKicksConceded,
+   onReport,
+   redCards,
+   yellowCards
+FROM MV_PLAYER_MATCH_STATS;
+-- VIEW_PLAYER_MATCH_KICKING_STATS
+CREATE OR REPLACE VIEW VIEW_PLAYER_MATCH_KICKING_STATS AS
+SELECT -- Informations
+   `uid`,
+   firstName,
+   lastName,
+   weight,
+   height,
+   teamName,
+   teamAbbreviationName,
+   teamColor,
+   teamLogoUrl,
+   matchName,
+   matchDate,
+   teamScore,
+   opponentTeamScore,
+   isHome,
+   leagueName,
+   season,
+   opponentTeamName,
+   -- Stats
+   kicks,
+   kickMetres,
+   kickFromHandMetres,
+   kicksFromHand,
+   kickChargedDown,
+   tryKicks,
+   kickTryScored,
+   kickOutOfPlay,
+   kickInField,
+   kickInTouch,
+   kickOppnCollection,
+   kickPossessionLost,
+   kickPossessionRetained,
+   kickTouchInGoal,
+   kickPenaltyBad,
+   kickPenaltyGood,
+   kickPercentSuccess,
+   pcKickPercent,
+   kickReturns,
+   kickReturnMetres,
+   fortyTwenty,
+   penaltyKickForTouchMetres
+FROM MV_PLAYER_MATCH_STATS;
+-- VIEW_PLAYER_MATCH_POSSESSION_CONTROL_STATS
+CREATE OR REPLACE VIEW VIEW_PLAYER_MATCH_POSSESSION_CONTROL_STATS AS
+SELECT -- Informations
+   `uid`,
+   firstName,
+   lastName,
+   weight,
+   height,
+   teamName,
+   teamAbbreviationName,
+   teamColor,
+   teamLogoUrl,
+   matchName,
+   matchDate,
+   teamScore,
+   opponentTeamScore,
+   isHome,
+   leagueName,
+   season,
+   opponentTeamName,
+   -- Stats
+   collectionFailed,
+   collectionFromKick,
+   collectionInterception,
+   collectionLooseBall,
+   collectionSuccess,
+   retainedKicks,
+   trueRetainedKicks,
+   restart22m,
+   restartErrorNotTen,
+   restartErrorOutOfPlay,
+   restartHalfway,
+   restartOppError,
+   restartOppPlayer,
+   restartOwnPlayer,
+   restartsLost,
+   restartsSuccess,
+   restartsWon,
+   handlingError,
+   droppedCatch,
+   badPasses,
+   ballOutOfPlay,
+   pickup,
+   catchFromKick,
+   turnoverWon,
+   turnoversConceded,
+   turnoverOppHalf,
+   turnoverOwnHalf,
+   turnoverLostInRuckOrMaul,
+   turnoverKnockOn,
+   turnoverForwardPass,
+   turnoverCarriedInTouch,
+   turnoverCarriedOver,
+   turnoverKickError,
+   turnoverBadPass
+FROM MV_PLAYER_MATCH_STATS;
+-- VIEW_PLAYER_MATCH_SET_PIECES_STATS
+CREATE OR REPLACE VIEW VIEW_PLAYER_MATCH_SET_PIECES_STATS AS
+SELECT -- Informations
+   `uid`,
+   firstName,
+   lastName,
+   weight,
+   height,
+   teamName,
+   teamAbbreviationName,
+   teamColor,
+   teamLogoUrl,
+   matchName,
+   matchDate,
+   teamScore,
+   opponentTeamScore,
+   isHome,
+   leagueName,
+   season,
+   opponentTeamName,
+   -- Stats
+   scrumsWonFreeKick,
+   scrumsWonOutright,
+   scrumsWonPenalty,
+   scrumsWonPenaltyTry,
+   scrumsWonPushoverTry,
+   scrumsLostFreeKick,
+   scrumsLostOutright,
+   scrumsLostPenalty,
+   scrumsLostReversed,
+   lineoutsWon,
+   lineoutSuccess,
+   lineoutsLost,
+   lineoutsInfringeOpp,
+   lineoutThrowWonClean,
+   lineoutThrowWonFreeKick,
+   lineoutThrowWonPenalty,
+   lineoutThrowWonTap,
+   lineoutThrowLostFreeKick,
+   lineoutThrowLostHandlingError,
+   lineoutThrowLostNotStraight,
+   lineoutThrowLostOutright,
+   lineoutThrowLostPenalty,
+   lineoutsToOwnPlayer,
+   lineoutNonStraight,
+   lineoutWonOppThrow,
+   lineoutWonOwnThrow,
+   lineoutWonSteal,
+   totalLineouts
+FROM MV_PLAYER_MATCH_STATS;
+-- VIEW_PLAYER_MATCH_RUCK_AND_MAUL_STATS
+CREATE OR REPLACE VIEW VIEW_PLAYER_MATCH_RUCK_AND_MAUL_STATS AS
+SELECT -- Informations
+   `uid`,
+   firstName,
+   lastName,
+   weight,
+   height,
+   teamName,
+   teamAbbreviationName,
+   teamColor,
+   teamLogoUrl,
+   matchName,
+   matchDate,
+   teamScore,
+   opponentTeamScore,
+   isHome,
+   leagueName,
+   season,
+   opponentTeamName,
+   -- Stats
+   rucksLost,
+   rucksWon,
+   maulsWon,
+   maulsLost,
+   maulsWonOutright,
+   maulsLostOutright,
+   maulsWonPenalty,
+   maulsLostTurnover,
+   maulsWonPenaltyTry,
+   maulsWonTry
+FROM MV_PLAYER_MATCH_STATS;
+-- VIEW_PLAYER_MATCH_GENERAL_STATS
+CREATE OR REPLACE VIEW VIEW_PLAYER_MATCH_GENERAL_STATS AS
+SELECT -- Informations
+   `uid`,
+   firstName,
+   lastName,
+   weight,
+   height,
+   teamName,
+   teamAbbreviationName,
+   teamColor,
+   teamLogoUrl,
+   matchName,
+   matchDate,
+   teamScore,
+   opponentTeamScore,
+   isHome,
+   leagueName,
+   season,
+   opponentTeamName,
+   -- Stats
+   matches,
+   won,
+   lost,
+   drawn,
+   numberOfTeams,
+   startingMatches,
+   replacementMatches,
+   mintuesPlayedBeforeFirstHalfExtra,
+   minutesPlayedBeforeFirstHalf,
+   minutesPlayedBeforePenaltyShootOut,
+   minutesPlayedBeforeSecondHalfExtra,
+   minutesPlayedBeforeSecondHalf,
+   minutesPlayedFirstHalf,
+   minutesPlayedFirstHalfExtra,
+   minutesPlayedSecondHalf,
+   minutesPlayedSecondHalfExtra,
+   minutesPlayedTotal
+FROM MV_PLAYER_MATCH_STATS;
@@ -0,0 +1,15 @@
+-- Season of the match in the statistics tables : partitioning key of
+-- 0007_season_partitioning.optional.sql, filled by the loader from now on
+ALTER TABLE TEAM_MATCH_STATS ADD COLUMN IF NOT EXISTS matchSeason SMALLINT AFTER matchEspnId;
+ALTER TABLE PLAYER_MATCH_STATS ADD COLUMN IF NOT EXISTS matchSeason SMALLINT AFTER matchEspnId;
+-- Season of the rows already loaded
+UPDATE TEAM_MATCH_STATS tms
+   JOIN MATCHES m ON tms.matchEspnId = m.espnId
+   JOIN LEAGUES l ON m.leagueUid = l.uid
+SET tms.matchSeason = l.season
+WHERE tms.matchSeason IS NULL;
+UPDATE PLAYER_MATCH_STATS pms
+   JOIN MATCHES m ON pms.matchEspnId = m.espnId
+   JOIN LEAGUES l ON m.leagueUid = l.uid
+SET pms.matchSeason = l.season
+WHERE pms.matchSeason IS NULL;
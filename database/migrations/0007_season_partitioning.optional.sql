@@ -0,0 +1,74 @@
+-- Optional : RANGE partitioning of the statistics tables by season, one partition per season.
+-- Applied only when asked : python main.py migrate --optional season_partitioning
+-- Rebuilds both tables : plan it outside of the loading runs.
+--
+-- A partitioned InnoDB table can not have foreign keys, and every unique key of the table must
+-- include the partitioning column : the foreign keys of the statistics tables are dropped (the
+-- loader writes the referenced rows first, see FK_DEPENDENCIES in orchestration/pipeline.py),
+-- and their primary and unique keys get matchSeason.
+ALTER TABLE TEAM_MATCH_STATS
+   DROP FOREIGN KEY IF EXISTS TEAM_MATCH_STATS_ibfk_1,
+   DROP FOREIGN KEY IF EXISTS TEAM_MATCH_STATS_ibfk_2,
+   DROP FOREIGN KEY IF EXISTS TEAM_MATCH_STATS_ibfk_3;
+ALTER TABLE PLAYER_MATCH_STATS
+   DROP FOREIGN KEY IF EXISTS PLAYER_MATCH_STATS_ibfk_1,
+   DROP FOREIGN KEY IF EXISTS PLAYER_MATCH_STATS_ibfk_2;
+-- Rows whose match has no league-season go to the first partition
+UPDATE TEAM_MATCH_STATS SET matchSeason = 0 WHERE matchSeason IS NULL;
+UPDATE PLAYER_MATCH_STATS SET matchSeason = 0 WHERE matchSeason IS NULL;
+ALTER TABLE TEAM_MATCH_STATS
+   MODIFY matchSeason SMALLINT NOT NULL,
+   DROP PRIMARY KEY,
+   ADD PRIMARY KEY (`uid`, matchSeason),
+   DROP INDEX IF EXISTS matchEspnId,
+   ADD UNIQUE matchEspnId (matchEspnId, teamEspnId, matchSeason);
+ALTER TABLE PLAYER_MATCH_STATS
+   MODIFY matchSeason SMALLINT NOT NULL,
+   DROP PRIMARY KEY,
+   ADD PRIMARY KEY (`uid`, matchSeason),
+   DROP INDEX IF EXISTS playerTeamUid,
+   ADD UNIQUE playerTeamUid (playerTeamUid, matchEspnId, matchSeason);
+-- One partition per season : p_old holds the seasons before 2010, p_future the seasons not
+-- created yet (split by database/partitions.py ensure_season_partition() before a season reload)
+ALTER TABLE TEAM_MATCH_STATS PARTITION BY RANGE (matchSeason) (
+   PARTITION p_old VALUES LESS THAN (2010),
+   PARTITION p2010 VALUES LESS THAN (2011),
+   PARTITION p2011 VALUES LESS THAN (2012),
+   PARTITION p2012 VALUES LESS THAN (2013),
+   PARTITION p2013 VALUES LESS THAN (2014),
+   PARTITION p2014 VALUES LESS THAN (2015),
+   PARTITION p2015 VALUES LESS THAN (2016),
+   PARTITION p2016 VALUES LESS THAN (2017),
+   PARTITION p2017 VALUES LESS THAN (2018),
+   PARTITION p2018 VALUES LESS THAN (2019),
+   PARTITION p2019 VALUES LESS THAN (2020),
+   PARTITION p2020 VALUES LESS THAN (2021),
+   PARTITION p2021 VALUES LESS THAN (2022),
+   PARTITION p2022 VALUES LESS THAN (2023),
+   PARTITION p2023 VALUES LESS THAN (2024),
+   PARTITION p2024 VALUES LESS THAN (2025),
+   PARTITION p2025 VALUES LESS THAN (2026),
+   PARTITION p2026 VALUES LESS THAN (2027),
+   PARTITION p_future VALUES LESS THAN MAXVALUE
+);
+ALTER TABLE PLAYER_MATCH_STATS PARTITION BY RANGE (matchSeason) (
+   PARTITION p_old VALUES LESS THAN (2010),
+   PARTITION p2010 VALUES LESS THAN (2011),
+   PARTITION p2011 VALUES LESS THAN (2012),
+   PARTITION p2012 VALUES LESS THAN (2013),
+   PARTITION p2013 VALUES LESS THAN (2014),
+   PARTITION p2014 VALUES LESS THAN (2015),
+   PARTITION p2015 VALUES LESS THAN (2016),
+   PARTITION p2016 VALUES LESS THAN (2017),
+   PARTITION p2017 VALUES LESS THAN (2018),
+   PARTITION p2018 VALUES LESS THAN (2019),
+   PARTITION p2019 VALUES LESS THAN (2020),
+   PARTITION p2020 VALUES LESS THAN (2021),
+   PARTITION p2021 VALUES LESS THAN (2022),
+   PARTITION p2022 VALUES LESS THAN (2023),
+   PARTITION p2023 VALUES LESS THAN (2024),
+   PARTITION p2024 VALUES LESS THAN (2025),
+   PARTITION p2025 VALUES LESS THAN (2026),
+   PARTITION p2026 VALUES LESS THAN (2027),
+   PARTITION p_future VALUES LESS THAN MAXVALUE
+);
@@ -0,0 +1,220 @@
+import logging
+from contextlib import contextmanager
+from typing import Callable, Dict, Any, Tuple
+
+from database.analytics import refresh_analytics
+from database.db_writer import DBWriter
+
+##########################################	GLOBAL SCOPE	#######################################
+# logs
+logger = logging.getLogger(__name__)
+
+# Statistics tables partitioned by season (database/migrations/0007_season_partitioning.optional.sql)
+PARTITIONED_TABLES = ("TEAM_MATCH_STATS", "PLAYER_MATCH_STATS")
+PARTITION_COLUMN = "matchSeason"
+
+# Primary key of the statistics tables, keying their rows in the row hash index (see `database.row_hashes.RowHashIndex`)
+PRIMARY_KEY = "uid"
+
+# Last partition of the tables, holding the seasons without partition of their own
+FUTURE_PARTITION = "p_future"
+
+# Named lock of the partition changes of a season : one league-season of a season creates or swaps its partitions at a time
+SEASON_LOCK_NAME = "rugby_db_season_{season}"
+SEASON_LOCK_TIMEOUT = 600
+
+##########################################	CLASS	###########################################
+
+class PartitionError(Exception):
+    pass
+
+##########################################	FUNCTIONS	###########################################
+
+def get_range_partitions(writer: DBWriter, table_name: str) -> list[Tuple[str, int | None]]:
+    """
+    Reads the RANGE partitions of a table.
+
+    Args:
+        writer (DBWriter): The database writer.
+        table_name (str): Name of the table.
+
+    Returns:
+        list[Tuple[str, int | None]]: The name and upper bound (None for MAXVALUE) of each partition, in order.
+        Empty when the table is not partitioned by RANGE.
+    """
+    rows = writer.select("""
+        SELECT PARTITION_NAME AS partitionName, PARTITION_METHOD AS partitionMethod, PARTITION_DESCRIPTION AS upperBound
+        FROM information_schema.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE() AND UPPER(TABLE_NAME) = %s AND PARTITION_NAME IS NOT NULL
+        ORDER BY PARTITION_ORDINAL_POSITION
+    """, (table_name.upper(),))
+    if any(row["partitionMethod"] != "RANGE" for row in rows):
+        return []
+    return [(row["partitionName"], None if row["upperBound"] == "MAXVALUE" else int(row["upperBound"])) for row in rows]
+
+#--------------------------------------------------------------------------------------------------
+
+def get_season_partitions(writer: DBWriter, table_name: str) -> Dict[int, str]:
+    """
+    Lists the partitions of a table holding exactly one season.
+
+    Args:
+        writer (DBWriter): The database writer.
+        table_name (str): Name of the table.
+
+    Returns:
+        Dict[int, str]: The partition name of each season, e.g. {2024: "p2024"}. Empty when the table is not partitioned.
+    """
+    seasons = {}
+    lower_bound = None
+    for partition_name, upper_bound in get_range_partitions(writer, table_name):
+        if upper_bound is not None and lower_bound is not None and upper_bound == lower_bound + 1:
+            seasons[lower_bound] = partition_name
+        lower_bound = upper_bound
+    return seasons
+
+#--------------------------------------------------------------------------------------------------
+
+def is_season_partitioned(writer: DBWriter) -> bool:
+    """Returns True when every statistics table is partitioned by season, see `PARTITIONED_TABLES`."""
+    return all(get_range_partitions(writer, table_name) for table_name in PARTITIONED_TABLES)
+
+#--------------------------------------------------------------------------------------------------
+
+@contextmanager
+def season_lock(writer: DBWriter, season: int):
+    """
+    Holds the named lock of a season on the connection of the writer, see `SEASON_LOCK_NAME`.
+
+    Raises:
+        PartitionError: If the lock is held by another connection for more than `SEASON_LOCK_TIMEOUT` seconds.
+    """
+    lock_name = SEASON_LOCK_NAME.format(season=season)
+    lock_rows = writer.select("SELECT GET_LOCK(%s, %s) AS acquired", (lock_name, SEASON_LOCK_TIMEOUT))
+    if not lock_rows or lock_rows[0]["acquired"] != 1:
+        raise PartitionError(f"Lock of the season {season} held by another process for more than {SEASON_LOCK_TIMEOUT} seconds.")
+    try:
+        yield
+    finally:
+        writer.select("SELECT RELEASE_LOCK(%s) AS released", (lock_name,))
+
+#--------------------------------------------------------------------------------------------------
+
+def ensure_season_partition(writer: DBWriter, table_name: str, season: int) -> str:
+    """
+    Returns the partition of a season, and creates it when the season is still in the last
+    partition (`FUTURE_PARTITION`) : the last partition is split into one partition per season
+    up to this season, and a new last partition. Call it under the lock of the season (see
+    `season_lock()`) : the partitions are read again, so a partition created meanwhile by another
+    process is reused.
+
+    Args:
+        writer (DBWriter): The database writer.
+        table_name (str): Name of the partitioned table.
+        season (int): The season year.
+
+    Returns:
+        str: The name of the partition of the season.
+
+    Raises:
+        PartitionError: If the season shares a partition with other seasons (seasons before the first
+                        partition of its own) or the table has no last partition to split.
+    """
+    partitions = get_range_partitions(writer, table_name)
+    season_partitions = get_season_partitions(writer, table_name)
+    if season in season_partitions:
+        return season_partitions[season]
+    if len(partitions) < 2 or partitions[-1] != (FUTURE_PARTITION, None) or season < partitions[-2][1]:
+        raise PartitionError(f"Season {season} has no partition of its own in the {table_name} table.")
+
+    new_partitions = [f"PARTITION p{year} VALUES LESS THAN ({year + 1})" for year in range(partitions[-2][1], season + 1)]
+    new_partitions.append(f"PARTITION {FUTURE_PARTITION} VALUES LESS THAN MAXVALUE")
+    writer.execute([(f"ALTER TABLE {table_name} REORGANIZE PARTITION {FUTURE_PARTITION} INTO ({', '.join(new_partitions)})", None)])
+    logger.info(f"Partitions of the seasons {partitions[-2][1]} to {season} created in the {table_name} table.")
+    return f"p{season}"
+
+#--------------------------------------------------------------------------------------------------
+
+def get_staging_table(table_name: str, league_uid: str) -> str:
+    return f"{table_name}_RELOAD_{league_uid.upper()}"
+
+#--------------------------------------------------------------------------------------------------
+
+def reload_league_season(writer: DBWriter, league_uid: str, season: int,
+                         load: Callable[[], Dict[str, int]]) -> Dict[str, int]:
+    """
+    Reloads the statistics of a league-season into empty staging tables, and swaps them into
+    the season partitions of the statistics tables with partition exchange.
+
+    The season partitions are first created if needed, under the named lock of the season.
+    While `load` runs, the writer sends the records of the statistics tables to staging tables
+    (see `DBWriter.table_redirects`) : readers keep the former rows of the season until the swap.
+    Under the named lock of the season, the staging tables then receive the rows of the partition
+    that were not reloaded (other leagues, matches left out of the load), and each staging table
+    is exchanged with the partition of the season in one metadata operation. The rows swapped in
+    and the former rows they replace did not go through the row hash index of the writer : their
+    hashes are forgotten. The staging tables, holding the former rows after the swap, are dropped,
+    and the analytics tables of the league-season are refreshed.
+
+    Rows written to the season partition by another loader between the copy and the swap are
+    lost : reload a season while no other loader writes it.
+
+    Args:
+        writer (DBWriter): The database writer, also used by `load`.
+        league_uid (str): The unique identifier of the league-season.
+        season (int): The season year.
+        load (Callable[[], Dict[str, int]]): Runs the pipeline of the league-season with `writer`,
+                                             see `orchestration.pipeline.run_pipeline()`.
+
+    Returns:
+        Dict[str, int]: The result of `load` : number of records sent to the database, by table.
+
+    Raises:
+        PartitionError: If the season has no partition of its own, or its lock is held for more than `SEASON_LOCK_TIMEOUT` seconds.
+        Exception: Any error raised by `load` : the statistics tables are left unchanged.
+    """
+    with season_lock(writer, season):
+        partition_names = {table_name: ensure_season_partition(writer, table_name, season) for table_name in PARTITIONED_TABLES}
+    staging_tables = {table_name: get_staging_table(table_name, league_uid) for table_name in PARTITIONED_TABLES}
+    statements = []
+    for table_name, staging_table in staging_tables.items():
+        statements += [(f"DROP TABLE IF EXISTS {staging_table}", None),
+                       (f"CREATE TABLE {staging_table} LIKE {table_name}", None),
+                       (f"ALTER TABLE {staging_table} REMOVE PARTITIONING", None)]
+    writer.execute(statements)
+
+    try:
+        writer.table_redirects = {table_name.lower(): staging_table for table_name, staging_table in staging_tables.items()}
+        try:
+            rows_written = load()
+        finally:
+            writer.table_redirects = {}
+
+        swapped_keys = {}
+        try:
+            with season_lock(writer, season):
+                for table_name, staging_table in staging_tables.items():
+                    partition_name = partition_names[table_name]
+                    if writer.row_hashes is not None:
+                        # Rows of the load, and former rows of the reloaded matches, read before the staging table is completed
+                        rows = writer.select(
+                            f"SELECT `{PRIMARY_KEY}` AS primaryKey FROM {staging_table} "
+                            f"UNION SELECT t.`{PRIMARY_KEY}` FROM {table_name} PARTITION ({partition_name}) t "
+                            f"WHERE t.matchEspnId IN (SELECT DISTINCT matchEspnId FROM {staging_table})")
+                        swapped_keys[table_name] = [str(row["primaryKey"]) for row in rows]
+                    # Matches of the load replace their former rows, the other rows of the season are kept
+                    writer.execute([
+                        (f"INSERT INTO {staging_table} SELECT t.* FROM {table_name} PARTITION ({partition_name}) t "
+                         f"WHERE t.matchEspnId NOT IN (SELECT DISTINCT matchEspnId FROM {staging_table})", None),
+                        (f"ALTER TABLE {table_name} EXCHANGE PARTITION {partition_name} WITH TABLE {staging_table}", None),
+                    ])
+        finally:
+            # Also after a failed exchange : a forgotten hash only costs one more write
+            for table_name, keys in swapped_keys.items():
+                writer.row_hashes.invalidate(table_name.lower(), keys) # Keyed like the writes of the pipeline
+    finally:
+        writer.execute([(f"DROP TABLE IF EXISTS {staging_table}", None) for staging_table in staging_tables.values()])
+
+    logger.info(f"Season partitions {sorted(set(partition_names.values()))} of {league_uid} exchanged.")
+    refresh_analytics(writer, [league_uid])
+    return rows_written
@@ -0,0 +1,148 @@
+import hashlib
+import json
+import logging
+import sqlite3
+from typing import Dict, Any, Tuple
+
+##########################################	GLOBAL SCOPE	#######################################
+# logs
+logger = logging.getLogger(__name__)
+
+# Primary keys looked up per query (SQLite limits the number of parameters)
+LOOKUP_BATCH_SIZE = 500
+
+##########################################	CLASS	###########################################
+
+class RowHashIndex:
+    """
+        A local side index of the content hash of every row upserted in the database.
+
+        Upserted tables (teams, standings, players ...) are sent again on every run, while
+        most of their rows did not change. The index keeps, by table and primary key, the
+        hash of the last row written : rows with the same hash are dropped before reaching
+        the database, and only new or changed rows are written.
+
+        The index is a SQLite file, so it survives between runs and can be shared by the
+        processes of one host. It only knows the rows written through it : delete the file
+        to force a full rewrite (e.g. after a manual change of the database).
+
+        Attributes:
+            path (str): Path of the SQLite file.
+
+        Methods:
+            filter_changed(table_name, primary_key, records_data): Splits new or changed rows from unchanged rows.
+            update(table_name, primary_key, records_data): Stores the hashes of rows written in the database.
+            invalidate(table_name, keys): Forgets the hashes of rows written in the database without the index.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS ROW_HASH (
+                tableName TEXT NOT NULL,
+                primaryKey TEXT NOT NULL,
+                hash TEXT NOT NULL,
+                PRIMARY KEY (tableName, primaryKey)
+            )
+        """)
+
+    def _get_hashes(self, table_name: str, keys: list[str]) -> Dict[str, str]:
+        hashes = {}
+        for i in range(0, len(keys), LOOKUP_BATCH_SIZE):
+            batch_keys = keys[i:i + LOOKUP_BATCH_SIZE]
+            placeholders = ", ".join(["?"] * len(batch_keys))
+            rows = self.conn.execute(
+                f"SELECT primaryKey, hash FROM ROW_HASH WHERE tableName = ? AND primaryKey IN ({placeholders})",
+                (table_name, *batch_keys),
+            )
+            hashes.update(rows.fetchall())
+        return hashes
+
+    def filter_changed(self, table_name: str, primary_key: str,
+                       records_data: list[Dict[str, Any]]) -> Tuple[list[Dict[str, Any]], list[str]]:
+        """
+        Splits the records of a table between new or changed records and unchanged records.
+
+        Args:
+            table_name (str): Name of the table.
+            primary_key (str): Name of the primary key column.
+            records_data (list[Dict[str, Any]]): Records to write.
+
+        Returns:
+            changed_records (list[Dict[str, Any]]): The new or changed records.
+            changed_keys (list[str]): The primary keys of the changed records (new records excluded).
+        """
+        stored_hashes = self._get_hashes(table_name, [str(record[primary_key]) for record in records_data])
+        changed_records = []
+        changed_keys = []
+        for record in records_data:
+            key = str(record[primary_key])
+            stored_hash = stored_hashes.get(key)
+            if stored_hash == get_row_hash(record):
+                continue
+            if stored_hash is not None:
+                changed_keys.append(key)
+            changed_records.append(record)
+        return changed_records, changed_keys
+
+    def update(self, table_name: str, primary_key: str, records_data: list[Dict[str, Any]]):
+        """
+        Stores the hashes of records written in the database. Called once the write is
+        committed, so a failed write is retried on the next run.
+
+        Args:
+            table_name (str): Name of the table.
+            primary_key (str): Name of the primary key column.
+            records_data (list[Dict[str, Any]]): Records written.
+        """
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO ROW_HASH (tableName, primaryKey, hash) VALUES (?, ?, ?)",
+                [(table_name, str(record[primary_key]), get_row_hash(record)) for record in records_data],
+            )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def invalidate(self, table_name: str, keys: list[str]):
+        """
+        Forgets the hashes of rows written or deleted in the database without the index,
+        so their next upsert is written whatever its content.
+
+        Args:
+            table_name (str): Name of the table.
+            keys (list[str]): The primary keys of the rows.
+        """
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            for i in range(0, len(keys), LOOKUP_BATCH_SIZE):
+                batch_keys = keys[i:i + LOOKUP_BATCH_SIZE]
+                placeholders = ", ".join(["?"] * len(batch_keys))
+                self.conn.execute(f"DELETE FROM ROW_HASH WHERE tableName = ? AND primaryKey IN ({placeholders})",
+                                  (table_name, *batch_keys))
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def close(self):
+        self.conn.close()
+
+##########################################	FUNCTIONS	###########################################
+
+def get_row_hash(record: Dict[str, Any]) -> str:
+    """
+    Computes the content hash of a record, independent of the order of its columns.
+
+    Args:
+        record (Dict[str, Any]): The record.
+
+    Returns:
+        str: The hexadecimal hash of the record.
+    """
+    content = json.dumps(dict(record), sort_keys=True, default=str)
+    return hashlib.blake2b(content.encode("utf-8"), digest_size=16).hexdigest()
@@ -0,0 +1,161 @@
+import json
+import logging
+import os
+import re
+from functools import lru_cache
+from typing import Dict, Any, Tuple
+
+from config.metrics import get_metrics
+
+##########################################	GLOBAL SCOPE	#######################################
+# logs
+logger = logging.getLogger(__name__)
+
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "create_tables.sql")
+
+# JSON column of the statistics tables holding the values without column
+OVERFLOW_COLUMN = "extraStats"
+
+# SQL type of the columns of statistics unknown to the schema
+DEFAULT_STAT_DEFINITION = "DECIMAL(8, 3)"
+
+# File of the ALTER TABLE statements written at the end of a command (None to only log the drift)
+_alter_sql_path = None
+
+##########################################	FUNCTIONS	###########################################
+
+def conform_records(table_name: str, records_data: list[Dict[str, Any]],
+                    columns: frozenset[str]) -> Tuple[list[Dict[str, Any]], Dict[str, int]]:
+    """
+    Fits records to the columns of their table in the database.
+
+    Values without column are moved to the JSON overflow column when the table has one
+    (see `OVERFLOW_COLUMN`), merged with the values already there, and dropped otherwise,
+    so an unknown statistic does not fail the INSERT of the whole batch. Records usually share
+    their columns : the check runs once per distinct set of columns, records of a known set
+    are returned unchanged.
+
+    Args:
+        table_name (str): Name of the table.
+        records_data (list[Dict[str, Any]]): Records to insert.
+        columns (frozenset[str]): Lower-case names of the columns of the table.
+
+    Returns:
+        records_data (list[Dict[str, Any]]): The records, with only columns of the table.
+        drift (Dict[str, int]): Records holding each column missing in the table.
+    """
+    has_overflow = OVERFLOW_COLUMN.lower() in columns
+    unknown_by_keys: Dict[tuple, tuple] = {}
+    drift: Dict[str, int] = {}
+    conformed = []
+    for record in records_data:
+        keys = tuple(record.keys())
+        unknown = unknown_by_keys.get(keys)
+        if unknown is None:
+            unknown = unknown_by_keys[keys] = tuple(key for key in keys if key.lower() not in columns)
+        if not unknown:
+            conformed.append(record)
+            continue
+        for key in unknown:
+            drift[key] = drift.get(key, 0) + 1
+        conformed_record = {key: value for key, value in record.items() if key not in unknown}
+        overflow = {key: record[key] for key in unknown if record[key] is not None and key != OVERFLOW_COLUMN}
+        if has_overflow and overflow:
+            previous = conformed_record.get(OVERFLOW_COLUMN)
+            overflow = (json.loads(previous) if previous else {}) | overflow
+            conformed_record[OVERFLOW_COLUMN] = json.dumps(overflow, sort_keys=True, default=str)
+        conformed.append(conformed_record)
+
+    for column, rows in drift.items():
+        get_metrics().record_schema_drift(table_name, column, rows)
+    if drift:
+        logger.warning("Columns missing in the %s table, values %s : %s", table_name,
+                       f"kept in {OVERFLOW_COLUMN}" if has_overflow else "dropped", sorted(drift))
+    return conformed, drift
+
+#--------------------------------------------------------------------------------------------------
+
+@lru_cache(maxsize=None)
+def get_column_definitions(table_name: str) -> Dict[str, str]:
+    """
+    Reads the SQL definition of the columns of a table in the database schema (database/create_tables.sql).
+
+    Args:
+        table_name (str): Name of the table (case insensitive).
+
+    Returns:
+        Dict[str, str]: The definition of each column, e.g. {"passes": "DECIMAL(8, 3)"}. Empty if the table is not in the schema.
+    """
+    with open(SCHEMA_PATH, encoding="utf-8") as schema_file:
+        schema = schema_file.read()
+    table_match = re.search(rf"CREATE TABLE IF NOT EXISTS {table_name.upper()} \((.*?)\n\);", schema, re.DOTALL)
+    if table_match is None:
+        return {}
+    definitions = {}
+    for line in table_match.group(1).splitlines():
+        column_match = re.match(r"\s*`?(\w+)`?\s+([A-Z]+(?:\s*\([^)]*\))?(?: NOT NULL)?)", line)
+        if column_match is None or column_match.group(1) in ("UNIQUE", "FOREIGN", "PRIMARY", "INDEX", "KEY"):
+            continue
+        definitions[column_match.group(1)] = column_match.group(2)
+    return definitions
+
+#--------------------------------------------------------------------------------------------------
+
+def generate_alter_statements(drift: Dict[str, Dict[str, int]]) -> list[str]:
+    """
+    Generates the statements adding the missing columns of a schema drift.
+
+    Columns of the schema file keep their definition, unknown statistics are added as
+    `DEFAULT_STAT_DEFINITION`. The values already kept in the overflow column are copied to
+    the new column.
+
+    Args:
+        drift (Dict[str, Dict[str, int]]): Records holding each missing column, by table,
+                                           see `config.metrics.MetricsRegistry.get_schema_drift()`.
+
+    Returns:
+        list[str]: The ALTER TABLE and UPDATE statements.
+    """
+    statements = []
+    for table_name, columns in sorted(drift.items()):
+        definitions = get_column_definitions(table_name)
+        # The overflow column first : the next statements read it
+        for column in sorted(columns, key=lambda column: (column != OVERFLOW_COLUMN, column)):
+            definition = definitions.get(column, DEFAULT_STAT_DEFINITION)
+            statements.append(f"ALTER TABLE {table_name.upper()} ADD COLUMN `{column}` {definition};")
+            if column != OVERFLOW_COLUMN and OVERFLOW_COLUMN in definitions:
+                path = f'$."{column}"'
+                statements.append(f"UPDATE {table_name.upper()} SET `{column}` = JSON_EXTRACT({OVERFLOW_COLUMN}, '{path}') "
+                                  f"WHERE `{column}` IS NULL AND JSON_CONTAINS_PATH({OVERFLOW_COLUMN}, 'one', '{path}');")
+    return statements
+
+#--------------------------------------------------------------------------------------------------
+
+def log_schema_drift(logger: logging.Logger):
+    """
+    Logs the columns missing in the database during the run, and writes the statements adding
+    them to the file of the process, if any (see `set_alter_sql_path()`).
+    """
+    drift = get_metrics().get_schema_drift()
+    if not drift:
+        return
+    lines = ["Schema drift, values without column (records) :"]
+    for table_name, columns in sorted(drift.items()):
+        for column, rows in sorted(columns.items()):
+            lines.append(f"  {table_name + '.' + column:<70} {rows:>9}")
+    alter_sql_path = _alter_sql_path
+    if alter_sql_path:
+        with open(alter_sql_path, "w", encoding="utf-8") as alter_file:
+            alter_file.write("\n".join(generate_alter_statements(drift)) + "\n")
+        lines.append(f"Statements adding the columns written to '{alter_sql_path}'.")
+    logger.warning("\n".join(lines))
+
+#--------------------------------------------------------------------------------------------------
+
+# Utility functions to set / obtain the file of the ALTER TABLE statements of the process (None to disable it)
+def set_alter_sql_path(path: str | None):
+    global _alter_sql_path
+    _alter_sql_path = path
+
+def get_alter_sql_path() -> str | None:
+    return _alter_sql_path
@@ -1,9 +1,10 @@
-import json
 import logging
 from typing import Dict, Any
 from pymysql import connect, Error as MySQLError
 from contextlib import contextmanager
 
+from config.tracing import trace_span
+
 ##########################################	GLOBAL SCOPE	#######################################
 # logs
 logger = logging.getLogger(__name__)
@@ -27,6 +28,59 @@ def create_connection(db_config):
 
 #--------------------------------------------------------------------------------------------------
 
+def select_records(conn: connect, sql: str, values: tuple = ()) -> list[Dict[str, Any]]:
+    """
+    Runs a SELECT query and returns its rows.
+
+    Args:
+        conn (connect): MySQL connection object.
+        sql (str): The SELECT query, with %s placeholders.
+        values (tuple, optional): The values of the placeholders. Defaults to ().
+
+    Returns:
+        list[Dict[str, Any]]: The rows of the query result.
+
+    Raises:
+        Error: If a MySQL-specific error occurs.
+    """
+    try :
+        with conn.cursor() as cursor:
+            cursor.execute(sql, values)
+            return list(cursor.fetchall())
+    except MySQLError as err:
+        logger.error(f"MySQL error when select records : {err.args[1]}")
+        raise
+
+#--------------------------------------------------------------------------------------------------
+
+def execute_statements(conn: connect, statements: list[tuple[str, tuple | None]]) -> list[int]:
+    """
+    Runs statements (DELETE, INSERT ... SELECT ...) in one transaction : either every statement
+    is committed, or none.
+
+    Args:
+        conn (connect): MySQL connection object.
+        statements (list[tuple[str, tuple | None]]): The statements, with %s placeholders, and the values of
+                                                     the placeholders (None for a statement without placeholder).
+
+    Returns:
+        list[int]: The number of rows affected by each statement.
+
+    Raises:
+        Error: If a MySQL-specific error occurs.
+    """
+    try :
+        with conn.cursor() as cursor:
+            row_counts = [cursor.execute(sql, values) for sql, values in statements]
+        conn.commit()
+        return row_counts
+    except MySQLError as err:
+        logger.error(f"MySQL error when execute statements : {err.args[1]}")
+        conn.rollback()
+        raise
+
+#--------------------------------------------------------------------------------------------------
+
 def is_record_exist(cursor, table_name: str, record_data: Dict[str, Any]) -> bool:
     """
     Check if a record exists in the specified table.
@@ -60,7 +114,7 @@ def is_record_exist(cursor, table_name: str, record_data: Dict[str, Any]) -> boo
     
     except MySQLError as err:
         logger.error(f"MySQL error when checking record existence: {err.args[1]}")
-        logger.error(f"Table: {table_name}, Data: \n{json.dumps(record_data, indent = 4)}")
+        logger.error("Table: %s, Data: %r", table_name, dict(record_data))
         raise
     except Exception as e :
         logger.error(f"An unexpected error has occurred: {e}")
@@ -101,25 +155,27 @@ def insert(conn: connect, table_name: str, records_data: list[Dict[str, Any]], b
             for i in range(0, len(records_data), batch_size) :
                 # Use batch processing 
                 batch_data = records_data[i:i+batch_size]
-
-                for record in batch_data :
-                    if not is_record_exist(cursor, table_name, record) :
-                        columns = ", ".join(f"`{col}`" for col in record.keys())
-                        placeholders = ", ".join(["%s"] * len(record))
-                        sql = f"INSERT INTO `{table_name}` ({columns}) VALUES ({placeholders})"
-
-                        values = tuple(record.values())
-                        cursor.execute(sql, values)
-                        inserted_count += 1
-                    # else:
-                    #     logger.warning(f"Record already exists: {json.dumps(record, indent = 4)}")
+                # One existence SELECT per record of the batch, timed with the batch rather than one span each
+                with trace_span(f"db_batch {table_name}", "db", table=table_name, rows=len(batch_data), existenceChecks=len(batch_data)):
+                    for record in batch_data :
+                        if not is_record_exist(cursor, table_name, record) :
+                            columns = ", ".join(f"`{col}`" for col in record.keys())
+                            placeholders = ", ".join(["%s"] * len(record))
+                            sql = f"INSERT INTO `{table_name}` ({columns}) VALUES ({placeholders})"
+
+                            values = tuple(record.values())
+                            cursor.execute(sql, values)
+                            inserted_count += 1
+                        # else:
+                        #     logger.warning(f"Record already exists: {json.dumps(record, indent = 4)}")
                     
-                conn.commit()
+                    conn.commit()
 
-        logger.info(f"Inserted {inserted_count}/{len(records_data)} records into {table_name}")
+        logger.info("Inserted %d/%d records into %s", inserted_count, len(records_data), table_name)
+        return inserted_count
     except MySQLError as err:
         logger.error(f"MySQL error when insert record : {err.args[1]}")
-        logger.error(f"Table: {table_name}, Data: \n{json.dumps(record, indent = 4)}")
+        logger.error("Table: %s, Data: %r", table_name, dict(record))
         conn.rollback()
         raise
     except ValueError as val_err:
@@ -144,6 +200,9 @@ def insert_or_ignore(conn: connect, table_name: str, records_data: list[Dict[str
         conn (connect): _description_
         table_name (str): _description_
         records_data (list[Dict[str, Any]]): _description_
+
+    Returns:
+        int: Number of records sent to the database.
     """
     if records_data == [] :
             raise ValueError(f"Records data for {table_name} is empty.")
@@ -154,22 +213,23 @@ def insert_or_ignore(conn: connect, table_name: str, records_data: list[Dict[str
             for i in range(0, len(records_data), batch_size) :
                 # Use batch processing 
                 batch_data = records_data[i:i+batch_size]
+                with trace_span(f"db_batch {table_name}", "db", table=table_name, rows=len(batch_data)):
+                    for record in batch_data :
+                        columns = ", ".join(f"`{col}`" for col in record.keys())
+                        placeholders = ", ".join(["%s"] * len(record))
+                        sql = f"INSERT IGNORE INTO `{table_name}` ({columns}) VALUES ({placeholders})"
 
-                for record in batch_data :
-                    columns = ", ".join(f"`{col}`" for col in record.keys())
-                    placeholders = ", ".join(["%s"] * len(record))
-                    sql = f"INSERT IGNORE INTO `{table_name}` ({columns}) VALUES ({placeholders})"
-
-                    values = tuple(record.values())
-                    cursor.execute(sql, values)
-                    inserted_count += 1
+                        values = tuple(record.values())
+                        cursor.execute(sql, values)
+                        inserted_count += 1
 
-                conn.commit()
+                    conn.commit()
 
-        logger.info(f"Inserted {inserted_count}/{len(records_data)} records into {table_name}")
+        logger.info("Inserted %d/%d records into %s", inserted_count, len(records_data), table_name)
+        return inserted_count
     except MySQLError as err:
         logger.error(f"MySQL error when insert record : {err.args[1]}")
-        logger.error(f"Table: {table_name}, Data: \n{json.dumps(record, indent = 4)}")
+        logger.error("Table: %s, Data: %r", table_name, dict(record))
         conn.rollback()
         raise
     except ValueError as val_err:
@@ -194,6 +254,9 @@ def insert_with_update(conn: connect, table_name: str, records_data: list[Dict[s
         conn (connect): _description_
         table_name (str): _description_
         records_data (list[Dict[str, Any]]): _description_
+
+    Returns:
+        int: Number of records sent to the database.
     """
     if records_data == [] :
             raise ValueError(f"Records data for {table_name} is empty.")
@@ -204,26 +267,27 @@ def insert_with_update(conn: connect, table_name: str, records_data: list[Dict[s
             for i in range(0, len(records_data), batch_size) :
                 # Use batch processing 
                 batch_data = records_data[i:i+batch_size]
-
-                for record in batch_data :
-                    columns = ", ".join(f"`{col}`" for col in record.keys())
-                    placeholders = ", ".join(["%s"] * len(record))
-                    update_str = ", ".join([f"{col} = VALUES({col})" for col in record.keys()])
-                    sql = f"""
-                            INSERT INTO `{table_name}` ({columns}) 
-                            VALUES ({placeholders})
-                            ON DUPLICATE KEY UPDATE {update_str}
-                        """
+                with trace_span(f"db_batch {table_name}", "db", table=table_name, rows=len(batch_data)):
+                    for record in batch_data :
+                        columns = ", ".join(f"`{col}`" for col in record.keys())
+                        placeholders = ", ".join(["%s"] * len(record))
+                        update_str = ", ".join([f"{col} = VALUES({col})" for col in record.keys()])
+                        sql = f"""
+                                INSERT INTO `{table_name}` ({columns}) 
+                                VALUES ({placeholders})
+                                ON DUPLICATE KEY UPDATE {update_str}
+                            """
                     
-                    values = tuple(record.values())
-                    cursor.execute(sql, values)
-                    inserted_count += 1
+                        values = tuple(record.values())
+                        cursor.execute(sql, values)
+                        inserted_count += 1
 
-                conn.commit()
-        logger.info(f"Inserted {inserted_count}/{len(records_data)} records into {table_name}")
+                    conn.commit()
+        logger.info("Inserted %d/%d records into %s", inserted_count, len(records_data), table_name)
+        return inserted_count
     except MySQLError as err:
         logger.error(f"MySQL error when insert record : {err.args[1]}")
-        logger.error(f"Table: {table_name}, Data: \n{json.dumps(record, indent = 4)}")
+        logger.error("Table: %s, Data: %r", table_name, dict(record))
         conn.rollback()
         raise
     except ValueError as val_err:
@@ -1,94 +1,383 @@
-from datetime import datetime
 import logging
-import json
-
-from config import logging_config
-from pymysql import connect, Error as PymysqlError
-from typing import Dict, Any
-
-from config.db_config import set_db_config, ui_db_config
-from config.scraper_config import ui_scraper_config
-from database.sql_functions import create_connection, insert, insert_or_ignore, insert_with_update
-from processing.leagues_data import process_league_season_data
-from processing.matches_data import process_matches_data, process_team_match_stats_data
-from processing.stadiums_data import process_stadiums_data
-from processing.standings_data import process_standings_data
-from processing.teams_data import process_teams_data
-from processing.players_data import process_player_match_stats_data, process_players_data
-from scraping.events_page import filter_valid_event_pages, scrape_event_pages_by_date_range, scrape_event_pages_for_gameday
-from scraping.players_page import scrape_roster_pages
-from scraping.standings_page import scrape_standing_pages
-from config.api_counter import get_counter
+import sys
+
+import click
+
+from config.logging_config import log_warning_summary, setup_logging
+from config.metrics import get_default_report_path, get_metrics, write_run_report
+from storage.league_catalog import DEFAULT_CATALOG_PATH
+from storage.quarantine import DEFAULT_QUARANTINE_PATH, log_quarantine_summary, set_max_invalid_ratio, set_quarantine_path
 
 ##########################################	GLOBAL SCOPE	#######################################
 # logs
 
 logger = logging.getLogger(__name__)
-    
-##########################################	 FUNCTION   ###########################################
-
-def get_event_pages(league_data : Dict[str, Any], is_full_season_scrape : bool) -> list[Dict[str, Any]]:
-    if is_full_season_scrape : # Retrieve data for the entire specified season
-        start_date = league_data["startDate"]
-        end_date = league_data["endDate"]
-        event_pages = scrape_event_pages_by_date_range(league_data["espnId"], start_date, end_date)
-    else : # Retrieve data for the lastes gameday of the current season
-            event_pages = scrape_event_pages_for_gameday(league_data["espnId"], "")
-            
-    filtered_event_pages = filter_valid_event_pages(event_pages)
-    return filtered_event_pages
+
+# Heavy modules (pymysql, requests, numpy, scraping and processing modules ...) are imported by
+# the commands using them : `--help` and quick commands do not pay for them. See benchmarks/bench_startup.py.
 
 ##########################################	   MAIN     ###########################################
 
-def main():
-    
+def main(report_path: str | None = None):
+    from config.db_config import set_db_config, ui_db_config
+    from config.scraper_config import ui_scraper_config
+    from database.db_writer import DBWriter
+    from database.schema_drift import log_schema_drift
+    from database.sql_functions import create_connection
+    from orchestration.pipeline import run_pipeline
+
     db_config = set_db_config(ui_db_config())
     conn =  None
+    writer = None
+    success = False
     try :
         with create_connection(db_config) as conn :
             # --- UI selection
             espn_league_id, season_year, is_full_season_scrape = ui_scraper_config()
-            
-            # --- LEAGUE TABLE
-            league_data = process_league_season_data(espn_league_id, season_year)
-            insert(conn, "leagues", [league_data])
-
-            # --- Get Events Page
-            event_pages = get_event_pages(league_data, is_full_season_scrape)
-
-            # --- STADIUMS TABLE
-            stadiums_data = process_stadiums_data(event_pages)
-            insert(conn, "stadiums", stadiums_data)
-    
-            # --- TEAMS & STANDING TABLE
-            standings_pages = scrape_standing_pages(espn_league_id, season_year)
-            teams_data = process_teams_data(standings_pages)
-            insert_with_update(conn, "teams", teams_data)
-            standings_data = process_standings_data(standings_pages, league_data["uid"])
-            insert_with_update(conn, "standings", standings_data)
-    
-            # --- MATCHES TABLE
-            matches_data = process_matches_data(event_pages, league_data["uid"])
-            insert(conn, "matches", matches_data)
-            teams_matches_stat = process_team_match_stats_data(event_pages)
-            insert(conn, "team_match_stats", teams_matches_stat)
-    
-            # --- PLAYERS TABLE
-            roster_pages = scrape_roster_pages(event_pages)
-            if roster_pages :
-                players_data = process_players_data(roster_pages)
-                insert_with_update(conn, "players", players_data)
-                players_teams_data, players_matches_stat = process_player_match_stats_data(roster_pages, season_year)
-                insert(conn, "player_team", players_teams_data)
-                insert(conn, "player_match_stats", players_matches_stat)
-            else :
-                logger.warning(f"Players datas and statistics by macth are missing in the ESPN database. No insertion of this data will be made in our database.")
+
+            # --- LEAGUE, STADIUMS, TEAMS, STANDINGS, MATCHES AND PLAYERS TABLES
+            writer = DBWriter(conn)
+            run_pipeline(writer, espn_league_id, season_year, is_full_season_scrape)
         
+        success = True
         logger.info(f"The program ended successfully.")
     except Exception :
         logger.error(f"The program ended with errors.")
     finally :
-        logger.info(f"Total API Request made : {get_counter().get_count()}")
-         
+        log_warning_summary(logger)
+        log_quarantine_summary(logger)
+        log_schema_drift(logger)
+        logger.info(f"Total API Request made : {get_metrics().get_request_count()}")
+        # Structured report : requests by endpoint family, time and rows of each stage
+        write_run_report(report_path or get_default_report_path(), {
+            "command": "interactive",
+            "success": success,
+            "rowsWritten": writer.rows_written if writer is not None else {},
+        })
+
+##########################################	   CLI      ###########################################
+
+@click.group(invoke_without_command=True)
+@click.option("--archive", "archive_dir", type=click.Path(file_okay=False), default=None,
+              help="Archive every raw API response in this directory (zstd-compressed JSONL segments).")
+@click.option("--row-hashes", "row_hash_path", type=click.Path(dir_okay=False), default=None,
+              help="Row hash index file : upserted rows unchanged since the last run are not written again.")
+@click.option("--compact-records", is_flag=True,
+              help="Keep the processed statistics rows as compact tuple-backed records (lower peak memory).")
+@click.option("--catalog", "catalog_path", type=click.Path(dir_okay=False), default=DEFAULT_CATALOG_PATH, show_default=True,
+              help="League catalog file : leagues, seasons and season dates are looked up locally.")
+@click.option("--catalog-ttl", type=float, default=24, show_default=True,
+              help="Hours before the leagues and seasons of the catalog are refreshed in the background.")
+@click.option("--report", "report_path", type=click.Path(dir_okay=False), default=None,
+              help="Write the JSON run report (requests by endpoint, stage times and rows) to this file.")
+@click.option("--metrics-port", type=int, default=None,
+              help="Expose the live metrics of the run for Prometheus on http://<metrics-host>:<port>/metrics.")
+@click.option("--metrics-host", default="127.0.0.1", show_default=True, help="Listening address of the metrics endpoint.")
+@click.option("--trace", "trace_path", type=click.Path(dir_okay=False), default=None,
+              help="Write a Chrome trace of the run (API requests, processing, database batches) to this file.")
+@click.option("--profile", "profile_dir", type=click.Path(file_okay=False), default=None,
+              help="Profile every pipeline stage (cProfile and tracemalloc) in a new run directory of this directory.")
+@click.option("--quarantine", "quarantine_path", type=click.Path(dir_okay=False), default=DEFAULT_QUARANTINE_PATH,
+              show_default=True, help="Append the items set aside by the pipeline (invalid event pages ...) to this JSONL file.")
+@click.option("--max-invalid-ratio", type=click.FloatRange(0, 1), default=None,
+              help="Fail a league-season when the share of its quarantined event pages exceeds this ratio (e.g. 0.1).")
+@click.option("--schema-drift-sql", "alter_sql_path", type=click.Path(dir_okay=False), default=None,
+              help="Write the ALTER TABLE statements adding the columns missing in the database to this file.")
+@click.pass_context
+def cli(ctx, archive_dir, row_hash_path, compact_records, catalog_path, catalog_ttl, report_path, metrics_port, metrics_host,
+        trace_path, profile_dir, quarantine_path, max_invalid_ratio, alter_sql_path):
+    """ESPN rugby data scraper. Without command, runs the interactive scraper."""
+    from database.db_writer import set_row_hash_path
+    from database.schema_drift import log_schema_drift, set_alter_sql_path
+    from processing.records import set_compact_records
+    from storage.league_catalog import LeagueCatalog, set_league_catalog
+
+    setup_logging()
+    ctx.ensure_object(dict)
+    ctx.obj["archive_dir"] = archive_dir
+    set_row_hash_path(row_hash_path)
+    set_compact_records(compact_records)
+    set_league_catalog(LeagueCatalog(catalog_path, catalog_ttl * 3600))
+    set_quarantine_path(quarantine_path)
+    set_max_invalid_ratio(max_invalid_ratio)
+    set_alter_sql_path(alter_sql_path)
+    if archive_dir :
+        from config.api_counter import set_archive_writer
+        from storage.response_archive import ResponseArchiveWriter
+        archive_writer = ResponseArchiveWriter(archive_dir)
+        set_archive_writer(archive_writer)
+        ctx.call_on_close(archive_writer.close)
+    if metrics_port is not None :
+        from config.metrics_server import start_metrics_server
+        metrics_server = start_metrics_server(metrics_port, metrics_host)
+        ctx.call_on_close(metrics_server.close)
+    if trace_path :
+        from config.tracing import Tracer, set_tracer
+        tracer = Tracer(trace_path)
+        set_tracer(tracer)
+        ctx.call_on_close(tracer.close)
+    if profile_dir :
+        from config.profiling import StageProfiler, get_default_run_dir, set_stage_profiler
+        stage_profiler = StageProfiler(get_default_run_dir(profile_dir))
+        set_stage_profiler(stage_profiler)
+        ctx.call_on_close(stage_profiler.close)
+    if ctx.invoked_subcommand is None :
+        main(report_path)
+        return
+    ctx.call_on_close(lambda: (log_warning_summary(logger), log_quarantine_summary(logger), log_schema_drift(logger)))
+    if report_path :
+        ctx.call_on_close(lambda: write_run_report(report_path, {"command": ctx.invoked_subcommand}))
+
+@cli.command()
+@click.option("--spec", "spec_path", type=click.Path(exists=True, dir_okay=False), help="Job spec file (.json, .yaml or .yml).")
+@click.option("--target", "target_args", multiple=True, help="Target '<league>:<season>' or '<league>:latest'. Repeatable.")
+@click.option("--parallelism", type=int, default=None, help="Number of targets processed at the same time.")
+@click.option("--cache-size", type=int, default=None, help="Maximum number of cached API responses (0 disables the cache).")
+def batch(spec_path, target_args, parallelism, cache_size):
+    """
+    Non-interactive run over many league-seasons.
+
+    The database connection is read from the RUGBY_DB_* environment variables.
+    """
+    from config.db_config import env_db_config, set_db_config
+    from config.job_config import DEFAULT_JOB_SPEC, load_job_spec, parse_target_arg
+    from orchestration.batch_runner import run_batch
+
+    job_spec = load_job_spec(spec_path) if spec_path else dict(DEFAULT_JOB_SPEC)
+    targets = job_spec["targets"] + [parse_target_arg(target_arg) for target_arg in target_args]
+    if not targets :
+        raise click.UsageError("No target to scrape : use --spec and/or --target.")
+
+    results = run_batch(
+        targets,
+        set_db_config(env_db_config()),
+        parallelism = parallelism if parallelism is not None else job_spec["parallelism"],
+        cache_size = cache_size if cache_size is not None else job_spec["cache_size"],
+    )
+    if not all(result["success"] for result in results) :
+        sys.exit(1)
+
+def resolve_season_units(league_ids, season_years, spec_path, target_args):
+    """Builds the (league, season) units of the backfill and enqueue commands."""
+    from config.job_config import DEFAULT_JOB_SPEC, load_job_spec, parse_target_arg
+    from orchestration.coordinator import list_league_seasons
+
+    job_spec = load_job_spec(spec_path) if spec_path else dict(DEFAULT_JOB_SPEC)
+    targets = job_spec["targets"] + [parse_target_arg(target_arg) for target_arg in target_args]
+    for espn_league_id in league_ids :
+        seasons = season_years or list_league_seasons(espn_league_id)
+        targets += [(espn_league_id, season_year) for season_year in seasons]
+    if not targets or any(season_year is None for _, season_year in targets) :
+        raise click.UsageError("(league, season) units needed : use --league, --spec and/or --target with explicit seasons.")
+    return list(dict.fromkeys(targets))
+
+@cli.command()
+@click.option("--league", "league_ids", type=int, multiple=True, help="League to backfill (every season). Repeatable.")
+@click.option("--season", "season_years", type=int, multiple=True, help="Restrict --league to these seasons. Repeatable.")
+@click.option("--spec", "spec_path", type=click.Path(exists=True, dir_okay=False), help="Job spec file (.json, .yaml or .yml).")
+@click.option("--target", "target_args", multiple=True, help="Unit '<league>:<season>'. Repeatable.")
+@click.option("--workers", type=int, default=4, show_default=True, help="Number of worker processes.")
+@click.option("--rate-limit", type=float, default=0, help="Maximum API requests per second for all workers (0 = no limit).")
+@click.option("--budget", type=int, default=0, help="Maximum API requests for the whole run (0 = no limit).")
+def backfill(league_ids, season_years, spec_path, target_args, workers, rate_limit, budget):
+    """
+    Backfill full seasons with a pool of worker processes.
+
+    The database connection is read from the RUGBY_DB_* environment variables.
+    """
+    from config.db_config import env_db_config, set_db_config
+    from orchestration.coordinator import run_backfill
+
+    targets = resolve_season_units(league_ids, season_years, spec_path, target_args)
+    archive_dir = click.get_current_context().obj["archive_dir"]
+    results = run_backfill(targets, set_db_config(env_db_config()), workers, rate_limit, budget, archive_dir)
+    if not all(result["success"] for result in results) :
+        sys.exit(1)
+
+@cli.command()
+@click.argument("archive_path", type=click.Path(exists=True, file_okay=False))
+@click.option("--league", "league_ids", type=int, multiple=True, help="League to rebuild. Repeatable.")
+@click.option("--season", "season_years", type=int, multiple=True, help="Season of --league to rebuild. Repeatable.")
+@click.option("--spec", "spec_path", type=click.Path(exists=True, dir_okay=False), help="Job spec file (.json, .yaml or .yml).")
+@click.option("--target", "target_args", multiple=True, help="Unit '<league>:<season>'. Repeatable.")
+@click.option("--workers", type=int, default=4, show_default=True, help="Number of worker processes.")
+def reprocess(archive_path, league_ids, season_years, spec_path, target_args, workers):
+    """
+    Rebuild league-seasons from a raw response archive, without any API request.
+
+    The database connection is read from the RUGBY_DB_* environment variables.
+    """
+    from config.db_config import env_db_config, set_db_config
+    from orchestration.reprocess import run_reprocess
+
+    if league_ids and not season_years :
+        raise click.UsageError("--league needs --season : the seasons to rebuild are read from the archive only.")
+    targets = resolve_season_units(league_ids, season_years, spec_path, target_args)
+    results = run_reprocess(targets, set_db_config(env_db_config()), archive_path, workers)
+    if not all(result["success"] for result in results) :
+        sys.exit(1)
+
+queue_option = click.option("--queue", "queue_url", default="mysql", show_default=True,
+                            help="Work queue : 'mysql' (scraper database, shared by all hosts) or 'sqlite:///<path>'.")
+
+@cli.command()
+@queue_option
+@click.option("--league", "league_ids", type=int, multiple=True, help="League to enqueue (every season). Repeatable.")
+@click.option("--season", "season_years", type=int, multiple=True, help="Restrict --league to these seasons. Repeatable.")
+@click.option("--spec", "spec_path", type=click.Path(exists=True, dir_okay=False), help="Job spec file (.json, .yaml or .yml).")
+@click.option("--target", "target_args", multiple=True, help="Unit '<league>:<season>'. Repeatable.")
+def enqueue(queue_url, league_ids, season_years, spec_path, target_args):
+    """
+    Add league-seasons to the distributed work queue.
+
+    The database connection is read from the RUGBY_DB_* environment variables.
+    """
+    from config.db_config import env_db_config, set_db_config
+    from orchestration.work_queue import SEASON_STAGE, create_work_queue, make_task
+
+    targets = resolve_season_units(league_ids, season_years, spec_path, target_args)
+    queue = create_work_queue(queue_url, set_db_config(env_db_config()))
+    new_tasks = queue.enqueue([make_task(league, season, SEASON_STAGE) for league, season in targets])
+    logger.info(f"{new_tasks}/{len(targets)} season tasks enqueued. Queue : {queue.stats()}")
+    queue.close()
+
+@cli.command()
+@queue_option
+@click.option("--lease", "lease_seconds", type=float, default=300, show_default=True, help="Lease duration of a claimed task, in seconds.")
+@click.option("--max-attempts", type=int, default=3, show_default=True, help="Deliveries of a task before it is failed.")
+@click.option("--poll-interval", type=float, default=10, show_default=True, help="Seconds to wait when the queue is empty.")
+@click.option("--exit-when-empty", is_flag=True, help="Stop when no task is available.")
+def worker(queue_url, lease_seconds, max_attempts, poll_interval, exit_when_empty):
+    """
+    Claim and run tasks of the distributed work queue.
+
+    The database connection is read from the RUGBY_DB_* environment variables.
+    """
+    from config.db_config import env_db_config, set_db_config
+    from orchestration.queue_worker import run_worker
+    from orchestration.work_queue import create_work_queue
+
+    db_config = set_db_config(env_db_config())
+    queue = create_work_queue(queue_url, db_config, lease_seconds, max_attempts)
+    try :
+        run_worker(queue, db_config, poll_interval, exit_when_empty)
+    finally :
+        queue.close()
+
+@cli.command()
+@click.option("--league", "league_ids", type=int, multiple=True, required=True, help="League to watch. Repeatable.")
+@click.option("--max-live-interval", type=float, default=600, show_default=True,
+              help="Maximum seconds between two polls of a league with a live match.")
+@click.option("--idle-interval", type=float, default=1800, show_default=True,
+              help="Seconds between two polls of a league without live match.")
+def live(league_ids, max_live_interval, idle_interval):
+    """
+    Watch today's matches of leagues and keep their rows up to date, until Ctrl+C.
+
+    The database connection is read from the RUGBY_DB_* environment variables.
+    """
+    from config.db_config import env_db_config, set_db_config
+    from orchestration.live_daemon import run_live
+
+    run_live(list(league_ids), set_db_config(env_db_config()), max_live_interval=max_live_interval, idle_interval=idle_interval)
+
+@cli.command("quarantine")
+@click.option("--retry", is_flag=True, help="Scrape and process the quarantined matches again, and write their rows.")
+def quarantine_command(retry):
+    """
+    Report the items of the quarantine file (see --quarantine), or retry its matches.
+
+    The database connection is read from the RUGBY_DB_* environment variables.
+    """
+    from storage.quarantine import count_quarantine, get_quarantine_path, load_quarantine
+
+    quarantine_path = get_quarantine_path()
+    if not retry :
+        items = load_quarantine(quarantine_path)
+        if not items :
+            logger.info(f"No quarantined item in '{quarantine_path}'.")
+        log_quarantine_summary(logger, count_quarantine(items))
+        return
+
+    from config.db_config import env_db_config, set_db_config
+    from database.db_writer import DBWriter
+    from database.sql_functions import create_connection
+    from orchestration.quarantine_retry import retry_quarantined_matches
+
+    with create_connection(set_db_config(env_db_config())) as conn :
+        result = retry_quarantined_matches(DBWriter(conn), quarantine_path)
+    if result["failedSeasons"] or result["quarantinedAgain"] :
+        sys.exit(1)
+
+@cli.command()
+@click.option("--refresh", is_flag=True, help="Rebuild the analytics tables of the targets (every league-season without --target).")
+@click.option("--target", "target_args", multiple=True, help="League-season '<league>:<season>' or '<league>:latest'. Repeatable.")
+@click.option("--level", type=click.Choice(["team", "player"]), default="team", show_default=True, help="Statistics level to read.")
+@click.option("--category", default=None, help="Statistics category to read (offensive, kicking ...), every column by default.")
+@click.option("--team", "team_name", default=None, help="Only the rows of this team.")
+@click.option("--limit", type=int, default=None, help="Maximum number of rows to read.")
+@click.option("--output", "output_path", type=click.Path(dir_okay=False), default=None, help="CSV file to write, stdout by default.")
+def analytics(refresh, target_args, level, category, team_name, limit, output_path):
+    """
+    Read match statistics from the analytics tables (CSV), or rebuild them.
+
+    The database connection is read from the RUGBY_DB_* environment variables.
+    """
+    import csv
+    from config.db_config import env_db_config, set_db_config
+    from config.job_config import parse_target_arg
+    from database.analytics import query_match_stats, refresh_analytics, resolve_league_uids
+    from database.db_writer import DBWriter
+    from database.sql_functions import create_connection
+
+    with create_connection(set_db_config(env_db_config())) as conn :
+        writer = DBWriter(conn)
+        targets = [parse_target_arg(target_arg) for target_arg in target_args] or None
+        league_uids = resolve_league_uids(writer, targets) if targets or refresh else None
+        if targets and not league_uids :
+            raise click.UsageError("No target league-season in the database.")
+        if refresh :
+            for league_uid in league_uids : # One transaction per league-season
+                refresh_analytics(writer, [league_uid])
+            return
+        try :
+            rows = query_match_stats(writer, level, category, league_uids, team_name, limit)
+        except ValueError as e :
+            raise click.BadParameter(str(e), param_hint="--category")
+
+    output_file = open(output_path, "w", newline="", encoding="utf-8") if output_path else sys.stdout
+    try :
+        if rows :
+            csv_writer = csv.DictWriter(output_file, fieldnames=list(rows[0]))
+            csv_writer.writeheader()
+            csv_writer.writerows(rows)
+    finally :
+        if output_path :
+            output_file.close()
+    logger.info(f"{len(rows)} {level} statistics rows read.")
+
+@cli.command()
+@click.option("--to", "target_version", type=int, default=None, help="Apply the migrations up to this version only.")
+@click.option("--dry-run", is_flag=True, help="List the pending migrations and their statements without running them.")
+@click.option("--optional", "optional_names", multiple=True, metavar="NAME",
+              help="Also apply this optional migration (database/migrations/*.optional.sql), e.g. season_partitioning. Repeatable.")
+def migrate(target_version, dry_run, optional_names):
+    """
+    Apply the pending schema migrations (database/migrations) to the database.
+
+    The database connection is read from the RUGBY_DB_* environment variables.
+    """
+    from config.db_config import env_db_config, set_db_config
+    from database.migrate import MigrationError, apply_migrations
+    from database.sql_functions import create_connection
+
+    with create_connection(set_db_config(env_db_config())) as conn :
+        try :
+            migrations = apply_migrations(conn, target_version, dry_run, optional=optional_names)
+        except MigrationError as e :
+            logger.error(f"{e}")
+            sys.exit(1)
+    logger.info(f"{len(migrations)} migrations {'pending' if dry_run else 'applied'}.")
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    cli()
\ No newline at end of file
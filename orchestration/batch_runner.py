@@ -0,0 +1,131 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Any, Tuple
+
+from config.api_counter import get_cache
+from config.metrics import get_metrics
+from database.db_writer import DBWriter
+from database.sql_functions import create_connection
+from orchestration.pipeline import run_pipeline
+
+##########################################	GLOBAL SCOPE	#######################################
+# logs
+logger = logging.getLogger(__name__)
+
+##########################################	FUNCTIONS	###########################################
+
+def format_target(target: Tuple[int, int | None]) -> str:
+    espn_league_id, season_year = target
+    return f"{espn_league_id}:{season_year if season_year is not None else 'latest'}"
+
+#--------------------------------------------------------------------------------------------------
+
+def run_target(writer: DBWriter, target: Tuple[int, int | None]) -> Dict[str, Any]:
+    """
+    Runs the pipeline for a single target and catches its errors, so that one failing
+    league-season does not stop the other targets of the batch.
+
+    Args:
+        writer (DBWriter): The database writer shared by all targets.
+        target (Tuple[int, int | None]): The ESPN league ID and the season year (None for the latest gameday).
+
+    Returns:
+        Dict[str, Any]: The target result :
+        {
+            "target": str,          # "<league>:<season>"
+            "success": bool,        # False if an error has occurred
+            "elapsed": float,       # Duration of the target in seconds
+            "rows": int,            # Number of records sent to the database
+            "error": str | None     # Error message, if any
+        }
+    """
+    espn_league_id, season_year = target
+    start_time = time.perf_counter()
+    result = {"target": format_target(target), "success": True, "rows": 0, "error": None}
+    try :
+        is_full_season_scrape = season_year is not None
+        rows_written = run_pipeline(writer, espn_league_id, season_year, is_full_season_scrape)
+        result["rows"] = sum(rows_written.values())
+    except Exception as e :
+        logger.error(f"Target {result['target']} ended with errors : {e!r}")
+        result["success"] = False
+        result["error"] = repr(e)
+    result["elapsed"] = time.perf_counter() - start_time
+    return result
+
+#--------------------------------------------------------------------------------------------------
+
+def log_throughput_report(results: list[Dict[str, Any]], elapsed: float, api_requests: int,
+                          rows_written: Dict[str, int], cache_stats: Tuple[int, int] | None = None,
+                          rows_unchanged: Dict[str, int] | None = None, request_label: str = "API requests"):
+    """
+    Logs the per-target results and the aggregate throughput of a batch.
+
+    Args:
+        results (list[Dict[str, Any]]): The results returned by `run_target()`.
+        elapsed (float): Wall time of the whole batch in seconds.
+        api_requests (int): Number of API requests made by the batch.
+        rows_written (Dict[str, int]): Number of records sent to the database, by table.
+        cache_stats (Tuple[int, int] | None, optional): Response cache hits and misses. Defaults to None.
+        rows_unchanged (Dict[str, int] | None, optional): Unchanged records not written, by table. Defaults to None.
+        request_label (str, optional): Name of the requests in the report, e.g. "Archive reads". Defaults to "API requests".
+    """
+    total_rows = sum(rows_written.values())
+    failed_results = [result for result in results if not result["success"]]
+    elapsed = max(elapsed, 1e-6)
+
+    logger.info("------ Batch throughput report ------")
+    for result in sorted(results, key=lambda result: result["target"]) :
+        status = "OK" if result["success"] else f"FAILED ({result['error']})"
+        logger.info(f"{result['target']:>16} | {result['elapsed']:8.1f} s | {result['rows']:7d} rows | {status}")
+    logger.info(f"Targets : {len(results) - len(failed_results)}/{len(results)} succeeded in {elapsed:.1f} s")
+    logger.info(f"{request_label} : {api_requests} ({api_requests / elapsed:.2f} req/s)")
+    if cache_stats is not None :
+        logger.info(f"Cache : {cache_stats[0]} hits / {cache_stats[1]} misses")
+    logger.info(f"Rows written : {total_rows} ({total_rows / elapsed:.1f} rows/s) {rows_written}")
+    if rows_unchanged :
+        logger.info(f"Rows unchanged (not written) : {sum(rows_unchanged.values())} {rows_unchanged}")
+
+#--------------------------------------------------------------------------------------------------
+
+def run_batch(targets: list[Tuple[int, int | None]], db_config: Dict[str, Any],
+              parallelism: int = 1, cache_size: int = 20000) -> list[Dict[str, Any]]:
+    """
+    Runs the pipeline for many league-seasons without any user interaction.
+
+    All targets share the same HTTP response cache and the same database writer
+    (one connection, serialized writes). Targets are processed by a pool of
+    `parallelism` threads, since the pipeline mostly waits on the ESPN API.
+
+    Args:
+        targets (list[Tuple[int, int | None]]): The ESPN league IDs and season years (None for the latest gameday).
+        db_config (Dict[str, Any]): The database configuration, see `config.db_config.set_db_config()`.
+        parallelism (int, optional): Number of targets processed at the same time. Defaults to 1.
+        cache_size (int, optional): Maximum number of cached API responses, 0 to disable the cache. Defaults to 20000.
+
+    Returns:
+        list[Dict[str, Any]]: The result of each target, see `run_target()`.
+    """
+    if cache_size > 0 :
+        get_cache().enable(cache_size)
+
+    start_time = time.perf_counter()
+    results = []
+    metrics = get_metrics()
+    metrics.register_gauge("scraper_units", "Batch targets, by state.",
+                           lambda: {"pending": len(targets) - len(results), "done": len(results)}, label="state")
+    try :
+        with create_connection(db_config) as conn :
+            writer = DBWriter(conn)
+            with ThreadPoolExecutor(max_workers=max(1, parallelism)) as executor :
+                futures = [executor.submit(run_target, writer, target) for target in targets]
+                for future in as_completed(futures) :
+                    results.append(future.result())
+
+            cache = get_cache()
+            log_throughput_report(results, time.perf_counter() - start_time, metrics.get_request_count(),
+                                  writer.rows_written, (cache.hits, cache.misses), writer.rows_unchanged)
+    finally :
+        metrics.unregister_gauge("scraper_units")
+    return results
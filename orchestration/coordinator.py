@@ -0,0 +1,213 @@
+import atexit
+import logging
+import time
+from multiprocessing.util import Finalize
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Any, Tuple
+
+from config.api_counter import RateLimiter, SessionManager, set_archive_writer, set_rate_limiter
+from config.metrics import get_metrics
+from config.profiling import StageProfiler, get_process_run_dir, get_profile_run_dir, set_stage_profiler
+from config.tracing import Tracer, get_process_trace_path, get_trace_path, set_tracer
+from database.db_writer import DBWriter, get_row_hash_path, set_row_hash_path
+from database.partitions import is_season_partitioned, reload_league_season
+from orchestration.batch_runner import format_target, log_throughput_report
+from orchestration.pipeline import run_pipeline
+from processing.records import is_compact_records, set_compact_records
+from processing.utils import generate_deterministic_uid
+from storage.league_catalog import LeagueCatalog, fetch_seasons, get_league_catalog, set_league_catalog
+from storage.quarantine import get_max_invalid_ratio, get_quarantine_path, set_max_invalid_ratio, set_quarantine_path
+from storage.response_archive import ResponseArchiveWriter
+
+##########################################	GLOBAL SCOPE	#######################################
+# logs
+logger = logging.getLogger(__name__)
+
+# Database writer of the current worker process, opened by `init_worker()`
+_worker_writer: DBWriter | None = None
+
+##########################################	FUNCTIONS	###########################################
+
+def list_league_seasons(espn_league_id: int, limit: int = 200) -> list[int]:
+    """
+    Lists every season year available for a league (most recent first), from the league
+    catalog of the process if any (see `storage.league_catalog.LeagueCatalog`).
+
+    Args:
+        espn_league_id (int): The ESPN ID of the league.
+        limit (int, optional): The maximum number of seasons to retrieve. Defaults to 200.
+
+    Returns:
+        list[int]: The season years of the league.
+    """
+    league_catalog = get_league_catalog()
+    if league_catalog is not None :
+        return league_catalog.get_seasons(espn_league_id)
+    return fetch_seasons(espn_league_id, limit)
+
+#--------------------------------------------------------------------------------------------------
+
+def init_worker(db_config: Dict[str, Any], rate_limiter: RateLimiter | None, archive_dir: str | None = None,
+                row_hash_path: str | None = None, compact_records: bool = False, trace_path: str | None = None,
+                profile_run_dir: str | None = None, quarantine_path: str | None = None, max_invalid_ratio: float | None = None,
+                catalog_path: str | None = None, catalog_ttl: float = 24 * 3600):
+    """
+    Initializes a worker process : its own HTTP session, its own database connection,
+    its own response archive writer, tracer, profiler and league catalog, and the rate limiter shared by the whole pool.
+
+    Args:
+        db_config (Dict[str, Any]): The database configuration, see `config.db_config.set_db_config()`.
+        rate_limiter (RateLimiter | None): The shared rate limiter, None for no limit.
+        archive_dir (str | None, optional): Directory of the raw response archive, None to disable it. Defaults to None.
+        row_hash_path (str | None, optional): Row hash index file, see `database.row_hashes.RowHashIndex`. Defaults to None.
+        compact_records (bool, optional): Compact processed records, see `processing.records.CompactRecord`. Defaults to False.
+        trace_path (str | None, optional): Trace file of the run, the worker writes `<trace>.<pid>.json`, see `config.tracing.Tracer`.
+                                           None to disable tracing. Defaults to None.
+        profile_run_dir (str | None, optional): Profiles directory of the run, the worker writes in `<dir>/worker-<pid>`,
+                                                see `config.profiling.StageProfiler`. None to disable profiling. Defaults to None.
+        quarantine_path (str | None, optional): Quarantine file of the run, shared by the workers, see `storage.quarantine.quarantine()`.
+                                                Defaults to None.
+        max_invalid_ratio (float | None, optional): Quarantine policy of the run, see `storage.quarantine.check_quarantine_ratio()`.
+                                                    Defaults to None.
+        catalog_path (str | None, optional): League catalog file of the run, see `storage.league_catalog.LeagueCatalog`.
+                                             None to scrape the seasons and their bounds on every call. Defaults to None.
+        catalog_ttl (float, optional): Lifetime of the leagues and seasons lists of the catalog, in seconds. Defaults to 24 hours.
+    """
+    global _worker_writer
+    from config.logging_config import setup_logging
+    from pymysql import connect
+
+    setup_logging() # Spawned workers do not inherit the logging configuration
+    SessionManager.reset()
+    set_rate_limiter(rate_limiter)
+    set_row_hash_path(row_hash_path)
+    set_compact_records(compact_records)
+    set_quarantine_path(quarantine_path)
+    set_max_invalid_ratio(max_invalid_ratio)
+    set_league_catalog(LeagueCatalog(catalog_path, catalog_ttl) if catalog_path else None)
+
+    if archive_dir :
+        archive_writer = ResponseArchiveWriter(archive_dir)
+        set_archive_writer(archive_writer)
+        # atexit handlers do not run in pool workers : flush the archive when the pool shuts down
+        Finalize(archive_writer, archive_writer.close, exitpriority=10)
+    if trace_path :
+        tracer = Tracer(get_process_trace_path(trace_path))
+        set_tracer(tracer)
+        Finalize(tracer, tracer.close, exitpriority=10)
+    if profile_run_dir :
+        stage_profiler = StageProfiler(get_process_run_dir(profile_run_dir))
+        set_stage_profiler(stage_profiler)
+        Finalize(stage_profiler, stage_profiler.close, exitpriority=10)
+
+    conn = connect(**db_config)
+    atexit.register(conn.close)
+    _worker_writer = DBWriter(conn)
+
+#--------------------------------------------------------------------------------------------------
+
+def get_catalog_args() -> Tuple[str | None, float]:
+    """Returns the league catalog arguments of `init_worker()` : the file and lifetime of the catalog of the process, if any."""
+    league_catalog = get_league_catalog()
+    if league_catalog is None :
+        return None, 24 * 3600
+    return league_catalog.path, league_catalog.ttl
+
+#--------------------------------------------------------------------------------------------------
+
+def run_unit(target: Tuple[int, int], rebuild: bool = False) -> Dict[str, Any]:
+    """
+    Runs the pipeline of one (league, season) unit in a worker process.
+
+    When the statistics tables are partitioned by season, a rebuild loads the statistics into
+    staging tables swapped into the season partitions at the end of the unit, see
+    `database.partitions.reload_league_season()`.
+
+    Args:
+        target (Tuple[int, int]): The ESPN league ID and the season year.
+        rebuild (bool, optional): True to scrape every match again, ignoring the refresh policy. Defaults to False.
+
+    Returns:
+        Dict[str, Any]: The unit result, see `orchestration.batch_runner.run_target()`, plus :
+        {
+            "api_requests": int,            # API requests made for this unit
+            "rows_written": Dict[str, int], # Records sent to the database, by table
+            "metrics": Dict[str, Any]       # Metrics of this unit, see `config.metrics.MetricsRegistry.to_dict()`
+        }
+    """
+    espn_league_id, season_year = target
+    start_time = time.perf_counter()
+    metrics = get_metrics()
+    metrics.reset() # The registry of the worker process holds the metrics of one unit at a time
+    result = {"target": format_target(target), "success": True, "rows": 0, "rows_written": {}, "error": None}
+    try :
+        load = lambda: run_pipeline(_worker_writer, espn_league_id, season_year, True, conflict_free=True, rebuild=rebuild)
+        if rebuild and season_year is not None and is_season_partitioned(_worker_writer) :
+            league_uid = generate_deterministic_uid([espn_league_id, season_year])
+            rows_written = reload_league_season(_worker_writer, league_uid, season_year, load)
+        else :
+            rows_written = load()
+        result["rows_written"] = rows_written
+        result["rows"] = sum(rows_written.values())
+    except Exception as e :
+        logger.error(f"Unit {result['target']} ended with errors : {e!r}")
+        result["success"] = False
+        result["error"] = repr(e)
+    result["api_requests"] = metrics.get_request_count()
+    result["metrics"] = metrics.to_dict()
+    result["elapsed"] = time.perf_counter() - start_time
+    return result
+
+#--------------------------------------------------------------------------------------------------
+
+def run_backfill(targets: list[Tuple[int, int]], db_config: Dict[str, Any], workers: int = 4,
+                 rate_limit: float = 0, request_budget: int = 0, archive_dir: str | None = None) -> list[Dict[str, Any]]:
+    """
+    Shards (league, season) units over a pool of worker processes.
+
+    Each worker owns its HTTP session and its database connection, so the pipeline
+    runs on several cores. Dimension tables are written in conflict-free mode
+    (see `orchestration.pipeline.run_pipeline()`), and every worker draws its API
+    requests from the same shared rate limiter.
+
+    Args:
+        targets (list[Tuple[int, int]]): The ESPN league IDs and season years to backfill.
+        db_config (Dict[str, Any]): The database configuration, see `config.db_config.set_db_config()`.
+        workers (int, optional): Number of worker processes. Defaults to 4.
+        rate_limit (float, optional): Maximum number of API requests per second for the whole pool, 0 for no limit. Defaults to 0.
+        request_budget (int, optional): Maximum number of API requests for the whole run, 0 for no limit. Defaults to 0.
+        archive_dir (str | None, optional): Directory of the raw response archive, None to disable it. Defaults to None.
+
+    Returns:
+        list[Dict[str, Any]]: The result of each unit, see `run_unit()`.
+    """
+    rate_limiter = None
+    if rate_limit > 0 or request_budget > 0 :
+        rate_limiter = RateLimiter(rate_limit if rate_limit > 0 else float("inf"), budget=request_budget)
+    set_rate_limiter(rate_limiter) # The metrics endpoint of the coordinator reads the shared bucket
+
+    start_time = time.perf_counter()
+    results = []
+    metrics = get_metrics()
+    metrics.register_gauge("scraper_units", "Backfill units, by state.",
+                           lambda: {"pending": len(targets) - len(results), "done": len(results)}, label="state")
+    try :
+        with ProcessPoolExecutor(max_workers=max(1, workers), initializer=init_worker,
+                                 initargs=(db_config, rate_limiter, archive_dir, get_row_hash_path(), is_compact_records(),
+                                           get_trace_path(), get_profile_run_dir(), get_quarantine_path(),
+                                           get_max_invalid_ratio(), *get_catalog_args())) as executor :
+            futures = [executor.submit(run_unit, target) for target in targets]
+            for future in as_completed(futures) :
+                result = future.result()
+                metrics.merge(result["metrics"]) # Merged as units end : the metrics endpoint follows the run
+                results.append(result)
+    finally :
+        metrics.unregister_gauge("scraper_units")
+
+    rows_written = {}
+    for result in results :
+        for table_name, count in result["rows_written"].items() :
+            rows_written[table_name] = rows_written.get(table_name, 0) + count
+    api_requests = sum(result["api_requests"] for result in results)
+    log_throughput_report(results, time.perf_counter() - start_time, api_requests, rows_written)
+    return results
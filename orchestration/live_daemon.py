@@ -0,0 +1,244 @@
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Any
+
+from database.db_writer import DBWriter, get_row_hash_path
+from database.row_hashes import RowHashIndex
+from database.sql_functions import create_connection
+from orchestration.pipeline import get_event_pages, run_matches_stage, run_season_stage
+from orchestration.refresh_policy import REFRESH_FULL, RefreshPolicy, get_utc_now, load_match_states
+from processing.kernels import convert_iso_date_to_MySQL
+from processing.matches_data import MATCH_STATUS_FINAL, MATCH_STATUS_IN_PROGRESS, MATCH_STATUS_POSTPONED
+from scraping.events_page import scrape_event_page
+
+##########################################	GLOBAL SCOPE	#######################################
+# logs
+logger = logging.getLogger(__name__)
+
+# Refresh policy of the daemon : today's matches, refreshed often while played and shortly after
+LIVE_REFRESH_POLICY = RefreshPolicy(
+    final_grace=timedelta(hours=12),
+    final_interval=timedelta(hours=1),
+    in_progress_interval=timedelta(minutes=1),
+)
+
+# Row hash index of the daemon when the process has none (see `database.db_writer.set_row_hash_path()`)
+DEFAULT_LIVE_ROW_HASH_PATH = "live_row_hashes.sqlite"
+
+# Tables whose changes mean the live matches are moving (the match rows change on every fetch : lastFetched)
+CHANGE_TABLES = ("team_match_stats", "player_match_stats")
+
+# The fixtures list of a league is fetched again after this time (new kick-off times, postponements)
+FIXTURES_TTL = timedelta(hours=1)
+
+##########################################	CLASS	###########################################
+
+class LeagueWatch:
+    """
+        The polling state of one league watched by the daemon.
+
+        Only the league-season and today's event pages are kept : the state does not grow
+        with the uptime of the daemon.
+
+        Attributes:
+            espn_league_id (int): The ESPN ID of the league.
+            league_data (Dict[str, Any] | None): The current league-season record, None before the first poll of the day.
+            day (date | None): The UTC day of `league_data` and `event_pages`.
+            event_pages (list[Dict[str, Any]]): The event pages of today's fixtures.
+            fixtures_fetched_at (datetime | None): When the fixtures list was fetched (UTC).
+            interval (float): Current polling interval, in seconds.
+            next_poll (float): `time.monotonic()` time of the next poll.
+    """
+
+    def __init__(self, espn_league_id: int) -> None:
+        self.espn_league_id = espn_league_id
+        self.league_data = None
+        self.day = None
+        self.event_pages = []
+        self.fixtures_fetched_at = None
+        self.interval = 0.0
+        self.next_poll = 0.0
+
+##########################################	FUNCTIONS	###########################################
+
+def get_kick_off(event_page: Dict[str, Any]) -> datetime:
+    return datetime.strptime(convert_iso_date_to_MySQL(event_page["date"]), '%Y-%m-%d %H:%M:%S')
+
+#--------------------------------------------------------------------------------------------------
+
+def refresh_fixtures(writer: DBWriter, watch: LeagueWatch, now: datetime):
+    """
+    Fetches today's fixtures of a league when they are missing or older than `FIXTURES_TTL`.
+
+    On the first poll of a UTC day, the season level stage runs again (league, stadiums, teams
+    and standings of the current season), so the match rows of the day can reference them.
+    """
+    if watch.day != now.date() :
+        watch.league_data, watch.event_pages, _ = run_season_stage(writer, watch.espn_league_id, None, False)
+    elif now - watch.fixtures_fetched_at > FIXTURES_TTL :
+        watch.event_pages = get_event_pages(watch.league_data, False)
+    else :
+        return
+    watch.day = now.date()
+    watch.fixtures_fetched_at = now
+    logger.info(f"League {watch.espn_league_id} : {len(watch.event_pages)} matches in the current gameday.")
+
+#--------------------------------------------------------------------------------------------------
+
+def refresh_event_pages(watch: LeagueWatch, match_states: Dict[int, Dict[str, Any]], refresh_policy: RefreshPolicy,
+                        now: datetime) -> int:
+    """
+    Fetches again the event pages of the matches fully refreshed by the next match stage.
+
+    The fixtures list is kept up to `FIXTURES_TTL`, but the winner and loser of a match are read
+    from its event page : the page of a match being refreshed must be as fresh as its statistics.
+
+    Args:
+        watch (LeagueWatch): The polling state of the league.
+        match_states (Dict[int, Dict[str, Any]]): Stored status of today's matches, by ESPN ID.
+        refresh_policy (RefreshPolicy): The refresh policy of the daemon.
+        now (datetime): The current time (UTC).
+
+    Returns:
+        int: Number of event pages fetched again.
+    """
+    refreshed_count = 0
+    for index, page in enumerate(watch.event_pages) :
+        match_espn_id = int(page["id"])
+        if refresh_policy.decide(match_states.get(match_espn_id), get_kick_off(page), now) == REFRESH_FULL :
+            watch.event_pages[index] = scrape_event_page(watch.espn_league_id, match_espn_id)
+            refreshed_count += 1
+    return refreshed_count
+
+#--------------------------------------------------------------------------------------------------
+
+def get_next_interval(watch: LeagueWatch, match_states: Dict[int, Dict[str, Any]], rows_changed: int, now: datetime,
+                      refresh_policy: RefreshPolicy, max_live_interval: float, idle_interval: float) -> float:
+    """
+    Returns the time to wait before the next poll of a league, in seconds.
+
+    - A match is live (in progress, or scheduled with its kick-off passed) : the league is polled
+      at the in-progress interval of the policy while its statistics change, and the interval
+      doubles after each poll without change, up to `max_live_interval`.
+    - Nothing is live : the league is polled at the next kick-off, or after `idle_interval`.
+
+    Args:
+        watch (LeagueWatch): The polling state of the league.
+        match_states (Dict[int, Dict[str, Any]]): Stored status of today's matches, by ESPN ID.
+        rows_changed (int): Rows of `CHANGE_TABLES` written by the poll.
+        now (datetime): The current time (UTC).
+        refresh_policy (RefreshPolicy): The refresh policy of the daemon.
+        max_live_interval (float): Maximum polling interval of a live league, in seconds.
+        idle_interval (float): Polling interval of a league without live match, in seconds.
+
+    Returns:
+        float: The polling interval, in seconds.
+    """
+    live_interval = refresh_policy.in_progress_interval.total_seconds()
+    next_kick_off = None
+    for page in watch.event_pages :
+        match_state = match_states.get(int(page["id"]))
+        status = match_state["status"] if match_state else None
+        if status in (MATCH_STATUS_FINAL, MATCH_STATUS_POSTPONED) :
+            continue
+        kick_off = get_kick_off(page)
+        if status == MATCH_STATUS_IN_PROGRESS or kick_off <= now :
+            if rows_changed :
+                return live_interval
+            return min(max(watch.interval * 2, live_interval), max_live_interval)
+        if next_kick_off is None or kick_off < next_kick_off :
+            next_kick_off = kick_off
+
+    if next_kick_off is None :
+        return idle_interval
+    return min(max((next_kick_off - now).total_seconds(), live_interval), idle_interval)
+
+#--------------------------------------------------------------------------------------------------
+
+def poll_league(writer: DBWriter, watch: LeagueWatch, refresh_policy: RefreshPolicy,
+                max_live_interval: float, idle_interval: float) -> int:
+    """
+    Polls the live matches of a league once, and schedules its next poll.
+
+    Today's fixtures list is kept between polls : the event pages of the matches selected by the
+    refresh policy are fetched again (status, scores, winner, statistics refs, see
+    `refresh_event_pages()`) before the match stage, and the row hash index of the writer drops
+    the rows that did not change.
+
+    Args:
+        writer (DBWriter): The database writer of the daemon.
+        watch (LeagueWatch): The polling state of the league.
+        refresh_policy (RefreshPolicy): The refresh policy of the daemon.
+        max_live_interval (float): Maximum polling interval of a live league, in seconds.
+        idle_interval (float): Polling interval of a league without live match, in seconds.
+
+    Returns:
+        int: Rows of `CHANGE_TABLES` written by the poll.
+    """
+    now = get_utc_now()
+    refresh_fixtures(writer, watch, now)
+
+    rows_before = sum(writer.rows_written.get(table, 0) for table in CHANGE_TABLES)
+    if watch.event_pages :
+        match_states = load_match_states(writer, [int(page["id"]) for page in watch.event_pages]) or {}
+        refresh_event_pages(watch, match_states, refresh_policy, now)
+        run_matches_stage(writer, watch.event_pages, watch.league_data["uid"], watch.league_data["season"],
+                          refresh_policy=refresh_policy)
+    rows_changed = sum(writer.rows_written.get(table, 0) for table in CHANGE_TABLES) - rows_before
+
+    match_states = load_match_states(writer, [int(page["id"]) for page in watch.event_pages]) or {}
+    watch.interval = get_next_interval(watch, match_states, rows_changed, get_utc_now(), refresh_policy,
+                                       max_live_interval, idle_interval)
+    watch.next_poll = time.monotonic() + watch.interval
+    logger.info(f"League {watch.espn_league_id} : {rows_changed} statistics rows changed, next poll in {watch.interval:.0f}s.")
+    return rows_changed
+
+#--------------------------------------------------------------------------------------------------
+
+def run_live(league_ids: list[int], db_config: Dict[str, Any], refresh_policy: RefreshPolicy = LIVE_REFRESH_POLICY,
+             max_live_interval: float = 600, idle_interval: float = 1800, max_polls: int | None = None) -> Dict[str, int]:
+    """
+    Watches today's matches of several leagues until it is stopped (Ctrl+C).
+
+    Each league is polled on its own schedule (see `get_next_interval()`). The daemon keeps one
+    database connection (pinged, and reconnected if needed, before each poll) and one HTTP
+    session, and never enables the response cache : every poll reads fresh data. Upserted rows
+    go through a row hash index on disk, so unchanged rows are not written again.
+
+    A failed poll is logged, and the league is polled again after `idle_interval`.
+
+    Args:
+        league_ids (list[int]): ESPN IDs of the leagues to watch.
+        db_config (Dict[str, Any]): The database configuration, see `config.db_config.set_db_config()`.
+        refresh_policy (RefreshPolicy, optional): Matches to scrape again at each poll. Defaults to `LIVE_REFRESH_POLICY`.
+        max_live_interval (float, optional): Maximum polling interval of a live league, in seconds. Defaults to 600.
+        idle_interval (float, optional): Polling interval of a league without live match, in seconds. Defaults to 1800.
+        max_polls (int | None, optional): Stop after this number of polls, None to run until stopped. Defaults to None.
+
+    Returns:
+        Dict[str, int]: Number of polls done and failed.
+    """
+    watches = [LeagueWatch(espn_league_id) for espn_league_id in dict.fromkeys(league_ids)]
+    counts = {"done": 0, "failed": 0}
+    logger.info(f"Live daemon started for leagues {[watch.espn_league_id for watch in watches]}.")
+    with create_connection(db_config) as conn :
+        writer = DBWriter(conn, RowHashIndex(get_row_hash_path() or DEFAULT_LIVE_ROW_HASH_PATH))
+        try :
+            while max_polls is None or counts["done"] + counts["failed"] < max_polls :
+                watch = min(watches, key=lambda league_watch: league_watch.next_poll)
+                time.sleep(max(0.0, watch.next_poll - time.monotonic()))
+                try :
+                    conn.ping(reconnect=True)
+                    poll_league(writer, watch, refresh_policy, max_live_interval, idle_interval)
+                    counts["done"] += 1
+                except Exception as e :
+                    logger.error(f"Poll of league {watch.espn_league_id} ended with errors : {e!r}")
+                    watch.interval = idle_interval
+                    watch.next_poll = time.monotonic() + idle_interval
+                    counts["failed"] += 1
+        except KeyboardInterrupt :
+            logger.info("Live daemon stopped.")
+
+    logger.info(f"Live daemon : {counts['done']} polls done, {counts['failed']} failed, {writer.get_total_rows()} rows written.")
+    return counts
@@ -0,0 +1,332 @@
+import logging
+from typing import Dict, Any, Tuple
+
+from config.profiling import profile_scope
+from config.tracing import trace_span
+from database.analytics import refresh_analytics
+from database.db_writer import DBWriter
+from orchestration.refresh_policy import RefreshPolicy, plan_match_refresh
+from orchestration.stage_dag import Stage, StageDAG, log_stage_timings
+from processing.leagues_data import process_league_season_data
+from processing.matches_data import process_matches_data, process_team_match_stats_data
+from processing.stadiums_data import process_stadiums_data
+from processing.standings_data import process_standings_data
+from processing.teams_data import process_teams_data
+from processing.players_data import process_player_match_stats_data, process_players_data
+from scraping.events_page import filter_valid_event_pages, scrape_event_pages_by_date_range, scrape_event_pages_for_gameday
+from scraping.players_page import scrape_roster_pages
+from scraping.standings_page import scrape_standing_pages
+from storage.response_archive import archive_partition
+
+##########################################	GLOBAL SCOPE	#######################################
+# logs
+
+logger = logging.getLogger(__name__)
+
+# Tables referenced by the foreign keys of each table (see database/create_tables.sql).
+# A table is written only once the tables it references are written.
+FK_DEPENDENCIES = {
+    "standings": ("teams", "leagues"),
+    "matches": ("leagues", "teams", "stadiums"),
+    "team_match_stats": ("matches", "teams"),
+    "player_team": ("players", "teams"),
+    "player_match_stats": ("player_team", "matches"),
+}
+
+# Insertion mode and primary key of each table :
+# - "dimension" : insert new records only, INSERT IGNORE in conflict-free mode (shared tables)
+# - "upsert" : insert or update records (ON DUPLICATE KEY UPDATE)
+TABLE_WRITE_MODES = {
+    "leagues": ("dimension", "uid"),
+    "stadiums": ("dimension", "espnId"),
+    "teams": ("upsert", "espnId"),
+    "standings": ("upsert", "uid"),
+    "matches": ("upsert", "espnId"),
+    "team_match_stats": ("upsert", "uid"),
+    "players": ("upsert", "espnId"),
+    "player_team": ("dimension", "uid"),
+    "player_match_stats": ("upsert", "uid"),
+}
+
+# Tables missing for some matches in the ESPN database (no roster), or for every match skipped
+# by the refresh policy : skipped when empty
+OPTIONAL_TABLES = ("matches", "team_match_stats", "players", "player_team", "player_match_stats")
+
+# Refresh policy of the match level stages when not rebuilding (see `orchestration.refresh_policy`)
+DEFAULT_REFRESH_POLICY = RefreshPolicy()
+
+##########################################	 FUNCTION   ###########################################
+
+def get_event_pages(league_data : Dict[str, Any], is_full_season_scrape : bool) -> list[Dict[str, Any]]:
+    if is_full_season_scrape : # Retrieve data for the entire specified season
+        start_date = league_data["startDate"]
+        end_date = league_data["endDate"]
+        event_pages = scrape_event_pages_by_date_range(league_data["espnId"], start_date, end_date)
+    else : # Retrieve data for the lastes gameday of the current season
+            event_pages = scrape_event_pages_for_gameday(league_data["espnId"], "")
+
+    filtered_event_pages = filter_valid_event_pages(event_pages)
+    return filtered_event_pages
+
+#--------------------------------------------------------------------------------------------------
+
+def sort_dimension_rows(records_data: list[Dict[str, Any]], primary_key: str, conflict_free: bool) -> list[Dict[str, Any]]:
+    # Rows locked in the same order by every process can not deadlock each other
+    if not conflict_free :
+        return records_data
+    return sorted(records_data, key=lambda record: record[primary_key])
+
+#--------------------------------------------------------------------------------------------------
+
+def write_table(writer: DBWriter, table_name: str, records_data: list[Dict[str, Any]], conflict_free: bool) -> int:
+    """
+    Inserts the records of a table with the insertion mode of the table (see `TABLE_WRITE_MODES`).
+
+    Dimension tables (stadiums, teams, players and player-team associations) are shared
+    between league-seasons. With `conflict_free`, they are written with idempotent statements
+    (INSERT IGNORE / ON DUPLICATE KEY UPDATE) sorted by primary key, so several processes
+    can load the same dimension rows concurrently without duplicate key errors or deadlocks.
+
+    Matches and statistics are upserted : a match scraped again by the refresh policy
+    (see `orchestration.refresh_policy`) or by a reprocessing updates its rows.
+
+    Args:
+        writer (DBWriter): The database writer used for the insertion.
+        table_name (str): Name of the table.
+        records_data (list[Dict[str, Any]]): Records to insert.
+        conflict_free (bool): True when other processes write the same database.
+
+    Returns:
+        int: Number of records sent to the database.
+    """
+    if not records_data and table_name in OPTIONAL_TABLES :
+        return 0
+
+    write_mode, primary_key = TABLE_WRITE_MODES[table_name]
+    if write_mode == "upsert" :
+        return writer.insert_with_update(table_name, sort_dimension_rows(records_data, primary_key, conflict_free), primary_key)
+    if write_mode == "dimension" and conflict_free :
+        return writer.insert_or_ignore(table_name, sort_dimension_rows(records_data, primary_key, conflict_free))
+    return writer.insert(table_name, records_data)
+
+#--------------------------------------------------------------------------------------------------
+
+def resolve_league(espn_league_id: int, season_year: int | None) -> Tuple[Dict[str, Any], str, int]:
+    league_data = process_league_season_data(espn_league_id, season_year)
+    # The season year is resolved by the league processing when scraping the current season
+    return league_data, league_data["uid"], league_data["season"]
+
+#--------------------------------------------------------------------------------------------------
+
+def process_rosters(roster_pages: list[Dict[str, Any]], season: int, stats_event_pages: list[Dict[str, Any]]) -> Tuple[list, list, list]:
+    if not stats_event_pages : # Every match skipped by the refresh policy
+        return [], [], []
+    if not roster_pages :
+        logger.warning(f"Players datas and statistics by macth are missing in the ESPN database. No insertion of this data will be made in our database.")
+        return [], [], []
+    players_data = process_players_data(roster_pages)
+    players_teams_data, players_matches_stat = process_player_match_stats_data(roster_pages, season)
+    return players_data, players_teams_data, players_matches_stat
+
+#--------------------------------------------------------------------------------------------------
+
+def refresh_match_analytics(writer: DBWriter, league_uid: str, match_event_pages: list[Dict[str, Any]],
+                            stats_event_pages: list[Dict[str, Any]]) -> int:
+    # Rows of the analytics tables of the matches written by the pipeline, see `database.analytics.refresh_analytics()`.
+    # Statistics written to staging tables are refreshed once swapped in, see `database.partitions.reload_league_season()`
+    if writer.table_redirects :
+        return 0
+    match_espn_ids = sorted({int(page["id"]) for page in match_event_pages + stats_event_pages})
+    return sum(refresh_analytics(writer, [league_uid], match_espn_ids).values())
+
+#--------------------------------------------------------------------------------------------------
+
+def make_write_stage(table_name: str, records_key: str, written_tables: set[str]) -> Stage:
+    """
+    Builds the stage inserting a table. The stage runs after the insertion of the tables
+    referenced by its foreign keys (see `FK_DEPENDENCIES`), when they are part of the same DAG.
+
+    Args:
+        table_name (str): Name of the table.
+        records_key (str): Name of the context value holding the records.
+        written_tables (set[str]): Tables written by the DAG.
+
+    Returns:
+        Stage: The write stage, producing the context value "rows_<table_name>".
+    """
+    def write(writer, conflict_free, **records):
+        return write_table(writer, table_name, records[records_key], conflict_free)
+
+    after = tuple(f"write_{table}" for table in FK_DEPENDENCIES.get(table_name, ()) if table in written_tables)
+    return Stage(f"write_{table_name}", write, inputs=("writer", "conflict_free", records_key),
+                 outputs=(f"rows_{table_name}",), after=after)
+
+#--------------------------------------------------------------------------------------------------
+
+def build_pipeline_stages(include_season: bool = True, include_matches: bool = True) -> list[Stage]:
+    """
+    Declares the stages of the pipeline.
+
+    Fetch and process stages only depend on the data they read : stadiums (from event pages),
+    teams and standings (from standing pages), and matches and rosters run concurrently.
+    Write stages follow the foreign key order of the database. The analytics tables of the
+    written matches are refreshed once the match level tables are written.
+
+    Args:
+        include_season (bool, optional): Include the season level stages (league, stadiums, teams, standings). Defaults to True.
+        include_matches (bool, optional): Include the match level stages (matches, statistics, players). Defaults to True.
+
+    Returns:
+        list[Stage]: The stages. Initial context : "writer", "conflict_free", "refresh_policy" and, with the season stages,
+        "espn_league_id", "season_year", "is_full_season_scrape", otherwise "event_pages", "league_uid", "season".
+    """
+    stages = []
+    tables = {}
+    if include_season :
+        stages += [
+            Stage("league", resolve_league, inputs=("espn_league_id", "season_year"),
+                  outputs=("league_data", "league_uid", "season")),
+            Stage("events", get_event_pages, inputs=("league_data", "is_full_season_scrape"), outputs=("event_pages",)),
+            Stage("stadiums", process_stadiums_data, inputs=("event_pages",), outputs=("stadiums_data",)),
+            Stage("standing_pages", lambda league_data: scrape_standing_pages(league_data["espnId"], league_data["season"]),
+                  inputs=("league_data",), outputs=("standings_pages",)),
+            Stage("teams", process_teams_data, inputs=("standings_pages",), outputs=("teams_data",)),
+            Stage("standings", process_standings_data, inputs=("standings_pages", "league_uid"), outputs=("standings_data",)),
+            Stage("league_record", lambda league_data: [league_data], inputs=("league_data",), outputs=("leagues_data",)),
+        ]
+        tables |= {"leagues": "leagues_data", "stadiums": "stadiums_data", "teams": "teams_data", "standings": "standings_data"}
+    if include_matches :
+        stages += [
+            Stage("refresh_plan", plan_match_refresh, inputs=("writer", "event_pages", "refresh_policy"),
+                  outputs=("match_event_pages", "stats_event_pages")),
+            Stage("matches", process_matches_data, inputs=("match_event_pages", "league_uid"), outputs=("matches_data",)),
+            Stage("team_match_stats", process_team_match_stats_data, inputs=("stats_event_pages", "season"), outputs=("teams_matches_stat",)),
+            Stage("rosters", scrape_roster_pages, inputs=("stats_event_pages",), outputs=("roster_pages",)),
+            Stage("players", process_rosters, inputs=("roster_pages", "season", "stats_event_pages"),
+                  outputs=("players_data", "players_teams_data", "players_matches_stat")),
+        ]
+        tables |= {"matches": "matches_data", "team_match_stats": "teams_matches_stat", "players": "players_data",
+                   "player_team": "players_teams_data", "player_match_stats": "players_matches_stat"}
+
+    stages += [make_write_stage(table_name, records_key, set(tables)) for table_name, records_key in tables.items()]
+    if include_matches :
+        stages.append(Stage("refresh_analytics", refresh_match_analytics,
+                            inputs=("writer", "league_uid", "match_event_pages", "stats_event_pages"), outputs=("analytics_rows",),
+                            after=("write_matches", "write_team_match_stats", "write_player_match_stats")))
+    return stages
+
+#--------------------------------------------------------------------------------------------------
+
+def run_stages(context: Dict[str, Any], include_season: bool, include_matches: bool, max_workers: int) -> Dict[str, int]:
+    dag = StageDAG(build_pipeline_stages(include_season, include_matches))
+    league, season = context.get("espn_league_id"), context.get("season_year", context.get("season"))
+    # Partition of the responses archived by this pipeline (urls without league or season)
+    with archive_partition(league, season), trace_span("pipeline", "pipeline", league=league, season=season), \
+            profile_scope(league, season):
+        log_stage_timings(dag.run(context, max_workers))
+    return {key[len("rows_"):]: value for key, value in context.items() if key.startswith("rows_")}
+
+#--------------------------------------------------------------------------------------------------
+
+def run_season_stage(writer: DBWriter, espn_league_id: int, season_year: int | None, is_full_season_scrape: bool,
+                     conflict_free: bool = False, max_workers: int = 4) -> Tuple[Dict[str, Any], list[Dict[str, Any]], Dict[str, int]]:
+    """
+    Scrapes, processes and inserts the season level tables of one league-season :
+    league, stadiums, teams and standings.
+
+    Args:
+        writer (DBWriter): The database writer used for every insertion.
+        espn_league_id (int): The ESPN ID of the league.
+        season_year (int | None): The year of the season, None for the current season.
+        is_full_season_scrape (bool): True to scrape the whole season, False for the latest gameday only.
+        conflict_free (bool, optional): True when other processes write the same database. Defaults to False.
+        max_workers (int, optional): Maximum number of stages running at the same time. Defaults to 4.
+
+    Returns:
+        league_data (Dict[str, Any]): The league-season record, see `process_league_season_data()`.
+        event_pages (list[Dict[str, Any]]): The valid event pages of the league-season.
+        rows_written (Dict[str, int]): Number of records sent to the database, by table.
+    """
+    context = {
+        "writer": writer,
+        "conflict_free": conflict_free,
+        "espn_league_id": espn_league_id,
+        "season_year": season_year,
+        "is_full_season_scrape": is_full_season_scrape,
+    }
+    rows_written = run_stages(context, include_season=True, include_matches=False, max_workers=max_workers)
+    return context["league_data"], context["event_pages"], rows_written
+
+#--------------------------------------------------------------------------------------------------
+
+def run_matches_stage(writer: DBWriter, event_pages: list[Dict[str, Any]], league_uid: str, season_year: int,
+                      conflict_free: bool = False, max_workers: int = 4, rebuild: bool = False,
+                      refresh_policy: RefreshPolicy | None = DEFAULT_REFRESH_POLICY) -> Dict[str, int]:
+    """
+    Scrapes, processes and inserts the match level tables of a list of events :
+    matches, team match statistics, players, player-team associations and player match statistics.
+
+    The season level tables referenced by foreign keys (league, stadiums, teams) must already be inserted,
+    see `run_season_stage()`.
+
+    Args:
+        writer (DBWriter): The database writer used for every insertion.
+        event_pages (list[Dict[str, Any]]): The event pages to process.
+        league_uid (str): The unique identifier of the league-season.
+        season_year (int): The year of the season.
+        conflict_free (bool, optional): True when other processes write the same database. Defaults to False.
+        max_workers (int, optional): Maximum number of stages running at the same time. Defaults to 4.
+        rebuild (bool, optional): True to scrape every match again, ignoring the refresh policy. Defaults to False.
+        refresh_policy (RefreshPolicy | None, optional): Matches to scrape again, None for every match. Ignored with `rebuild`.
+                                                         Defaults to `DEFAULT_REFRESH_POLICY`.
+
+    Returns:
+        Dict[str, int]: Number of records sent to the database, by table.
+    """
+    context = {
+        "writer": writer,
+        "conflict_free": conflict_free,
+        "refresh_policy": None if rebuild else refresh_policy,
+        "event_pages": event_pages,
+        "league_uid": league_uid,
+        "season": season_year,
+    }
+    return run_stages(context, include_season=False, include_matches=True, max_workers=max_workers)
+
+#--------------------------------------------------------------------------------------------------
+
+def run_pipeline(writer: DBWriter, espn_league_id: int, season_year: int | None, is_full_season_scrape: bool,
+                 conflict_free: bool = False, max_workers: int = 4, rebuild: bool = False,
+                 refresh_policy: RefreshPolicy | None = DEFAULT_REFRESH_POLICY) -> Dict[str, int]:
+    """
+    Scrapes, processes and inserts every table of one league-season.
+
+    The pipeline is a DAG of stages (see `build_pipeline_stages()`) : independent stages run
+    concurrently, and each table is written once the tables it references are written.
+
+    Args:
+        writer (DBWriter): The database writer used for every insertion.
+        espn_league_id (int): The ESPN ID of the league.
+        season_year (int | None): The year of the season, None for the current season.
+        is_full_season_scrape (bool): True to scrape the whole season, False for the latest gameday only.
+        conflict_free (bool, optional): True when other processes write the same database, see `write_table()`. Defaults to False.
+        max_workers (int, optional): Maximum number of stages running at the same time. Defaults to 4.
+        rebuild (bool, optional): True to scrape every match again, ignoring the refresh policy. Defaults to False.
+        refresh_policy (RefreshPolicy | None, optional): Matches to scrape again, None for every match. Ignored with `rebuild`.
+                                                         Defaults to `DEFAULT_REFRESH_POLICY`.
+
+    Returns:
+        Dict[str, int]: Number of records sent to the database, by table.
+
+    Raises:
+        Exception: Any error raised by the scraping, processing or insertion functions.
+    """
+    context = {
+        "writer": writer,
+        "conflict_free": conflict_free,
+        "refresh_policy": None if rebuild else refresh_policy,
+        "espn_league_id": espn_league_id,
+        "season_year": season_year,
+        "is_full_season_scrape": is_full_season_scrape,
+    }
+    return run_stages(context, include_season=True, include_matches=True, max_workers=max_workers)
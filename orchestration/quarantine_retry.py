@@ -0,0 +1,102 @@
+import logging
+import os
+from datetime import datetime
+from typing import Dict, Any, Tuple
+
+from config.metrics import get_metrics
+from database.db_writer import DBWriter
+from orchestration.pipeline import resolve_league, run_matches_stage
+from processing.utils import generate_deterministic_uid
+from scraping.events_page import filter_valid_event_pages, scrape_event_page
+from storage.quarantine import append_quarantine, load_quarantine
+from storage.response_archive import LEAGUE_PATTERN
+
+##########################################	GLOBAL SCOPE	#######################################
+# logs
+logger = logging.getLogger(__name__)
+
+##########################################	FUNCTIONS	###########################################
+
+def group_quarantined_matches(items: list[Dict[str, Any]]) -> Dict[Tuple[int, int | None], list[Dict[str, Any]]]:
+    """
+    Groups the quarantined matches by league-season.
+
+    The league is read from the url of the quarantined page when the pipeline did not know it
+    (match tasks of the work queue), the season is None when the match was scraped for the current season.
+
+    Args:
+        items (list[Dict[str, Any]]): Quarantined items of kind "match", see `storage.quarantine.load_quarantine()`.
+
+    Returns:
+        Dict[Tuple[int, int | None], list[Dict[str, Any]]]: The items, by (league, season).
+    """
+    groups: Dict[Tuple[int, int | None], list[Dict[str, Any]]] = {}
+    for item in items:
+        league = item.get("league")
+        if league is None:
+            league_match = LEAGUE_PATTERN.search(item.get("ref") or "")
+            league = league_match.group(1) if league_match else None
+        if league is None or item.get("matchEspnId") is None:
+            logger.warning("Quarantined match without league or ID skipped : %s", item.get("ref"))
+            continue
+        season = item.get("season")
+        season_year = int(season) if season not in (None, "current") else None
+        groups.setdefault((int(league), season_year), []).append(item)
+    return groups
+
+#--------------------------------------------------------------------------------------------------
+
+def retry_quarantined_matches(writer: DBWriter, quarantine_path: str) -> Dict[str, Any]:
+    """
+    Scrapes and processes again the matches of a quarantine file (see `processing.utils.isolate_match()`),
+    and writes their rows.
+
+    The quarantine file is renamed `<path>.<timestamp>` first, and kept : matches failing again
+    are quarantined in a new file at `quarantine_path`, with the items of the league-seasons whose
+    retry failed. Run it when no other command writes the file.
+
+    Args:
+        writer (DBWriter): The database writer.
+        quarantine_path (str): Path of the quarantine file.
+
+    Returns:
+        Dict[str, Any]: The retry result :
+        {
+            "matches": int,                 # Quarantined matches retried
+            "quarantinedAgain": int,        # Pages of these matches quarantined again
+            "failedSeasons": list[str],     # League-seasons whose retry failed
+            "rowsWritten": Dict[str, int]   # Records sent to the database, by table
+        }
+    """
+    result = {"matches": 0, "quarantinedAgain": 0, "failedSeasons": [], "rowsWritten": {}}
+    groups = group_quarantined_matches(load_quarantine(quarantine_path, "match"))
+    if not groups:
+        logger.info("No quarantined match in '%s'.", quarantine_path)
+        return result
+    retried_path = f"{quarantine_path}.{datetime.now():%Y%m%d_%H%M%S}"
+    os.replace(quarantine_path, retried_path)
+    logger.info("Quarantine file moved to '%s', matches failing again are quarantined in '%s'.", retried_path, quarantine_path)
+
+    metrics = get_metrics()
+    quarantined_before = sum(metrics.get_quarantine_counts().get("match", {}).values())
+    for (espn_league_id, season_year), items in groups.items():
+        match_ids = list(dict.fromkeys(int(item["matchEspnId"]) for item in items))
+        try :
+            if season_year is None : # Scraped for the current season
+                _, league_uid, season_year = resolve_league(espn_league_id, None)
+            else : # Same deterministic uid as `process_league_season_data()`
+                league_uid = generate_deterministic_uid([espn_league_id, season_year])
+            event_pages = filter_valid_event_pages([scrape_event_page(espn_league_id, match_id) for match_id in match_ids],
+                                                   enforce_policy=False)
+            rows_written = run_matches_stage(writer, event_pages, league_uid, season_year, refresh_policy=None)
+            for table_name, rows in rows_written.items():
+                result["rowsWritten"][table_name] = result["rowsWritten"].get(table_name, 0) + rows
+        except Exception as e :
+            logger.error("Retry of the quarantined matches of %s:%s ended with errors : %r", espn_league_id, season_year, e)
+            result["failedSeasons"].append(f"{espn_league_id}:{season_year}")
+            append_quarantine(quarantine_path, items) # Kept for the next retry
+        result["matches"] += len(match_ids)
+    result["quarantinedAgain"] = sum(metrics.get_quarantine_counts().get("match", {}).values()) - quarantined_before
+    logger.info("%d quarantined matches retried, %d quarantined again, %d league-seasons failed. Rows written : %s",
+                result["matches"], result["quarantinedAgain"], len(result["failedSeasons"]), result["rowsWritten"])
+    return result
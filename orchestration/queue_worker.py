@@ -0,0 +1,119 @@
+import logging
+import time
+from typing import Dict, Any
+
+from config.metrics import get_metrics
+from database.db_writer import DBWriter
+from database.sql_functions import create_connection
+from orchestration.pipeline import run_matches_stage, run_season_stage
+from orchestration.work_queue import (
+    MATCH_STAGE,
+    SEASON_STAGE,
+    LeaseHeartbeat,
+    WorkQueue,
+    format_task,
+    get_worker_id,
+    make_task,
+)
+from processing.utils import generate_deterministic_uid
+from scraping.events_page import filter_valid_event_pages, scrape_event_page
+
+##########################################	GLOBAL SCOPE	#######################################
+# logs
+logger = logging.getLogger(__name__)
+
+##########################################	FUNCTIONS	###########################################
+
+def run_queue_task(writer: DBWriter, queue: WorkQueue, task: Dict[str, Any]) -> Dict[str, int]:
+    """
+    Runs one task of the work queue.
+
+    - SEASON_STAGE : inserts the league, stadiums, teams and standings of the league-season,
+      then enqueues one MATCH_STAGE task per valid event of the season.
+    - MATCH_STAGE : inserts the match, its team statistics, its players and their statistics.
+
+    Every write is conflict-free (see `orchestration.pipeline.run_pipeline()`), so a task
+    delivered again after a worker death can safely be replayed.
+
+    Args:
+        writer (DBWriter): The database writer of the worker.
+        queue (WorkQueue): The work queue, to enqueue the match tasks of a season.
+        task (Dict[str, Any]): The task to run.
+
+    Returns:
+        Dict[str, int]: Number of records sent to the database, by table.
+
+    Raises:
+        ValueError: If the task stage is unknown.
+    """
+    league, season = task["league"], task["season"]
+    if task["stage"] == SEASON_STAGE :
+        _, event_pages, rows_written = run_season_stage(writer, league, season, True, conflict_free=True)
+        match_tasks = [make_task(league, season, MATCH_STAGE, int(page["id"])) for page in event_pages]
+        new_tasks = queue.enqueue(match_tasks)
+        logger.info(f"{new_tasks}/{len(match_tasks)} match tasks enqueued for {league}:{season}.")
+        return rows_written
+
+    if task["stage"] == MATCH_STAGE :
+        # The policy applies to the event pages of a season, checked by its SEASON_STAGE task
+        event_pages = filter_valid_event_pages([scrape_event_page(league, task["matchEspnId"])], enforce_policy=False)
+        if not event_pages :
+            return {}
+        # Same deterministic uid as `process_league_season_data()`
+        league_uid = generate_deterministic_uid([league, season])
+        return run_matches_stage(writer, event_pages, league_uid, season, conflict_free=True)
+
+    raise ValueError(f"Unknown task stage : '{task['stage']}'")
+
+#--------------------------------------------------------------------------------------------------
+
+def run_worker(queue: WorkQueue, db_config: Dict[str, Any], poll_interval: float = 10,
+               exit_when_empty: bool = False) -> Dict[str, int]:
+    """
+    Claims and runs tasks of the work queue until it is stopped (Ctrl+C), or until
+    the queue is empty with `exit_when_empty`.
+
+    The lease of the running task is extended by a heartbeat thread. On Ctrl+C, the
+    running task is released so another worker can take it immediately.
+
+    Args:
+        queue (WorkQueue): The work queue.
+        db_config (Dict[str, Any]): The database configuration, see `config.db_config.set_db_config()`.
+        poll_interval (float, optional): Seconds to wait when the queue is empty. Defaults to 10.
+        exit_when_empty (bool, optional): Stop when no task is available. Defaults to False.
+
+    Returns:
+        Dict[str, int]: Number of tasks done and failed by this worker.
+    """
+    worker_id = get_worker_id()
+    counts = {"done": 0, "failed": 0}
+    # Read by the metrics endpoint : the queue serializes its connection behind a lock
+    get_metrics().register_gauge("scraper_work_queue_tasks", "Tasks of the work queue, by status.", queue.stats, label="status")
+    logger.info(f"Worker {worker_id} started.")
+    with create_connection(db_config) as conn :
+        writer = DBWriter(conn)
+        while True :
+            task = queue.claim(worker_id)
+            if task is None :
+                if exit_when_empty :
+                    break
+                time.sleep(poll_interval)
+                continue
+
+            logger.info(f"Task {format_task(task)} claimed (attempt {task['attempts']}).")
+            try :
+                with LeaseHeartbeat(queue, task) :
+                    run_queue_task(writer, queue, task)
+                queue.complete(task)
+                counts["done"] += 1
+            except KeyboardInterrupt :
+                queue.release(task)
+                logger.info(f"Worker {worker_id} stopped, task {format_task(task)} released.")
+                break
+            except Exception as e :
+                logger.error(f"Task {format_task(task)} ended with errors : {e!r}")
+                queue.fail(task, repr(e))
+                counts["failed"] += 1
+
+    logger.info(f"Worker {worker_id} : {counts['done']} tasks done, {counts['failed']} failed. Queue : {queue.stats()}")
+    return counts
@@ -0,0 +1,163 @@
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, Tuple
+
+from database.db_writer import DBWriter
+from processing.kernels import convert_iso_date_to_MySQL
+from processing.matches_data import (
+    MATCH_STATUS_FINAL,
+    MATCH_STATUS_IN_PROGRESS,
+    MATCH_STATUS_POSTPONED,
+)
+
+##########################################	GLOBAL SCOPE	#######################################
+# logs
+logger = logging.getLogger(__name__)
+
+# Refresh actions of a match
+REFRESH_FULL = "full"   # Match, team statistics, rosters and player statistics
+REFRESH_EVENT = "event" # Match row only (event and status pages) : no statistics nor rosters
+REFRESH_SKIP = "skip"   # Nothing
+
+# Matches read per query
+STATE_BATCH_SIZE = 500
+
+# Columns of the MATCHES table read by the policy (database/migrations/0001_match_refresh_columns.sql)
+STATE_COLUMNS = ("status", "lastFetched")
+
+# True once the warning about a database without the state columns is logged
+_missing_columns_warned = False
+
+##########################################	CLASS	###########################################
+
+class RefreshPolicy:
+    """
+        Decides what to scrape again for a match, from its stored status and last fetch time.
+
+        - Unknown match : full scrape.
+        - Final match : frozen (skipped) once `final_grace` has passed since its kick-off. Within
+          the grace window, refreshed every `final_interval` to catch late statistics corrections.
+        - In progress match : refreshed every `in_progress_interval`.
+        - Scheduled or postponed match : only its event and status pages are checked (match row),
+          until its kick-off time has passed.
+
+        Attributes:
+            final_grace (timedelta): Time after kick-off when a final match is frozen.
+            final_interval (timedelta): Minimum time between two refreshes of a final match in its grace window.
+            in_progress_interval (timedelta): Minimum time between two refreshes of an in progress match.
+
+        Methods:
+            decide(match_state, match_date, now): Returns the refresh action of a match.
+    """
+
+    def __init__(self, final_grace: timedelta = timedelta(days=3), final_interval: timedelta = timedelta(hours=6),
+                 in_progress_interval: timedelta = timedelta(minutes=2)) -> None:
+        self.final_grace = final_grace
+        self.final_interval = final_interval
+        self.in_progress_interval = in_progress_interval
+
+    def decide(self, match_state: Dict[str, Any] | None, match_date: datetime, now: datetime) -> str:
+        """
+        Returns the refresh action of a match.
+
+        Args:
+            match_state (Dict[str, Any] | None): The stored "status" and "lastFetched" of the match, None if unknown.
+            match_date (datetime): The kick-off time of the match (UTC), from its event page.
+            now (datetime): The current time (UTC).
+
+        Returns:
+            str: REFRESH_FULL, REFRESH_EVENT or REFRESH_SKIP.
+        """
+        if match_state is None :
+            return REFRESH_FULL
+
+        status = match_state["status"]
+        last_fetched = match_state["lastFetched"]
+        if status == MATCH_STATUS_FINAL :
+            if now - match_date > self.final_grace :
+                return REFRESH_SKIP
+            if last_fetched is not None and now - last_fetched < self.final_interval :
+                return REFRESH_SKIP
+            return REFRESH_FULL
+        if status == MATCH_STATUS_IN_PROGRESS :
+            if last_fetched is not None and now - last_fetched < self.in_progress_interval :
+                return REFRESH_SKIP
+            return REFRESH_FULL
+        if status == MATCH_STATUS_POSTPONED or match_date > now :
+            return REFRESH_EVENT
+        return REFRESH_FULL # Kick-off passed : the match may have started
+
+##########################################	FUNCTIONS	###########################################
+
+def get_utc_now() -> datetime:
+    # Naive UTC datetime, as the DATETIME columns of the database
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+#--------------------------------------------------------------------------------------------------
+
+def load_match_states(writer: DBWriter, match_espn_ids: list[int]) -> Dict[int, Dict[str, Any]] | None:
+    """
+    Reads the stored status and last fetch time of matches.
+
+    Args:
+        writer (DBWriter): The database writer.
+        match_espn_ids (list[int]): ESPN IDs of the matches.
+
+    Returns:
+        Dict[int, Dict[str, Any]] | None: {"status": str, "lastFetched": datetime} by ESPN ID, for the matches in the database.
+        None when the MATCHES table has no state columns (database created before them, see `database.migrate`).
+    """
+    global _missing_columns_warned
+    columns = writer.get_table_columns("MATCHES")
+    if columns is not None and not all(column.lower() in columns for column in STATE_COLUMNS) :
+        if not _missing_columns_warned :
+            _missing_columns_warned = True
+            logger.warning("Columns %s missing in the MATCHES table : refresh policy disabled, every match is scraped. "
+                           "Run 'python main.py migrate' to add them.", STATE_COLUMNS)
+        return None
+
+    match_states = {}
+    for i in range(0, len(match_espn_ids), STATE_BATCH_SIZE) :
+        batch_ids = match_espn_ids[i:i + STATE_BATCH_SIZE]
+        placeholders = ", ".join(["%s"] * len(batch_ids))
+        rows = writer.select(f"SELECT espnId, `status`, lastFetched FROM MATCHES WHERE espnId IN ({placeholders})", tuple(batch_ids))
+        for row in rows :
+            match_states[row["espnId"]] = row
+    return match_states
+
+#--------------------------------------------------------------------------------------------------
+
+def plan_match_refresh(writer: DBWriter, event_pages: list[Dict[str, Any]],
+                       refresh_policy: RefreshPolicy | None) -> Tuple[list[Dict[str, Any]], list[Dict[str, Any]]]:
+    """
+    Applies the refresh policy to the events of a pipeline.
+
+    Args:
+        writer (DBWriter): The database writer.
+        event_pages (list[Dict[str, Any]]): The event pages of the pipeline.
+        refresh_policy (RefreshPolicy | None): The refresh policy, None to scrape every match.
+
+    Returns:
+        match_event_pages (list[Dict[str, Any]]): Events whose match row is scraped again.
+        stats_event_pages (list[Dict[str, Any]]): Events whose statistics and rosters are scraped again.
+        Every event when the database has no match states, see `load_match_states()`.
+    """
+    if refresh_policy is None or not event_pages :
+        return event_pages, event_pages
+
+    now = get_utc_now()
+    match_states = load_match_states(writer, [int(page["id"]) for page in event_pages])
+    if match_states is None :
+        return event_pages, event_pages
+    match_event_pages, stats_event_pages = [], []
+    for page in event_pages :
+        match_date = datetime.strptime(convert_iso_date_to_MySQL(page["date"]), '%Y-%m-%d %H:%M:%S')
+        action = refresh_policy.decide(match_states.get(int(page["id"])), match_date, now)
+        if action != REFRESH_SKIP :
+            match_event_pages.append(page)
+        if action == REFRESH_FULL :
+            stats_event_pages.append(page)
+
+    logger.info(f"Refresh policy : {len(stats_event_pages)} full, {len(match_event_pages) - len(stats_event_pages)} event only, "
+                f"{len(event_pages) - len(match_event_pages)} skipped matches.")
+    return match_event_pages, stats_event_pages
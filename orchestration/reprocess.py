@@ -0,0 +1,122 @@
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Any, Tuple
+
+from config.api_counter import get_archive_reader, set_archive_reader
+from config.metrics import get_metrics
+from config.profiling import get_profile_run_dir
+from config.tracing import get_trace_path
+from database.db_writer import get_row_hash_path
+from orchestration.batch_runner import log_throughput_report
+from orchestration.coordinator import get_catalog_args, init_worker, run_unit
+from processing.records import is_compact_records
+from storage.quarantine import get_max_invalid_ratio, get_quarantine_path
+from storage.response_archive import ResponseArchiveReader
+
+##########################################	GLOBAL SCOPE	#######################################
+# logs
+logger = logging.getLogger(__name__)
+
+##########################################	FUNCTIONS	###########################################
+
+def init_reprocess_worker(db_config: Dict[str, Any], archive_dir: str, row_hash_path: str | None = None,
+                          compact_records: bool = False, trace_path: str | None = None, profile_run_dir: str | None = None,
+                          quarantine_path: str | None = None, max_invalid_ratio: float | None = None,
+                          catalog_path: str | None = None, catalog_ttl: float = 24 * 3600):
+    """
+    Initializes a reprocessing worker : a backfill worker (see `orchestration.coordinator.init_worker()`)
+    whose API requests are all served by the response archive.
+
+    Args:
+        db_config (Dict[str, Any]): The database configuration, see `config.db_config.set_db_config()`.
+        archive_dir (str): Root directory of the response archive.
+        row_hash_path (str | None, optional): Row hash index file, see `database.row_hashes.RowHashIndex`. Defaults to None.
+        compact_records (bool, optional): Compact processed records, see `processing.records.CompactRecord`. Defaults to False.
+        trace_path (str | None, optional): Trace file of the run, see `orchestration.coordinator.init_worker()`. Defaults to None.
+        profile_run_dir (str | None, optional): Profiles directory of the run, see `orchestration.coordinator.init_worker()`. Defaults to None.
+        quarantine_path (str | None, optional): Quarantine file of the run, see `orchestration.coordinator.init_worker()`. Defaults to None.
+        max_invalid_ratio (float | None, optional): Quarantine policy of the run, see `orchestration.coordinator.init_worker()`. Defaults to None.
+        catalog_path (str | None, optional): League catalog file of the run, see `orchestration.coordinator.init_worker()`. Defaults to None.
+        catalog_ttl (float, optional): Lifetime of the catalog lists, see `orchestration.coordinator.init_worker()`. Defaults to 24 hours.
+    """
+    init_worker(db_config, None, row_hash_path=row_hash_path, compact_records=compact_records, trace_path=trace_path,
+                profile_run_dir=profile_run_dir, quarantine_path=quarantine_path, max_invalid_ratio=max_invalid_ratio,
+                catalog_path=catalog_path, catalog_ttl=catalog_ttl)
+    set_archive_reader(ResponseArchiveReader(archive_dir))
+
+#--------------------------------------------------------------------------------------------------
+
+def reprocess_unit(target: Tuple[int, int]) -> Dict[str, Any]:
+    """
+    Rebuilds the rows of one (league, season) unit from the archive, in a worker process.
+
+    Args:
+        target (Tuple[int, int]): The ESPN league ID and the season year.
+
+    Returns:
+        Dict[str, Any]: The unit result, see `orchestration.coordinator.run_unit()`, plus
+        "archive_hits" and "archive_misses", the responses read and missing in the archive.
+        A unit missing responses in the archive is incomplete : it fails.
+    """
+    archive_reader = get_archive_reader()
+    start_hits, start_misses = archive_reader.hits, archive_reader.misses
+    result = run_unit(target, rebuild=True)
+    result["archive_hits"] = archive_reader.hits - start_hits
+    result["archive_misses"] = archive_reader.misses - start_misses
+    if result["archive_misses"] and result["success"] :
+        result["success"] = False
+        result["error"] = f"{result['archive_misses']} responses missing in the archive"
+    return result
+
+#--------------------------------------------------------------------------------------------------
+
+def run_reprocess(targets: list[Tuple[int, int]], db_config: Dict[str, Any], archive_dir: str,
+                  workers: int = 4) -> list[Dict[str, Any]]:
+    """
+    Rebuilds the rows of (league, season) units purely from the raw response archive.
+
+    The whole pipeline runs without any API request : every response is read from the
+    memory-mapped archive segments (see `storage.response_archive.ResponseArchiveReader`).
+    Units are spread over a pool of worker processes, so the CPU-bound processing runs
+    on several cores, and the records go to the same bulk insertions as a crawl. Fact
+    records (matches, statistics) replace the rows of a former run.
+
+    Args:
+        targets (list[Tuple[int, int]]): The ESPN league IDs and season years to rebuild.
+        db_config (Dict[str, Any]): The database configuration, see `config.db_config.set_db_config()`.
+        archive_dir (str): Root directory of the response archive.
+        workers (int, optional): Number of worker processes. Defaults to 4.
+
+    Returns:
+        list[Dict[str, Any]]: The result of each unit, see `reprocess_unit()`.
+    """
+    start_time = time.perf_counter()
+    results = []
+    metrics = get_metrics()
+    metrics.register_gauge("scraper_units", "Reprocessed units, by state.",
+                           lambda: {"pending": len(targets) - len(results), "done": len(results)}, label="state")
+    try :
+        with ProcessPoolExecutor(max_workers=max(1, workers), initializer=init_reprocess_worker,
+                                 initargs=(db_config, archive_dir, get_row_hash_path(), is_compact_records(),
+                                           get_trace_path(), get_profile_run_dir(), get_quarantine_path(),
+                                           get_max_invalid_ratio(), *get_catalog_args())) as executor :
+            futures = [executor.submit(reprocess_unit, target) for target in targets]
+            for future in as_completed(futures) :
+                result = future.result()
+                metrics.merge(result["metrics"]) # Merged as units end : the metrics endpoint follows the run
+                results.append(result)
+    finally :
+        metrics.unregister_gauge("scraper_units")
+
+    rows_written = {}
+    for result in results :
+        for table_name, count in result["rows_written"].items() :
+            rows_written[table_name] = rows_written.get(table_name, 0) + count
+    archive_hits = sum(result["archive_hits"] for result in results)
+    archive_misses = sum(result["archive_misses"] for result in results)
+    log_throughput_report(results, time.perf_counter() - start_time, archive_hits, rows_written, request_label="Archive reads")
+    logger.info(f"Archive : {archive_hits} responses read / {archive_misses} missing")
+    if archive_misses :
+        logger.warning(f"{archive_misses} responses missing in the archive : the units needing them failed.")
+    return results
@@ -0,0 +1,169 @@
+import contextvars
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, Any, Callable
+
+from config.metrics import count_rows, get_metrics
+from config.profiling import profile_stage
+from config.tracing import trace_span
+
+##########################################	GLOBAL SCOPE	#######################################
+# logs
+logger = logging.getLogger(__name__)
+
+##########################################	CLASS	###########################################
+
+class StageDAGError(Exception):
+    pass
+
+
+class Stage:
+    """
+        A pipeline stage : a function reading named inputs and producing named outputs.
+
+        Attributes:
+            name (str): Unique name of the stage.
+            function (Callable): Called with one keyword argument per input. Returns the output
+                                 (one output), a tuple of outputs (several outputs) or None (no output).
+            inputs (tuple[str]): Names of the values read in the pipeline context.
+            outputs (tuple[str]): Names of the values written in the pipeline context.
+            after (tuple[str]): Names of stages that must end before this one, without exchanging
+                                data (e.g. a table insertion must follow the tables it references).
+    """
+
+    def __init__(self, name: str, function: Callable, inputs: tuple = (), outputs: tuple = (), after: tuple = ()) -> None:
+        self.name = name
+        self.function = function
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs)
+        self.after = tuple(after)
+
+    def run(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        result = self.function(**{input_name: context[input_name] for input_name in self.inputs})
+        if not self.outputs:
+            return {}
+        if len(self.outputs) == 1:
+            return {self.outputs[0]: result}
+        return dict(zip(self.outputs, result))
+
+
+class StageDAG:
+    """
+        A directed acyclic graph of stages, executed concurrently as soon as their dependencies end.
+
+        The dependencies of a stage are the stages producing its inputs and the stages listed
+        in its `after` attribute. Independent stages run at the same time in a thread pool,
+        which suits the pipeline stages that mostly wait on the ESPN API. When a stage fails,
+        the stages depending on it are skipped, the other stages still run.
+
+        Methods:
+            run(context, max_workers): Runs every stage and returns the timing of each stage.
+    """
+
+    def __init__(self, stages: list[Stage]) -> None:
+        self.stages = {stage.name: stage for stage in stages}
+        if len(self.stages) != len(stages):
+            raise StageDAGError("Stage names must be unique.")
+
+        producers = {}
+        for stage in stages:
+            for output_name in stage.outputs:
+                if output_name in producers:
+                    raise StageDAGError(f"Output '{output_name}' is produced by '{producers[output_name]}' and '{stage.name}'.")
+                producers[output_name] = stage.name
+
+        self.dependencies = {}
+        for stage in stages:
+            unknown_stages = [name for name in stage.after if name not in self.stages]
+            if unknown_stages:
+                raise StageDAGError(f"Stage '{stage.name}' runs after unknown stages : {unknown_stages}")
+            self.dependencies[stage.name] = {producers[name] for name in stage.inputs if name in producers} | set(stage.after)
+        self._check_acyclic()
+
+    def _check_acyclic(self):
+        remaining = {name: set(dependencies) for name, dependencies in self.dependencies.items()}
+        while remaining:
+            ready = [name for name, dependencies in remaining.items() if not dependencies]
+            if not ready:
+                raise StageDAGError(f"Dependency cycle between stages : {sorted(remaining)}")
+            for name in ready:
+                del remaining[name]
+            for dependencies in remaining.values():
+                dependencies.difference_update(ready)
+
+    def run(self, context: Dict[str, Any], max_workers: int = 4) -> Dict[str, float]:
+        """
+        Runs every stage, updating the context with their outputs.
+
+        Args:
+            context (Dict[str, Any]): The initial values of the pipeline, updated with the stage outputs.
+            max_workers (int, optional): Maximum number of stages running at the same time. Defaults to 4.
+
+        Returns:
+            Dict[str, float]: Duration of each stage in seconds, in completion order. Durations and rows
+            produced are also recorded in the metrics registry (see `config.metrics.MetricsRegistry`).
+
+        Raises:
+            StageDAGError: If an input is neither in the context nor produced by a stage.
+            Exception: The first error raised by a stage, once the stages not depending on a failed
+                       stage have ended. Stages depending on a failed stage are skipped.
+        """
+        produced = {output_name for stage in self.stages.values() for output_name in stage.outputs}
+        missing_inputs = {name for stage in self.stages.values() for name in stage.inputs} - produced - set(context)
+        if missing_inputs:
+            raise StageDAGError(f"Missing pipeline inputs : {sorted(missing_inputs)}")
+
+        timings = {}
+        done = set()
+        failed = set()
+        error = None
+        running = {}
+
+        def timed_run(stage):
+            start_time = time.perf_counter()
+            with trace_span(f"stage:{stage.name}", "stage"), profile_stage(stage.name):
+                outputs = stage.run(context)
+            return outputs, time.perf_counter() - start_time
+
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            while True:
+                # Dependencies of a failed stage never end : its dependents are never ready
+                for name, dependencies in self.dependencies.items():
+                    if name not in done and name not in failed and name not in running.values() and dependencies <= done:
+                        # Stages see the context variables of the caller (e.g. the archive partition)
+                        stage_context = contextvars.copy_context()
+                        running[executor.submit(stage_context.run, timed_run, self.stages[name])] = name
+                if not running:
+                    break
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    try:
+                        outputs, elapsed = future.result()
+                    except Exception as e:
+                        logger.error(f"Stage '{name}' ended with errors.")
+                        failed.add(name)
+                        error = error or e
+                        continue
+                    context.update(outputs)
+                    timings[name] = elapsed
+                    stage = self.stages[name]
+                    get_metrics().record_stage(name, f"{stage.function.__module__}.{stage.function.__qualname__}",
+                                               elapsed, sum(count_rows(output) for output in outputs.values()))
+                    done.add(name)
+
+        if error is not None:
+            skipped = sorted(set(self.stages) - done - failed)
+            if skipped:
+                logger.warning(f"Stages skipped after the errors of {sorted(failed)} : {skipped}")
+            raise error
+        return timings
+
+##########################################	FUNCTIONS	###########################################
+
+def log_stage_timings(timings: Dict[str, float]):
+    logger.info("------ Stage timings ------")
+    for name, elapsed in sorted(timings.items(), key=lambda item: item[1], reverse=True):
+        logger.info(f"{name:>26} | {elapsed:8.2f} s")
@@ -0,0 +1,395 @@
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from typing import Dict, Any, Optional
+
+from processing.utils import generate_deterministic_uid
+
+##########################################	GLOBAL SCOPE	#######################################
+# logs
+logger = logging.getLogger(__name__)
+
+# Task stages
+SEASON_STAGE = "season" # League, stadiums, teams and standings of a league-season, then enqueues its matches
+MATCH_STAGE = "match"   # Match, team statistics, players and player statistics of one match
+
+# Task status
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+TASK_COLUMNS = ("taskId", "league", "season", "stage", "matchEspnId", "status",
+                "owner", "leaseToken", "leaseExpiresAt", "attempts", "lastError", "createdAt", "updatedAt")
+
+##########################################	CLASS	###########################################
+
+class WorkQueueError(Exception):
+    pass
+
+
+class WorkQueue(ABC):
+    """
+        A work queue handing out (league, season, stage, match) tasks to scraper nodes.
+
+        A claimed task is leased to one worker for `lease_seconds`. The worker extends
+        its lease with `heartbeat()` while it works. If the worker dies, its lease expires
+        and the task is delivered again to another worker, until `max_attempts` is reached.
+        Tasks have a deterministic id, so enqueuing the same task twice (from two nodes for
+        example) has no effect.
+
+        Methods:
+            enqueue(tasks): Adds tasks to the queue, returns the number of new tasks.
+            claim(worker_id): Leases the next available task to a worker, None if the queue is empty.
+            heartbeat(task): Extends the lease of a task, False if the lease was lost.
+            complete(task): Marks a task as done.
+            fail(task, error): Marks a task as failed, or puts it back in the queue if attempts remain.
+            release(task): Puts a leased task back in the queue (graceful worker stop).
+            stats(): Returns the number of tasks by status.
+    """
+
+    def __init__(self, lease_seconds: float = 300, max_attempts: int = 3) -> None:
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+
+    @abstractmethod
+    def enqueue(self, tasks: list[Dict[str, Any]]) -> int: ...
+
+    @abstractmethod
+    def claim(self, worker_id: str) -> Optional[Dict[str, Any]]: ...
+
+    @abstractmethod
+    def heartbeat(self, task: Dict[str, Any]) -> bool: ...
+
+    @abstractmethod
+    def complete(self, task: Dict[str, Any]): ...
+
+    @abstractmethod
+    def fail(self, task: Dict[str, Any], error: str): ...
+
+    @abstractmethod
+    def release(self, task: Dict[str, Any]): ...
+
+    @abstractmethod
+    def stats(self) -> Dict[str, int]: ...
+
+    def close(self):
+        pass
+
+
+class SQLiteWorkQueue(WorkQueue):
+    """
+        Work queue stored in a local SQLite file, for tests and single host runs.
+
+        Every state change runs in an immediate transaction, which takes the SQLite
+        file lock : several processes of the same host can share the queue safely.
+    """
+
+    def __init__(self, path: str, lease_seconds: float = 300, max_attempts: int = 3) -> None:
+        super().__init__(lease_seconds, max_attempts)
+        self.path = path
+        self._lock = threading.Lock() # The heartbeat thread shares the connection
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS work_queue (
+                taskId TEXT PRIMARY KEY,
+                league INTEGER NOT NULL,
+                season INTEGER NOT NULL,
+                stage TEXT NOT NULL,
+                matchEspnId INTEGER,
+                status TEXT NOT NULL,
+                owner TEXT,
+                leaseToken TEXT,
+                leaseExpiresAt REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                lastError TEXT,
+                createdAt REAL NOT NULL,
+                updatedAt REAL NOT NULL
+            )""")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS work_queue_status ON work_queue (status, createdAt)")
+
+    def _transaction(self, statements):
+        with self._lock:
+            try:
+                self.conn.execute("BEGIN IMMEDIATE")
+                result = statements(self.conn.cursor())
+                self.conn.execute("COMMIT")
+                return result
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def enqueue(self, tasks: list[Dict[str, Any]]) -> int:
+        now = time.time()
+
+        def statements(cursor):
+            inserted_count = 0
+            for task in tasks:
+                cursor.execute(
+                    "INSERT OR IGNORE INTO work_queue (taskId, league, season, stage, matchEspnId, status, attempts, createdAt, updatedAt) "
+                    "VALUES (?, ?, ?, ?, ?, ?, 0, ?, ?)",
+                    (task["taskId"], task["league"], task["season"], task["stage"], task["matchEspnId"], PENDING, now, now),
+                )
+                inserted_count += cursor.rowcount
+            return inserted_count
+        return self._transaction(statements)
+
+    def claim(self, worker_id: str) -> Optional[Dict[str, Any]]:
+        def statements(cursor):
+            now = time.time()
+            # Leases of dead workers that already used all their attempts are failed
+            cursor.execute(
+                "UPDATE work_queue SET status = ?, lastError = ?, updatedAt = ? "
+                "WHERE status = ? AND leaseExpiresAt < ? AND attempts >= ?",
+                (FAILED, "Lease expired (worker death)", now, LEASED, now, self.max_attempts),
+            )
+            cursor.execute(
+                "SELECT taskId FROM work_queue WHERE status = ? OR (status = ? AND leaseExpiresAt < ?) "
+                "ORDER BY stage = ? DESC, createdAt LIMIT 1",
+                (PENDING, LEASED, now, SEASON_STAGE),
+            )
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            lease_token = uuid.uuid4().hex
+            cursor.execute(
+                "UPDATE work_queue SET status = ?, owner = ?, leaseToken = ?, leaseExpiresAt = ?, attempts = attempts + 1, updatedAt = ? "
+                "WHERE taskId = ?",
+                (LEASED, worker_id, lease_token, now + self.lease_seconds, now, row["taskId"]),
+            )
+            cursor.execute("SELECT * FROM work_queue WHERE taskId = ?", (row["taskId"],))
+            return dict(cursor.fetchone())
+        return self._transaction(statements)
+
+    def _update_leased(self, task: Dict[str, Any], assignments: str, values: tuple) -> bool:
+        def statements(cursor):
+            cursor.execute(
+                f"UPDATE work_queue SET {assignments}, updatedAt = ? WHERE taskId = ? AND leaseToken = ? AND status = ?",
+                (*values, time.time(), task["taskId"], task["leaseToken"], LEASED),
+            )
+            return cursor.rowcount == 1
+        return self._transaction(statements)
+
+    def heartbeat(self, task: Dict[str, Any]) -> bool:
+        return self._update_leased(task, "leaseExpiresAt = ?", (time.time() + self.lease_seconds,))
+
+    def complete(self, task: Dict[str, Any]):
+        self._update_leased(task, "status = ?, leaseToken = NULL", (DONE,))
+
+    def fail(self, task: Dict[str, Any], error: str):
+        status = FAILED if task["attempts"] >= self.max_attempts else PENDING
+        self._update_leased(task, "status = ?, leaseToken = NULL, lastError = ?", (status, error))
+
+    def release(self, task: Dict[str, Any]):
+        self._update_leased(task, "status = ?, leaseToken = NULL, attempts = attempts - 1", (PENDING,))
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self.conn.execute("SELECT status, COUNT(*) AS count FROM work_queue GROUP BY status").fetchall()
+        return {row["status"]: row["count"] for row in rows}
+
+    def close(self):
+        self.conn.close()
+
+
+class MySQLWorkQueue(WorkQueue):
+    """
+        Work queue stored in the MariaDB/MySQL server, shared by scraper nodes on several hosts.
+
+        A task is claimed with a single atomic UPDATE ... LIMIT 1 writing a random lease token,
+        then read back by its token : two nodes can never lease the same task.
+    """
+
+    def __init__(self, db_config: Dict[str, Any], lease_seconds: float = 300, max_attempts: int = 3) -> None:
+        super().__init__(lease_seconds, max_attempts)
+        from pymysql import connect
+        self._lock = threading.Lock() # The heartbeat thread shares the connection
+        self.conn = connect(**{**db_config, "autocommit": True})
+        with self.conn.cursor() as cursor:
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS WORK_QUEUE (
+                    taskId VARCHAR(16) PRIMARY KEY,
+                    league INT NOT NULL,
+                    season YEAR NOT NULL,
+                    stage VARCHAR(16) NOT NULL,
+                    matchEspnId INT,
+                    `status` VARCHAR(16) NOT NULL,
+                    `owner` VARCHAR(100),
+                    leaseToken VARCHAR(32),
+                    leaseExpiresAt DOUBLE,
+                    attempts INT NOT NULL DEFAULT 0,
+                    lastError TEXT,
+                    createdAt DOUBLE NOT NULL,
+                    updatedAt DOUBLE NOT NULL,
+                    INDEX (`status`, createdAt),
+                    INDEX (leaseToken)
+                )""")
+
+    def _execute(self, sql: str, values: tuple = ()):
+        with self._lock:
+            self.conn.ping(reconnect=True)
+            with self.conn.cursor() as cursor:
+                cursor.execute(sql, values)
+                return cursor.rowcount, cursor.fetchall()
+
+    def enqueue(self, tasks: list[Dict[str, Any]]) -> int:
+        now = time.time()
+        inserted_count = 0
+        for task in tasks:
+            rowcount, _ = self._execute(
+                "INSERT IGNORE INTO WORK_QUEUE (taskId, league, season, stage, matchEspnId, `status`, attempts, createdAt, updatedAt) "
+                "VALUES (%s, %s, %s, %s, %s, %s, 0, %s, %s)",
+                (task["taskId"], task["league"], task["season"], task["stage"], task["matchEspnId"], PENDING, now, now),
+            )
+            inserted_count += rowcount
+        return inserted_count
+
+    def claim(self, worker_id: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        # Leases of dead workers that already used all their attempts are failed
+        self._execute(
+            "UPDATE WORK_QUEUE SET `status` = %s, lastError = %s, updatedAt = %s "
+            "WHERE `status` = %s AND leaseExpiresAt < %s AND attempts >= %s",
+            (FAILED, "Lease expired (worker death)", now, LEASED, now, self.max_attempts),
+        )
+        lease_token = uuid.uuid4().hex
+        rowcount, _ = self._execute(
+            "UPDATE WORK_QUEUE SET `status` = %s, `owner` = %s, leaseToken = %s, leaseExpiresAt = %s, "
+            "attempts = attempts + 1, updatedAt = %s "
+            "WHERE `status` = %s OR (`status` = %s AND leaseExpiresAt < %s) "
+            "ORDER BY stage = %s DESC, createdAt LIMIT 1",
+            (LEASED, worker_id, lease_token, now + self.lease_seconds, now, PENDING, LEASED, now, SEASON_STAGE),
+        )
+        if rowcount == 0:
+            return None
+        _, rows = self._execute("SELECT * FROM WORK_QUEUE WHERE leaseToken = %s", (lease_token,))
+        return rows[0] if rows else None
+
+    def _update_leased(self, task: Dict[str, Any], assignments: str, values: tuple) -> bool:
+        rowcount, _ = self._execute(
+            f"UPDATE WORK_QUEUE SET {assignments}, updatedAt = %s WHERE taskId = %s AND leaseToken = %s AND `status` = %s",
+            (*values, time.time(), task["taskId"], task["leaseToken"], LEASED),
+        )
+        return rowcount == 1
+
+    def heartbeat(self, task: Dict[str, Any]) -> bool:
+        return self._update_leased(task, "leaseExpiresAt = %s", (time.time() + self.lease_seconds,))
+
+    def complete(self, task: Dict[str, Any]):
+        self._update_leased(task, "`status` = %s, leaseToken = NULL", (DONE,))
+
+    def fail(self, task: Dict[str, Any], error: str):
+        status = FAILED if task["attempts"] >= self.max_attempts else PENDING
+        self._update_leased(task, "`status` = %s, leaseToken = NULL, lastError = %s", (status, error))
+
+    def release(self, task: Dict[str, Any]):
+        self._update_leased(task, "`status` = %s, leaseToken = NULL, attempts = attempts - 1", (PENDING,))
+
+    def stats(self) -> Dict[str, int]:
+        _, rows = self._execute("SELECT `status`, COUNT(*) AS count FROM WORK_QUEUE GROUP BY `status`")
+        return {row["status"]: row["count"] for row in rows}
+
+    def close(self):
+        self.conn.close()
+
+
+class LeaseHeartbeat:
+    """
+        Context manager extending the lease of a task in a background thread while it is processed.
+
+        Attributes:
+            lost (bool): True if the lease was lost (expired and delivered to another worker).
+    """
+
+    def __init__(self, queue: WorkQueue, task: Dict[str, Any]) -> None:
+        self.queue = queue
+        self.task = task
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.queue.lease_seconds / 3):
+            try:
+                if not self.queue.heartbeat(self.task):
+                    self.lost = True
+                    logger.warning(f"Lease lost for task {format_task(self.task)}.")
+                    return
+            except Exception as e:
+                logger.warning(f"Heartbeat error for task {format_task(self.task)} : {e!r}")
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+##########################################	FUNCTIONS	###########################################
+
+def make_task(league: int, season: int, stage: str, match_espn_id: int | None = None) -> Dict[str, Any]:
+    """
+    Builds a task with its deterministic id.
+
+    Args:
+        league (int): The ESPN ID of the league.
+        season (int): The year of the season.
+        stage (str): SEASON_STAGE or MATCH_STAGE.
+        match_espn_id (int | None, optional): The ESPN ID of the match, for MATCH_STAGE tasks. Defaults to None.
+
+    Returns:
+        Dict[str, Any]: The task.
+    """
+    return {
+        "taskId": generate_deterministic_uid([f"league={league}", f"season={season}", f"stage={stage}", f"match={match_espn_id}"]),
+        "league": league,
+        "season": season,
+        "stage": stage,
+        "matchEspnId": match_espn_id,
+    }
+
+#--------------------------------------------------------------------------------------------------
+
+def format_task(task: Dict[str, Any]) -> str:
+    match_part = f":{task['matchEspnId']}" if task.get("matchEspnId") else ""
+    return f"{task['stage']} {task['league']}:{task['season']}{match_part}"
+
+#--------------------------------------------------------------------------------------------------
+
+def get_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+#--------------------------------------------------------------------------------------------------
+
+def create_work_queue(queue_url: str, db_config: Dict[str, Any] | None = None,
+                      lease_seconds: float = 300, max_attempts: int = 3) -> WorkQueue:
+    """
+    Creates the work queue backend from its url.
+
+    Args:
+        queue_url (str): "sqlite:///<path>" for a local queue file, "mysql" for the queue
+                         stored in the scraper database (shared by all hosts).
+        db_config (Dict[str, Any] | None, optional): The database configuration, required by "mysql". Defaults to None.
+        lease_seconds (float, optional): Lease duration of a claimed task. Defaults to 300.
+        max_attempts (int, optional): Deliveries of a task before it is failed. Defaults to 3.
+
+    Returns:
+        WorkQueue: The work queue.
+
+    Raises:
+        WorkQueueError: If the url is not supported.
+    """
+    if queue_url.startswith("sqlite:///"):
+        return SQLiteWorkQueue(queue_url[len("sqlite:///"):], lease_seconds, max_attempts)
+    if queue_url == "mysql":
+        if db_config is None:
+            raise WorkQueueError("The 'mysql' work queue needs the database configuration.")
+        return MySQLWorkQueue(db_config, lease_seconds, max_attempts)
+    raise WorkQueueError(f"Unsupported work queue url : '{queue_url}' (expected 'sqlite:///<path>' or 'mysql').")
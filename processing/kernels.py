@@ -0,0 +1,111 @@
+import hashlib
+import re
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Iterable
+
+from dateutil import parser
+
+##########################################	GLOBAL SCOPE	#######################################
+
+# Numeric fields of an ESPN "$ref" url (".../events/594152/competitions/594152/competitors/25901/roster")
+REF_NUMBER_PATTERN = re.compile(r"/(\d+)")
+
+# ESPN dates : "2024-05-18T14:00Z", "2024-05-18T14:00:00Z", "2024-05-18T14:00:00.000+02:00", "1995-03-12"
+ISO_DATE_PATTERN = re.compile(
+    r"(\d{4})-(\d{2})-(\d{2})(?:[T ](\d{2}):(\d{2})(?::(\d{2})(?:\.\d+)?)?)?(?:Z|[+-]\d{2}:?\d{2})?"
+)
+
+##########################################	FUNCTIONS	###########################################
+
+@lru_cache(maxsize=65536)
+def parse_ref_ids(url: str) -> tuple[int, ...]:
+    """
+    Returns every numeric field of a url at once, with a precompiled pattern.
+
+    Args:
+        url (str): An ESPN "$ref" url.
+
+    Returns:
+        tuple[int]: The numeric fields of the url, in url order. Empty if the url has none.
+
+    Note:
+        Results are memoized : the same refs (positions, teams ...) come back for every roster entry.
+    """
+    return tuple(int(number) for number in REF_NUMBER_PATTERN.findall(url))
+
+#--------------------------------------------------------------------------------------------------
+
+@lru_cache(maxsize=65536)
+def convert_iso_date_to_MySQL(date: str) -> str:
+    """
+    Converts an ESPN ISO date to the MySQL datetime format ('%Y-%m-%d %H:%M:%S').
+
+    ESPN dates are matched by a precompiled pattern, other formats fall back to
+    `dateutil.parser.parse()`. As `dateutil`, the wall-clock time of the date is kept
+    (no time zone conversion). Results are memoized : many matches share the same kick-off.
+
+    Args:
+        date (str): The date string.
+
+    Returns:
+        str: The date in MySQL datetime format.
+
+    Raises:
+        dateutil.parser.ParserError: If the date can not be parsed.
+    """
+    date_match = ISO_DATE_PATTERN.fullmatch(date)
+    if date_match is None:
+        return parser.parse(date).strftime('%Y-%m-%d %H:%M:%S')
+    year, month, day, hour, minute, second = date_match.groups()
+    try:
+        datetime(int(year), int(month), int(day), int(hour or 0), int(minute or 0), int(second or 0))
+    except ValueError:
+        return parser.parse(date).strftime('%Y-%m-%d %H:%M:%S') # Let dateutil raise on invalid dates
+    return f"{year}-{month}-{day} {hour or '00'}:{minute or '00'}:{second or '00'}"
+
+#--------------------------------------------------------------------------------------------------
+
+def generate_uid(unique_keys: Iterable[Any]) -> str:
+    """
+    Same UID as `processing.utils.generate_deterministic_uid()`, without its checks and error handling.
+
+    Args:
+        unique_keys (Iterable[Any]): The values identifying the record (not empty).
+
+    Returns:
+        str: A 16-character hexadecimal string.
+    """
+    return hashlib.sha256("_".join(sorted(map(str, unique_keys))).encode("utf-8")).hexdigest()[:16]
+
+#--------------------------------------------------------------------------------------------------
+
+def generate_uids(unique_keys_list: Iterable[Iterable[Any]]) -> list[str]:
+    """
+    Generates the UIDs of many records at once, byte-identical to `processing.utils.generate_deterministic_uid()`.
+
+    Repeated keys (the player-team of every match of a player, the league-season of every
+    standing ...) are hashed once per batch.
+
+    Args:
+        unique_keys_list (Iterable[Iterable[Any]]): The unique keys of each record (int and str values).
+
+    Returns:
+        list[str]: The 16-character hexadecimal UID of each record, in input order.
+
+    Raises:
+        ValueError: If the unique keys of a record are empty.
+    """
+    sha256 = hashlib.sha256
+    batch_uids = {}
+    uids = []
+    for unique_keys in unique_keys_list:
+        keys = tuple(unique_keys)
+        uid = batch_uids.get(keys)
+        if uid is None:
+            if not keys:
+                raise ValueError("unique_keys dictionary cannot be empty")
+            uid = sha256("_".join(sorted(map(str, keys))).encode("utf-8")).hexdigest()[:16]
+            batch_uids[keys] = uid
+        uids.append(uid)
+    return uids
@@ -2,10 +2,12 @@ import json
 import logging
 from typing import Dict, Any, Tuple
 
+from config.tracing import traced
 from parsing.leagues_data import parse_calendar_dates
 from processing.utils import generate_deterministic_uid, get_number_field
 from scraping.events_page import scrape_event_pages_for_gameday
 from scraping.league_pages import scrape_calendar_page, scrape_league_page, scrape_league_season_page
+from storage.league_catalog import get_league_catalog
 
 
 ##########################################	GLOBAL SCOPE	#######################################
@@ -75,6 +77,7 @@ def check_dates_validity(league_espn_id: int, season_year: int, dates: list[str]
 
 #--------------------------------------------------------------------------------------------------
     
+@traced("processing")
 def process_league_season_data( league_espn_id: int, season_year: int ) -> Dict[str, Any]:
     """
     Processes league and season data for a specific league and year.
@@ -123,8 +126,13 @@ def process_league_season_data( league_espn_id: int, season_year: int ) -> Dict[
             season_year = league_page["season"]["year"]
             calendar_page = scrape_calendar_page(league_espn_id, season_year)
         dates = parse_calendar_dates(calendar_page)
-        # See docstring the function `check_dates_validity()`
-        start_date, end_date = check_dates_validity(league_espn_id, season_year, dates)
+        # See docstring the function `check_dates_validity()`. The league catalog keeps the bounds
+        # validated for the same calendar dates, without scraping the events again.
+        league_catalog = get_league_catalog()
+        if league_catalog is not None :
+            start_date, end_date = league_catalog.get_season_bounds(league_espn_id, season_year, dates, check_dates_validity)
+        else :
+            start_date, end_date = check_dates_validity(league_espn_id, season_year, dates)
 
         # scrape other informations from individual league page for each season.
         league_season_page = scrape_league_season_page(league_espn_id, season_year)
@@ -1,12 +1,16 @@
 from ast import Tuple
 import logging
+from datetime import datetime, timezone
 from typing import Dict, Any, Tuple
 
+from config.logging_config import warn_sampled
+from config.tracing import trace_span, traced
+from processing.stats_columns import StatsBatch
 from processing.utils import (
     extract_linescores,
-    extract_stats,
     generate_deterministic_uid,
     convert_date_time_to_MySQL,
+    isolate_match,
 )
 from scraping.utils import scrape_url
 
@@ -14,6 +18,12 @@ from scraping.utils import scrape_url
 # logs
 logger = logging.getLogger(__name__)
 
+# Match status stored in MATCHES.status (from the "state" of the ESPN status type)
+MATCH_STATUS_SCHEDULED = "scheduled"
+MATCH_STATUS_IN_PROGRESS = "in_progress"
+MATCH_STATUS_FINAL = "final"
+MATCH_STATUS_POSTPONED = "postponed" # Ended without being completed (postponed, canceled, abandoned)
+
 ##########################################	FUNCTIONS	###########################################
 
 
@@ -84,9 +94,8 @@ def get_venue_espn_id(event_page : Dict[str, Any]) :
     competitions_page = event_page["competitions"][0]
     venue = competitions_page.get("venue", None)
     if venue is None:
-        logger.warning(
-            f"Venue is missing in ESPN database for match '{event_page['name']}' (ID: {event_page['id']})."
-        )
+        warn_sampled(logger, "Match venue missing",
+                     "Venue is missing in ESPN database for match '%s' (ID: %s).", event_page['name'], event_page['id'])
     else:
         stadium_espn_id = int(venue["id"])
     return stadium_espn_id
@@ -104,21 +113,63 @@ def get_total_play_time(event_page : Dict[str, Any]) :
     Returns:
         total_play_time (int): total play time.
     """
+    total_play_time, _ = get_status_data(event_page)
+    return total_play_time
+
+#--------------------------------------------------------------------------------------------------
+
+def get_match_status(status_page : Dict[str, Any]) -> str | None :
+    """
+    Sub function of `get_status_data` to parse the match status.
+
+    Args:
+        status_page (Dict[str, Any]): The status page of a match.
+
+    Returns:
+        str | None: One of the MATCH_STATUS_* values, None if the status type is missing.
+    """
+    status_type = status_page.get("type", {})
+    match status_type.get("state") :
+        case "pre" :
+            return MATCH_STATUS_SCHEDULED
+        case "in" :
+            return MATCH_STATUS_IN_PROGRESS
+        case "post" :
+            return MATCH_STATUS_FINAL if status_type.get("completed", True) else MATCH_STATUS_POSTPONED
+    return None
+
+#--------------------------------------------------------------------------------------------------
+
+def get_status_data(event_page : Dict[str, Any]) -> Tuple[int | None, str | None] :
+    """
+    Sub function of `process_matches_data` to parse total play time and match status,
+    from the same status page.
+
+    Args:
+        event_page (Dict[str, Any]): A dictionaries containing event data,
+                                    in particular the status url.
+
+    Returns:
+        total_play_time (int): total play time.
+        status (str): The match status, see `get_match_status()`.
+    """
     total_play_time = None
-    # Get stadium_espn_id if exist
+    status = None
+    # Get status page if exist
     competitions_page = event_page["competitions"][0]
     status_url = competitions_page.get("status", {}).get("$ref", None)
     if status_url is None:
-        logger.warning(
-            f"Total play time is missing in ESPN database for match '{event_page['name']}' (ID: {event_page['id']})."
-        )
+        warn_sampled(logger, "Match status missing",
+                     "Total play time is missing in ESPN database for match '%s' (ID: %s).", event_page['name'], event_page['id'])
     else:
         status_page = scrape_url(status_url)
         total_play_time = status_page["clock"]
-    return total_play_time
+        status = get_match_status(status_page)
+    return total_play_time, status
 
 #--------------------------------------------------------------------------------------------------
 
+@traced("processing")
 def process_matches_data(
     event_pages: list[Dict[str, Any]], league_uid: str
 ) -> list[Dict[str, Any]]:
@@ -148,7 +199,9 @@ def process_matches_data(
             "stadiumEspnId": int,       # ESPN ID of the stadium
             "winnerScore": int,         # Score of the winning team
             "loserScore": int,          # Score of the losing team
-            "totalPlayTime": float      # Total play time of the match in seconds
+            "totalPlayTime": float,     # Total play time of the match in seconds
+            "status": str,              # Match status : scheduled, in_progress, final or postponed
+            "lastFetched": str          # UTC time of this scrape in MySQL format
         }
 
     Raises:
@@ -172,8 +225,8 @@ def process_matches_data(
             # Get stadium_espn_id
             stadium_espn_id = get_venue_espn_id(page)
 
-            # Get Total Playtime
-            total_play_time = get_total_play_time(page)
+            # Get Total Playtime and status
+            total_play_time, status = get_status_data(page)
 
             # fill the table pattern
             match_data = {
@@ -190,6 +243,8 @@ def process_matches_data(
                 "winnerScore": winner_score,
                 "loserScore": loser_score,
                 "totalPlayTime": total_play_time,
+                "status": status,
+                "lastFetched": datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S'),
             }
             matches_data.append(match_data)
 
@@ -206,8 +261,9 @@ def process_matches_data(
 # --------------------------------------------------------------------------------------------------
 
 
+@traced("processing")
 def process_team_match_stats_data(
-    event_pages: list[Dict[str, Any]]
+    event_pages: list[Dict[str, Any]], season_year: int | None = None
 ) -> list[Dict[str, Any]]:
     """
     Processes team match statistics data from a list of event pages.
@@ -217,6 +273,7 @@ def process_team_match_stats_data(
 
     Args:
         event_pages (list[Dict[str, Any]]): A list of dictionaries containing event page data.
+        season_year (int | None, optional): The year of the season of the matches. Defaults to None.
 
     Returns:
         list[Dict[str, Any]]: A list of dictionaries, each containing match statistics for a team.
@@ -224,6 +281,7 @@ def process_team_match_stats_data(
         {
             "uid": str,                 # Unique identifier for the team-match combination
             "matchEspnId": int,         # ESPN ID of the match
+            "matchSeason": int,         # Season year of the match (partitioning key, see database/partitions.py)
             "teamEspnId": int,          # ESPN ID of the team
             "opponentEspnId": int,      # ESPN ID of the opponent team
             "linescore1stHalf": int,    # Score for the first half
@@ -234,20 +292,50 @@ def process_team_match_stats_data(
         }
 
     Raises:
-        KeyError: If required keys are missing from the event page data.
-        ValueError: If home or away team data is missing.
-        Exception: For any unexpected errors during the processing of team match statistics.
+        ScrappingError: If the API request budget of the run is exhausted.
 
     Note:
+        - A match with invalid data is quarantined and skipped, see `process_team_match_stats_batch()`.
         - This function uses external functions for extracting line scores and additional statistics.
         - It generates a unique identifier for each team-match combination.
         - The function processes both home and away team data for each match.
+        - The records are built once from the columnar batch of `process_team_match_stats_batch()` :
+          only the statistics found in the statistics page are present.
     """
-    teams_matches_stat: list[Dict[str, Any]] = []
+    return process_team_match_stats_batch(event_pages, season_year).to_records()
 
-    try:
 
-        for page in event_pages:
+# --------------------------------------------------------------------------------------------------
+
+
+def process_team_match_stats_batch(event_pages: list[Dict[str, Any]], season_year: int | None = None) -> StatsBatch:
+    """
+    Processes team match statistics data from a list of event pages into a columnar batch.
+
+    The statistics of each team are written directly in the NumPy array of the batch, at the
+    column index of the statistic in the TEAM_MATCH_STATS table (see `processing.stats_columns`).
+
+    Each match is processed in isolation (see `processing.utils.isolate_match()`) : a match with
+    missing keys, unexpected values or an unavailable statistics page is quarantined with its event
+    page, its rows are removed from the batch, and the other matches are processed.
+
+    Args:
+        event_pages (list[Dict[str, Any]]): A list of dictionaries containing event page data.
+        season_year (int | None, optional): The year of the season of the matches. Defaults to None.
+
+    Returns:
+        StatsBatch: One row per team and match, see `process_team_match_stats_data()` for the columns.
+
+    Raises:
+        ScrappingError: If the API request budget of the run is exhausted.
+    """
+    teams_matches_stat = StatsBatch("team_match_stats", capacity=2 * len(event_pages))
+
+    for page in event_pages:
+        batch_size = teams_matches_stat.size
+        with isolate_match("team_match_stats", page.get("id"), page.get("$ref"), page,
+                           lambda: teams_matches_stat.truncate(batch_size)), \
+                trace_span("match", "match", matchId=page.get("id")):
             # Get Match Espn Id
             match_espn_id = int(page["id"])
 
@@ -255,13 +343,14 @@ def process_team_match_stats_data(
             competitions = page["competitions"][0]
             competitors = competitions["competitors"]
 
+            home_competitor = away_competitor = None
             for competitor in competitors:
                 if competitor["homeAway"] == "home":
                     home_competitor = competitor
                 elif competitor["homeAway"] == "away":
                     away_competitor = competitor
-                else:
-                    raise ValueError("Home or away team data is missing")
+            if home_competitor is None or away_competitor is None:
+                raise ValueError("Home or away team data is missing")
             for competitor in [home_competitor, away_competitor]:
                 # get opponent id
                 opponent_espn_id = int(
@@ -279,6 +368,7 @@ def process_team_match_stats_data(
                 team_match_data = {
                     "uid": uid,
                     "matchEspnId": match_espn_id,
+                    "matchSeason": season_year,
                     "teamEspnId": team_espn_id,
                     "opponentEspnId": opponent_espn_id,
                 }
@@ -286,9 +376,8 @@ def process_team_match_stats_data(
                 # Check if linescores exist
                 linescore_url = competitor.get("linescores", {}).get("$ref", None)
                 if linescore_url is None:
-                    logger.warning(
-                        f"Match linescores missing in ESPN database for match '{page['name']}' (ID: {page['id']}."
-                    )
+                    warn_sampled(logger, "Match linescores missing",
+                                 "Match linescores missing in ESPN database for match '%s' (ID: %s).", page['name'], page['id'])
                 else:
                     # If exist, add them to team_match_data
                     team_match_data = team_match_data | extract_linescores(
@@ -298,25 +387,14 @@ def process_team_match_stats_data(
                 # Check if Statistic exist
                 stat_url = competitor.get("statistics", {}).get("$ref", None)
                 if stat_url is None:
-                    team_match_stat = team_match_data
-                    logger.warning(
-                        f"Match statistics missing in ESPN database for match '{page['name']}' (ID: {page['id']}."
-                    )
+                    stats_page = None
+                    warn_sampled(logger, "Match statistics missing",
+                                 "Match statistics missing in ESPN database for match '%s' (ID: %s).", page['name'], page['id'])
                 else:
-                    # If exist, add them to team_match_data
-                    team_match_stat = team_match_data | extract_stats(stat_url)
+                    # If exist, write them in the row of team_match_data
+                    stats_page = scrape_url(stat_url)
 
                 # Concat
-                teams_matches_stat.append(team_match_stat)
-
-    except KeyError as key_err:
-        logger.error(f"Dict parse KeyError: {key_err}")
-        raise
-    except ValueError as val_err:
-        logger.error(f"ValueError : {val_err}")
-        raise
-    except Exception as e:
-        logger.error(f"An unexpected error has occurred: {e}")
-        raise
+                teams_matches_stat.add_row(team_match_data, stats_page)
 
     return teams_matches_stat
@@ -3,12 +3,14 @@ from ast import Tuple
 import logging
 from typing import Dict, Any, Tuple
 
+from config.logging_config import warn_sampled
+from config.tracing import trace_span, traced
+from processing.kernels import generate_uid, parse_ref_ids
+from processing.stats_columns import StatsBatch
 from processing.utils import (
+    isolate_match,
     convert_inches_to_meters,
     convert_lbs_to_kg,
-    extract_stats,
-    generate_deterministic_uid,
-    get_number_field,
     convert_date_time_to_MySQL,
 )
 from scraping.utils import scrape_url
@@ -58,6 +60,7 @@ player_position_map = {
 ##########################################	FUNCTIONS	###########################################
 
 
+@traced("processing")
 def process_players_data(roster_pages: list[Dict[str, Any]]) -> list[Dict[str, Any]]:
     """
     Processes player data from a list of roster pages and returns a list of player information.
@@ -161,6 +164,7 @@ def process_players_data(roster_pages: list[Dict[str, Any]]) -> list[Dict[str, A
 # --------------------------------------------------------------------------------------------------
 
 
+@traced("processing")
 def process_player_match_stats_data(
     roster_pages: list[Dict[str, Any]], season_year: int
 ) -> Tuple[list[Dict[str, Any]], list[Dict[str, Any]]]:
@@ -191,6 +195,7 @@ def process_player_match_stats_data(
                    "uid": str,          # Unique identifier for player-match combination
                    "playerTeamUid": str,# Unique identifier for player-team combination
                    "matchEspnId": int,  # ESPN ID of the match
+                   "matchSeason": int,  # Season year (partitioning key, see database/partitions.py)
                    "jersey": int,       # Player's jersey number
                    "positionName": str, # Player's position name
                    "isFirstChoice": bool, # Whether the player is a first-choice player
@@ -200,42 +205,85 @@ def process_player_match_stats_data(
            ]
 
     Raises:
-        KeyError: If required keys are missing from the roster page data.
-        ValueError: If there's an issue with value conversion or processing.
-        Exception: For any unexpected errors during the processing of data.
+        ValueError: If the roster pages list is empty.
+        ScrappingError: If the API request budget of the run is exhausted.
 
     Note:
+        - A match with invalid data is quarantined and skipped, see `process_player_match_stats_batch()`.
         - This function uses external functions for generating UIDs and extracting statistics.
         - It handles duplicate player-team combinations by including them only once.
+        - The statistics records are built once from the columnar batch of `process_player_match_stats_batch()` :
+          only the statistics found in the statistics page are present.
+    """
+    players_teams_data, players_matches_stat = process_player_match_stats_batch(roster_pages, season_year)
+    return players_teams_data, players_matches_stat.to_records()
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def process_player_match_stats_batch(
+    roster_pages: list[Dict[str, Any]], season_year: int
+) -> Tuple[list[Dict[str, Any]], StatsBatch]:
+    """
+    Processes player match statistics data from roster pages into a columnar batch.
+
+    The statistics of each player are written directly in the NumPy array of the batch, at the
+    column index of the statistic in the PLAYER_MATCH_STATS table (see `processing.stats_columns`).
+
+    Each roster page (the players of one team in one match) is processed in isolation (see
+    `processing.utils.isolate_match()`) : a page with missing keys, unexpected values or an
+    unavailable statistics page is quarantined, its rows and player-team associations are
+    removed, and the other pages are processed.
+
+    Args:
+        roster_pages (list[Dict[str, Any]]): A list of dictionaries containing roster page data.
+        season_year (int): The year of the season for which the data is being processed.
+
+    Returns:
+        players_teams_data (list[Dict[str, Any]]): Player-team table associations, see `process_player_match_stats_data()`.
+        players_matches_stat (StatsBatch): One row per player and match.
+
+    Raises:
+        ValueError: If the roster pages list is empty.
+        ScrappingError: If the API request budget of the run is exhausted.
     """
 
     if roster_pages == []:
         raise ValueError(f"Roster pages is empty.")
 
     players_teams_data: list[Dict[str, Any]] = []
-    players_matches_stat: list[Dict[str, Any]] = []
+    players_matches_stat = StatsBatch("player_match_stats", capacity=sum(len(page.get("entries", [])) for page in roster_pages))
     players_teams_uid = set()
-    try:
 
-        for page in roster_pages:
-            # get team & match id
-            team_espn_id = get_number_field(page["$ref"], 3)
-            match_espn_id = get_number_field(page["$ref"], 1)
+    for page in roster_pages:
+        batch_size, players_teams_size = players_matches_stat.size, len(players_teams_data)
 
+        def rollback():
+            # Rows and player-team associations added by this roster page only
+            for player_team_data in players_teams_data[players_teams_size:]:
+                players_teams_uid.discard(player_team_data["uid"])
+            del players_teams_data[players_teams_size:]
+            players_matches_stat.truncate(batch_size)
+
+        # get team & match id
+        roster_ids = parse_ref_ids(page.get("$ref", "")) # All ids of the ref at once
+        team_espn_id, match_espn_id = (roster_ids[3], roster_ids[1]) if len(roster_ids) > 3 else (None, None)
+
+        with isolate_match("player_match_stats", match_espn_id, page.get("$ref"), page, rollback), \
+                trace_span("match", "match", matchId=match_espn_id, teamId=team_espn_id):
+            if team_espn_id is None:
+                raise ValueError(f"Team and match IDs missing in the roster url '{page.get('$ref')}'")
             entries = page["entries"]
             for entry in entries:
                 # get player id and compute unique player_team and player_match id
                 player_espn_id = int(entry["playerId"])
-                player_team_uid = generate_deterministic_uid(
-                    [team_espn_id, player_espn_id, season_year]
-                )
-                player_match_uid = generate_deterministic_uid(
-                    [player_team_uid, match_espn_id]
-                )
+                player_team_uid = generate_uid((team_espn_id, player_espn_id, season_year))
+                player_match_uid = generate_uid((player_team_uid, match_espn_id))
 
                 # Get position data
                 jersey = int(entry["jersey"])
-                position_id = get_number_field(entry["position"]["$ref"], 0)
+                position_id = parse_ref_ids(entry["position"]["$ref"])[0]
                 poisition_name = player_position_map[position_id]
 
                 # starter
@@ -252,6 +300,7 @@ def process_player_match_stats_data(
                     "uid": player_match_uid,
                     "playerTeamUid": player_team_uid,
                     "matchEspnId": match_espn_id,
+                    "matchSeason": season_year,
                     "jersey": jersey,
                     "positionName": poisition_name,
                     "isFirstChoice": is_first_choice,
@@ -259,12 +308,12 @@ def process_player_match_stats_data(
                 # Check if Statistic exist
                 stat_url = entry.get("statistics", {}).get("$ref", None)
                 if stat_url is None:
-                    player_match_stat = player_match_data
-                    logger.warning(
-                        f"Player statistics missing in ESPN database for match id '{match_espn_id}' and player id `{player_espn_id}`."
-                    )
+                    stats_page = None
+                    warn_sampled(logger, "Player statistics missing",
+                                 "Player statistics missing in ESPN database for match id '%s' and player id `%s`.",
+                                 match_espn_id, player_espn_id)
                 else:
-                    player_match_stat = player_match_data | extract_stats(stat_url)
+                    stats_page = scrape_url(stat_url)
 
                 # Concat
                 # Skip on duplicate athlete
@@ -272,16 +321,6 @@ def process_player_match_stats_data(
                     players_teams_data.append(player_team_data)
                     players_teams_uid.add(player_team_uid)
 
-                players_matches_stat.append(player_match_stat)
-
-    except KeyError as key_err:
-        logger.error(f"Dict parse KeyError: {key_err}")
-        raise
-    except ValueError as val_err:
-        logger.error(f"ValueError : {val_err}")
-        raise
-    except Exception as e:
-        logger.error(f"An unexpected error has occurred: {e}")
-        raise
+                players_matches_stat.add_row(player_match_data, stats_page)
 
     return players_teams_data, players_matches_stat
@@ -0,0 +1,83 @@
+from collections.abc import Mapping
+from typing import Any, Iterator
+
+##########################################	GLOBAL SCOPE	#######################################
+
+# Compact records are produced by the processing functions when enabled (see `set_compact_records()`)
+_compact_records = False
+
+##########################################	CLASS	###########################################
+
+class RecordSchema:
+    """
+        The columns shared by every compact record of a table.
+
+        Attributes:
+            columns (tuple[str]): Names of the columns, in record order.
+            index (Dict[str, int]): Position of each column in the record values.
+    """
+    __slots__ = ("columns", "index")
+
+    def __init__(self, columns: tuple[str, ...]) -> None:
+        self.columns = tuple(columns)
+        self.index = {name: position for position, name in enumerate(self.columns)}
+
+    def __len__(self) -> int:
+        return len(self.columns)
+
+
+class CompactRecord(Mapping):
+    """
+        A read-only record backed by a tuple of values and a shared `RecordSchema`.
+
+        A dict record stores its own hash table of keys : ~9 KB for the ~190 columns of a
+        statistics row. A compact record only stores its values, the column names live once
+        in the schema. It behaves as a read-only dict for the existing callers (`record[key]`,
+        `keys()`, `values()`, `items()`, `get()`, `dict(record)`, `record | {...}`).
+
+        Attributes:
+            schema (RecordSchema): The columns of the record.
+            values_tuple (tuple): The values of the record, in schema order.
+    """
+    __slots__ = ("schema", "values_tuple")
+
+    def __init__(self, schema: RecordSchema, values: tuple) -> None:
+        self.schema = schema
+        self.values_tuple = values
+
+    def __getitem__(self, key: str) -> Any:
+        return self.values_tuple[self.schema.index[key]]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.schema.columns)
+
+    def __len__(self) -> int:
+        return len(self.values_tuple)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.schema.index
+
+    def keys(self):
+        return self.schema.columns
+
+    def values(self):
+        return self.values_tuple
+
+    def items(self):
+        return zip(self.schema.columns, self.values_tuple)
+
+    def __or__(self, other: Mapping) -> dict:
+        return dict(self.items()) | dict(other)
+
+    def __repr__(self) -> str:
+        return f"CompactRecord({dict(self.items())!r})"
+
+##########################################	FUNCTIONS	###########################################
+
+# Utility functions to enable / check the compact records of the processing functions
+def set_compact_records(enabled: bool):
+    global _compact_records
+    _compact_records = enabled
+
+def is_compact_records() -> bool:
+    return _compact_records
@@ -1,12 +1,15 @@
 import logging
 from typing import Dict, Any
 
+from config.tracing import traced
+
 ##########################################	GLOBAL SCOPE	#######################################
 # logs
 logger = logging.getLogger(__name__)
 
 ##########################################	FUNCTIONS	###########################################
 
+@traced("processing")
 def process_stadiums_data(event_pages : list[Dict[str, Any]]) -> list[Dict[str, Any]]:
     """
     Processes stadium data from a list of event pages and returns unique stadium information.
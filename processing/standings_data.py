@@ -2,6 +2,7 @@ import logging
 from typing import Dict, Any, Tuple
 from dateutil import parser
 
+from config.tracing import traced
 from processing.utils import generate_deterministic_uid, get_number_field
 
 ##########################################	GLOBAL SCOPE	#######################################
@@ -11,6 +12,7 @@ logger = logging.getLogger(__name__)
 ##########################################	FUNCTIONS	###########################################
 
 
+@traced("processing")
 def process_standings_data(
     standings_pages: list[Dict[str, Any]], league_uid: str
 ) -> list[Dict[str, Any]]:
@@ -0,0 +1,344 @@
+import json
+import logging
+from typing import Dict, Any
+
+import numpy as np
+
+from config.logging_config import warn_sampled
+from config.metrics import get_metrics
+from database.schema_drift import OVERFLOW_COLUMN
+from processing.records import CompactRecord, RecordSchema, is_compact_records
+
+##########################################	GLOBAL SCOPE	#######################################
+# logs
+logger = logging.getLogger(__name__)
+
+# Columns of the statistics tables, kept equal to database/create_tables.sql by tests/test_stats_columns.py
+# Columns of the TEAM_MATCH_STATS table filled by the processing, in table order
+TEAM_MATCH_KEY_COLUMNS = (
+    "uid", "matchEspnId", "matchSeason", "teamEspnId", "opponentEspnId", "linescore1stHalf",
+    "linescore2ndHalf", "linescore20min", "linescore60min", "extraStats",
+)
+# Statistics columns of the TEAM_MATCH_STATS table (DECIMAL), in table order
+TEAM_MATCH_STAT_COLUMNS = (
+    # Offensive Stats
+    "passes", "runs", "metres", "attackingKicks", "offload", "cleanBreaks", "defendersBeaten", "breakAssist",
+    "carriesMetres", "carriesCrossedGainLine", "carriesNotMadeGainLine", "carriesSupport", "averageGain",
+    "dummyHalfMetres", "hitUps", "hitUpMetres", "runFromDummyHalf", "tackleBusts", "attackingEventsZoneA",
+    "attackingEventsZoneB", "attackingEventsZoneC", "attackingEventsZoneD", "completeSets", "incompleteSets",
+    # Defensive Stats
+    "tackles", "tackleSuccess", "missedTackles", "turnoverWon", "turnoversConceded", "turnoverOppHalf",
+    "turnoverOwnHalf", "turnoverLostInRuckOrMaul", "turnoverKnockOn", "turnoverForwardPass",
+    "turnoverCarriedInTouch", "turnoverCarriedOver", "turnoverKickError", "turnoverBadPass", "markerTackles",
+    "ballWonZoneA", "ballWonZoneB", "ballWonZoneC", "ballWonZoneD",
+    # Scoring Stats
+    "points", "tries", "penaltyTries", "tryAssists", "tryBonusPoints", "losingBonusPoints",
+    "conversionGoals", "dropGoalsConverted", "dropGoalMissed", "goals", "missedConversionGoals",
+    "missedGoals", "penaltyGoals", "missedPenaltyGoals",
+    # Discipline Stats
+    "freeKickConcededAtLineout", "freeKickConcededAtScrum", "freeKickConcededInGeneralPlay",
+    "freeKickConcededInRuckOrMaul", "freeKickConceded", "penaltiesConceded", "penaltyConcededCollapsingMaul",
+    "penaltyConcededCollapsingOffense", "penaltyConcededCollapsing", "penaltyConcededDelibKnockOn",
+    "penaltyConcededDissent", "penaltyConcededEarlyTackle", "penaltyConcededFoulPlay",
+    "penaltyConcededHandlingInRuck", "penaltyConcededHighTackle", "penaltyConcededKillingRuck",
+    "penaltyConcededLineoutOffence", "penaltyConcededObstruction", "penaltyConcededOffside",
+    "penaltyConcededOppHalf", "penaltyConcededOther", "penaltyConcededOwnHalf",
+    "penaltyConcededScrumOffence", "penaltyConcededStamping", "penaltyConcededWrongSide",
+    "totalFreeKicksConceded", "onReport", "redCards", "yellowCards",
+    # Kicking Stats
+    "kicks", "kickFromHandMetres", "kicksFromHand", "kickChargedDown", "tryKicks", "kickTryScored",
+    "kickOutOfPlay", "kickInTouch", "kickOppnCollection", "kickPossessionLost", "kickPossessionRetained",
+    "kickTouchInGoal", "kickPenaltyBad", "kickPenaltyGood", "totalKicks", "totalKicksSucceeded",
+    "kickPercentSuccess", "pcKickPercent", "kickSuccess", "kickReturns", "kickReturnMetres", "fortyTwenty",
+    "penaltyKickForTouchMetres",
+    # Possession and Control Stats
+    "ballPossessionLast10Mins", "pcPossessionFirst", "pcPossessionSecond", "pcTerritoryFirst",
+    "pcTerritorySecond", "possession", "territory", "territoryLast10Mins", "collectionFailed",
+    "collectionFromKick", "collectionInterception", "collectionLooseBall", "collectionSuccess",
+    "retainedKicks", "trueRetainedKicks", "restart22m", "restartErrorNotTen", "restartErrorOutOfPlay",
+    "restartHalfway", "restartOppError", "restartOppPlayer", "restartOwnPlayer", "restartsLost",
+    "restartsSuccess", "restartsWon", "handlingError", "phaseNumber", "playTheBall",
+    # Set Pieces Stats
+    "scrumsWonFreeKick", "scrumsWonOutright", "scrumsWonPenalty", "scrumsWonPenaltyTry",
+    "scrumsWonPushoverTry", "scrumsLostFreeKick", "scrumsLostOutright", "scrumsLostPenalty",
+    "scrumsLostReversed", "scrumsLost", "scrumsReset", "scrumsSuccess", "scrumsTotal", "scrumsWon",
+    "lineoutsToOppPlayer", "lineoutsWon", "lineoutSuccess", "lineoutsLost", "lineoutsInfringeOpp",
+    "lineoutsInfringeOwn", "lineoutThrowWonClean", "lineoutThrowWonFreeKick", "lineoutThrowWonPenalty",
+    "lineoutThrowWonTap", "lineoutThrowLostFreeKick", "lineoutThrowLostHandlingError",
+    "lineoutThrowLostNotStraight", "lineoutThrowLostOutright", "lineoutThrowLostPenalty",
+    "lineoutsToOwnPlayer", "lineoutThrowNotStraight", "lineoutWonOwnThrow", "lineoutWonSteal",
+    "totalLineouts", "setPieceWon",
+    # Ruck and Maul Stats
+    "rucksLost", "rucksWon", "rucksTotal", "ruckSuccess", "maulsWon", "maulsLost", "maulsTotal",
+    "maulsWonOutright", "maulsLostOutright", "maulsWonPenalty", "maulsLostTurnover", "maulsWonPenaltyTry",
+    "maulsWonTry", "maulingMetres",
+    # General Stats
+    "matches", "won", "lost", "drawn", "numberOfTeams", "startingMatches", "replacementMatches",
+)
+
+# Columns of the PLAYER_MATCH_STATS table filled by the processing, in table order
+PLAYER_MATCH_KEY_COLUMNS = (
+    "uid", "playerTeamUid", "matchEspnId", "matchSeason", "jersey", "positionName", "isFirstChoice",
+    "extraStats",
+)
+# Statistics columns of the PLAYER_MATCH_STATS table (DECIMAL), in table order
+PLAYER_MATCH_STAT_COLUMNS = (
+    # Offensive Stats
+    "passes", "runs", "metres", "attackingKicks", "offload", "cleanBreaks", "defendersBeaten", "breakAssist",
+    "carriesMetres", "gainLine", "carriesCrossedGainLine", "carriesNotMadeGainLine", "carriesSupport",
+    "averageGain", "dummyHalfMetres", "hitUps", "hitUpMetres", "runFromDummyHalf", "tackleBusts",
+    # Defensive Stats
+    "tackles", "tackleSuccess", "missedTackles", "markerTackles",
+    # Scoring Stats
+    "points", "tries", "tryAssists", "tryBonusPoints", "losingBonusPoints", "conversionGoals",
+    "dropGoalsConverted", "dropGoalMissed", "goals", "missedConversionGoals", "missedGoals", "penaltyGoals",
+    "missedPenaltyGoals", "goalsFromMark",
+    # Discipline Stats
+    "freeKickConcededAtLineout", "freeKickConcededAtScrum", "freeKickConcededInGeneralPlay",
+    "freeKickConcededInRuckOrMaul", "penaltiesConceded", "penaltyConcededCollapsingMaul",
+    "penaltyConcededCollapsingOffense", "penaltyConcededDelibKnockOn", "penaltyConcededDissent",
+    "penaltyConcededEarlyTackle", "penaltyConcededFoulPlay", "penaltyConcededHandlingInRuck",
+    "penaltyConcededHighTackle", "penaltyConcededKillingRuck", "penaltyConcededLineoutOffence",
+    "penaltyConcededObstruction", "penaltyConcededOffside", "penaltyConcededOppHalf", "penaltyConcededOther",
+    "penaltyConcededOwnHalf", "penaltyConcededScrumOffence", "penaltyConcededStamping",
+    "penaltyConcededWrongSide", "totalFreeKicksConceded", "onReport", "redCards", "yellowCards",
+    # Kicking Stats
+    "kicks", "kickMetres", "kickFromHandMetres", "kicksFromHand", "kickChargedDown", "tryKicks",
+    "kickTryScored", "kickOutOfPlay", "kickInField", "kickInTouch", "kickOppnCollection",
+    "kickPossessionLost", "kickPossessionRetained", "kickTouchInGoal", "kickPenaltyBad", "kickPenaltyGood",
+    "kickPercentSuccess", "pcKickPercent", "kickReturns", "kickReturnMetres", "fortyTwenty",
+    "penaltyKickForTouchMetres",
+    # Possession and Control Stats
+    "collectionFailed", "collectionFromKick", "collectionInterception", "collectionLooseBall",
+    "collectionSuccess", "retainedKicks", "trueRetainedKicks", "restart22m", "restartErrorNotTen",
+    "restartErrorOutOfPlay", "restartHalfway", "restartOppError", "restartOppPlayer", "restartOwnPlayer",
+    "restartsLost", "restartsSuccess", "restartsWon", "handlingError", "droppedCatch", "badPasses",
+    "ballOutOfPlay", "pickup", "catchFromKick", "turnoverWon", "turnoversConceded", "turnoverOppHalf",
+    "turnoverOwnHalf", "turnoverLostInRuckOrMaul", "turnoverKnockOn", "turnoverForwardPass",
+    "turnoverCarriedInTouch", "turnoverCarriedOver", "turnoverKickError", "turnoverBadPass",
+    # Set Pieces Stats
+    "scrumsWonFreeKick", "scrumsWonOutright", "scrumsWonPenalty", "scrumsWonPenaltyTry",
+    "scrumsWonPushoverTry", "scrumsLostFreeKick", "scrumsLostOutright", "scrumsLostPenalty",
+    "scrumsLostReversed", "lineoutsWon", "lineoutSuccess", "lineoutsLost", "lineoutsInfringeOpp",
+    "lineoutThrowWonClean", "lineoutThrowWonFreeKick", "lineoutThrowWonPenalty", "lineoutThrowWonTap",
+    "lineoutThrowLostFreeKick", "lineoutThrowLostHandlingError", "lineoutThrowLostNotStraight",
+    "lineoutThrowLostOutright", "lineoutThrowLostPenalty", "lineoutsToOwnPlayer", "lineoutNonStraight",
+    "lineoutWonOppThrow", "lineoutWonOwnThrow", "lineoutWonSteal", "totalLineouts",
+    # Ruck and Maul Stats
+    "rucksLost", "rucksWon", "maulsWon", "maulsLost", "maulsWonOutright", "maulsLostOutright",
+    "maulsWonPenalty", "maulsLostTurnover", "maulsWonPenaltyTry", "maulsWonTry",
+    # General Stats
+    "matches", "won", "lost", "drawn", "numberOfTeams", "startingMatches", "replacementMatches",
+    "mintuesPlayedBeforeFirstHalfExtra", "minutesPlayedBeforeFirstHalf",
+    "minutesPlayedBeforePenaltyShootOut", "minutesPlayedBeforeSecondHalfExtra",
+    "minutesPlayedBeforeSecondHalf", "minutesPlayedFirstHalf", "minutesPlayedFirstHalfExtra",
+    "minutesPlayedSecondHalf", "minutesPlayedSecondHalfExtra", "minutesPlayedTotal",
+)
+
+# Key columns and statistics columns of each statistics table (kept in line with database/create_tables.sql)
+STATS_TABLE_COLUMNS = {
+    "team_match_stats": (TEAM_MATCH_KEY_COLUMNS, TEAM_MATCH_STAT_COLUMNS),
+    "player_match_stats": (PLAYER_MATCH_KEY_COLUMNS, PLAYER_MATCH_STAT_COLUMNS),
+}
+
+# Rows converted at once by `StatsBatch.to_records()`
+TO_RECORDS_CHUNK_SIZE = 1024
+
+##########################################	CLASS	###########################################
+
+class StatsBatch:
+    """
+        A columnar batch of statistics rows (one row per team or player and match).
+
+        The statistics columns of the table and their index are defined in `STATS_TABLE_COLUMNS`.
+        The statistics of a row are written directly in a preallocated NumPy array
+        (rows x statistics, NaN when missing), instead of building and merging a dict per row.
+        The other columns (ids, jersey ...) are kept in one list per column. Statistics without
+        column, and statistics whose value is not a number, are kept as JSON in the overflow column
+        of the table (see `database.schema_drift`).
+
+        Attributes:
+            table_name (str): Name of the table.
+            key_columns (tuple[str]): Columns filled by the processing, in table order.
+            stat_columns (tuple[str]): Statistics columns, in table order.
+            stat_index (Dict[str, int]): Index of each statistic in the rows of `values`.
+            values (np.ndarray): The statistics, shape (capacity, number of statistics).
+            size (int): Number of rows in the batch.
+            unknown_stats (Dict[str, int]): Rows holding each statistic without column.
+
+        Methods:
+            add_row(key_values, stats_page): Adds a row with the statistics of a statistics page.
+            truncate(size): Removes the rows added after the first `size` rows.
+            get_columns(): Returns every column of the batch (lists and NumPy arrays).
+            to_records(): Returns the rows as records for the database writers, with the statistics found only.
+            to_arrow(): Returns the batch as a `pyarrow.Table`.
+    """
+
+    def __init__(self, table_name: str, capacity: int = 64) -> None:
+        self.table_name = table_name
+        self.key_columns, self.stat_columns = get_stat_table_columns(table_name)
+        self.stat_index = {name: index for index, name in enumerate(self.stat_columns)}
+        self._row_schemas: Dict[tuple, RecordSchema] = {}
+        self.values = np.full((max(1, capacity), len(self.stat_columns)), np.nan)
+        self._keys = {name: [] for name in self.key_columns}
+        self.size = 0
+        self.unknown_stats: Dict[str, int] = {}
+        self._overflow = self._keys.get(OVERFLOW_COLUMN)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _grow(self):
+        grown_values = np.full((self.values.shape[0] * 2, len(self.stat_columns)), np.nan)
+        grown_values[:self.size] = self.values[:self.size]
+        self.values = grown_values
+
+    def add_row(self, key_values: Dict[str, Any], stats_page: Dict[str, Any] | None = None):
+        """
+        Adds a row to the batch.
+
+        Args:
+            key_values (Dict[str, Any]): Values of the key columns (missing columns are None).
+            stats_page (Dict[str, Any] | None, optional): A statistics page of the ESPN API, None when
+                                                          the statistics are missing. Defaults to None.
+
+        Raises:
+            KeyError: If the statistics page has no statistics split.
+        """
+        if self.size == self.values.shape[0]:
+            self._grow()
+        for name, column in self._keys.items():
+            column.append(key_values.get(name))
+
+        if stats_page is not None:
+            row = self.values[self.size]
+            stat_index = self.stat_index
+            extra_stats = None
+            invalid_stats = None
+            for group_stat in stats_page["splits"]["categories"][0]["stats"]:
+                index = stat_index.get(group_stat["name"])
+                if index is None:
+                    extra_stats = extra_stats or {}
+                    extra_stats[group_stat["name"]] = group_stat["value"]
+                    continue
+                value = group_stat["value"]
+                if value is None:
+                    continue
+                try:
+                    row[index] = float(value)
+                except (TypeError, ValueError):
+                    # Not a number (e.g. "--") : the statistic stays missing, its raw value is kept with the statistics without column
+                    warn_sampled(logger, "Statistic value not numeric", "Statistic %s of %s not numeric, kept in %s : %r",
+                                 group_stat["name"], self.table_name, OVERFLOW_COLUMN, value)
+                    invalid_stats = invalid_stats or {}
+                    invalid_stats[group_stat["name"]] = value
+            if extra_stats:
+                for name in extra_stats:
+                    self.unknown_stats[name] = self.unknown_stats.get(name, 0) + 1
+                    get_metrics().record_schema_drift(self.table_name, name, 1)
+            if (extra_stats or invalid_stats) and self._overflow is not None:
+                self._overflow[-1] = json.dumps({**(extra_stats or {}), **(invalid_stats or {})}, sort_keys=True)
+        self.size += 1
+
+    def truncate(self, size: int):
+        # Rolls back the rows of a match whose processing failed (see `processing.utils.isolate_match()`)
+        for column in self._keys.values():
+            del column[size:]
+        self.values[size:self.size] = np.nan
+        self.size = size
+
+    def get_columns(self) -> Dict[str, Any]:
+        """
+        Returns every column of the batch : a list per key column and a NumPy
+        view per statistics column (NaN when missing).
+        """
+        columns: Dict[str, Any] = dict(self._keys)
+        for index, name in enumerate(self.stat_columns):
+            columns[name] = self.values[:self.size, index]
+        return columns
+
+    def _get_row_schema(self, key_present: tuple[bool, ...], stat_present: bytes) -> RecordSchema:
+        # Rows of a batch share a few sets of columns : one schema per set
+        row_columns = (key_present, stat_present)
+        schema = self._row_schemas.get(row_columns)
+        if schema is None:
+            columns = [name for name, present in zip(self.key_columns, key_present) if present]
+            columns += [name for name, present in zip(self.stat_columns, stat_present) if present]
+            schema = self._row_schemas[row_columns] = RecordSchema(tuple(columns))
+        return schema
+
+    def to_records(self, compact: bool | None = None) -> list[Dict[str, Any]]:
+        """
+        Returns the rows as records, in table column order.
+
+        A record only holds the columns with a value : the statistics found in its statistics page,
+        and the key columns that are not None. An upsert never overwrites a stored value with NULL
+        when the API leaves it out of a page.
+
+        Args:
+            compact (bool | None, optional): True for `CompactRecord` rows sharing the batch schema,
+                                             None to follow `processing.records.set_compact_records()`. Defaults to None.
+
+        Returns:
+            list[Dict[str, Any]]: One record per row, for `database.db_writer.DBWriter`.
+        """
+        if self.unknown_stats:
+            logger.warning(f"Statistics without column in {self.table_name} "
+                           f"{f'kept in {OVERFLOW_COLUMN}' if self._overflow is not None else 'ignored'} : {sorted(self.unknown_stats)}")
+        # Statistics take few distinct values : rows share one Python float per distinct value
+        values = self.values[:self.size]
+        unique_values, inverse = np.unique(values, return_inverse=True)
+        value_objects = np.array([float(value) for value in unique_values], dtype=object)
+        inverse = inverse.reshape(values.shape)
+        present = ~np.isnan(values)
+        key_rows = zip(*self._keys.values()) if self.key_columns else iter([()] * self.size)
+        compact = compact if compact is not None else is_compact_records()
+
+        records = []
+        for start in range(0, self.size, TO_RECORDS_CHUNK_SIZE): # Chunks bound the temporary lists
+            chunk_inverse = inverse[start:start + TO_RECORDS_CHUNK_SIZE]
+            chunk_present = present[start:start + TO_RECORDS_CHUNK_SIZE]
+            for row_inverse, row_present, key_row in zip(chunk_inverse, chunk_present, key_rows):
+                key_present = tuple(value is not None for value in key_row)
+                schema = self._get_row_schema(key_present, row_present.tobytes())
+                row_values = (*(value for value, kept in zip(key_row, key_present) if kept),
+                              *value_objects[row_inverse[row_present]].tolist())
+                records.append(CompactRecord(schema, row_values) if compact else dict(zip(schema.columns, row_values)))
+        return records
+
+    def to_arrow(self):
+        """
+        Returns the batch as a `pyarrow.Table` (statistics columns without copy, nulls when missing).
+
+        Raises:
+            ImportError: If pyarrow is not installed.
+        """
+        try:
+            import pyarrow as pa
+        except ImportError as import_err:
+            raise ImportError("Arrow export requires pyarrow : pip install pyarrow") from import_err
+        arrays = [pa.array(column) for column in self._keys.values()]
+        for index in range(len(self.stat_columns)):
+            stat_values = self.values[:self.size, index]
+            arrays.append(pa.array(stat_values, mask=np.isnan(stat_values)))
+        return pa.Table.from_arrays(arrays, names=list(self.key_columns + self.stat_columns))
+
+##########################################	FUNCTIONS	###########################################
+
+def get_stat_table_columns(table_name: str) -> tuple[tuple[str, ...], tuple[str, ...]]:
+    """
+    Splits the columns of a statistics table between key columns and statistics columns, see `STATS_TABLE_COLUMNS`.
+
+    Args:
+        table_name (str): Name of the table (case insensitive).
+
+    Returns:
+        key_columns (tuple[str]): Columns filled by the processing.
+        stat_columns (tuple[str]): Columns filled from the statistics pages (DECIMAL columns).
+
+    Raises:
+        ValueError: If the table is not a statistics table.
+    """
+    if table_name.lower() not in STATS_TABLE_COLUMNS:
+        raise ValueError(f"Table '{table_name}' is not a statistics table.")
+    return STATS_TABLE_COLUMNS[table_name.lower()]
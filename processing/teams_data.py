@@ -2,6 +2,7 @@ import logging
 from typing import Dict, Any
 import re
 
+from config.tracing import traced
 from processing.utils import get_number_field
 from scraping.standings_page import scrape_group_pages
 from scraping.teams_page import scrape_team_pages
@@ -13,6 +14,7 @@ logger = logging.getLogger(__name__)
 
 ##########################################	FUNCTIONS	###########################################
 
+@traced("processing")
 def process_teams_data(standings_pages: list[Dict[str, Any]]) -> list[Dict[str, Any]]:
     """
     Processes and extracts team data for a specific league and season.
@@ -1,18 +1,61 @@
 import logging
-from typing import Dict, Any
-import hashlib
-import re
+from contextlib import contextmanager
+from typing import Dict, Any, Callable
 
 from datetime import datetime
 from dateutil import parser
-from scraping.utils import scrape_url
+from config.api_counter import APIBudgetExceededError, ArchiveMissError
+from config.tracing import traced
+from processing.kernels import convert_iso_date_to_MySQL, generate_uid, parse_ref_ids
+from scraping.utils import ScrappingError, scrape_url
+from storage.quarantine import quarantine
 
 ##########################################	GLOBAL SCOPE	#######################################
 # logs
 logger = logging.getLogger(__name__)
 
+# Errors caused by the data of one match (missing keys, unexpected values, sub-resource unavailable) :
+# the match is quarantined and the processing goes on with the next one
+MATCH_DATA_ERRORS = (KeyError, ValueError, TypeError, IndexError, ScrappingError)
+
 ##########################################	FUNCTIONS	###########################################
 
+@contextmanager
+def isolate_match(stage_name: str, match_espn_id: Any, ref: str | None, payload: Dict[str, Any], rollback: Callable[[], None]):
+    """
+    Processes the data of one match in isolation : a data error quarantines the match (see
+    `storage.quarantine.quarantine()`) instead of failing the whole batch, so the healthy matches
+    of the batch are still written. The quarantined matches are retried by
+    `orchestration.quarantine_retry.retry_quarantined_matches()`.
+
+    Args:
+        stage_name (str): Name of the processing, e.g. "team_match_stats".
+        match_espn_id (Any): ESPN ID of the match.
+        ref (str | None): Url of the page being processed.
+        payload (Dict[str, Any]): The page being processed, kept in the quarantine file.
+        rollback (Callable[[], None]): Removes the rows of the match already added to the batch.
+
+    Raises:
+        ScrappingError: If the API request budget of the run is exhausted (every next match would fail too),
+                        or a response is missing in the archive of an offline reprocessing (the unit is incomplete).
+    """
+    try:
+        yield
+    except MATCH_DATA_ERRORS as error:
+        context = error.__context__
+        while context is not None:
+            if isinstance(context, (APIBudgetExceededError, ArchiveMissError)):
+                raise
+            context = context.__context__
+        rollback()
+        logger.error("%s of match %s quarantined : %r", stage_name, match_espn_id, error)
+        quarantine("match", f"{stage_name} : {type(error).__name__}", ref, payload, matchEspnId=match_espn_id,
+                   stage=stage_name, error=repr(error))
+
+#--------------------------------------------------------------------------------------------------
+
+
+@traced("processing")
 def extract_stats(stat_url : str) -> Dict[str, int] :
     """
     Extracts statistical data from a given dictionary containing API response data.
@@ -56,6 +99,7 @@ def extract_stats(stat_url : str) -> Dict[str, int] :
 
 #--------------------------------------------------------------------------------------------------
 
+@traced("processing")
 def extract_linescores(linescore_url: str) -> Dict[str, Any]:
     """
     Extracts linescore data from a given URL containing linescore information.
@@ -133,13 +177,13 @@ def get_number_field(url, index_field) -> int :
         int: The numeric value extracted from the URL at the specified index.
     """
     try :
-        # Extraire tous les nombres de l'URL
-        numbers = re.findall(r'/(\d+)', url)
+        # Extraire tous les nombres de l'URL (precompiled and memoized, see `processing.kernels`)
+        numbers = parse_ref_ids(url)
         if not numbers:
             raise ValueError(f"URL is invalid or contains no numeric fields: {url}")
         
         # Tenter d'accéder à l'index spécifié
-        return int(numbers[index_field])
+        return numbers[index_field]
     
     except IndexError:
         error_msg = f"Index ({index_field}) is out of range. Available indices: 0 to {len(numbers) - 1}"
@@ -176,21 +220,8 @@ def generate_deterministic_uid(unique_keys: list[Any]) -> str:
         if not unique_keys:
             raise ValueError("unique_keys dictionary cannot be empty")
         
-        # Convert all elements to strings
-        str_keys = [str(key) for key in unique_keys]
-
-        # Sort keys to ensure constant order
-        sorted_keys = sorted(str_keys)
-
-        # Combining unique keys into a single string
-        combined_key = "_".join(sorted_keys)
-        
-        # Using SHA256 to generate a hash
-        hash_object = hashlib.sha256(combined_key.encode('utf-8'))
-        hash_hex = hash_object.hexdigest()
-        
-        # We take the first 16 characters of the hash for a shorter ID
-        return hash_hex[:16]
+        # Sorted string keys, joined and hashed with SHA256 : first 16 characters (see `processing.kernels.generate_uid()`)
+        return generate_uid(unique_keys)
     
     except ValueError as ValErr:
         logger.error(ValErr)
@@ -215,10 +246,8 @@ def convert_inches_to_meters(length: float) -> float:
 
 def convert_date_time_to_MySQL(date : str):
     try :
-        # Parser la chaîne ISO
-        parse_date = parser.parse(date)
-        # Convertir en format MySQL datetime
-        date_MySQL = parse_date.strftime('%Y-%m-%d %H:%M:%S')
+        # Parser la chaîne ISO et convertir en format MySQL datetime (see `processing.kernels`)
+        date_MySQL = convert_iso_date_to_MySQL(date)
     except parser.ParserError as ParsErr:
         logger.error(f"Date format error has occurred : {ParsErr}")
         raise
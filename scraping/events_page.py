@@ -1,9 +1,9 @@
-import json
 import logging
-from click import pause
 from typing import Dict, Any
 from datetime import datetime
+from config.logging_config import warn_sampled
 from scraping.utils import ParsingError, ScrappingError, parse_urls, scrape_api_request, scrape_url
+from storage.quarantine import check_quarantine_ratio, quarantine
 
 
 ##########################################   GLOBAL SCOPE   #######################################
@@ -16,33 +16,46 @@ class DateFormatError(Exception):
 
 #########################################    FUNCTIONS    #########################################
 
-def filter_valid_event_pages(event_pages: list[Dict[str, Any]]) -> list[Dict[str, Any]] :
+def filter_valid_event_pages(event_pages: list[Dict[str, Any]], enforce_policy: bool = True) -> list[Dict[str, Any]] :
     """
-    Filters out invalid or duplicate event pages based on the 'timeValid' field.
+    Filters out invalid or duplicate event pages based on the 'timeValid' field and the event ID.
 
     This function checks the integrity of event pages by examining the 'timeValid' field.
-    Pages with 'timeValid' set to False are considered duplicates or incomplete and are excluded.
+    Pages with 'timeValid' set to False are considered duplicates or incomplete, and pages whose
+    event ID was already seen in the list are duplicates : both are excluded and quarantined
+    with their reason (see `storage.quarantine.quarantine()`), and the run goes on.
 
     Args:
         event_pages (list[Dict[str, Any]]): A list of dictionaries containing event page data.
+        enforce_policy (bool, optional): Fail when the share of invalid pages exceeds the limit of the process,
+                                         see `storage.quarantine.check_quarantine_ratio()`. Defaults to True.
 
     Returns:
         list[Dict[str, Any]]: A filtered list of valid event pages.
 
+    Raises:
+        QuarantineLimitError: If the share of invalid pages exceeds the limit of the process.
+
     Note:
-        - Logs a warning for each invalid page encountered.
-        - Uses the 'pause()' function after logging each warning (ensure this function is defined).
+        - Logs a sampled warning for the invalid pages, see `config.logging_config.warn_sampled()`.
     """
     valid_event_pages = []
+    seen_ids = set()
     for event_page in event_pages :
-        if event_page["timeValid"] == True :
-            valid_event_pages.append(event_page)
+        if event_page.get("timeValid") != True :
+            reason = "timeValid is false (duplicated or incomplete page)"
+        elif event_page.get("id") in seen_ids :
+            reason = "duplicate event ID"
         else :
-            logger.warning(
-                f"""It seems that this event page is duplicated or incomplete. 
-                url : '{event_page["$ref"]}'. \nContent page : \n{json.dumps(event_page, indent = 4)})."""
-            )
-            pause()
+            seen_ids.add(event_page.get("id"))
+            valid_event_pages.append(event_page)
+            continue
+        warn_sampled(logger, "Invalid event page", "Event page quarantined, %s. url : '%s' (ID: %s, name: %s).",
+                     reason, event_page.get("$ref"), event_page.get("id"), event_page.get("name"))
+        quarantine("event_page", reason, event_page.get("$ref"), event_page, matchEspnId=event_page.get("id"))
+
+    if enforce_policy :
+        check_quarantine_ratio("event pages", len(event_pages) - len(valid_event_pages), len(event_pages))
     return valid_event_pages
         
 #--------------------------------------------------------------------------------------------------
@@ -153,6 +166,7 @@ def scrape_event_pages_for_gameday(espn_id_league: int, date: str, limit: int =
         - Uses date_format() to format the input date.
         - Relies on external functions: scrape_api_request(), parse_urls(), and scrape_url().
     """
+    formated_date = "" # Without date, the API returns the events of the current gameday
     if date :
         formated_date = date_format(date)
 
@@ -181,3 +195,36 @@ def scrape_event_pages_for_gameday(espn_id_league: int, date: str, limit: int =
     except Exception as e:
         logger.error(f"An unexpected error has occurred: {e}")
         raise
+
+#--------------------------------------------------------------------------------------------------
+
+def scrape_event_page(espn_id_league: int, espn_id_match: int) -> Dict[str, Any]:
+    """
+    Scrapes the event page of a single match.
+
+    Args:
+        espn_id_league (int): The ESPN ID of the league.
+        espn_id_match (int): The ESPN ID of the match (event).
+
+    Returns:
+        Dict[str, Any]: A dictionary containing the event page data.
+
+    Raises:
+        ScrappingError: If there's an error during the scraping process.
+        Exception: For any unexpected errors.
+    """
+    try:
+        event_page = scrape_api_request(
+            "event_info",
+            url_params={
+                "id_league": espn_id_league,
+                "id_match": espn_id_match,
+            }
+        )
+        return event_page
+    except ScrappingError:
+        logger.error(f"Scraping error.")
+        raise
+    except Exception as e:
+        logger.error(f"An unexpected error has occurred: {e}")
+        raise
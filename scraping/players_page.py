@@ -1,6 +1,8 @@
 import logging
 from typing import Dict, Any
 from datetime import datetime
+from config.logging_config import warn_sampled
+from config.tracing import trace_span
 from scraping.utils import ParsingError, ScrappingError, parse_urls, scrape_api_request, scrape_url
 
 
@@ -34,18 +36,20 @@ def scrape_roster_pages(event_pages : list[Dict[str, Any]]) -> list[Dict[str, An
     roster_pages = []
     try:
         for page in event_pages:
-            # Get Competitors
-            competitions = page["competitions"][0]
-            competitors = competitions["competitors"]
-
-            for competitor in competitors :
-                # Check if roster exist
-                roster_url = competitor.get("roster", {}).get("$ref", None)
-                if roster_url is None :
-                    logger.warning(f"Roster data missing in ESPN database for match '{page['name']}' (ID: {page['id']}).")
-                    continue
-                roster_page = scrape_url(roster_url)
-                roster_pages.append(roster_page)
+            with trace_span("match", "match", matchId=page["id"]):
+                # Get Competitors
+                competitions = page["competitions"][0]
+                competitors = competitions["competitors"]
+
+                for competitor in competitors :
+                    # Check if roster exist
+                    roster_url = competitor.get("roster", {}).get("$ref", None)
+                    if roster_url is None :
+                        warn_sampled(logger, "Roster missing",
+                                     "Roster data missing in ESPN database for match '%s' (ID: %s).", page['name'], page['id'])
+                        continue
+                    roster_page = scrape_url(roster_url)
+                    roster_pages.append(roster_page)
 
     except KeyError as key_err:
         logger.error(f"Dict parse KeyError: {key_err}")
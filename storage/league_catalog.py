@@ -0,0 +1,173 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, Any, Callable, Tuple
+
+##########################################	GLOBAL SCOPE	#######################################
+# logs
+logger = logging.getLogger(__name__)
+
+DEFAULT_CATALOG_PATH = "league_catalog.json"
+
+# Catalog used by the process (None to scrape the leagues and seasons on every call)
+_league_catalog = None
+
+##########################################	CLASS	###########################################
+
+class LeagueCatalog:
+    """
+        A persisted catalog of the leagues, their seasons and the validated date bounds of each season.
+
+        Listing the leagues scrapes up to 200 league pages one by one, listing the seasons of a
+        league scrapes its seasons page, and validating the date bounds of a season scrapes the
+        events of many calendar dates (see `processing.leagues_data.check_dates_validity()`).
+        The catalog keeps these results in a JSON file, so they become local lookups :
+
+        - Leagues and seasons lists expire after `ttl` seconds. An expired list is still returned
+          at once, and refreshed by a background thread for the next lookup. A missing list is
+          scraped synchronously.
+        - Season bounds do not expire : they are kept with a hash of the calendar dates they were
+          validated from, and validated again only when the calendar of the season changes.
+
+        The file is rewritten atomically after each change. The worker processes of a backfill or
+        reprocessing run each open their own catalog on the file of the run (see
+        `orchestration.coordinator.init_worker()`) : each process rewrites the file with its own
+        entries, so an entry added by another process since its opening may be dropped and is
+        then scraped again by the next run.
+
+        Attributes:
+            path (str): Path of the JSON file.
+            ttl (float): Lifetime of the leagues and seasons lists, in seconds.
+
+        Methods:
+            get_leagues(): Returns the leagues, {name: ESPN ID}.
+            get_seasons(espn_league_id): Returns the season years of a league, most recent first.
+            get_season_bounds(espn_league_id, season_year, dates, validate_dates): Returns the validated bounds of a season.
+    """
+
+    def __init__(self, path: str = DEFAULT_CATALOG_PATH, ttl: float = 24 * 3600) -> None:
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._refreshing: set[str] = set()
+        self._entries = {"leagues": None, "seasons": {}, "seasonBounds": {}}
+        if os.path.exists(path):
+            try:
+                with open(path, encoding="utf-8") as catalog_file:
+                    self._entries.update(json.load(catalog_file))
+            except (OSError, ValueError) as e:
+                logger.warning(f"League catalog '{path}' unreadable, it will be rebuilt : {e}")
+
+    def _save(self):
+        # Called with the lock held
+        temporary_path = f"{self.path}.{os.getpid()}.tmp" # Processes sharing the file never write the same temporary file
+        with open(temporary_path, "w", encoding="utf-8") as catalog_file:
+            json.dump(self._entries, catalog_file)
+        os.replace(temporary_path, self.path)
+
+    def _store(self, section: str, key: str | None, items: Any):
+        entry = {"fetchedAt": time.time(), "items": items}
+        with self._lock:
+            if key is None:
+                self._entries[section] = entry
+            else:
+                self._entries[section][key] = entry
+            self._save()
+
+    def _refresh(self, refresh_key: str, section: str, key: str | None, fetch: Callable[[], Any]):
+        try:
+            self._store(section, key, fetch())
+            logger.debug(f"League catalog : {refresh_key} refreshed.")
+        except Exception as e:
+            logger.warning(f"League catalog : refresh of {refresh_key} failed, the former entry is kept : {e!r}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(refresh_key)
+
+    def _lookup(self, section: str, key: str | None, fetch: Callable[[], Any]) -> Any:
+        with self._lock:
+            entry = self._entries[section] if key is None else self._entries[section].get(key)
+        if entry is None:
+            items = fetch()
+            self._store(section, key, items)
+            return items
+
+        refresh_key = section if key is None else f"{section}:{key}"
+        if time.time() - entry["fetchedAt"] > self.ttl:
+            with self._lock:
+                is_refreshing = refresh_key in self._refreshing
+                self._refreshing.add(refresh_key)
+            if not is_refreshing:
+                threading.Thread(target=self._refresh, args=(refresh_key, section, key, fetch),
+                                 name=f"catalog-{refresh_key}", daemon=True).start()
+        return entry["items"]
+
+    def get_leagues(self) -> Dict[str, int]:
+        return self._lookup("leagues", None, fetch_leagues)
+
+    def get_seasons(self, espn_league_id: int) -> list[int]:
+        return self._lookup("seasons", str(espn_league_id), lambda: fetch_seasons(espn_league_id))
+
+    def get_season_bounds(self, espn_league_id: int, season_year: int, dates: list[str],
+                          validate_dates: Callable[[int, int, list[str]], Tuple[str, str]]) -> Tuple[str, str]:
+        """
+        Returns the validated start and end dates of a season.
+
+        Args:
+            espn_league_id (int): The ESPN ID of the league.
+            season_year (int): The year of the season.
+            dates (list[str]): The calendar dates of the season.
+            validate_dates (Callable): Validates the bounds when the calendar dates are not in the
+                                       catalog, see `processing.leagues_data.check_dates_validity()`.
+
+        Returns:
+            Tuple[str, str]: The start and end dates of the season.
+        """
+        key = f"{espn_league_id}:{season_year}"
+        dates_hash = hashlib.blake2b(json.dumps(dates).encode("utf-8"), digest_size=16).hexdigest()
+        with self._lock:
+            entry = self._entries["seasonBounds"].get(key)
+        if entry is not None and entry["items"]["datesHash"] == dates_hash:
+            return entry["items"]["startDate"], entry["items"]["endDate"]
+
+        start_date, end_date = validate_dates(espn_league_id, season_year, dates)
+        self._store("seasonBounds", key, {"datesHash": dates_hash, "startDate": start_date, "endDate": end_date})
+        return start_date, end_date
+
+##########################################	FUNCTIONS	###########################################
+
+# Scraping modules imported on a catalog miss only : a catalog lookup stays cheap at startup
+def fetch_leagues(limit: int = 200) -> Dict[str, int]:
+    from parsing.leagues_data import parse_leagues_id
+    from scraping.league_pages import scrape_league_pages
+    return parse_leagues_id(scrape_league_pages(limit))
+
+def fetch_seasons(espn_league_id: int, limit: int = 200) -> list[int]:
+    from parsing.leagues_data import parse_seasons_year
+    from scraping.league_pages import scrape_league_season_urls_page
+    return parse_seasons_year(scrape_league_season_urls_page(espn_league_id, limit))
+
+#--------------------------------------------------------------------------------------------------
+
+def list_leagues() -> Dict[str, int]:
+    """Returns the leagues, {name: ESPN ID}, from the catalog of the process if any."""
+    league_catalog = get_league_catalog()
+    return league_catalog.get_leagues() if league_catalog is not None else fetch_leagues()
+
+def list_seasons(espn_league_id: int) -> list[int]:
+    """Returns the season years of a league (most recent first), from the catalog of the process if any."""
+    league_catalog = get_league_catalog()
+    return league_catalog.get_seasons(espn_league_id) if league_catalog is not None else fetch_seasons(espn_league_id)
+
+#--------------------------------------------------------------------------------------------------
+
+# Utility functions to install / obtain the league catalog of the process (None to scrape on every call)
+def set_league_catalog(league_catalog: LeagueCatalog | None):
+    global _league_catalog
+    _league_catalog = league_catalog
+
+def get_league_catalog() -> LeagueCatalog | None:
+    return _league_catalog
@@ -0,0 +1,156 @@
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, Any
+
+from config.metrics import get_metrics
+
+##########################################	GLOBAL SCOPE	#######################################
+# logs
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUARANTINE_PATH = "quarantine.jsonl"
+
+# Quarantine file of the process (None to only count and log the quarantined items)
+_quarantine_path = None
+
+# Maximum share of quarantined items in a batch before failing it (None to never fail)
+_max_invalid_ratio = None
+
+# Serializes the appends of the threads of the process
+_lock = threading.Lock()
+
+##########################################	CLASS	###########################################
+
+class QuarantineLimitError(Exception):
+    pass
+
+##########################################	FUNCTIONS	###########################################
+
+def quarantine(kind: str, reason: str, ref: str | None = None, payload: Any = None, **details: Any):
+    """
+    Sets aside an item the pipeline can not use (an invalid event page ...) instead of stopping the run.
+
+    The item is counted by kind and reason in the metrics registry (see `log_quarantine_summary()`),
+    and appended to the quarantine file of the process as one JSON line :
+        {"quarantinedAt": ..., "kind": ..., "reason": ..., "ref": ..., "payload": ..., **details}
+    Each line is written by a single append, so the worker processes of a run share the file.
+    The league and season of the running pipeline are added to the line (see `storage.response_archive.archive_partition()`).
+
+    Args:
+        kind (str): Kind of the item, e.g. "event_page".
+        reason (str): Why the item is set aside, e.g. "duplicate".
+        ref (str | None, optional): Url or identifier of the item. Defaults to None.
+        payload (Any, optional): The item itself, JSON serializable. Defaults to None.
+        **details: Values kept with the item (league, season, match id ...).
+    """
+    get_metrics().record_quarantine(kind, reason)
+    path = _quarantine_path
+    if path is None:
+        return
+    from storage.response_archive import get_archive_partition
+    league, season = get_archive_partition()
+    append_quarantine(path, [{"quarantinedAt": time.time(), "kind": kind, "reason": reason, "ref": ref,
+                              "league": league, "season": season, **details, "payload": payload}])
+
+def append_quarantine(path: str, items: list[Dict[str, Any]]):
+    """Appends items to a quarantine file, one JSON line each (see `quarantine()`)."""
+    for item in items:
+        line = json.dumps(item, default=str) + "\n"
+        try:
+            with _lock:
+                file_descriptor = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+                try:
+                    os.write(file_descriptor, line.encode("utf-8"))
+                finally:
+                    os.close(file_descriptor)
+        except OSError as e:
+            logger.error("Quarantine file '%s' unavailable, %s '%s' not saved : %r", path, item["kind"], item["ref"], e)
+
+#--------------------------------------------------------------------------------------------------
+
+def check_quarantine_ratio(items_name: str, invalid_count: int, total_count: int):
+    """
+    Applies the quarantine policy of the process to a batch (the event pages of a season ...) :
+    a batch with a share of quarantined items over the limit fails, instead of being loaded with gaps.
+
+    Args:
+        items_name (str): Name of the items in the error message, e.g. "event pages".
+        invalid_count (int): Items of the batch quarantined.
+        total_count (int): Items of the batch.
+
+    Raises:
+        QuarantineLimitError: If the share of quarantined items exceeds the limit, see `set_max_invalid_ratio()`.
+    """
+    max_invalid_ratio = _max_invalid_ratio
+    if max_invalid_ratio is None or not invalid_count:
+        return
+    if invalid_count > max_invalid_ratio * total_count:
+        raise QuarantineLimitError(f"{invalid_count}/{total_count} {items_name} quarantined, "
+                                   f"over the limit of {max_invalid_ratio:.0%}.")
+
+#--------------------------------------------------------------------------------------------------
+
+def load_quarantine(path: str, kind: str | None = None) -> list[Dict[str, Any]]:
+    """
+    Reads the items of a quarantine file.
+
+    Args:
+        path (str): Path of the quarantine file.
+        kind (str | None, optional): Only the items of this kind. Defaults to None.
+
+    Returns:
+        list[Dict[str, Any]]: The quarantined items, oldest first.
+    """
+    if not os.path.exists(path):
+        return []
+    items = []
+    with open(path, encoding="utf-8") as quarantine_file:
+        for line in quarantine_file:
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            if kind is None or item["kind"] == kind:
+                items.append(item)
+    return items
+
+#--------------------------------------------------------------------------------------------------
+
+def count_quarantine(items: list[Dict[str, Any]]) -> Dict[str, Dict[str, int]]:
+    """Counts quarantined items (see `load_quarantine()`) by kind and reason."""
+    counts: Dict[str, Dict[str, int]] = {}
+    for item in items:
+        reasons = counts.setdefault(item["kind"], {})
+        reasons[item["reason"]] = reasons.get(item["reason"], 0) + 1
+    return counts
+
+def log_quarantine_summary(logger: logging.Logger, counts: Dict[str, Dict[str, int]] | None = None):
+    """Logs the number of quarantined items by kind and reason, by default the items of this run."""
+    if counts is None:
+        counts = get_metrics().get_quarantine_counts()
+    if not counts:
+        return
+    lines = [f"Quarantined items{f' (saved in {_quarantine_path!r})' if _quarantine_path else ''} :"]
+    for kind, reasons in counts.items():
+        for reason, count in sorted(reasons.items(), key=lambda item: item[1], reverse=True):
+            lines.append(f"  {kind:<20} {reason:<60} {count:>7}")
+    logger.warning("\n".join(lines))
+
+#--------------------------------------------------------------------------------------------------
+
+# Utility functions to set / obtain the quarantine file and policy of the process (None to disable them)
+def set_quarantine_path(path: str | None):
+    global _quarantine_path
+    _quarantine_path = path
+
+def get_quarantine_path() -> str | None:
+    return _quarantine_path
+
+def set_max_invalid_ratio(max_invalid_ratio: float | None):
+    global _max_invalid_ratio
+    _max_invalid_ratio = max_invalid_ratio
+
+def get_max_invalid_ratio() -> float | None:
+    return _max_invalid_ratio
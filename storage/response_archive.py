@@ -0,0 +1,359 @@
+import contextlib
+import contextvars
+import glob
+import json
+import logging
+import mmap
+import os
+import queue
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+from config.api_config import get_endpoint_family
+
+##########################################	GLOBAL SCOPE	#######################################
+# logs
+logger = logging.getLogger(__name__)
+
+SEGMENT_SUFFIX = ".jsonl.zst"
+INDEX_PREFIX = "index-"
+
+# League and season of the pipeline running in the current thread, used to partition
+# responses whose url does not contain them (events, rosters, athletes ...)
+_partition_context = contextvars.ContextVar("archive_partition", default=(None, None))
+
+LEAGUE_PATTERN = re.compile(r"/leagues/(\d+)")
+SEASON_PATTERN = re.compile(r"/seasons/(\d+)")
+
+##########################################	CLASS	###########################################
+
+class ArchiveError(Exception):
+    pass
+
+
+class _Partition:
+    """
+        Write state of one archive partition (league / season / endpoint family) : the buffered
+        lines not yet compressed, and the current segment file of this writer.
+    """
+
+    def __init__(self, directory: str, segment_prefix: str) -> None:
+        self.directory = directory
+        self.segment_prefix = segment_prefix
+        self.segment_number = 0
+        self.lines: list[tuple[str, float, bytes]] = []
+        self.buffered_bytes = 0
+
+    def get_segment_name(self) -> str:
+        return f"{self.segment_prefix}-{self.segment_number:05d}{SEGMENT_SUFFIX}"
+
+
+class ResponseArchiveWriter:
+    """
+        Append-only archive of the raw API responses, in zstd-compressed JSONL segments.
+
+        Responses are partitioned by league, season and endpoint family :
+            <root_dir>/league=<id>/season=<year>/family=<family>/segment-<writer>-<n>.jsonl.zst
+        Each line is {"url": ..., "fetchedAt": ..., "body": <response JSON>}. Every flush of a
+        partition buffer is compressed as one independent zstd frame appended to the segment,
+        and an index line per response (url -> segment, frame offset and size, line offset
+        and size in the decompressed frame) is appended to the index file of the writer.
+
+        `record()` only queues the raw response bytes : serialization, compression and file
+        writes happen in a background thread, so archiving does not slow the fetch path.
+        Each writer (one per process) has its own segment and index files, so several
+        processes can archive in the same root directory.
+
+        Attributes:
+            root_dir (str): Root directory of the archive.
+            buffer_bytes (int): Uncompressed bytes buffered by partition before a frame is written.
+            segment_bytes (int): Compressed size of a segment before rotation to a new segment.
+
+        Methods:
+            record(url, params, content): Queues a raw response.
+            close(): Flushes every buffer and stops the background thread.
+
+        Note:
+            Requires the `zstandard` package (`pip install zstandard`).
+    """
+
+    def __init__(self, root_dir: str, buffer_bytes: int = 1 << 20, segment_bytes: int = 256 << 20,
+                 compression_level: int = 3, max_queued: int = 10000) -> None:
+        try:
+            import zstandard
+        except ImportError as import_err:
+            raise ArchiveError("The response archive requires zstandard : pip install zstandard") from import_err
+
+        self.root_dir = root_dir
+        self.buffer_bytes = buffer_bytes
+        self.segment_bytes = segment_bytes
+        self._compressor = zstandard.ZstdCompressor(level=compression_level)
+        self._writer_id = f"{time.strftime('%Y%m%d%H%M%S')}-{os.getpid()}"
+        self._partitions: Dict[tuple, _Partition] = {}
+        self._queue = queue.Queue(maxsize=max_queued) # Bounded : back-pressure instead of unbounded memory
+        self._thread = threading.Thread(target=self._run, name="response-archive", daemon=True)
+        self._closed = False
+        self._thread.start()
+
+    def record(self, url: str, params: Optional[Dict[str, Any]], content: bytes):
+        """
+        Queues a raw response. Called by `API_request()` in the fetching thread.
+
+        Args:
+            url (str): The URL of the request.
+            params (dict, optional): The request params.
+            content (bytes): The raw JSON content of the response.
+        """
+        from config.api_counter import get_cache_key
+
+        league, season = _partition_context.get()
+        league_match = LEAGUE_PATTERN.search(url)
+        season_match = SEASON_PATTERN.search(url)
+        partition_key = (
+            league_match.group(1) if league_match else (league or "none"),
+            season_match.group(1) if season_match else (season or "none"),
+            get_endpoint_family(url),
+        )
+        self._queue.put((partition_key, get_cache_key(url, params), time.time(), content))
+
+    def get_queue_depth(self) -> int:
+        # Responses recorded and not yet compressed (metrics endpoint)
+        return self._queue.qsize()
+
+    def _run(self):
+        while True:
+            try:
+                item = self._queue.get(timeout=5)
+            except queue.Empty:
+                self._flush_all() # Idle : do not keep responses in memory
+                continue
+            if item is None:
+                self._flush_all()
+                return
+            try:
+                self._append(*item)
+            except Exception as e:
+                logger.error(f"Response archive error : {e!r}")
+
+    def _append(self, partition_key: tuple, url_key: str, fetched_at: float, content: bytes):
+        partition = self._partitions.get(partition_key)
+        if partition is None:
+            league, season, family = partition_key
+            directory = os.path.join(self.root_dir, f"league={league}", f"season={season}", f"family={family}")
+            os.makedirs(directory, exist_ok=True)
+            partition = _Partition(directory, f"segment-{self._writer_id}")
+            self._partitions[partition_key] = partition
+
+        if b"\n" in content: # One response per line
+            content = json.dumps(json.loads(content)).encode("utf-8")
+        line = b'{"url": ' + json.dumps(url_key).encode("utf-8") + b', "fetchedAt": ' \
+            + repr(fetched_at).encode("ascii") + b', "body": ' + content + b'}\n'
+        partition.lines.append((url_key, fetched_at, line))
+        partition.buffered_bytes += len(line)
+        if partition.buffered_bytes >= self.buffer_bytes:
+            self._flush(partition)
+
+    def _flush(self, partition: _Partition):
+        if not partition.lines:
+            return
+        frame = self._compressor.compress(b"".join(line for _, _, line in partition.lines))
+        segment_name = partition.get_segment_name()
+        segment_path = os.path.join(partition.directory, segment_name)
+        with open(segment_path, "ab") as segment_file:
+            frame_offset = segment_file.tell()
+            segment_file.write(frame)
+
+        index_lines = []
+        line_offset = 0
+        for url_key, fetched_at, line in partition.lines:
+            index_lines.append(json.dumps({
+                "url": url_key,
+                "segment": segment_name,
+                "frame": frame_offset,
+                "frameSize": len(frame),
+                "offset": line_offset,
+                "size": len(line),
+                "fetchedAt": fetched_at,
+            }))
+            line_offset += len(line)
+        index_path = os.path.join(partition.directory, f"{INDEX_PREFIX}{self._writer_id}.jsonl")
+        with open(index_path, "a") as index_file:
+            index_file.write("\n".join(index_lines) + "\n")
+
+        partition.lines = []
+        partition.buffered_bytes = 0
+        if frame_offset + len(frame) >= self.segment_bytes: # Rotate by size
+            partition.segment_number += 1
+
+    def _flush_all(self):
+        for partition in self._partitions.values():
+            try:
+                self._flush(partition)
+            except Exception as e:
+                logger.error(f"Response archive error : {e!r}")
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+        logger.info(f"Response archive flushed in '{self.root_dir}'.")
+
+class ArchiveResponse:
+    """
+        A response read from the archive, with the attributes of `requests.Response` used by the scraper.
+    """
+
+    status_code = 200
+
+    def __init__(self, url: str, body: Any) -> None:
+        self.url = url
+        self._body = body
+
+    @property
+    def content(self) -> bytes:
+        return json.dumps(self._body).encode("utf-8")
+
+    def json(self) -> Any:
+        return self._body
+
+    def raise_for_status(self):
+        pass
+
+
+class ResponseArchiveReader:
+    """
+        Read access to an archive written by `ResponseArchiveWriter`.
+
+        The index files of every partition are loaded at creation (the most recent response
+        of a url wins). Segments are memory-mapped on first use, and the last decompressed
+        frames are kept in memory : responses of a frame are mostly read together.
+
+        Attributes:
+            root_dir (str): Root directory of the archive.
+            hits (int): Number of responses read from the archive.
+            misses (int): Number of urls missing from the archive.
+
+        Methods:
+            get(url, params): Returns the archived response of a request, or None.
+            close(): Unmaps the segments.
+
+        Note:
+            Requires the `zstandard` package (`pip install zstandard`).
+    """
+
+    def __init__(self, root_dir: str, max_frames: int = 16) -> None:
+        try:
+            import zstandard
+        except ImportError as import_err:
+            raise ArchiveError("The response archive requires zstandard : pip install zstandard") from import_err
+        if not os.path.isdir(root_dir):
+            raise ArchiveError(f"No response archive in '{root_dir}'.")
+
+        self.root_dir = root_dir
+        self.max_frames = max_frames
+        self.hits = 0
+        self.misses = 0
+        self._decompressor = zstandard.ZstdDecompressor()
+        self._lock = threading.Lock() # The stages of a pipeline read the archive from several threads
+        self._segments: Dict[str, mmap.mmap] = {}
+        self._frames = OrderedDict()
+        self._index: Dict[str, tuple] = {}
+        self._load_index()
+
+    def _load_index(self):
+        fetched_at = {}
+        for index_path in glob.glob(os.path.join(self.root_dir, "**", f"{INDEX_PREFIX}*.jsonl"), recursive=True):
+            directory = os.path.dirname(index_path)
+            with open(index_path) as index_file:
+                for line in index_file:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue # Last line of an index whose writer was killed
+                    if entry["fetchedAt"] < fetched_at.get(entry["url"], 0):
+                        continue
+                    fetched_at[entry["url"]] = entry["fetchedAt"]
+                    self._index[entry["url"]] = (os.path.join(directory, entry["segment"]),
+                                                 entry["frame"], entry["frameSize"], entry["offset"], entry["size"])
+        logger.info(f"{len(self._index)} archived responses indexed in '{self.root_dir}'.")
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def _read_frame(self, segment_path: str, frame_offset: int, frame_size: int) -> bytes:
+        frame_key = (segment_path, frame_offset)
+        frame = self._frames.get(frame_key)
+        if frame is not None:
+            self._frames.move_to_end(frame_key)
+            return frame
+        segment = self._segments.get(segment_path)
+        if segment is None:
+            with open(segment_path, "rb") as segment_file:
+                segment = mmap.mmap(segment_file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._segments[segment_path] = segment
+        frame = self._decompressor.decompress(segment[frame_offset:frame_offset + frame_size])
+        self._frames[frame_key] = frame
+        while len(self._frames) > self.max_frames:
+            self._frames.popitem(last=False)
+        return frame
+
+    def get(self, url: str, params: Optional[Dict[str, Any]] = None) -> Optional[ArchiveResponse]:
+        """
+        Returns the archived response of a request.
+
+        Args:
+            url (str): The URL of the request.
+            params (dict, optional): The request params.
+
+        Returns:
+            ArchiveResponse | None: The archived response, None if the request is not archived.
+        """
+        from config.api_counter import get_cache_key
+
+        entry = self._index.get(get_cache_key(url, params))
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            segment_path, frame_offset, frame_size, line_offset, line_size = entry
+            frame = self._read_frame(segment_path, frame_offset, frame_size)
+            self.hits += 1
+        record = json.loads(frame[line_offset:line_offset + line_size])
+        return ArchiveResponse(url, record["body"])
+
+    def close(self):
+        with self._lock:
+            self._frames.clear()
+            for segment in self._segments.values():
+                segment.close()
+            self._segments = {}
+
+##########################################	FUNCTIONS	###########################################
+
+@contextlib.contextmanager
+def archive_partition(espn_league_id: int | None, season_year: int | None):
+    """
+    Sets the league and season used to partition the archived responses of the current
+    pipeline (for urls that do not contain them).
+
+    Args:
+        espn_league_id (int | None): The ESPN ID of the league.
+        season_year (int | None): The year of the season, None for the current season.
+    """
+    token = _partition_context.set((
+        str(espn_league_id) if espn_league_id is not None else None,
+        str(season_year) if season_year is not None else "current",
+    ))
+    try:
+        yield
+    finally:
+        _partition_context.reset(token)
+
+def get_archive_partition() -> tuple[str | None, str | None]:
+    # League and season of the pipeline running in the current context, see `archive_partition()`
+    return _partition_context.get()
@@ -0,0 +1,39 @@
+import pytest
+
+from benchmarks.bench_kernels import (
+    baseline_convert_date_time_to_MySQL, baseline_generate_deterministic_uid, baseline_get_number_field, make_inputs,
+)
+from processing.kernels import convert_iso_date_to_MySQL, generate_uid, generate_uids, parse_ref_ids
+from processing.utils import convert_date_time_to_MySQL, generate_deterministic_uid, get_number_field
+
+# Kernels must return exactly the results of the former implementations : UIDs are the keys between tables
+REFS, DATES, UID_KEYS = make_inputs(2000)
+
+ESPN_DATES = ["2024-05-18T14:00Z", "2024-05-18T14:00:00Z", "2024-05-18T14:00:00.000+02:00", "2024-05-18 14:00:00",
+              "1995-03-12", "2024-02-29T19:45Z", "May 18, 2024 2:00 PM"]
+
+#--------------------------------------------------------------------------------------------------
+
+def test_parse_ref_ids_matches_baseline():
+    for ref in REFS:
+        ids = parse_ref_ids(ref)
+        assert all(ids[index] == baseline_get_number_field(ref, index) for index in range(-len(ids), len(ids)))
+        assert get_number_field(ref, -1) == baseline_get_number_field(ref, -1)
+
+@pytest.mark.parametrize("date", ESPN_DATES)
+def test_convert_iso_date_matches_baseline(date):
+    assert convert_iso_date_to_MySQL(date) == baseline_convert_date_time_to_MySQL(date)
+    assert convert_date_time_to_MySQL(date) == baseline_convert_date_time_to_MySQL(date)
+
+def test_convert_random_dates_match_baseline():
+    assert [convert_iso_date_to_MySQL(date) for date in DATES] == [baseline_convert_date_time_to_MySQL(date) for date in DATES]
+
+def test_uids_match_baseline():
+    expected = [baseline_generate_deterministic_uid(keys) for keys in UID_KEYS]
+    assert generate_uids(UID_KEYS) == expected
+    assert [generate_uid(keys) for keys in UID_KEYS] == expected
+    assert [generate_deterministic_uid(list(keys)) for keys in UID_KEYS] == expected
+
+def test_uid_known_value():
+    # UIDs stored in existing databases : keys are sorted as strings, joined with "_"
+    assert generate_uid((25901, 2024, 77)) == "c827ce327b6c8d96"
@@ -0,0 +1,31 @@
+import pytest
+
+from config import metrics as metrics_module
+from config.metrics import get_metrics
+
+#--------------------------------------------------------------------------------------------------
+
+@pytest.fixture
+def metrics():
+    registry = get_metrics()
+    registry.reset()
+    yield registry
+    registry.reset()
+
+#--------------------------------------------------------------------------------------------------
+
+def test_retry_counted_after_failure(metrics):
+    metrics.record_error("events", "404", "GET /events/1")
+    metrics.record_attempt("events", "GET /events/1")
+    metrics.record_request("events", 0.1, 100, "GET /events/1")
+    metrics.record_attempt("events", "GET /events/1")
+    assert metrics.endpoints["events"].retries == 1
+
+def test_failed_keys_bounded(metrics, monkeypatch):
+    monkeypatch.setattr(metrics_module, "MAX_FAILED_KEYS", 3)
+    for request_id in range(5):
+        metrics.record_error("events", "404", f"GET /events/{request_id}")
+    assert list(metrics._failed_keys) == ["GET /events/2", "GET /events/3", "GET /events/4"]
+    metrics.record_error("events", "404", "GET /events/2") # Failed again : forgotten last
+    metrics.record_error("events", "404", "GET /events/5")
+    assert list(metrics._failed_keys) == ["GET /events/4", "GET /events/2", "GET /events/5"]
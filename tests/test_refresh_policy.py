@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from orchestration import refresh_policy as policy_module
+from orchestration.refresh_policy import REFRESH_EVENT, REFRESH_FULL, REFRESH_SKIP, RefreshPolicy, plan_match_refresh
+from processing.matches_data import MATCH_STATUS_FINAL, MATCH_STATUS_IN_PROGRESS, MATCH_STATUS_POSTPONED, MATCH_STATUS_SCHEDULED
+
+NOW = datetime(2024, 5, 20, 12, 0, 0)
+NEVER = None
+
+#--------------------------------------------------------------------------------------------------
+
+class MatchesWriter:
+    # Database writer holding the MATCHES rows of the tests, see `orchestration.refresh_policy.load_match_states()`
+    def __init__(self, match_states: dict, columns: frozenset | None) -> None:
+        self.match_states = match_states
+        self.columns = columns
+
+    def get_table_columns(self, table_name):
+        return self.columns
+
+    def select(self, sql, values=()):
+        return [dict(self.match_states[espn_id], espnId=espn_id) for espn_id in values if espn_id in self.match_states]
+
+def make_event_page(espn_id: int, kick_off: datetime) -> dict:
+    return {"id": str(espn_id), "date": kick_off.strftime("%Y-%m-%dT%H:%MZ")}
+
+#--------------------------------------------------------------------------------------------------
+
+# Default policy : frozen 3 days after kick-off, final matches every 6 hours, in progress matches every 2 minutes
+@pytest.mark.parametrize("status, kick_off_age, last_fetched_age, expected", [
+    # Unknown match
+    (None, timedelta(days=10), NEVER, REFRESH_FULL),
+    # Final match : grace window of 3 days after kick-off
+    (MATCH_STATUS_FINAL, timedelta(days=1), timedelta(hours=7), REFRESH_FULL),
+    (MATCH_STATUS_FINAL, timedelta(days=1), timedelta(hours=5), REFRESH_SKIP),
+    (MATCH_STATUS_FINAL, timedelta(days=1), NEVER, REFRESH_FULL),
+    (MATCH_STATUS_FINAL, timedelta(days=3, minutes=1), timedelta(days=2), REFRESH_SKIP),
+    (MATCH_STATUS_FINAL, timedelta(days=3, minutes=1), NEVER, REFRESH_SKIP),
+    # In progress match
+    (MATCH_STATUS_IN_PROGRESS, timedelta(minutes=30), timedelta(minutes=1), REFRESH_SKIP),
+    (MATCH_STATUS_IN_PROGRESS, timedelta(minutes=30), timedelta(minutes=3), REFRESH_FULL),
+    (MATCH_STATUS_IN_PROGRESS, timedelta(days=5), NEVER, REFRESH_FULL),
+    # Scheduled match : event pages only until kick-off
+    (MATCH_STATUS_SCHEDULED, -timedelta(days=2), timedelta(minutes=1), REFRESH_EVENT),
+    (MATCH_STATUS_SCHEDULED, timedelta(minutes=5), timedelta(hours=1), REFRESH_FULL),
+    # Postponed match : event pages only, even after its former kick-off
+    (MATCH_STATUS_POSTPONED, -timedelta(days=2), timedelta(hours=1), REFRESH_EVENT),
+    (MATCH_STATUS_POSTPONED, timedelta(days=2), timedelta(hours=1), REFRESH_EVENT),
+])
+def test_decide(status, kick_off_age, last_fetched_age, expected):
+    match_state = None
+    if status is not None:
+        match_state = {"status": status, "lastFetched": None if last_fetched_age is None else NOW - last_fetched_age}
+    assert RefreshPolicy().decide(match_state, NOW - kick_off_age, NOW) == expected
+
+def test_decide_custom_grace():
+    match_state = {"status": MATCH_STATUS_FINAL, "lastFetched": NOW - timedelta(hours=7)}
+    assert RefreshPolicy(final_grace=timedelta(hours=1)).decide(match_state, NOW - timedelta(hours=2), NOW) == REFRESH_SKIP
+
+#--------------------------------------------------------------------------------------------------
+
+def test_plan_match_refresh(monkeypatch):
+    monkeypatch.setattr(policy_module, "get_utc_now", lambda: NOW)
+    event_pages = [make_event_page(1, NOW - timedelta(days=10)),  # Unknown
+                   make_event_page(2, NOW - timedelta(days=10)),  # Frozen final
+                   make_event_page(3, NOW + timedelta(days=1)),   # Scheduled
+                   make_event_page(4, NOW - timedelta(minutes=30))] # In progress, not fetched for 5 minutes
+    writer = MatchesWriter({
+        2: {"status": MATCH_STATUS_FINAL, "lastFetched": NOW - timedelta(days=9)},
+        3: {"status": MATCH_STATUS_SCHEDULED, "lastFetched": NOW - timedelta(hours=1)},
+        4: {"status": MATCH_STATUS_IN_PROGRESS, "lastFetched": NOW - timedelta(minutes=5)},
+    }, frozenset({"espnid", "status", "lastfetched"}))
+    match_event_pages, stats_event_pages = plan_match_refresh(writer, event_pages, RefreshPolicy())
+    assert [page["id"] for page in match_event_pages] == ["1", "3", "4"]
+    assert [page["id"] for page in stats_event_pages] == ["1", "4"]
+
+def test_plan_match_refresh_without_state_columns(monkeypatch):
+    # Database created before the state columns : every match is scraped
+    monkeypatch.setattr(policy_module, "_missing_columns_warned", False)
+    event_pages = [make_event_page(2, NOW - timedelta(days=10))]
+    writer = MatchesWriter({2: {"status": MATCH_STATUS_FINAL, "lastFetched": NOW}}, frozenset({"espnid", "date"}))
+    assert policy_module.load_match_states(writer, [2]) is None
+    assert plan_match_refresh(writer, event_pages, RefreshPolicy()) == (event_pages, event_pages)
+
+def test_plan_match_refresh_without_policy():
+    event_pages = [make_event_page(2, NOW - timedelta(days=10))]
+    assert plan_match_refresh(MatchesWriter({}, None), event_pages, None) == (event_pages, event_pages)
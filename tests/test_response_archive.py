@@ -0,0 +1,84 @@
+import glob
+import json
+import os
+import random
+
+import pytest
+
+pytest.importorskip("zstandard")
+
+from storage.response_archive import INDEX_PREFIX, SEGMENT_SUFFIX, ResponseArchiveReader, ResponseArchiveWriter, archive_partition
+
+CORE_API = "http://sports.core.api.espn.com/v2/sports/rugby"
+
+#--------------------------------------------------------------------------------------------------
+
+def make_responses(count: int) -> dict:
+    generator = random.Random(0)
+    responses = {}
+    for number in range(count):
+        league = (270557, 267979)[number % 2]
+        url = f"{CORE_API}/leagues/{league}/seasons/2024/events/{590000 + number}"
+        if number % 3 == 0:
+            url += f"/competitions/{590000 + number}/competitors/25901/roster"
+        responses[url] = {"id": str(590000 + number), "stats": [generator.random() for _ in range(20)]}
+    return responses
+
+def write_archive(root_dir: str, responses: dict, params: dict | None = None):
+    writer = ResponseArchiveWriter(root_dir, buffer_bytes=2048, segment_bytes=8192)
+    for url, body in responses.items():
+        writer.record(url, params, json.dumps(body).encode("utf-8"))
+    writer.close()
+
+#--------------------------------------------------------------------------------------------------
+
+def test_round_trip_across_segment_rotation(tmp_path):
+    responses = make_responses(400)
+    write_archive(str(tmp_path), responses)
+
+    segments = glob.glob(os.path.join(tmp_path, "**", f"*{SEGMENT_SUFFIX}"), recursive=True)
+    partitions = {os.path.dirname(segment) for segment in segments}
+    assert len(partitions) == 4 # 2 leagues x (events, roster) families
+    assert len(segments) > len(partitions) # Rotated segments
+    assert len(glob.glob(os.path.join(tmp_path, "**", f"{INDEX_PREFIX}*.jsonl"), recursive=True)) == len(partitions)
+
+    reader = ResponseArchiveReader(str(tmp_path), max_frames=2)
+    assert len(reader) == len(responses)
+    urls = list(responses)
+    random.Random(1).shuffle(urls) # Frames evicted and read again
+    for url in urls:
+        assert reader.get(url).json() == responses[url]
+        assert len(reader._frames) <= 2
+    assert reader.get(f"{CORE_API}/leagues/270557/seasons/2024/events/1") is None
+    assert (reader.hits, reader.misses) == (len(responses), 1)
+    reader.close()
+
+def test_params_and_multiline_bodies(tmp_path):
+    url = f"{CORE_API}/leagues/270557/seasons/2024/events"
+    writer = ResponseArchiveWriter(str(tmp_path))
+    writer.record(url, {"dates": "20240518"}, b'{\n  "count": 2,\n  "items": ["a", "b"]\n}')
+    writer.close()
+
+    reader = ResponseArchiveReader(str(tmp_path))
+    assert reader.get(url, {"dates": "20240518"}).json() == {"count": 2, "items": ["a", "b"]}
+    assert reader.get(url) is None
+    reader.close()
+
+def test_latest_response_wins(tmp_path):
+    url = f"{CORE_API}/leagues/270557/seasons/2024/events/594152"
+    write_archive(str(tmp_path), {url: {"status": "scheduled"}})
+    write_archive(str(tmp_path), {url: {"status": "final"}})
+    reader = ResponseArchiveReader(str(tmp_path))
+    assert reader.get(url).json() == {"status": "final"}
+    reader.close()
+
+def test_partition_of_urls_without_league(tmp_path):
+    url = f"{CORE_API}/positions/7"
+    writer = ResponseArchiveWriter(str(tmp_path))
+    with archive_partition(270557, None):
+        writer.record(url, None, b'{"name": "Hooker"}')
+    writer.close()
+    assert os.path.isdir(os.path.join(tmp_path, "league=270557", "season=current"))
+    reader = ResponseArchiveReader(str(tmp_path))
+    assert reader.get(url).json() == {"name": "Hooker"}
+    reader.close()
@@ -0,0 +1,77 @@
+import pytest
+
+import database.partitions as partitions
+from database.row_hashes import RowHashIndex, get_row_hash
+
+#--------------------------------------------------------------------------------------------------
+
+@pytest.fixture
+def row_hashes(tmp_path):
+    index = RowHashIndex(str(tmp_path / "row_hashes.sqlite"))
+    yield index
+    index.close()
+
+class PartitionedWriter:
+    # Database writer of a partitioned database holding the season 2024, see `database.partitions.reload_league_season()`
+    def __init__(self, row_hashes: RowHashIndex, swapped_keys: list[str]) -> None:
+        self.row_hashes = row_hashes
+        self.table_redirects = {}
+        self.swapped_keys = swapped_keys
+        self.statements = []
+
+    def select(self, sql, values=()):
+        if "GET_LOCK" in sql:
+            return [{"acquired": 1}]
+        if "information_schema.PARTITIONS" in sql:
+            return [{"partitionName": "p_old", "partitionMethod": "RANGE", "upperBound": "2024"},
+                    {"partitionName": "p2024", "partitionMethod": "RANGE", "upperBound": "2025"},
+                    {"partitionName": "p_future", "partitionMethod": "RANGE", "upperBound": "MAXVALUE"}]
+        if "UNION" in sql:
+            return [{"primaryKey": key} for key in self.swapped_keys]
+        return [{"released": 1}]
+
+    def execute(self, statements):
+        self.statements += [sql for sql, _ in statements]
+        return [0] * len(statements)
+
+#--------------------------------------------------------------------------------------------------
+
+def test_unchanged_record_filtered_out(row_hashes):
+    records = [{"uid": "a", "passes": 10.0}, {"uid": "b", "passes": 4.0}]
+    row_hashes.update("team_match_stats", "uid", records)
+    assert row_hashes.filter_changed("team_match_stats", "uid", records) == ([], [])
+
+def test_changed_and_new_records_pass_through(row_hashes):
+    row_hashes.update("team_match_stats", "uid", [{"uid": "a", "passes": 10.0}])
+    changed = {"uid": "a", "passes": 11.0}
+    new = {"uid": "b", "passes": 4.0}
+    assert row_hashes.filter_changed("team_match_stats", "uid", [changed, new]) == ([changed, new], ["a"])
+
+def test_hashes_kept_by_table(row_hashes):
+    record = {"uid": "a", "passes": 10.0}
+    row_hashes.update("team_match_stats", "uid", [record])
+    assert row_hashes.filter_changed("player_match_stats", "uid", [record]) == ([record], [])
+
+def test_hash_independent_of_column_order(row_hashes):
+    assert get_row_hash({"uid": "a", "passes": 10.0, "runs": 2.0}) == get_row_hash({"runs": 2.0, "uid": "a", "passes": 10.0})
+    row_hashes.update("team_match_stats", "uid", [{"uid": "a", "passes": 10.0, "runs": 2.0}])
+    assert row_hashes.filter_changed("team_match_stats", "uid", [{"runs": 2.0, "passes": 10.0, "uid": "a"}]) == ([], [])
+
+def test_invalidate_forgets_keys(row_hashes):
+    records = [{"uid": str(i), "passes": float(i)} for i in range(1200)] # More keys than one lookup batch
+    row_hashes.update("team_match_stats", "uid", records)
+    row_hashes.invalidate("team_match_stats", [str(i) for i in range(1000)])
+    changed_records, changed_keys = row_hashes.filter_changed("team_match_stats", "uid", records)
+    assert changed_records == records[:1000] and changed_keys == []
+
+def test_reload_league_season_invalidates_swapped_rows(row_hashes, monkeypatch):
+    monkeypatch.setattr(partitions, "refresh_analytics", lambda writer, league_uids: {})
+    records = [{"uid": key, "passes": 1.0} for key in ("a", "b", "c")]
+    for table_name in ("team_match_stats", "player_match_stats"):
+        row_hashes.update(table_name, "uid", records)
+    writer = PartitionedWriter(row_hashes, swapped_keys=["a", "b"])
+
+    assert partitions.reload_league_season(writer, "abc", 2024, lambda: {"team_match_stats": 2}) == {"team_match_stats": 2}
+    assert any("EXCHANGE PARTITION p2024" in sql for sql in writer.statements)
+    for table_name in ("team_match_stats", "player_match_stats"):
+        assert row_hashes.filter_changed(table_name, "uid", records) == (records[:2], [])
@@ -0,0 +1,81 @@
+import contextvars
+import threading
+
+import pytest
+
+from orchestration.pipeline import FK_DEPENDENCIES, TABLE_WRITE_MODES, make_write_stage
+from orchestration.stage_dag import Stage, StageDAG, StageDAGError
+
+current_partition = contextvars.ContextVar("current_partition", default=None)
+
+#--------------------------------------------------------------------------------------------------
+
+class RecordingWriter:
+    # Database writer recording the order of the table writes
+    def __init__(self) -> None:
+        self.tables = []
+        self._lock = threading.Lock()
+
+    def _record(self, table_name, records_data, *args):
+        with self._lock:
+            self.tables.append(table_name)
+        return len(records_data)
+
+    insert = insert_or_ignore = insert_with_update = _record
+
+def fail():
+    raise ValueError("stage error")
+
+#--------------------------------------------------------------------------------------------------
+
+def test_outputs_passed_to_inputs():
+    dag = StageDAG([Stage("double", lambda value: value * 2, inputs=("value",), outputs=("doubled",)),
+                    Stage("split", lambda doubled: (doubled, -doubled), inputs=("doubled",), outputs=("plus", "minus"))])
+    context = {"value": 3}
+    assert set(dag.run(context)) == {"double", "split"}
+    assert (context["plus"], context["minus"]) == (6, -6)
+
+def test_invalid_graphs_rejected():
+    with pytest.raises(StageDAGError):
+        StageDAG([Stage("a", lambda: 1, outputs=("x",)), Stage("b", lambda: 2, outputs=("x",))])
+    with pytest.raises(StageDAGError):
+        StageDAG([Stage("a", lambda: None, after=("b",)), Stage("b", lambda: None, after=("a",))])
+    with pytest.raises(StageDAGError):
+        StageDAG([Stage("a", lambda missing: None, inputs=("missing",))]).run({})
+
+def test_write_stages_follow_foreign_keys():
+    tables = list(TABLE_WRITE_MODES)
+    stages = [make_write_stage(table_name, f"{table_name}_data", set(tables)) for table_name in tables]
+    context = {"writer": RecordingWriter(), "conflict_free": True}
+    context.update({f"{table_name}_data": [{"uid": 1, "espnId": 1}] for table_name in tables})
+    StageDAG(stages).run(context, max_workers=8)
+
+    write_order = context["writer"].tables
+    assert sorted(write_order) == sorted(tables)
+    for table_name, referenced_tables in FK_DEPENDENCIES.items():
+        for referenced_table in referenced_tables:
+            assert write_order.index(referenced_table) < write_order.index(table_name)
+
+def test_failed_stage_skips_its_dependents_only():
+    ran = []
+    dag = StageDAG([
+        Stage("failing", fail, outputs=("failed_value",)),
+        Stage("dependent", lambda failed_value: ran.append("dependent"), inputs=("failed_value",)),
+        Stage("after_dependent", lambda: ran.append("after_dependent"), after=("dependent",)),
+        Stage("independent", lambda: ran.append("independent") or 1, outputs=("independent_value",)),
+        Stage("after_independent", lambda independent_value: ran.append("after_independent"), inputs=("independent_value",)),
+    ])
+    with pytest.raises(ValueError, match="stage error"):
+        dag.run({}, max_workers=1)
+    assert sorted(ran) == ["after_independent", "independent"]
+
+def test_stages_see_caller_context_variables():
+    token = current_partition.set("league=270557/season=2024")
+    try:
+        context = {}
+        StageDAG([Stage("read", lambda: current_partition.get(), outputs=("partition",)),
+                  Stage("write", lambda: current_partition.set("changed by a stage"))]).run(context)
+        assert context["partition"] == "league=270557/season=2024"
+        assert current_partition.get() == "league=270557/season=2024" # Stages run in copies of the context
+    finally:
+        current_partition.reset(token)
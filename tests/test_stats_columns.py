@@ -0,0 +1,50 @@
+import json
+import os
+import re
+
+import pytest
+
+from processing.stats_columns import STATS_TABLE_COLUMNS, StatsBatch
+
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "database", "create_tables.sql")
+
+#--------------------------------------------------------------------------------------------------
+
+def read_table_columns(table_name: str) -> tuple[list[str], list[str]]:
+    # Columns of a table in database/create_tables.sql : (non DECIMAL columns, DECIMAL columns), in table order
+    with open(SCHEMA_PATH, encoding="utf-8") as schema_file:
+        schema = schema_file.read()
+    table_match = re.search(rf"CREATE TABLE IF NOT EXISTS {table_name.upper()} \((.*?)\n\);", schema, re.DOTALL)
+    assert table_match, f"{table_name} missing in create_tables.sql"
+    key_columns, stat_columns = [], []
+    for line in table_match.group(1).splitlines():
+        column_match = re.match(r"\s*`?(\w+)`?\s+([A-Z]+)", line.split("--")[0])
+        if column_match is None or column_match.group(1) in ("UNIQUE", "INDEX", "PRIMARY", "FOREIGN", "KEY"):
+            continue
+        (stat_columns if column_match.group(2) == "DECIMAL" else key_columns).append(column_match.group(1))
+    return key_columns, stat_columns
+
+def make_stats_page(stats: dict) -> dict:
+    return {"splits": {"categories": [{"stats": [{"name": name, "value": value} for name, value in stats.items()]}]}}
+
+#--------------------------------------------------------------------------------------------------
+
+@pytest.mark.parametrize("table_name", sorted(STATS_TABLE_COLUMNS))
+def test_columns_match_schema(table_name):
+    key_columns, stat_columns = STATS_TABLE_COLUMNS[table_name]
+    assert read_table_columns(table_name) == (list(key_columns), list(stat_columns))
+
+def test_records_hold_found_statistics_only():
+    batch = StatsBatch("team_match_stats")
+    batch.add_row({"uid": "a", "matchEspnId": 1}, make_stats_page({"passes": 10, "runs": "4"}))
+    batch.add_row({"uid": "b", "matchEspnId": 1}, None)
+    assert batch.to_records(compact=False) == [{"uid": "a", "matchEspnId": 1, "passes": 10.0, "runs": 4.0},
+                                               {"uid": "b", "matchEspnId": 1}]
+
+def test_non_numeric_value_kept_in_overflow_column():
+    batch = StatsBatch("player_match_stats")
+    batch.add_row({"uid": "a"}, make_stats_page({"passes": "--", "runs": 3, "metres": None, "newStat": 2}))
+    record, = batch.to_records(compact=False)
+    assert record["runs"] == 3.0
+    assert "passes" not in record and "metres" not in record
+    assert json.loads(record["extraStats"]) == {"passes": "--", "newStat": 2}
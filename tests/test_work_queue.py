@@ -0,0 +1,109 @@
+import pytest
+
+from orchestration import work_queue
+from orchestration.work_queue import DONE, FAILED, LEASED, MATCH_STAGE, PENDING, SEASON_STAGE, SQLiteWorkQueue, make_task
+
+#--------------------------------------------------------------------------------------------------
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(work_queue.time, "time", clock)
+    return clock
+
+@pytest.fixture
+def queue(clock):
+    queue = SQLiteWorkQueue(":memory:", lease_seconds=60, max_attempts=2)
+    yield queue
+    queue.close()
+
+def get_task(queue: SQLiteWorkQueue, task_id: str) -> dict:
+    return dict(queue.conn.execute("SELECT * FROM work_queue WHERE taskId = ?", (task_id,)).fetchone())
+
+#--------------------------------------------------------------------------------------------------
+
+def test_enqueue_ignores_duplicates(queue):
+    task = make_task(270557, 2024, SEASON_STAGE)
+    assert queue.enqueue([task, make_task(270557, 2024, MATCH_STAGE, 594152)]) == 2
+    assert queue.enqueue([task]) == 0
+    assert queue.stats() == {PENDING: 2}
+
+def test_claim_prefers_season_tasks(queue, clock):
+    queue.enqueue([make_task(270557, 2024, MATCH_STAGE, 594152)])
+    clock.now += 1
+    season_task = make_task(270557, 2024, SEASON_STAGE)
+    queue.enqueue([season_task])
+    claimed = queue.claim("worker-1")
+    assert claimed["taskId"] == season_task["taskId"]
+    assert claimed["status"] == LEASED and claimed["owner"] == "worker-1" and claimed["attempts"] == 1
+
+def test_claim_leaves_live_leases(queue, clock):
+    queue.enqueue([make_task(270557, 2024, SEASON_STAGE)])
+    assert queue.claim("worker-1") is not None
+    clock.now += 59
+    assert queue.claim("worker-2") is None
+
+def test_claim_takes_back_expired_lease(queue, clock):
+    task = make_task(270557, 2024, SEASON_STAGE)
+    queue.enqueue([task])
+    first_lease = queue.claim("worker-1")
+    clock.now += 61
+    second_lease = queue.claim("worker-2")
+    assert second_lease["taskId"] == task["taskId"]
+    assert second_lease["owner"] == "worker-2" and second_lease["attempts"] == 2
+    assert second_lease["leaseToken"] != first_lease["leaseToken"]
+
+def test_expired_lease_failed_at_max_attempts(queue, clock):
+    task = make_task(270557, 2024, SEASON_STAGE)
+    queue.enqueue([task])
+    queue.claim("worker-1")
+    clock.now += 61
+    queue.claim("worker-2")
+    clock.now += 61
+    assert queue.claim("worker-3") is None
+    stored_task = get_task(queue, task["taskId"])
+    assert stored_task["status"] == FAILED and stored_task["lastError"] == "Lease expired (worker death)"
+
+def test_fail_retries_then_fails_at_max_attempts(queue):
+    task = make_task(270557, 2024, SEASON_STAGE)
+    queue.enqueue([task])
+    queue.fail(queue.claim("worker-1"), "first error")
+    assert get_task(queue, task["taskId"])["status"] == PENDING
+    queue.fail(queue.claim("worker-1"), "second error")
+    stored_task = get_task(queue, task["taskId"])
+    assert stored_task["status"] == FAILED and stored_task["lastError"] == "second error"
+    assert queue.claim("worker-1") is None
+
+def test_release_gives_back_the_attempt(queue):
+    task = make_task(270557, 2024, SEASON_STAGE)
+    queue.enqueue([task])
+    queue.release(queue.claim("worker-1"))
+    stored_task = get_task(queue, task["taskId"])
+    assert stored_task["status"] == PENDING and stored_task["attempts"] == 0 and stored_task["leaseToken"] is None
+
+def test_stale_lease_token_rejected(queue, clock):
+    task = make_task(270557, 2024, SEASON_STAGE)
+    queue.enqueue([task])
+    stale_lease = queue.claim("worker-1")
+    clock.now += 61
+    current_lease = queue.claim("worker-2")
+
+    assert not queue.heartbeat(stale_lease)
+    queue.complete(stale_lease)
+    queue.fail(stale_lease, "late error")
+    queue.release(stale_lease)
+    stored_task = get_task(queue, task["taskId"])
+    assert stored_task["status"] == LEASED and stored_task["leaseToken"] == current_lease["leaseToken"]
+    assert stored_task["attempts"] == 2 and stored_task["lastError"] is None
+
+    assert queue.heartbeat(current_lease)
+    queue.complete(current_lease)
+    assert queue.stats() == {DONE: 1}
+    assert not queue.heartbeat(current_lease)